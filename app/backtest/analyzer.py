@@ -1,6 +1,24 @@
 import backtrader as bt
 from typing import Dict, Any
 
+
+class EquityCurve(bt.Analyzer):
+    """
+    Records the broker value at the end of every bar
+    """
+    def start(self):
+        self.curve = []
+
+    def next(self):
+        self.curve.append({
+            "date": self.strategy.datetime.date(0).isoformat(),
+            "value": self.strategy.broker.getvalue()
+        })
+
+    def get_analysis(self):
+        return self.curve
+
+
 class BacktestAnalyzer:
     @staticmethod
     def parse_results(strategy: bt.Strategy) -> Dict[str, Any]:
@@ -51,4 +69,8 @@ class BacktestAnalyzer:
             gross_lost = abs(trades.get('lost', {}).get('pnl', {}).get('total', 0.0))
             results['metrics']['profit_factor'] = (gross_won / gross_lost) if gross_lost > 0 else float('inf') if gross_won > 0 else 0.0
 
+        # Parse Equity Curve
+        if hasattr(strategy.analyzers, 'equity'):
+            results['equity_curve'] = strategy.analyzers.equity.get_analysis()
+
         return results
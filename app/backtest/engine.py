@@ -1,7 +1,7 @@
 import backtrader as bt
 from typing import Type, Dict, Any, List, Optional
 import logging
-from app.backtest.analyzer import BacktestAnalyzer
+from app.backtest.analyzer import BacktestAnalyzer, EquityCurve
 from app.backtest.exceptions import BacktestError
 
 logger = logging.getLogger(__name__)
@@ -19,6 +19,7 @@ class BacktestEngine:
         self.cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
         # self.cerebro.addanalyzer(bt.analyzers.TimeReturn, _name='returns')
         self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
+        self.cerebro.addanalyzer(EquityCurve, _name='equity')
 
     def add_data(self, data: bt.feeds.PandasData):
         self.cerebro.adddata(data)
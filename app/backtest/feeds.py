@@ -5,6 +5,7 @@ from typing import Optional, List, Dict, Any
 import logging
 from app.services.historical_data_service import get_historical_data_service
 from app.backtest.exceptions import DataFeedError
+from app.backtest.vectorized import BarPanel
 
 logger = logging.getLogger(__name__)
 
@@ -23,17 +24,42 @@ class MongoPandasData(bt.feeds.PandasData):
         ('openinterest', -1), # -1 means not present
     )
 
-async def get_data_feed(
+def _bar_store():
+    from tradingagents.dataflows.cache.bar_store import get_bar_store
+    return get_bar_store()
+
+def _read_bar_store(
+    symbol: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    period: str
+) -> Optional[pd.DataFrame]:
+    """Read bars from the columnar store when it covers the requested range"""
+    store = _bar_store()
+    if store is None or not store.covers(symbol, start_date, end_date, period=period):
+        return None
+    df = store.read(symbol, period=period, start_date=start_date, end_date=end_date,
+                    columns=['open', 'high', 'low', 'close', 'volume'])
+    return df if df is not None and not df.empty else None
+
+async def get_data_frame(
     symbol: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     data_source: Optional[str] = None,
     period: str = 'daily'
-) -> bt.feeds.PandasData:
+) -> pd.DataFrame:
     """
-    Fetch data from HistoricalDataService and return a Backtrader Data Feed
+    Fetch data from HistoricalDataService and return an ascending OHLCV DataFrame
+    indexed by trade date, ready to be wrapped in a MongoPandasData feed
     """
     try:
+        # Prefer the memory-mapped columnar store (already typed and sorted)
+        if data_source is None:
+            df = _read_bar_store(symbol, start_date, end_date, period)
+            if df is not None:
+                return df.set_index('trade_date')
+
         service = await get_historical_data_service()
         
         # Fetch data
@@ -69,12 +95,85 @@ async def get_data_feed(
                  raise DataFeedError(f"Missing required column '{col}' in historical data")
             df[col] = pd.to_numeric(df[col], errors='coerce')
             
-        # Create Feed
-        # Note: name parameter helps in identifying the data in cerebro
-        data_feed = MongoPandasData(dataname=df, name=symbol)
-        
-        return data_feed
+        return df
         
     except Exception as e:
         logger.error(f"Error creating data feed for {symbol}: {e}")
         raise DataFeedError(f"Failed to create data feed: {e}")
+
+async def get_data_feed(
+    symbol: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    data_source: Optional[str] = None,
+    period: str = 'daily'
+) -> bt.feeds.PandasData:
+    """
+    Fetch data from HistoricalDataService and return a Backtrader Data Feed
+    """
+    df = await get_data_frame(
+        symbol=symbol,
+        start_date=start_date,
+        end_date=end_date,
+        data_source=data_source,
+        period=period
+    )
+    # Create Feed
+    # Note: name parameter helps in identifying the data in cerebro
+    return MongoPandasData(dataname=df, name=symbol)
+
+async def get_bar_panel(
+    symbols: List[str],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    data_source: Optional[str] = None,
+    period: str = 'daily'
+) -> BarPanel:
+    """
+    Fetch bars for many symbols in one query and return a dates x symbols BarPanel
+    for the VectorizedBacktestEngine
+    """
+    try:
+        frames = []
+        missing = list(symbols)
+
+        # Symbols kept in the columnar store are read memory-mapped, the rest from Mongo
+        store = _bar_store() if data_source is None else None
+        if store is not None:
+            stored = [s for s in symbols if store.covers(s, start_date, end_date, period=period)]
+            if stored:
+                frames.append(store.read_many(
+                    stored, period=period, start_date=start_date, end_date=end_date,
+                    columns=['open', 'high', 'low', 'close', 'volume']
+                ))
+                stored_set = set(stored)
+                missing = [s for s in symbols if s not in stored_set]
+
+        if missing:
+            service = await get_historical_data_service()
+            records = await service.get_historical_data_multi(
+                symbols=missing,
+                start_date=start_date,
+                end_date=end_date,
+                data_source=data_source,
+                period=period
+            )
+            if records:
+                df = pd.DataFrame(records)
+                for col in ['open', 'high', 'low', 'close', 'volume']:
+                    if col in df.columns:
+                        df[col] = pd.to_numeric(df[col], errors='coerce')
+                frames.append(df)
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            logger.warning(f"No data found for {len(symbols)} symbols in range {start_date}-{end_date}")
+            raise DataFeedError(f"No data found for symbols {symbols[:5]}{'...' if len(symbols) > 5 else ''}")
+
+        return BarPanel.from_frame(pd.concat(frames, ignore_index=True))
+
+    except DataFeedError:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating bar panel for {len(symbols)} symbols: {e}")
+        raise DataFeedError(f"Failed to create bar panel: {e}")
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import json
+import uuid
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Set, Type
+
+from app.core.config import settings
+from app.core.database import get_mongo_db, get_redis_client
+from app.backtest.engine import BacktestEngine
+from app.backtest.feeds import MongoPandasData, get_data_frame
+from app.backtest.vectorized import BarPanel, VectorizedBacktestEngine
+from app.backtest.strategies.registry import StrategyRegistry
+from app.backtest.exceptions import BacktestError
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "backtest_jobs"
+
+# Job statuses
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+TOTAL_STEPS = 4
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_backtest_executor() -> ProcessPoolExecutor:
+    """Process pool shared by all backtest jobs of this process"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, settings.BACKTEST_MAX_WORKERS))
+    return _executor
+
+
+def shutdown_backtest_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def make_cache_key(spec: Dict[str, Any]) -> str:
+    """
+    Stable hash of everything that determines a backtest result
+    (strategy, symbol, date range, cash, commission, params, engine)
+    """
+    payload = json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def execute_backtest(strategy_cls: Type, data: pd.DataFrame, symbol: str, engine: str,
+                     initial_cash: float, commission: float, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one backtest and return metrics plus equity curve.
+    Executed inside a worker process, so it must stay a module-level function.
+    """
+    if engine == "vectorized":
+        frame = data.reset_index()
+        frame['symbol'] = symbol
+        results = VectorizedBacktestEngine(initial_cash=initial_cash, commission=commission).run(
+            strategy_cls, BarPanel.from_frame(frame), equity_curve=True, **params
+        )
+        if symbol not in results:
+            raise BacktestError(f"No data found for {symbol}")
+        return results[symbol]
+
+    bt_engine = BacktestEngine(initial_cash=initial_cash, commission=commission)
+    bt_engine.add_data(MongoPandasData(dataname=data, name=symbol))
+    return bt_engine.run(strategy_cls, **params)
+
+
+class BacktestJobService:
+    """
+    Runs backtests as background jobs.
+
+    Jobs execute in a process pool so the event loop stays free, publish
+    progress on the ``task_progress:{job_id}`` Redis channel used by the SSE
+    stream, and persist metrics and the equity curve in Mongo. A completed
+    job is reused for any later submission with the same cache key.
+
+    Active jobs refresh ``updated_at`` as a heartbeat. A queued or running job
+    whose heartbeat is older than BACKTEST_JOB_STALE_SECONDS belongs to a
+    process that died; it is never reused and is marked failed at startup.
+    """
+
+    def __init__(self):
+        self._running: Set[asyncio.Task] = set()
+        self._indexes_ready = False
+
+    @property
+    def collection(self):
+        return get_mongo_db()[JOBS_COLLECTION]
+
+    async def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        try:
+            await self.collection.create_index("job_id", unique=True, name="job_id_unique", background=True)
+            await self.collection.create_index([("cache_key", 1), ("status", 1)], name="cache_key_status", background=True)
+            self._indexes_ready = True
+        except Exception as e:
+            logger.warning(f"Failed to create backtest job indexes: {e}")
+
+    @staticmethod
+    def _stale_cutoff() -> datetime:
+        return datetime.utcnow() - timedelta(seconds=settings.BACKTEST_JOB_STALE_SECONDS)
+
+    async def fail_stale_jobs(self) -> int:
+        """Mark queued/running jobs without a recent heartbeat as failed (run at startup)"""
+        now = datetime.utcnow()
+        result = await self.collection.update_many(
+            {"status": {"$in": ACTIVE_STATUSES}, "updated_at": {"$lt": self._stale_cutoff()}},
+            {"$set": {
+                "status": STATUS_FAILED,
+                "error": "Backtest job was interrupted (process restarted)",
+                "message": "回测中断：服务重启",
+                "updated_at": now,
+                "completed_at": now,
+            }}
+        )
+        count = getattr(result, "modified_count", 0)
+        if count:
+            logger.warning(f"Marked {count} stale backtest jobs as failed")
+        return count
+
+    async def submit(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Submit a backtest. Returns the stored job immediately when an identical
+        backtest already completed (or is still running with a live heartbeat),
+        otherwise a new queued job.
+        """
+        await self._ensure_indexes()
+
+        strategy_cls = StrategyRegistry.get_strategy(spec["strategy_id"])
+        if not strategy_cls:
+            raise BacktestError(f"Strategy {spec['strategy_id']} not found")
+
+        cache_key = make_cache_key(spec)
+        existing = await self.collection.find_one(
+            {"cache_key": cache_key, "$or": [
+                {"status": STATUS_COMPLETED},
+                {"status": {"$in": ACTIVE_STATUSES}, "updated_at": {"$gte": self._stale_cutoff()}},
+            ]},
+            {"_id": 0},
+            sort=[("created_at", -1)]
+        )
+        if existing:
+            logger.info(f"Reusing backtest job {existing['job_id']} ({existing['status']}) for cache key {cache_key[:12]}")
+            existing["cached"] = existing["status"] == STATUS_COMPLETED
+            return existing
+
+        now = datetime.utcnow()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "cache_key": cache_key,
+            "spec": spec,
+            "status": STATUS_QUEUED,
+            "progress": 0.0,
+            "message": "排队中",
+            "metrics": None,
+            "equity_curve": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(dict(job))
+
+        task = asyncio.create_task(self._run_job(job["job_id"], strategy_cls, spec))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+        job["cached"] = False
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    async def _update(self, job_id: str, step: int, message: str, **fields):
+        progress = round(step / TOTAL_STEPS * 100, 1)
+        fields.update({"progress": progress, "message": message, "updated_at": datetime.utcnow()})
+        try:
+            await self.collection.update_one({"job_id": job_id}, {"$set": fields})
+        except Exception as e:
+            logger.warning(f"Failed to update backtest job {job_id}: {e}")
+
+        progress_data = {
+            "task_id": job_id,
+            "message": message,
+            "timestamp": datetime.now().isoformat(),
+            "step": step,
+            "total_steps": TOTAL_STEPS,
+            "progress": progress,
+        }
+        if "status" in fields:
+            progress_data["status"] = fields["status"]
+        try:
+            await get_redis_client().publish(
+                f"task_progress:{job_id}", json.dumps(progress_data, ensure_ascii=False)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to publish progress for backtest job {job_id}: {e}")
+
+    async def _heartbeat(self, job_id: str):
+        """Keep updated_at fresh while the job waits in the process pool"""
+        interval = max(1.0, settings.BACKTEST_JOB_STALE_SECONDS / 4)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.collection.update_one(
+                    {"job_id": job_id, "status": {"$in": ACTIVE_STATUSES}},
+                    {"$set": {"updated_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning(f"Failed to refresh heartbeat of backtest job {job_id}: {e}")
+
+    async def _run_job(self, job_id: str, strategy_cls: Type, spec: Dict[str, Any]):
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self._update(job_id, 1, "加载历史数据...", status=STATUS_RUNNING, started_at=datetime.utcnow())
+            data = await get_data_frame(
+                symbol=spec["symbol"],
+                start_date=spec["start_date"],
+                end_date=spec["end_date"]
+            )
+            data = data[['open', 'high', 'low', 'close', 'volume']]
+
+            await self._update(job_id, 2, f"回测运行中（{len(data)} 根K线）...")
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                get_backtest_executor(), execute_backtest,
+                strategy_cls, data, spec["symbol"], spec.get("engine", "backtrader"),
+                spec["initial_cash"], spec["commission"], spec.get("params", {})
+            )
+
+            await self._update(job_id, 3, "保存回测结果...")
+            await self._update(
+                job_id, TOTAL_STEPS, "回测完成",
+                status=STATUS_COMPLETED,
+                metrics=results.get("metrics"),
+                equity_curve=results.get("equity_curve"),
+                completed_at=datetime.utcnow()
+            )
+            logger.info(f"Backtest job {job_id} completed")
+
+        except Exception as e:
+            logger.error(f"Backtest job {job_id} failed: {e}")
+            await self._update(
+                job_id, TOTAL_STEPS, f"回测失败: {e}",
+                status=STATUS_FAILED,
+                error=str(e),
+                completed_at=datetime.utcnow()
+            )
+        finally:
+            heartbeat.cancel()
+
+
+_backtest_job_service: Optional[BacktestJobService] = None
+
+
+def get_backtest_job_service() -> BacktestJobService:
+    global _backtest_job_service
+    if _backtest_job_service is None:
+        _backtest_job_service = BacktestJobService()
+    return _backtest_job_service
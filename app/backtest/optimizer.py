@@ -0,0 +1,166 @@
+import itertools
+import os
+import asyncio
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Type, Dict, Any, List, Optional
+from app.backtest.engine import BacktestEngine
+from app.backtest.feeds import MongoPandasData
+from app.backtest.exceptions import BacktestError, StrategyError
+
+logger = logging.getLogger(__name__)
+
+# Guard against accidental combinatorial explosions from the API
+MAX_COMBINATIONS = 2000
+
+# Metrics where a smaller value ranks higher
+ASCENDING_METRICS = {'max_drawdown', 'max_drawdown_len', 'lost_trades'}
+
+# Metrics reported by BacktestEngine that results can be ranked by
+SORTABLE_METRICS = ASCENDING_METRICS | {
+    'sharpe_ratio', 'return_pct', 'pnl', 'final_value',
+    'total_trades', 'won_trades', 'win_rate', 'profit_factor',
+}
+
+# Data shared read-only by every task of a worker process (set by _init_worker)
+_shared_data: Optional[pd.DataFrame] = None
+
+
+def expand_param_grid(strategy_cls: Type, param_ranges: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand parameter ranges into the list of parameter combinations to test.
+
+    Each range is either an explicit list of values or a dict with
+    ``start``/``stop``/``step`` (``stop`` inclusive). Names must be parameters
+    declared in the strategy's schema, values are cast to the schema type.
+    """
+    schema = {p['name']: p for p in strategy_cls.get_schema()['params']}
+
+    names, values = [], []
+    for name, spec in param_ranges.items():
+        if name not in schema:
+            raise StrategyError(f"Unknown parameter '{name}' for strategy {strategy_cls.__name__}")
+        cast = int if schema[name]['type'] == 'int' else float if schema[name]['type'] == 'float' else None
+
+        if isinstance(spec, dict):
+            try:
+                start, stop, step = spec['start'], spec['stop'], spec.get('step', 1)
+            except KeyError as e:
+                raise StrategyError(f"Range for '{name}' is missing {e}")
+            if step <= 0 or stop < start:
+                raise StrategyError(f"Invalid range for '{name}': {spec}")
+            count = int((stop - start) / step + 1e-9) + 1
+            candidates = [start + i * step for i in range(count)]
+        elif isinstance(spec, (list, tuple)):
+            candidates = list(spec)
+        else:
+            candidates = [spec]
+
+        if not candidates:
+            raise StrategyError(f"Empty range for parameter '{name}'")
+        if cast is not None:
+            candidates = [cast(v) for v in candidates]
+
+        names.append(name)
+        values.append(list(dict.fromkeys(candidates)))
+
+    combinations = [dict(zip(names, combo)) for combo in itertools.product(*values)]
+    if len(combinations) > MAX_COMBINATIONS:
+        raise StrategyError(f"Too many parameter combinations ({len(combinations)} > {MAX_COMBINATIONS})")
+    return combinations
+
+
+def _init_worker(data: pd.DataFrame):
+    """Process pool initializer: receive the data once per worker instead of once per task"""
+    global _shared_data
+    _shared_data = data
+
+
+def _run_combination(strategy_cls: Type, initial_cash: float, commission: float,
+                     params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a single backtest in a worker process against the shared data"""
+    try:
+        engine = BacktestEngine(initial_cash=initial_cash, commission=commission)
+        engine.add_data(MongoPandasData(dataname=_shared_data))
+        results = engine.run(strategy_cls, **params)
+        return {"params": params, "metrics": results['metrics'], "error": None}
+    except Exception as e:
+        return {"params": params, "metrics": None, "error": str(e)}
+
+
+def rank_results(results: List[Dict[str, Any]], sort_by: str = 'sharpe_ratio') -> List[Dict[str, Any]]:
+    """
+    Sort results by a metric (best first) and assign ranks.
+    Combinations without a value for the metric rank after all the others;
+    failed combinations are kept at the bottom without a rank.
+    """
+    if sort_by not in SORTABLE_METRICS:
+        raise BacktestError(f"Unknown sort metric '{sort_by}'")
+
+    ok = [r for r in results if r['metrics'] is not None]
+    failed = [r for r in results if r['metrics'] is None]
+
+    def has_value(r: Dict[str, Any]) -> bool:
+        value = r['metrics'].get(sort_by)
+        return value is not None and value == value  # NaN counts as missing
+
+    valued = [r for r in ok if has_value(r)]
+    missing = [r for r in ok if not has_value(r)]
+    valued.sort(key=lambda r: r['metrics'][sort_by], reverse=sort_by not in ASCENDING_METRICS)
+    ok = valued + missing
+
+    for i, r in enumerate(ok, start=1):
+        r['rank'] = i
+    for r in failed:
+        r['rank'] = None
+    return ok + failed
+
+
+class ParameterOptimizer:
+    """
+    Grid search over strategy parameters on a pool of worker processes.
+
+    The OHLCV data is fetched once by the caller and handed to each worker
+    process when it starts, so every combination reuses it read-only.
+    """
+
+    def __init__(self, data: pd.DataFrame, initial_cash: float = 100000.0,
+                 commission: float = 0.0003, max_workers: Optional[int] = None):
+        # Only ship the columns the feed reads to the workers
+        self.data = data[['open', 'high', 'low', 'close', 'volume']]
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    async def optimize(self, strategy_cls: Type, param_ranges: Dict[str, Any],
+                       sort_by: str = 'sharpe_ratio') -> List[Dict[str, Any]]:
+        """
+        Run every parameter combination and return the ranked results
+        """
+        if sort_by not in SORTABLE_METRICS:
+            raise BacktestError(f"Unknown sort metric '{sort_by}'")
+        combinations = expand_param_grid(strategy_cls, param_ranges)
+        if not combinations:
+            raise BacktestError("No parameter combinations to test")
+
+        workers = max(1, min(self.max_workers, len(combinations)))
+        logger.info(
+            f"Optimizing {strategy_cls.__name__}: {len(combinations)} combinations on {workers} workers"
+        )
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.data,)) as pool:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(
+                    pool, _run_combination, strategy_cls, self.initial_cash, self.commission, params
+                )
+                for params in combinations
+            ])
+
+        failed = sum(1 for r in results if r['error'])
+        if failed:
+            logger.warning(f"{failed}/{len(results)} parameter combinations failed")
+
+        return rank_results(list(results), sort_by=sort_by)
@@ -96,7 +96,29 @@ class BaseStrategy(bt.Strategy):
     def sell_signal(self):
         """Helper to execute a sell (close position)"""
         self.order = self.close()
-        
+
+    @classmethod
+    def get_default_params(cls) -> Dict[str, Any]:
+        """Default parameter values declared in ``params``"""
+        return dict(cls.params._gettuple())
+
+    @classmethod
+    def generate_signals(cls, panel, **params):
+        """
+        Vectorized counterpart of ``next`` used by ``VectorizedBacktestEngine``.
+
+        Receives a compacted ``BarPanel`` (bars x symbols) and must return an
+        array of the same shape holding the desired position after each bar's
+        close: 1 for long, 0 for flat, NaN to keep the previous position.
+        Strategies that only implement ``next`` can't run vectorized.
+        """
+        raise NotImplementedError(f"{cls.__name__} does not implement generate_signals")
+
+    @classmethod
+    def supports_vectorized(cls) -> bool:
+        """Whether the strategy overrides ``generate_signals``"""
+        return cls.generate_signals.__func__ is not BaseStrategy.generate_signals.__func__
+
     @classmethod
     def get_schema(cls) -> Dict[str, Any]:
         """
@@ -107,6 +129,7 @@ class BaseStrategy(bt.Strategy):
             "id": cls.__name__,
             "name": cls.metadata.get("name", cls.__name__),
             "description": cls.metadata.get("description", ""),
+            "vectorized": cls.supports_vectorized(),
             "params": []
         }
         
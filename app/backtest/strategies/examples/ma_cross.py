@@ -1,5 +1,7 @@
+import numpy as np
 import backtrader as bt
 from app.backtest.strategies.base import BaseStrategy
+from app.backtest.vectorized import rolling_mean, crossover
 
 class DualMovingAverage(BaseStrategy):
     """
@@ -59,3 +61,18 @@ class DualMovingAverage(BaseStrategy):
                 self.log(f'SELL CREATE, {self.data.close[0]:.2f}')
                 # Keep track of the created order to avoid a 2nd order
                 self.sell_signal()
+
+    @classmethod
+    def generate_signals(cls, panel, **params):
+        """
+        Same rules as ``next`` evaluated for every symbol at once:
+        go long on an up-cross, go flat on a down-cross, otherwise hold.
+        """
+        fast_ma = rolling_mean(panel.close, params['fast_period'])
+        slow_ma = rolling_mean(panel.close, params['slow_period'])
+        cross = crossover(fast_ma, slow_ma)
+
+        target = np.full(cross.shape, np.nan)
+        target[cross > 0] = 1.0
+        target[cross < 0] = 0.0
+        return target
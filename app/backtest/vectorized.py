@@ -0,0 +1,337 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Type, Dict, Any, List, Optional
+import logging
+from app.backtest.exceptions import BacktestError, DataFeedError, StrategyError
+
+logger = logging.getLogger(__name__)
+
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+# Matches backtrader's SharpeRatio(timeframe=Days) annualisation factor
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass
+class BarPanel:
+    """
+    Dates x symbols panel of OHLCV bars stored as 2D NumPy arrays.
+
+    In the date-aligned layout row ``t`` is ``dates[t]`` for every symbol and
+    missing bars (suspension, not yet listed, delisted) are NaN. The compact
+    layout produced by ``compact()`` stores each symbol's own bar sequence
+    from row 0, with a NaN tail after ``lengths[j]`` bars; this is what a
+    single-symbol backtrader feed would see.
+    """
+    symbols: List[str]
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    lengths: Optional[np.ndarray] = None
+    compacted: bool = field(default=False)
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, date_col: str = 'trade_date', symbol_col: str = 'symbol') -> 'BarPanel':
+        """
+        Build a date-aligned panel from a long DataFrame (one row per symbol and bar)
+        """
+        missing = [c for c in (date_col, symbol_col) + OHLCV_FIELDS if c not in df.columns]
+        if missing:
+            raise DataFeedError(f"Missing required columns {missing} in panel data")
+
+        df = df[[date_col, symbol_col, *OHLCV_FIELDS]].copy()
+        df[date_col] = pd.to_datetime(df[date_col])
+        # The same bar may be stored by several data sources; keep one per (symbol, date)
+        df = df.drop_duplicates(subset=[symbol_col, date_col], keep='first')
+
+        arrays = {}
+        wide = df.pivot(index=date_col, columns=symbol_col).sort_index()
+        for col in OHLCV_FIELDS:
+            arrays[col] = wide[col].to_numpy(dtype=np.float64)
+
+        return cls(
+            symbols=[str(s) for s in wide[OHLCV_FIELDS[0]].columns],
+            dates=wide.index.to_numpy(),
+            **arrays
+        )
+
+    def compact(self) -> 'BarPanel':
+        """
+        Move each symbol's valid bars to the top of its column, preserving order.
+        """
+        if self.compacted:
+            return self
+
+        valid = ~np.isnan(self.close)
+        # Stable sort keeps the chronological order of valid rows
+        order = np.argsort(~valid, axis=0, kind='stable')
+        lengths = valid.sum(axis=0)
+        rows = np.arange(self.close.shape[0])[:, None]
+        tail = rows >= lengths[None, :]
+
+        arrays = {}
+        for col in OHLCV_FIELDS:
+            values = np.take_along_axis(getattr(self, col), order, axis=0)
+            values[tail] = np.nan
+            arrays[col] = values
+
+        dates = np.take_along_axis(
+            np.broadcast_to(self.dates[:, None], self.close.shape), order, axis=0
+        ).astype('datetime64[ns]')
+        dates[tail] = np.datetime64('NaT')
+
+        return BarPanel(
+            symbols=list(self.symbols),
+            dates=dates,
+            lengths=lengths,
+            compacted=True,
+            **arrays
+        )
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average down axis 0; NaN until ``window`` bars are available.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full_like(values, np.nan)
+    if window <= 0 or window > values.shape[0]:
+        return out
+
+    csum = np.cumsum(np.nan_to_num(values), axis=0)
+    out[window - 1:] = csum[window - 1:]
+    out[window:] -= csum[:-window]
+    out /= window
+
+    # A window touching a NaN (padding or a NaN bar) is not ready
+    nan_count = np.cumsum(np.isnan(values), axis=0)
+    nan_in_window = nan_count.copy()
+    nan_in_window[window:] -= nan_count[:-window]
+    out[nan_in_window > 0] = np.nan
+    return out
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward fill NaNs down axis 0"""
+    rows = np.arange(values.shape[0])[:, None]
+    idx = np.where(~np.isnan(values), rows, 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return np.take_along_axis(values, idx, axis=0)
+
+
+def crossover(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of ``bt.indicators.CrossOver``.
+
+    Returns 1.0 where ``a`` crosses above ``b``, -1.0 where it crosses below
+    and 0.0 otherwise. Like backtrader, the previous non-zero difference is
+    used so touching and then crossing still counts as a cross.
+    """
+    diff = np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)
+    nzd = np.where(diff == 0, np.nan, diff)
+    nzd = _ffill(nzd)
+    # First ready bar keeps the raw difference, even if it is zero
+    first = ~np.isnan(diff) & np.vstack([np.ones((1, diff.shape[1]), dtype=bool), np.isnan(diff[:-1])])
+    nzd = np.where(first, diff, nzd)
+
+    prev = np.vstack([np.full((1, diff.shape[1]), np.nan), nzd[:-1]])
+    with np.errstate(invalid='ignore'):
+        up = (prev < 0) & (diff > 0)
+        down = (prev > 0) & (diff < 0)
+    return up.astype(np.float64) - down.astype(np.float64)
+
+
+class VectorizedBacktestEngine:
+    """
+    Array-based backtest engine that runs one signal strategy over many symbols at once.
+
+    Each symbol is simulated as an independent account with ``initial_cash``,
+    mirroring what ``BacktestEngine`` does for a single feed: orders are created
+    on a bar's close and filled at the next bar's open, commission is a
+    percentage of traded value and a fixed ``stake`` is traded per order
+    (backtrader's default sizer trades 1 share).
+    """
+
+    def __init__(self, initial_cash: float = 100000.0, commission: float = 0.0003,
+                 stake: int = 1, riskfreerate: float = 0.02):
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.stake = stake
+        self.riskfreerate = riskfreerate
+
+    def run(self, strategy_cls: Type, panel: BarPanel, equity_curve: bool = False,
+            **kwargs) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the backtest for every symbol in the panel.
+
+        Returns a dict keyed by symbol; each value has the same shape as
+        ``BacktestEngine.run`` (``params`` and ``metrics``, plus
+        ``equity_curve`` when requested).
+        """
+        try:
+            logger.info(
+                f"Starting vectorized backtest with strategy {strategy_cls.__name__} "
+                f"over {len(panel.symbols)} symbols and params {kwargs}"
+            )
+            params = strategy_cls.get_default_params()
+            params.update(kwargs)
+
+            bars = panel.compact()
+            target = strategy_cls.generate_signals(bars, **params)
+            target = np.asarray(target, dtype=np.float64)
+            if target.shape != bars.shape:
+                raise StrategyError(
+                    f"Strategy {strategy_cls.__name__} returned signals of shape {target.shape}, "
+                    f"expected {bars.shape}"
+                )
+
+            metrics, value = self._simulate(bars, target)
+
+            results = {}
+            for j, symbol in enumerate(bars.symbols):
+                if bars.lengths[j] == 0:
+                    continue
+                results[symbol] = {
+                    "params": dict(params),
+                    "metrics": {name: values[j].item() for name, values in metrics.items()},
+                }
+                if equity_curve:
+                    n = bars.lengths[j]
+                    results[symbol]["equity_curve"] = [
+                        {"date": str(d)[:10], "value": v}
+                        for d, v in zip(bars.dates[:n, j], value[:n, j].tolist())
+                    ]
+
+            logger.info(f"Vectorized backtest completed for {len(results)} symbols")
+            return results
+
+        except BacktestError:
+            raise
+        except NotImplementedError as e:
+            raise StrategyError(f"Strategy {strategy_cls.__name__} does not support vectorized backtests: {e}")
+        except Exception as e:
+            logger.error(f"Vectorized backtest execution failed: {e}")
+            raise BacktestError(f"Vectorized backtest execution failed: {e}")
+
+    def _simulate(self, bars: BarPanel, target: np.ndarray):
+        n_bars, n_symbols = bars.shape
+        rows = np.arange(n_bars)[:, None]
+        valid = rows < bars.lengths[None, :]
+
+        # Desired position after each bar's close (1 = long, 0 = flat), NaN keeps the previous one
+        target = np.where(valid, target, np.nan)
+        target[0] = np.where(np.isnan(target[0]), 0.0, target[0])
+        target = np.clip(_ffill(target), 0.0, 1.0)
+
+        # Orders created on bar t's close fill at bar t+1's open
+        position = np.zeros_like(target)
+        position[1:] = target[:-1]
+        position = np.where(valid, position, 0.0)
+
+        # Padding rows are never traded, so an open position stays open at the last bar
+        fills = np.where(valid, np.diff(position, axis=0, prepend=0.0), 0.0)
+        open_px = np.nan_to_num(bars.open)
+        close_px = np.nan_to_num(_ffill(bars.close))
+        traded_value = np.abs(fills) * self.stake * open_px
+        comm = traded_value * self.commission
+        cashflow = -fills * self.stake * open_px - comm
+        cash = self.initial_cash + np.cumsum(cashflow, axis=0)
+        value = cash + position * self.stake * close_px
+
+        last = np.maximum(bars.lengths - 1, 0)
+        final_value = np.where(
+            bars.lengths > 0, value[last, np.arange(n_symbols)], self.initial_cash
+        )
+        pnl = final_value - self.initial_cash
+
+        metrics = {
+            "sharpe_ratio": self._sharpe_ratio(value, valid),
+        }
+        metrics.update(self._drawdown(value, valid))
+        metrics.update(self._trades(fills, open_px, comm, position, last))
+        metrics.update({
+            "initial_cash": np.full(n_symbols, float(self.initial_cash)),
+            "final_value": final_value,
+            "pnl": pnl,
+            "return_pct": pnl / self.initial_cash * 100,
+        })
+        return metrics, value
+
+    def _sharpe_ratio(self, value: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """Per-bar Sharpe ratio, same maths as bt.analyzers.SharpeRatio with annualize=False"""
+        prev = np.vstack([np.full((1, value.shape[1]), self.initial_cash), value[:-1]])
+        rate = pow(1.0 + self.riskfreerate, 1.0 / TRADING_DAYS_PER_YEAR) - 1.0
+        excess = np.where(valid, value / prev - 1.0 - rate, 0.0)
+
+        count = valid.sum(axis=0)
+        safe_count = np.maximum(count, 1)
+        mean = excess.sum(axis=0) / safe_count
+        var = np.where(valid, (excess - mean) ** 2, 0.0).sum(axis=0) / safe_count
+        std = np.sqrt(var)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = mean / std
+        return np.where((count > 0) & (std > 0), sharpe, 0.0)
+
+    @staticmethod
+    def _drawdown(value: np.ndarray, valid: np.ndarray) -> Dict[str, np.ndarray]:
+        """Max drawdown (percent) and its length in bars, as bt.analyzers.DrawDown"""
+        peak = np.maximum.accumulate(np.where(valid, value, -np.inf), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dd = np.where(valid, 100.0 * (peak - value) / peak, 0.0)
+
+        in_dd = dd > 0
+        run = np.cumsum(in_dd, axis=0)
+        run -= np.maximum.accumulate(np.where(in_dd, 0, run), axis=0)
+        return {
+            "max_drawdown": dd.max(axis=0, initial=0.0),
+            "max_drawdown_len": run.max(axis=0, initial=0),
+        }
+
+    def _trades(self, fills: np.ndarray, open_px: np.ndarray, comm: np.ndarray,
+                position: np.ndarray, last: np.ndarray) -> Dict[str, np.ndarray]:
+        """Round-trip statistics, as parsed from bt.analyzers.TradeAnalyzer"""
+        buys = fills > 0
+        sells = fills < 0
+
+        entry_px = _ffill(np.where(buys, open_px, np.nan))
+        entry_comm = _ffill(np.where(buys, comm, np.nan))
+        pnlcomm = np.where(
+            sells,
+            self.stake * (open_px - np.nan_to_num(entry_px)) - comm - np.nan_to_num(entry_comm),
+            np.nan,
+        )
+
+        won = sells & (pnlcomm >= 0)
+        lost = sells & (pnlcomm < 0)
+        won_trades = won.sum(axis=0)
+        lost_trades = lost.sum(axis=0)
+        gross_won = np.where(won, pnlcomm, 0.0).sum(axis=0)
+        gross_lost = np.abs(np.where(lost, pnlcomm, 0.0).sum(axis=0))
+
+        # Like TradeAnalyzer, total counts every opened trade including the one still open
+        total_trades = buys.sum(axis=0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.where(total_trades > 0, won_trades / total_trades, 0.0)
+            profit_factor = np.where(
+                gross_lost > 0,
+                gross_won / gross_lost,
+                np.where(gross_won > 0, np.inf, 0.0),
+            )
+
+        return {
+            "total_trades": total_trades,
+            "won_trades": won_trades,
+            "lost_trades": lost_trades,
+            "win_rate": win_rate,
+            "profit_factor": profit_factor,
+        }
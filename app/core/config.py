@@ -61,6 +61,8 @@ class Settings(BaseSettings):
     REDIS_DB: int = Field(default=0)
     REDIS_MAX_CONNECTIONS: int = Field(default=20)
     REDIS_RETRY_ON_TIMEOUT: bool = Field(default=True)
+    # 数据源限流令牌桶保存在Redis中，所有进程共享配额（Redis不可用时退化为进程内限流）
+    RATE_LIMIT_REDIS_ENABLED: bool = Field(default=True)
 
     @property
     def REDIS_URL(self) -> str:
@@ -136,6 +138,10 @@ class Settings(BaseSettings):
     SSE_BATCH_POLL_INTERVAL_SECONDS: float = Field(default=2.0)
     SSE_BATCH_MAX_IDLE_SECONDS: int = Field(default=600)
 
+    # 回测任务配置
+    BACKTEST_MAX_WORKERS: int = Field(default=2)  # 回测进程池大小
+    BACKTEST_JOB_STALE_SECONDS: int = Field(default=300)  # 排队/运行中的任务超过该时间无心跳视为已失效
+
 
     # 监控配置
     METRICS_ENABLED: bool = Field(default=True)
@@ -181,6 +187,12 @@ class Settings(BaseSettings):
         default=True,
         description="自动检测Tushare rt_k接口权限，付费用户自动切换到高频模式（5秒）"
     )
+    QUOTES_MINUTE_BARS_ENABLED: bool = Field(
+        default=True,
+        description="将每次采集中发生变化的行情聚合为分钟K线，追加写入时序集合"
+    )
+    QUOTES_MINUTE_BARS_COLLECTION: str = Field(default="market_quotes_minute", description="分钟K线集合名")
+    QUOTES_MINUTE_BARS_RETENTION_DAYS: int = Field(default=30, description="分钟K线保留天数（时序集合自动过期）")
 
     # Tushare基础配置
     TUSHARE_TOKEN: str = Field(default="", description="Tushare API Token")
@@ -196,6 +208,9 @@ class Settings(BaseSettings):
     TUSHARE_QUOTES_SYNC_CRON: str = Field(default="*/5 9-15 * * 1-5")  # 交易时间每5分钟
     TUSHARE_HISTORICAL_SYNC_ENABLED: bool = Field(default=True)
     TUSHARE_HISTORICAL_SYNC_CRON: str = Field(default="0 16 * * 1-5")  # 工作日16点
+    TUSHARE_HISTORICAL_BULK_SYNC_ENABLED: bool = Field(default=True, description="增量同步按交易日整市场拉取日线")
+    TUSHARE_HISTORICAL_BULK_LOOKBACK_DAYS: int = Field(default=10, ge=1, le=365, description="整市场增量同步回看天数（补齐不完整的交易日）")
+    TUSHARE_HISTORICAL_QFQ_RESYNC_MAX: int = Field(default=200, ge=0, description="整市场增量同步后按前复权整段重新同步的除权股票数上限（0 表示只记录不重新同步）")
     TUSHARE_FINANCIAL_SYNC_ENABLED: bool = Field(default=True)
     TUSHARE_FINANCIAL_SYNC_CRON: str = Field(default="0 3 * * 0")  # 周日凌晨3点
     TUSHARE_STATUS_CHECK_ENABLED: bool = Field(default=True)
@@ -219,6 +234,13 @@ class Settings(BaseSettings):
     AKSHARE_STATUS_CHECK_ENABLED: bool = Field(default=True, description="启用状态检查")
     AKSHARE_STATUS_CHECK_CRON: str = Field(default="30 * * * *", description="状态检查CRON表达式")  # 每小时30分
 
+    AKSHARE_SYNC_CONCURRENCY: int = Field(default=4, ge=1, le=32, description="历史数据同步并发请求数")
+    AKSHARE_SYNC_MAX_CALLS_PER_MINUTE: int = Field(default=120, ge=1, description="历史数据同步每分钟最大请求数")
+
+    # 按股票同步流水线（AKShare/BaoStock/港股/美股）
+    SYNC_PIPELINE_CONCURRENCY: int = Field(default=8, ge=1, le=64, description="港股/美股逐只同步的并发请求数")
+    SYNC_PIPELINE_WRITE_BATCH_SIZE: int = Field(default=2000, ge=100, le=20000, description="流水线每次bulk_write的操作数")
+
     # AKShare数据初始化配置
     AKSHARE_INIT_HISTORICAL_DAYS: int = Field(default=365, ge=1, le=3650, description="初始化历史数据天数")
     AKSHARE_INIT_BATCH_SIZE: int = Field(default=100, ge=10, le=1000, description="初始化批处理大小")
@@ -1,99 +1,219 @@
 """
 速率限制器
 用于控制API调用频率，避免超过数据源的限流限制
+
+基于令牌桶（预约式）：每次 acquire 预约一个令牌，令牌不足时返回需要等待的时间，
+调用方在锁外等待后直接使用该令牌，因此多个等待者按预约顺序公平获得许可，互不阻塞。
+
+桶状态优先保存在 Redis 中（原子 Lua 脚本），API 进程、分析 worker 与定时同步任务
+共享同一个数据源（或接口）的配额；Redis 不可用时退化为进程内令牌桶。
 """
 import asyncio
+import threading
 import time
 import logging
-from collections import deque
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Redis 键前缀：rate_limit:<数据源>[:<接口>]
+RATE_LIMIT_KEY_PREFIX = "rate_limit"
+
+# 预约式令牌桶（原子执行）：
+#   KEYS[1] 桶键；ARGV[1] 桶容量；ARGV[2] 每秒补充令牌数；ARGV[3] 本次预约的令牌数
+#   令牌允许为负数（表示已被预约的未来令牌），返回 {需要等待的秒数, 预约后的令牌数}
+#   （均为字符串，避免被截断为整数）
+TOKEN_BUCKET_LUA = """
+redis.replicate_commands()
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - requested
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate + wait) + 60)
+return {tostring(wait), tostring(tokens)}
+"""
+
 
 class RateLimiter:
     """
-    滑动窗口速率限制器
-    
-    使用滑动窗口算法精确控制API调用频率
+    令牌桶速率限制器
+
+    容量为 max_calls，每 time_window 秒补满，即平均 max_calls/time_window 次每秒，
+    允许最多 max_calls 次的突发调用（与原滑动窗口的上限一致）。
     """
-    
-    def __init__(self, max_calls: int, time_window: float, name: str = "RateLimiter"):
+
+    def __init__(self, max_calls: int, time_window: float, name: str = "RateLimiter",
+                 key: Optional[str] = None, use_redis: Optional[bool] = None):
         """
         初始化速率限制器
-        
+
         Args:
             max_calls: 时间窗口内最大调用次数
             time_window: 时间窗口大小（秒）
             name: 限制器名称（用于日志）
+            key: Redis 中的桶名（同名的限制器跨进程共享配额），默认使用 name
+            use_redis: 是否使用 Redis 共享令牌桶，默认读取 RATE_LIMIT_REDIS_ENABLED
         """
         self.max_calls = max_calls
         self.time_window = time_window
         self.name = name
-        self.calls = deque()  # 存储调用时间戳
-        self.lock = asyncio.Lock()  # 确保线程安全
-        
+        self.key = key or name
+        self.rate = max_calls / time_window  # 每秒补充的令牌数
+        if use_redis is None:
+            try:
+                from app.core.config import settings
+                use_redis = settings.RATE_LIMIT_REDIS_ENABLED
+            except Exception:
+                use_redis = False
+        self.use_redis = use_redis
+
+        # 进程内令牌桶（Redis 不可用时使用）：桶名 -> (令牌数, 时间戳)
+        self._local_buckets: Dict[str, Tuple[float, float]] = {}
+        self._local_lock = threading.Lock()  # 只保护状态读写，等待在锁外进行
+        self._script = None
+        self._script_client = None
+
         # 统计信息
         self.total_calls = 0
         self.total_waits = 0
         self.total_wait_time = 0.0
-        
-        logger.info(f"🔧 {self.name} 初始化: {max_calls}次/{time_window}秒")
-    
-    async def acquire(self):
+        self.max_wait_time = 0.0
+        self.last_wait_time = 0.0
+        self.redis_calls = 0
+        self.redis_errors = 0
+        # 最近一次预约后的桶水位：(令牌数, time.monotonic())，用于估算当前窗口内的调用数
+        self._last_level: Optional[Tuple[float, float]] = None
+
+        logger.info(f"🔧 {self.name} 初始化: {max_calls}次/{time_window}秒 "
+                    f"({'Redis共享令牌桶' if self.use_redis else '进程内令牌桶'})")
+
+    def _bucket_key(self, endpoint: Optional[str] = None) -> str:
+        key = f"{RATE_LIMIT_KEY_PREFIX}:{self.key}"
+        return f"{key}:{endpoint}" if endpoint else key
+
+    def _get_redis(self):
+        """获取已初始化的异步 Redis 客户端（未初始化时返回 None）"""
+        try:
+            from app.core import database
+            if database.redis_client is not None:
+                return database.redis_client
+        except Exception:
+            pass
+        try:
+            from app.core import redis_client
+            return redis_client.redis_client
+        except Exception:
+            return None
+
+    async def _reserve_redis(self, bucket: str, tokens: float) -> Optional[float]:
+        """在 Redis 中原子地预约令牌，返回等待秒数；Redis 不可用时返回 None"""
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            if self._script is None or self._script_client is not client:
+                self._script = client.register_script(TOKEN_BUCKET_LUA)
+                self._script_client = client
+            wait, level = await self._script(keys=[bucket], args=[self.max_calls, self.rate, tokens])
+            self.redis_calls += 1
+            self._last_level = (float(level), time.monotonic())
+            return float(wait)
+        except Exception as e:
+            self.redis_errors += 1
+            if self.redis_errors == 1 or self.redis_errors % 100 == 0:
+                logger.warning(f"⚠️ {self.name} Redis令牌桶不可用，使用进程内令牌桶: {e}")
+            return None
+
+    def _reserve_local(self, bucket: str, tokens: float) -> float:
+        """在进程内预约令牌，返回等待秒数（与 Lua 脚本相同的算法）"""
+        with self._local_lock:
+            now = time.monotonic()
+            available, ts = self._local_buckets.get(bucket, (float(self.max_calls), now))
+            available = min(float(self.max_calls), available + max(0.0, now - ts) * self.rate) - tokens
+            self._local_buckets[bucket] = (available, now)
+            self._last_level = (available, now)
+        return -available / self.rate if available < 0 else 0.0
+
+    async def acquire(self, endpoint: Optional[str] = None, tokens: float = 1):
         """
         获取调用许可
         如果超过速率限制，会等待直到可以调用
+
+        Args:
+            endpoint: 接口名；提供时使用该接口独立的令牌桶（如 Tushare 各接口分别限频）
+            tokens: 本次调用消耗的令牌数
         """
-        async with self.lock:
-            now = time.time()
-            
-            # 移除时间窗口外的旧调用记录
-            while self.calls and self.calls[0] <= now - self.time_window:
-                self.calls.popleft()
-            
-            # 如果当前窗口内调用次数已达上限，需要等待
-            if len(self.calls) >= self.max_calls:
-                # 计算需要等待的时间
-                oldest_call = self.calls[0]
-                wait_time = oldest_call + self.time_window - now + 0.01  # 加一点缓冲
-                
-                if wait_time > 0:
-                    self.total_waits += 1
-                    self.total_wait_time += wait_time
-                    
-                    logger.debug(f"⏳ {self.name} 达到速率限制，等待 {wait_time:.2f}秒")
-                    await asyncio.sleep(wait_time)
-                    
-                    # 重新获取当前时间
-                    now = time.time()
-                    
-                    # 再次清理旧记录
-                    while self.calls and self.calls[0] <= now - self.time_window:
-                        self.calls.popleft()
-            
-            # 记录本次调用
-            self.calls.append(now)
-            self.total_calls += 1
-    
+        bucket = self._bucket_key(endpoint)
+        wait_time = None
+        if self.use_redis:
+            wait_time = await self._reserve_redis(bucket, tokens)
+        if wait_time is None:
+            wait_time = self._reserve_local(bucket, tokens)
+
+        self.total_calls += 1
+        self.last_wait_time = wait_time
+        if wait_time > 0:
+            self.total_waits += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+            logger.debug(f"⏳ {self.name} 达到速率限制，等待 {wait_time:.2f}秒")
+            # 令牌已预约，等待期间不持有任何锁
+            await asyncio.sleep(wait_time)
+
+    def current_calls(self) -> int:
+        """
+        按最近一次预约后的桶水位估算当前窗口内已使用的配额（0 ~ max_calls）
+
+        令牌按 max_calls/time_window 的速度补充，已消耗且尚未补回的令牌数即为窗口内的调用数
+        """
+        if self._last_level is None:
+            return 0
+        level, ts = self._last_level
+        level = min(float(self.max_calls), level + max(0.0, time.monotonic() - ts) * self.rate)
+        return int(round(min(float(self.max_calls), max(0.0, self.max_calls - level))))
+
     def get_stats(self) -> dict:
         """获取统计信息"""
         return {
             "name": self.name,
+            "key": self._bucket_key(),
+            "backend": "redis" if self.use_redis and self.redis_calls > 0 else "local",
             "max_calls": self.max_calls,
             "time_window": self.time_window,
-            "current_calls": len(self.calls),
+            "current_calls": self.current_calls(),
             "total_calls": self.total_calls,
             "total_waits": self.total_waits,
             "total_wait_time": self.total_wait_time,
-            "avg_wait_time": self.total_wait_time / self.total_waits if self.total_waits > 0 else 0
+            "avg_wait_time": self.total_wait_time / self.total_waits if self.total_waits > 0 else 0,
+            "max_wait_time": self.max_wait_time,
+            "last_wait_time": self.last_wait_time,
+            "wait_ratio": self.total_waits / self.total_calls if self.total_calls > 0 else 0,
+            "redis_errors": self.redis_errors,
         }
-    
+
     def reset_stats(self):
         """重置统计信息"""
         self.total_calls = 0
         self.total_waits = 0
         self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.last_wait_time = 0.0
+        self.redis_calls = 0
+        self.redis_errors = 0
         logger.info(f"🔄 {self.name} 统计信息已重置")
 
 
@@ -134,7 +254,8 @@ class TushareRateLimiter(RateLimiter):
         super().__init__(
             max_calls=max_calls,
             time_window=time_window,
-            name=f"TushareRateLimiter({tier})"
+            name=f"TushareRateLimiter({tier})",
+            key="tushare"
         )
         
         self.tier = tier
@@ -162,7 +283,8 @@ class AKShareRateLimiter(RateLimiter):
         super().__init__(
             max_calls=max_calls,
             time_window=time_window,
-            name="AKShareRateLimiter"
+            name="AKShareRateLimiter",
+            key="akshare"
         )
 
 
@@ -184,7 +306,8 @@ class BaoStockRateLimiter(RateLimiter):
         super().__init__(
             max_calls=max_calls,
             time_window=time_window,
-            name="BaoStockRateLimiter"
+            name="BaoStockRateLimiter",
+            key="baostock"
         )
 
 
@@ -202,11 +325,11 @@ def get_tushare_rate_limiter(tier: str = "standard", safety_margin: float = 0.8)
     return _tushare_limiter
 
 
-def get_akshare_rate_limiter() -> AKShareRateLimiter:
-    """获取AKShare速率限制器（单例）"""
+def get_akshare_rate_limiter(max_calls: int = 60, time_window: float = 60) -> AKShareRateLimiter:
+    """获取AKShare速率限制器（单例，参数仅在首次创建时生效）"""
     global _akshare_limiter
     if _akshare_limiter is None:
-        _akshare_limiter = AKShareRateLimiter()
+        _akshare_limiter = AKShareRateLimiter(max_calls=max_calls, time_window=time_window)
     return _akshare_limiter
 
 
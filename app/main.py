@@ -261,6 +261,13 @@ async def lifespan(app: FastAPI):
 
     logger.info("TradingAgents FastAPI backend started")
 
+    # 进程重启后遗留的排队/运行中回测任务不会再有人执行，标记为失败以免阻塞重复提交
+    try:
+        from app.backtest.jobs import get_backtest_job_service
+        await get_backtest_job_service().fail_stale_jobs()
+    except Exception as e:
+        logger.warning(f"Backtest stale job recovery failed (ignored): {e}")
+
     # 启动期：若需要在休市时补充上一交易日收盘快照
     if settings.QUOTES_BACKFILL_ON_STARTUP:
         try:
@@ -597,6 +604,20 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.warning(f"Scheduler shutdown error: {e}")
 
+        # 关闭 SSE 进度分发器（进程级 Pub/Sub 连接）
+        try:
+            from app.services.progress.dispatcher import close_progress_dispatcher
+            await close_progress_dispatcher()
+        except Exception as e:
+            logger.warning(f"Progress dispatcher cleanup error: {e}")
+
+        # 关闭回测进程池
+        try:
+            from app.backtest.jobs import shutdown_backtest_executor
+            shutdown_backtest_executor()
+        except Exception as e:
+            logger.warning(f"Backtest executor cleanup error: {e}")
+
         # 关闭 UserService MongoDB 连接
         try:
             from app.services.user_service import user_service
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 import logging
 
 from app.backtest.strategies.registry import StrategyRegistry
-from app.backtest.feeds import get_data_feed
+from app.backtest.feeds import get_data_feed, get_data_frame, get_bar_panel
 from app.backtest.engine import BacktestEngine
+from app.backtest.vectorized import VectorizedBacktestEngine
+from app.backtest.optimizer import ParameterOptimizer, SORTABLE_METRICS
+from app.backtest.jobs import get_backtest_job_service
 from app.backtest.exceptions import BacktestError
 
 logger = logging.getLogger(__name__)
@@ -20,12 +23,55 @@ class BacktestRequest(BaseModel):
     initial_cash: float = 100000.0
     commission: float = 0.0003
     params: Dict[str, Any] = {}
+    engine: Literal["backtrader", "vectorized"] = "backtrader"
 
 class BacktestResponse(BaseModel):
     status: str
     metrics: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+class UniverseBacktestRequest(BaseModel):
+    strategy_id: str
+    symbols: List[str]
+    start_date: str
+    end_date: str
+    initial_cash: float = 100000.0
+    commission: float = 0.0003
+    params: Dict[str, Any] = {}
+
+class BacktestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    cached: bool = False
+    progress: float = 0.0
+    message: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    equity_curve: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+
+class OptimizeRequest(BaseModel):
+    strategy_id: str
+    symbol: str
+    start_date: str
+    end_date: str
+    initial_cash: float = 100000.0
+    commission: float = 0.0003
+    # name -> list of values, or {"start": .., "stop": .., "step": ..}
+    param_ranges: Dict[str, Any]
+    sort_by: str = "sharpe_ratio"
+    top_n: Optional[int] = None
+
+class OptimizeResponse(BaseModel):
+    status: str
+    total: int = 0
+    results: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+
+class UniverseBacktestResponse(BaseModel):
+    status: str
+    results: Optional[Dict[str, Dict[str, Any]]] = None
+    error: Optional[str] = None
+
 @router.get("/strategies", response_model=List[Dict[str, Any]])
 async def get_strategies():
     """
@@ -39,8 +85,8 @@ async def get_strategies():
 async def run_backtest(request: BacktestRequest):
     """
     Run a backtest synchronously.
-    For long-running backtests, this should be converted to an async background task 
-    that updates a job status in DB. For MVP, we run it directly.
+    Long-running backtests should be submitted through POST /jobs instead,
+    which runs them in a worker pool and stores the results.
     """
     try:
         # 1. Get Strategy Class
@@ -48,6 +94,24 @@ async def run_backtest(request: BacktestRequest):
         if not strategy_cls:
             raise HTTPException(status_code=404, detail=f"Strategy {request.strategy_id} not found")
             
+        if request.engine == "vectorized":
+            panel = await get_bar_panel(
+                symbols=[request.symbol],
+                start_date=request.start_date,
+                end_date=request.end_date
+            )
+            engine = VectorizedBacktestEngine(
+                initial_cash=request.initial_cash,
+                commission=request.commission
+            )
+            results = engine.run(strategy_cls, panel, **request.params)
+            if request.symbol not in results:
+                raise BacktestError(f"No data found for {request.symbol}")
+            return BacktestResponse(
+                status="success",
+                metrics=results[request.symbol]['metrics']
+            )
+
         # 2. Get Data Feed
         feed = await get_data_feed(
             symbol=request.symbol,
@@ -77,3 +141,126 @@ async def run_backtest(request: BacktestRequest):
     except Exception as e:
         logger.exception("Unexpected error during backtest")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/run_universe", response_model=UniverseBacktestResponse)
+async def run_universe_backtest(request: UniverseBacktestRequest):
+    """
+    Run one strategy over many symbols at once with the vectorized engine.
+    Only strategies implementing generate_signals are supported.
+    """
+    try:
+        strategy_cls = StrategyRegistry.get_strategy(request.strategy_id)
+        if not strategy_cls:
+            raise HTTPException(status_code=404, detail=f"Strategy {request.strategy_id} not found")
+        if not strategy_cls.supports_vectorized():
+            raise HTTPException(status_code=400, detail=f"Strategy {request.strategy_id} does not support vectorized backtests")
+
+        panel = await get_bar_panel(
+            symbols=request.symbols,
+            start_date=request.start_date,
+            end_date=request.end_date
+        )
+
+        engine = VectorizedBacktestEngine(
+            initial_cash=request.initial_cash,
+            commission=request.commission
+        )
+        results = engine.run(strategy_cls, panel, **request.params)
+
+        return UniverseBacktestResponse(
+            status="success",
+            results={symbol: res['metrics'] for symbol, res in results.items()}
+        )
+
+    except BacktestError as e:
+        logger.error(f"Universe backtest failed: {e}")
+        return UniverseBacktestResponse(status="failed", error=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error during universe backtest")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs", response_model=BacktestJobResponse)
+async def submit_backtest_job(request: BacktestRequest):
+    """
+    Submit a backtest to run in the background worker pool.
+    Progress is streamed on /api/stream/backtests/{job_id}; an identical
+    backtest that already completed is returned immediately from Mongo.
+    """
+    try:
+        job = await get_backtest_job_service().submit(request.model_dump())
+        return BacktestJobResponse(**job)
+    except BacktestError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.exception("Failed to submit backtest job")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/{job_id}", response_model=BacktestJobResponse)
+async def get_backtest_job(job_id: str):
+    """
+    Get status, progress and (when completed) results of a backtest job.
+    """
+    job = await get_backtest_job_service().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Backtest job {job_id} not found")
+    return BacktestJobResponse(**job)
+
+@router.post("/optimize", response_model=OptimizeResponse)
+async def optimize_backtest(request: OptimizeRequest):
+    """
+    Grid-search strategy parameters.
+    The data is loaded once and every combination runs in a process pool;
+    results are ranked by `sort_by` (best first).
+    """
+    if request.sort_by not in SORTABLE_METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sort_by '{request.sort_by}', expected one of {sorted(SORTABLE_METRICS)}"
+        )
+
+    try:
+        strategy_cls = StrategyRegistry.get_strategy(request.strategy_id)
+        if not strategy_cls:
+            raise HTTPException(status_code=404, detail=f"Strategy {request.strategy_id} not found")
+
+        data = await get_data_frame(
+            symbol=request.symbol,
+            start_date=request.start_date,
+            end_date=request.end_date
+        )
+
+        optimizer = ParameterOptimizer(
+            data,
+            initial_cash=request.initial_cash,
+            commission=request.commission
+        )
+        ranked = await optimizer.optimize(strategy_cls, request.param_ranges, sort_by=request.sort_by)
+
+        rows = [
+            {
+                "rank": r["rank"],
+                "params": r["params"],
+                "sharpe_ratio": (r["metrics"] or {}).get("sharpe_ratio"),
+                "max_drawdown": (r["metrics"] or {}).get("max_drawdown"),
+                "return_pct": (r["metrics"] or {}).get("return_pct"),
+                "total_trades": (r["metrics"] or {}).get("total_trades"),
+                "win_rate": (r["metrics"] or {}).get("win_rate"),
+                "error": r["error"],
+            }
+            for r in ranked
+        ]
+        if request.top_n:
+            rows = rows[:request.top_n]
+
+        return OptimizeResponse(status="success", total=len(ranked), results=rows)
+
+    except BacktestError as e:
+        logger.error(f"Backtest optimization failed: {e}")
+        return OptimizeResponse(status="failed", error=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error during backtest optimization")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -10,6 +10,7 @@ from app.core.database import get_redis_client
 from app.core.config import settings
 
 from app.services.queue_service import get_queue_service, QueueService
+from app.services.progress.dispatcher import get_progress_dispatcher
 
 router = APIRouter()
 logger = logging.getLogger("webapi.sse")
@@ -17,8 +18,8 @@ logger = logging.getLogger("webapi.sse")
 
 async def task_progress_generator(task_id: str, user_id: str):
     """Generate SSE events for task progress updates"""
-    r = get_redis_client()
-    pubsub = None
+    dispatcher = get_progress_dispatcher()
+    queue = None
     channel = f"task_progress:{task_id}"
 
     try:
@@ -26,93 +27,63 @@ async def task_progress_generator(task_id: str, user_id: str):
         try:
             from app.services.config_provider import provider as config_provider
             eff = await config_provider.get_effective_system_settings()
-            poll_timeout = float(eff.get("sse_poll_timeout_seconds", 1.0))
             heartbeat_every = int(eff.get("sse_heartbeat_interval_seconds", 10))
             max_idle_seconds = int(eff.get("sse_task_max_idle_seconds", 300))
         except Exception:
-            poll_timeout = float(getattr(settings, "SSE_POLL_TIMEOUT_SECONDS", 1.0))
             heartbeat_every = int(getattr(settings, "SSE_HEARTBEAT_INTERVAL_SECONDS", 10))
             max_idle_seconds = int(getattr(settings, "SSE_TASK_MAX_IDLE_SECONDS", 300))
 
-        # 🔥 修复：创建 PubSub 连接
-        pubsub = r.pubsub()
-        logger.info(f"📡 [SSE-Task] 创建 PubSub 连接: task={task_id}, user={user_id}")
-
-        # 🔥 修复：订阅频道（可能失败，需要确保 pubsub 被清理）
+        # 通过进程级分发器订阅（共享一个 task_progress:* 模式订阅，不再为每个连接创建 PubSub）
         try:
-            await pubsub.subscribe(channel)
-            logger.info(f"✅ [SSE-Task] 订阅频道成功: {channel}")
+            queue = await dispatcher.subscribe(channel)
+            logger.info(f"✅ [SSE-Task] 订阅频道成功: {channel} (user={user_id})")
             # Send initial connection confirmation
             yield f"event: connected\ndata: {{\"task_id\": \"{task_id}\", \"message\": \"已连接进度流\"}}\n\n"
         except Exception as subscribe_error:
-            # 🔥 订阅失败时立即清理 pubsub 连接
             logger.error(f"❌ [SSE-Task] 订阅频道失败: {subscribe_error}")
-            try:
-                await pubsub.close()
-                logger.info(f"🧹 [SSE-Task] 订阅失败后已关闭 PubSub 连接")
-            except Exception as close_error:
-                logger.error(f"❌ [SSE-Task] 关闭 PubSub 连接失败: {close_error}")
-            # 重新抛出异常，让外层 except 处理
             raise
 
-        # Listen for progress updates
-        idle_elapsed = 0.0
-        last_hb = time.monotonic()
+        # Listen for progress updates: 有消息才唤醒，否则按心跳间隔唤醒
+        last_message = last_hb = time.monotonic()
 
-        while idle_elapsed < max_idle_seconds:
+        while True:
+            now = time.monotonic()
+            idle_left = max_idle_seconds - (now - last_message)
+            if idle_left <= 0:
+                break
+            wait = max(0.0, min(idle_left, heartbeat_every - (now - last_hb)))
             try:
-                message = await asyncio.wait_for(pubsub.get_message(ignore_subscribe_messages=True), timeout=poll_timeout)
-                if message and message['type'] == 'message':
-                    # Reset idle timer on valid message
-                    idle_elapsed = 0.0
-                    try:
-                        progress_data = json.loads(message['data'])
-                        yield f"event: progress\ndata: {json.dumps(progress_data, ensure_ascii=False)}\n\n"
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON in progress message: {message['data']}")
-                else:
-                    # No update: accumulate idle time and send heartbeat if due
-                    idle_elapsed += poll_timeout
-                    now = time.monotonic()
-                    if now - last_hb >= heartbeat_every:
-                        yield f"event: heartbeat\ndata: {{\"timestamp\": \"{asyncio.get_event_loop().time()}\"}}\n\n"
-                        last_hb = now
-
+                data = await asyncio.wait_for(queue.get(), timeout=wait)
             except asyncio.TimeoutError:
-                idle_elapsed += poll_timeout
+                now = time.monotonic()
+                if now - last_hb >= heartbeat_every:
+                    yield f"event: heartbeat\ndata: {{\"timestamp\": \"{asyncio.get_event_loop().time()}\"}}\n\n"
+                    last_hb = now
                 continue
 
+            # Reset idle timer on valid message
+            last_message = time.monotonic()
+            try:
+                progress_data = json.loads(data)
+                yield f"event: progress\ndata: {json.dumps(progress_data, ensure_ascii=False)}\n\n"
+            except json.JSONDecodeError:
+                logger.warning(f"Invalid JSON in progress message: {data}")
+
     except Exception as e:
         logger.exception(f"SSE error for task {task_id}: {e}")
         yield f"event: error\ndata: {{\"error\": \"连接异常: {str(e)}\"}}\n\n"
     finally:
-        # 🔥 修复：确保在所有情况下都释放连接
-        if pubsub:
-            logger.info(f"🧹 [SSE-Task] 清理 PubSub 连接: task={task_id}")
-
-            # 分步骤关闭，确保即使 unsubscribe 失败也能关闭连接
-            try:
-                await pubsub.unsubscribe(channel)
-                logger.debug(f"✅ [SSE-Task] 已取消订阅频道: {channel}")
-            except Exception as e:
-                logger.warning(f"⚠️ [SSE-Task] 取消订阅失败（将继续关闭连接）: {e}")
-
-            try:
-                await pubsub.close()
-                logger.info(f"✅ [SSE-Task] PubSub 连接已关闭: task={task_id}")
-            except Exception as e:
-                logger.error(f"❌ [SSE-Task] 关闭 PubSub 连接失败: {e}", exc_info=True)
-                # 即使关闭失败，也尝试重置连接
-                try:
-                    await pubsub.reset()
-                    logger.info(f"🔄 [SSE-Task] PubSub 连接已重置: task={task_id}")
-                except Exception as reset_error:
-                    logger.error(f"❌ [SSE-Task] 重置 PubSub 连接也失败: {reset_error}")
+        if queue is not None:
+            dispatcher.unsubscribe(channel, queue)
+            logger.info(f"🧹 [SSE-Task] 已取消订阅: task={task_id}")
 
 
 async def batch_progress_generator(batch_id: str, user_id: str):
     """Generate SSE events for batch progress updates"""
     svc = get_queue_service()
+    dispatcher = get_progress_dispatcher()
+    wakeups = None
+    channels = []
 
     try:
         # Load dynamic SSE settings for batch stream
@@ -151,6 +122,16 @@ async def batch_progress_generator(batch_id: str, user_id: str):
                     idle_elapsed += batch_poll_interval
                     continue
 
+                # 订阅批次内任务的进度消息：任务有进展时立即刷新，否则按轮询间隔刷新
+                if wakeups is None:
+                    channels = [f"task_progress:{tid}" for tid in task_ids]
+                    try:
+                        for ch in channels:
+                            wakeups = await dispatcher.subscribe(ch, wakeups)
+                    except Exception as e:
+                        logger.warning(f"⚠️ [SSE-Batch] 订阅任务进度失败，仅按间隔轮询: {e}")
+                        wakeups = wakeups or asyncio.Queue()
+
                 completed_count = 0
                 failed_count = 0
                 processing_count = 0
@@ -207,9 +188,15 @@ async def batch_progress_generator(batch_id: str, user_id: str):
                     yield f"event: finished\ndata: {{\"batch_id\": \"{batch_id}\", \"final_status\": \"{batch_status}\"}}\n\n"
                     break
 
-                # Wait before next update
-                await asyncio.sleep(batch_poll_interval)
-                idle_elapsed += batch_poll_interval
+                # Wait before next update (woken early by task progress messages)
+                started = time.monotonic()
+                try:
+                    await asyncio.wait_for(wakeups.get(), timeout=batch_poll_interval)
+                    while not wakeups.empty():
+                        wakeups.get_nowait()
+                except asyncio.TimeoutError:
+                    pass
+                idle_elapsed += time.monotonic() - started
 
             except Exception as e:
                 logger.exception(f"Batch progress error: {e}")
@@ -219,6 +206,10 @@ async def batch_progress_generator(batch_id: str, user_id: str):
     except Exception as e:
         logger.exception(f"SSE batch error for {batch_id}: {e}")
         yield f"event: error\ndata: {{\"error\": \"连接异常: {str(e)}\"}}\n\n"
+    finally:
+        if wakeups is not None:
+            for ch in channels:
+                dispatcher.unsubscribe(ch, wakeups)
 
 
 @router.get("/tasks/{task_id}")
@@ -240,6 +231,26 @@ async def stream_task_progress(task_id: str, user: dict = Depends(get_current_us
     )
 
 
+@router.get("/backtests/{job_id}")
+async def stream_backtest_progress(job_id: str, user: dict = Depends(get_current_user)):
+    """Stream real-time progress updates for a backtest job"""
+    from app.backtest.jobs import get_backtest_job_service
+
+    job = await get_backtest_job_service().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+
+    return StreamingResponse(
+        task_progress_generator(job_id, user["id"]),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/batches/{batch_id}")
 async def stream_batch_progress(batch_id: str, user: dict = Depends(get_current_user), svc: QueueService = Depends(get_queue_service)):
     """Stream real-time progress updates for a batch"""
@@ -6,14 +6,28 @@
 import asyncio
 import logging
 from datetime import datetime, date
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
 
 from app.core.database import get_database
 
 logger = logging.getLogger(__name__)
 
+# 每次 bulk_write（无序）的操作数
+BULK_WRITE_BATCH_SIZE = 1000
+
+
+def _falsy(values: pd.Series) -> pd.Series:
+    """逐元素的 `not value`：None、0、空字符串为假；NaN 与逐行 row.get 时一样视为真"""
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+        return values == 0
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.Series(False, index=values.index)
+    return values.map(lambda v: v is None or (isinstance(v, (int, float, str, np.number, np.bool_)) and not v)).astype(bool)
+
 
 class HistoricalDataService:
     """统一历史数据管理服务"""
@@ -78,6 +92,8 @@ class HistoricalDataService:
         """
         保存历史数据到数据库
 
+        整表向量化标准化后，与库中已有K线的内容哈希比较，只写入新增或变化的K线
+
         Args:
             symbol: 股票代码
             data: 历史数据DataFrame
@@ -86,7 +102,7 @@ class HistoricalDataService:
             period: 数据周期 (daily/weekly/monthly)
 
         Returns:
-            保存的记录数量
+            保存（新增或更新）的记录数量
         """
         if self.collection is None:
             await self.initialize()
@@ -96,93 +112,22 @@ class HistoricalDataService:
                 logger.warning(f"⚠️ {symbol} 历史数据为空，跳过保存")
                 return 0
 
-            from datetime import datetime
             total_start = datetime.now()
 
             logger.info(f"💾 开始保存 {symbol} 历史数据: {len(data)}条记录 (数据源: {data_source})")
 
-            # ⏱️ 性能监控：单位转换
-            convert_start = datetime.now()
-            # 🔥 在 DataFrame 层面做单位转换（向量化操作，比逐行快得多）
-            if data_source == "tushare":
-                # 成交额：千元 -> 元
-                if 'amount' in data.columns:
-                    data['amount'] = data['amount'] * 1000
-                elif 'turnover' in data.columns:
-                    data['turnover'] = data['turnover'] * 1000
-
-                # 成交量：手 -> 股
-                if 'volume' in data.columns:
-                    data['volume'] = data['volume'] * 100
-                elif 'vol' in data.columns:
-                    data['vol'] = data['vol'] * 100
-
-            # 🔥 港股/美股数据：添加 pre_close 字段（从前一天的 close 获取）
-            if market in ["HK", "US"] and 'pre_close' not in data.columns and 'close' in data.columns:
-                # 使用 shift(1) 将 close 列向下移动一行，得到前一天的收盘价
-                data['pre_close'] = data['close'].shift(1)
-                logger.debug(f"✅ {symbol} 添加 pre_close 字段（从前一天的 close 获取）")
-
-            convert_duration = (datetime.now() - convert_start).total_seconds()
-
-            # ⏱️ 性能监控：构建操作列表
+            # ⏱️ 性能监控：单位转换 + 向量化标准化
             prepare_start = datetime.now()
-            # 准备批量操作
-            operations = []
-            saved_count = 0
-            batch_size = 200  # 进一步减小批量大小，避免超时（从500改为200）
-
-            for date_index, row in data.iterrows():
-                try:
-                    # 标准化数据（传递日期索引）
-                    doc = self._standardize_record(symbol, row, data_source, market, period, date_index)
-
-                    # 创建upsert操作
-                    filter_doc = {
-                        "symbol": doc["symbol"],
-                        "trade_date": doc["trade_date"],
-                        "data_source": doc["data_source"],
-                        "period": doc["period"]
-                    }
-
-                    from pymongo import ReplaceOne
-                    operations.append(ReplaceOne(
-                        filter=filter_doc,
-                        replacement=doc,
-                        upsert=True
-                    ))
-
-                    # 批量执行（每200条）
-                    if len(operations) >= batch_size:
-                        batch_write_start = datetime.now()
-                        batch_saved = await self._execute_bulk_write_with_retry(symbol, operations)
-                        batch_write_duration = (datetime.now() - batch_write_start).total_seconds()
-                        logger.debug(f"   批量写入 {len(operations)} 条，耗时 {batch_write_duration:.2f}秒")
-                        saved_count += batch_saved
-                        operations = []
-
-                except Exception as e:
-                    # 获取日期信息用于错误日志
-                    date_str = str(date_index) if hasattr(date_index, '__str__') else 'unknown'
-                    logger.error(f"❌ 处理记录失败 {symbol} {date_str}: {e}")
-                    continue
-
+            docs = self.prepare_documents(symbol, data, data_source, market, period)
             prepare_duration = (datetime.now() - prepare_start).total_seconds()
 
-            # ⏱️ 性能监控：最后一批写入
-            final_write_start = datetime.now()
-            # 执行剩余操作
-            if operations:
-                saved_count += await self._execute_bulk_write_with_retry(
-                    symbol, operations
-                )
-            final_write_duration = (datetime.now() - final_write_start).total_seconds()
+            saved_count, changed = await self._write_changed_documents(symbol, docs)
 
             total_duration = (datetime.now() - total_start).total_seconds()
             logger.info(
-                f"✅ {symbol} 历史数据保存完成: {saved_count}条记录，"
-                f"总耗时 {total_duration:.2f}秒 "
-                f"(转换: {convert_duration:.3f}秒, 准备: {prepare_duration:.2f}秒, 最后写入: {final_write_duration:.2f}秒)"
+                f"✅ {symbol} 历史数据保存完成: {saved_count}条记录 "
+                f"(变化 {len(changed)}/{len(docs)}条)，"
+                f"总耗时 {total_duration:.2f}秒 (准备: {prepare_duration:.3f}秒)"
             )
             return saved_count
             
@@ -190,6 +135,432 @@ class HistoricalDataService:
             logger.error(f"❌ 保存历史数据失败 {symbol}: {e}")
             return 0
 
+    def _convert_units(self, data: pd.DataFrame, data_source: str):
+        """数据源单位统一（原地修改）：Tushare 成交额千元 -> 元、成交量手 -> 股"""
+        if data_source == "tushare":
+            # 成交额：千元 -> 元
+            if 'amount' in data.columns:
+                data['amount'] = data['amount'] * 1000
+            elif 'turnover' in data.columns:
+                data['turnover'] = data['turnover'] * 1000
+
+            # 成交量：手 -> 股
+            if 'volume' in data.columns:
+                data['volume'] = data['volume'] * 100
+            elif 'vol' in data.columns:
+                data['vol'] = data['vol'] * 100
+
+    async def save_market_data(
+        self,
+        data: pd.DataFrame,
+        data_source: str,
+        market: str = "CN",
+        period: str = "daily",
+        batch_size: int = BULK_WRITE_BATCH_SIZE
+    ) -> int:
+        """
+        批量保存多只股票的历史数据（如某个交易日的全市场日线）
+
+        Args:
+            data: 长表，每行一只股票的一根K线，需包含 symbol 与 trade_date 列
+            data_source: 数据源 (tushare/akshare/baostock)
+            market: 市场类型 (CN/HK/US)
+            period: 数据周期 (daily/weekly/monthly)
+            batch_size: 每次 bulk_write 的操作数
+
+        Returns:
+            保存（新增或更新）的记录数量
+        """
+        if self.collection is None:
+            await self.initialize()
+
+        if data is None or data.empty:
+            return 0
+
+        total_start = datetime.now()
+        data = data.copy()
+        self._convert_units(data, data_source)
+
+        docs_by_symbol: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in self._standardize_frame(data, data_source, market, period):
+            docs_by_symbol.setdefault(doc["symbol"], []).append(doc)
+
+        saved_count = await self.save_documents(docs_by_symbol, market, period, batch_size)
+
+        total_duration = (datetime.now() - total_start).total_seconds()
+        logger.info(
+            f"✅ 批量保存完成: {len(docs_by_symbol)}只股票 {saved_count}条记录 "
+            f"(数据源: {data_source}, 耗时 {total_duration:.2f}秒)"
+        )
+        return saved_count
+
+    def prepare_documents(
+        self,
+        symbol: str,
+        data: pd.DataFrame,
+        data_source: str,
+        market: str = "CN",
+        period: str = "daily"
+    ) -> List[Dict[str, Any]]:
+        """
+        将单只股票的历史数据转换为标准化文档（纯CPU计算，不访问数据库）
+
+        供同步流水线在转换阶段调用，写入由 save_documents 批量完成
+
+        Returns:
+            标准化后的文档列表
+        """
+        if data is None or data.empty:
+            return []
+
+        data = data.copy()
+        self._convert_units(data, data_source)
+        if market in ["HK", "US"] and 'pre_close' not in data.columns and 'close' in data.columns:
+            # 港股/美股数据：用前一天的 close 作为 pre_close
+            data['pre_close'] = data['close'].shift(1)
+
+        return self._standardize_frame(data, data_source, market, period, symbol=symbol)
+
+    async def save_documents(
+        self,
+        docs_by_symbol: Dict[str, List[Dict[str, Any]]],
+        market: str = "CN",
+        period: str = "daily",
+        batch_size: int = BULK_WRITE_BATCH_SIZE
+    ) -> int:
+        """
+        批量写入多只股票的标准化文档：只写入新增或变化的K线，合并为大批量 bulk_write，并同步列式K线存储
+        （列式存储写入全部文档：库中已有、未变化的K线也要进入存储，否则更早的区间永远无法命中）
+
+        Args:
+            docs_by_symbol: 股票代码 -> prepare_documents 生成的文档列表
+            batch_size: 每次 bulk_write 的操作数
+
+        Returns:
+            保存（新增或更新）的记录数量
+        """
+        if self.collection is None:
+            await self.initialize()
+
+        label = f"{market}市场批量({len(docs_by_symbol)}只)"
+        docs = [doc for symbol_docs in docs_by_symbol.values() for doc in symbol_docs]
+        saved_count, _ = await self._write_changed_documents(label, docs, batch_size, write_bar_store=False)
+
+        await self._write_bar_store_many(
+            {symbol: symbol_docs for symbol, symbol_docs in docs_by_symbol.items() if symbol_docs}, market, period
+        )
+        return saved_count
+
+    async def _write_changed_documents(
+        self,
+        label: str,
+        docs: List[Dict[str, Any]],
+        batch_size: int = BULK_WRITE_BATCH_SIZE,
+        write_bar_store: bool = True
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        过滤掉内容未变化的文档后批量 upsert；列式K线存储写入全部文档
+
+        Returns:
+            (保存的记录数量, 实际写入的文档列表)
+        """
+        if not docs:
+            return 0, []
+
+        changed = await self._filter_changed(docs)
+        if len(changed) < len(docs):
+            logger.debug(f"⏭️ {label} 跳过未变化的K线 {len(docs) - len(changed)}条")
+
+        saved_count = 0
+        for i in range(0, len(changed), batch_size):
+            operations = [self._upsert_operation(doc) for doc in changed[i:i + batch_size]]
+            saved_count += await self._execute_bulk_write_with_retry(label, operations)
+
+        if write_bar_store:
+            doc = docs[0]
+            await self._write_bar_store(doc["symbol"], docs, doc["market"], doc["period"])
+        return saved_count, changed
+
+    async def _filter_changed(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        与库中已有K线的 content_hash 比较，返回新增或内容变化的文档
+
+        每个 (数据源, 周期) 只发一次查询：symbol 为单值或 $in，trade_date 为本批的日期范围。
+        库中缺少 content_hash 的旧文档视为已变化（会被重写一次，之后即可跳过）
+        """
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for doc in docs:
+            groups.setdefault((doc["data_source"], doc["period"]), []).append(doc)
+
+        changed = []
+        for (data_source, period), group in groups.items():
+            symbols = sorted({doc["symbol"] for doc in group})
+            dates = [doc["trade_date"] for doc in group]
+            query = {
+                "symbol": symbols[0] if len(symbols) == 1 else {"$in": symbols},
+                "data_source": data_source,
+                "period": period,
+                "trade_date": {"$gte": min(dates), "$lte": max(dates)},
+            }
+            try:
+                cursor = self.collection.find(query, {"_id": 0, "symbol": 1, "trade_date": 1, "content_hash": 1})
+                stored = {(d["symbol"], d["trade_date"]): d.get("content_hash") async for d in cursor}
+            except Exception as e:
+                logger.warning(f"⚠️ 查询已有K线失败，全部写入: {e}")
+                changed.extend(group)
+                continue
+            changed.extend(
+                doc for doc in group
+                if stored.get((doc["symbol"], doc["trade_date"])) != doc["content_hash"]
+            )
+        return changed
+
+    @staticmethod
+    def _upsert_operation(doc: Dict[str, Any]) -> UpdateOne:
+        """构建 upsert 操作：更新行情字段，created_at 只在首次插入时写入"""
+        fields = dict(doc)
+        created_at = fields.pop("created_at", None)
+        return UpdateOne(
+            {
+                "symbol": doc["symbol"],
+                "trade_date": doc["trade_date"],
+                "data_source": doc["data_source"],
+                "period": doc["period"]
+            },
+            {"$set": fields, "$setOnInsert": {"created_at": created_at}},
+            upsert=True
+        )
+
+    def _standardize_frame(
+        self,
+        data: pd.DataFrame,
+        data_source: str,
+        market: str,
+        period: str = "daily",
+        symbol: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        将K线数据标准化为 MongoDB 文档：按列一次性构建所有文档
+
+        Args:
+            data: 已完成单位转换的K线数据
+            symbol: 股票代码；为 None 时使用 data 的 symbol 列（多只股票的长表）
+
+        Returns:
+            标准化后的文档列表（含 content_hash，用于变化检测）
+        """
+        n = len(data)
+        if n == 0:
+            return []
+        now = datetime.utcnow()
+        index = pd.RangeIndex(n)
+
+        def column(*names) -> Optional[pd.Series]:
+            """按 `a or b` 的语义逐行取值：前一列为 None/0/空串时取后一列（缺失的列视为 None，NaN 视为有值）"""
+            if not any(name in data.columns for name in names):
+                return None
+            result = None
+            for name in names:
+                if name in data.columns:
+                    values = data[name].reset_index(drop=True)
+                else:
+                    values = pd.Series([None] * n, index=index, dtype=object)
+                result = values if result is None else result.where(~_falsy(result), values)
+            return result
+
+        def numeric(values: Optional[pd.Series]) -> pd.Series:
+            if values is None:
+                return pd.Series(np.nan, index=index)
+            return pd.to_numeric(values, errors='coerce').astype(float)
+
+        # 股票代码
+        if symbol is not None:
+            symbols = pd.Series(symbol, index=index)
+        else:
+            symbols = data['symbol'].astype(str).reset_index(drop=True)
+        full_symbols = symbols.map({s: self._get_full_symbol(s, market) for s in symbols.unique()})
+
+        # 交易日期：优先取列，其次取日期类型的索引，否则为当天
+        dates = column('date', 'trade_date')
+        if dates is None:
+            if isinstance(data.index, pd.DatetimeIndex):
+                dates = pd.Series(data.index, index=index)
+            else:
+                dates = pd.Series([None] * n, index=index)
+        if pd.api.types.is_datetime64_any_dtype(dates):
+            trade_dates = dates.dt.strftime('%Y-%m-%d')
+        else:
+            trade_dates = dates.map(self._format_date)
+
+        frame = pd.DataFrame({
+            "open": numeric(column('open')),
+            "high": numeric(column('high')),
+            "low": numeric(column('low')),
+            "close": numeric(column('close')),
+            "pre_close": numeric(column('pre_close', 'preclose')),
+            "volume": numeric(column('volume', 'vol')),
+            "amount": numeric(column('amount', 'turnover')),
+        })
+
+        # 计算涨跌数据（有收盘价与昨收时计算，否则取原始列）
+        computable = frame["close"].fillna(0).ne(0) & frame["pre_close"].fillna(0).ne(0)
+        change = (frame["close"] - frame["pre_close"]).round(4)
+        frame["change"] = change.where(computable, numeric(column('change')))
+        frame["pct_chg"] = (change / frame["pre_close"] * 100).round(4).where(
+            computable, numeric(column('pct_chg', 'change_percent'))
+        )
+
+        # 可选字段：源数据中存在该列时才写入
+        optional_fields = {
+            "turnover_rate": ('turnover_rate', 'turn'),
+            "volume_ratio": ('volume_ratio',),
+            "pe": ('pe',),
+            "pb": ('pb',),
+            "ps": ('ps',),
+            "adjustflag": ('adjustflag', 'adj_factor'),
+            "tradestatus": ('tradestatus',),
+            "isST": ('isST',),
+        }
+        absent: Dict[str, pd.Series] = {}
+        for key, names in optional_fields.items():
+            values = column(*names)
+            if values is not None:
+                frame[key] = numeric(values)
+                missing = values.map(lambda v: v is None)
+                if missing.any():
+                    absent[key] = missing
+
+        hashes = pd.util.hash_pandas_object(frame, index=False).map(lambda h: f"{h:016x}")
+        values = frame.astype(object).where(frame.notna(), None)
+
+        symbol_list = symbols.tolist()
+        full_symbol_list = full_symbols.tolist()
+        trade_date_list = trade_dates.tolist()
+        hash_list = hashes.tolist()
+        absent = {key: missing.tolist() for key, missing in absent.items()}
+
+        docs = []
+        for i, record in enumerate(values.to_dict('records')):
+            doc = {
+                "symbol": symbol_list[i],
+                "code": symbol_list[i],  # 添加 code 字段，与 symbol 保持一致（向后兼容）
+                "full_symbol": full_symbol_list[i],
+                "market": market,
+                "trade_date": trade_date_list[i],
+                "period": period,
+                "data_source": data_source,
+                "created_at": now,
+                "updated_at": now,
+                "version": 1,
+            }
+            doc.update(record)
+            for key, missing in absent.items():
+                if missing[i]:
+                    del doc[key]
+            doc["content_hash"] = hash_list[i]
+            docs.append(doc)
+        return docs
+
+    async def _get_list_dates(self, symbols: List[str]) -> Dict[str, str]:
+        """查询上市日期（YYYY-MM-DD），供列式K线存储判断上市较晚的股票是否覆盖请求区间"""
+        try:
+            cursor = self.db.stock_basic_info.find({"code": {"$in": symbols}}, {"_id": 0, "code": 1, "list_date": 1})
+            list_dates = {}
+            async for doc in cursor:
+                value = doc.get("list_date")
+                if not value:
+                    continue
+                if isinstance(value, str) and len(value) == 8 and value.isdigit():
+                    value = f"{value[:4]}-{value[4:6]}-{value[6:]}"
+                list_dates[doc["code"]] = value if isinstance(value, str) else value.strftime('%Y-%m-%d')
+            return list_dates
+        except Exception as e:
+            logger.debug(f"查询上市日期失败（忽略）: {e}")
+            return {}
+
+    @staticmethod
+    def _bar_store_partitions(docs: List[Dict[str, Any]]) -> Dict[tuple, List[Dict[str, Any]]]:
+        """按 (数据源, 复权方式) 分组，不同复权基准的K线写入不同分区"""
+        from tradingagents.dataflows.cache.bar_store import bar_adjustment
+
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for doc in docs:
+            key = (doc.get("data_source"), bar_adjustment(doc.get("data_source"), doc.get("adjustflag")))
+            groups.setdefault(key, []).append(doc)
+        return groups
+
+    async def _write_bar_store_many(self, docs_by_symbol: Dict[str, List[Dict[str, Any]]], market: str, period: str,
+                                    compact: bool = False):
+        """批量写入列式K线存储：在一个工作线程中逐只合并写入（compact=True 时写完立即合并增量文件）"""
+        try:
+            from tradingagents.dataflows.cache.bar_store import get_bar_store, partition_name
+            store = get_bar_store()
+            if store is None or not docs_by_symbol:
+                return
+            list_dates = await self._get_list_dates(list(docs_by_symbol))
+
+            def write_all():
+                for symbol, docs in docs_by_symbol.items():
+                    for (data_source, adjustment), group in self._bar_store_partitions(docs).items():
+                        store.write(symbol, pd.DataFrame(group), market, period,
+                                    data_source=data_source, adjustment=adjustment,
+                                    list_date=list_dates.get(symbol))
+                        if compact:
+                            store.compact(symbol, market, period, partition_name(data_source, adjustment))
+
+            await asyncio.to_thread(write_all)
+        except Exception as e:
+            logger.warning(f"⚠️ 批量写入列式K线存储失败: {e}")
+
+    async def _write_bar_store(self, symbol: str, docs: List[Dict[str, Any]], market: str, period: str):
+        """将标准化后的记录合并写入列式K线存储（失败不影响 MongoDB 写入结果）"""
+        await self._write_bar_store_many({symbol: docs}, market, period)
+
+    async def backfill_bar_store(
+        self,
+        symbols: Optional[List[str]] = None,
+        market: str = "CN",
+        period: str = "daily",
+        batch_symbols: int = 100
+    ) -> int:
+        """
+        把 MongoDB 中已有的K线回填到列式K线存储
+
+        存储只随同步写入增长，启用存储之前已在库中的历史需要回填一次，
+        否则对更早区间的 covers() 始终为 False，读取会一直退回 MongoDB
+
+        Args:
+            symbols: 要回填的股票代码，默认为库中该市场、周期下的全部股票
+            batch_symbols: 每次从 MongoDB 读取的股票数量
+
+        Returns:
+            回填的股票数量
+        """
+        if self.collection is None:
+            await self.initialize()
+
+        if symbols is None:
+            symbols = await self.collection.distinct("symbol", {"market": market, "period": period})
+        symbols = sorted(symbols)
+
+        filled = 0
+        for i in range(0, len(symbols), batch_symbols):
+            batch = symbols[i:i + batch_symbols]
+            cursor = self.collection.find(
+                {"symbol": {"$in": batch}, "market": market, "period": period},
+                {"_id": 0}
+            )
+            docs_by_symbol: Dict[str, List[Dict[str, Any]]] = {}
+            async for doc in cursor:
+                docs_by_symbol.setdefault(doc["symbol"], []).append(doc)
+
+            await self._write_bar_store_many(docs_by_symbol, market, period, compact=True)
+            filled += len(docs_by_symbol)
+            logger.info(f"📦 列式K线存储回填进度: {min(i + batch_symbols, len(symbols))}/{len(symbols)}")
+
+        logger.info(f"✅ 列式K线存储回填完成: {filled}只股票 ({market}/{period})")
+        return filled
+
     async def _execute_bulk_write_with_retry(
         self,
         symbol: str,
@@ -245,88 +616,6 @@ class HistoricalDataService:
 
         return saved_count
 
-    def _standardize_record(
-        self,
-        symbol: str,
-        row: pd.Series,
-        data_source: str,
-        market: str,
-        period: str = "daily",
-        date_index = None
-    ) -> Dict[str, Any]:
-        """标准化单条记录"""
-        now = datetime.utcnow()
-
-        # 获取日期 - 优先从列中获取，如果索引是日期类型才使用索引
-        trade_date = None
-
-        # 先尝试从列中获取日期
-        date_from_column = row.get('date') or row.get('trade_date')
-
-        # 如果列中有日期，优先使用列中的日期
-        if date_from_column is not None:
-            trade_date = self._format_date(date_from_column)
-        # 如果列中没有日期，且索引是日期类型，才使用索引
-        elif date_index is not None and isinstance(date_index, (date, datetime, pd.Timestamp)):
-            trade_date = self._format_date(date_index)
-        # 否则使用当前日期
-        else:
-            trade_date = self._format_date(None)
-
-        # 基础字段映射
-        doc = {
-            "symbol": symbol,
-            "code": symbol,  # 添加 code 字段，与 symbol 保持一致（向后兼容）
-            "full_symbol": self._get_full_symbol(symbol, market),
-            "market": market,
-            "trade_date": trade_date,
-            "period": period,
-            "data_source": data_source,
-            "created_at": now,
-            "updated_at": now,
-            "version": 1
-        }
-        
-        # OHLCV数据（单位转换已在 DataFrame 层面完成）
-        amount_value = self._safe_float(row.get('amount') or row.get('turnover'))
-        volume_value = self._safe_float(row.get('volume') or row.get('vol'))
-
-        doc.update({
-            "open": self._safe_float(row.get('open')),
-            "high": self._safe_float(row.get('high')),
-            "low": self._safe_float(row.get('low')),
-            "close": self._safe_float(row.get('close')),
-            "pre_close": self._safe_float(row.get('pre_close') or row.get('preclose')),
-            "volume": volume_value,
-            "amount": amount_value
-        })
-        
-        # 计算涨跌数据
-        if doc["close"] and doc["pre_close"]:
-            doc["change"] = round(doc["close"] - doc["pre_close"], 4)
-            doc["pct_chg"] = round((doc["change"] / doc["pre_close"]) * 100, 4)
-        else:
-            doc["change"] = self._safe_float(row.get('change'))
-            doc["pct_chg"] = self._safe_float(row.get('pct_chg') or row.get('change_percent'))
-        
-        # 可选字段
-        optional_fields = {
-            "turnover_rate": row.get('turnover_rate') or row.get('turn'),
-            "volume_ratio": row.get('volume_ratio'),
-            "pe": row.get('pe'),
-            "pb": row.get('pb'),
-            "ps": row.get('ps'),
-            "adjustflag": row.get('adjustflag') or row.get('adj_factor'),
-            "tradestatus": row.get('tradestatus'),
-            "isST": row.get('isST')
-        }
-        
-        for key, value in optional_fields.items():
-            if value is not None:
-                doc[key] = self._safe_float(value)
-        
-        return doc
-    
     def _get_full_symbol(self, symbol: str, market: str) -> str:
         """生成完整股票代码"""
         if market == "CN":
@@ -429,6 +718,63 @@ class HistoricalDataService:
             logger.error(f"❌ 查询历史数据失败 {symbol}: {e}")
             return []
     
+    async def get_historical_data_multi(
+        self,
+        symbols: List[str],
+        start_date: str = None,
+        end_date: str = None,
+        data_source: str = None,
+        period: str = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        一次查询多只股票的历史数据（用于面板/全市场回测）
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+            data_source: 数据源筛选
+            period: 数据周期筛选 (daily/weekly/monthly)
+            fields: 只返回这些字段（默认返回 OHLCV）
+
+        Returns:
+            历史数据列表（按 symbol、trade_date 升序）
+        """
+        if self.collection is None:
+            await self.initialize()
+
+        try:
+            query: Dict[str, Any] = {"symbol": {"$in": list(symbols)}}
+
+            if start_date or end_date:
+                date_filter = {}
+                if start_date:
+                    date_filter["$gte"] = start_date
+                if end_date:
+                    date_filter["$lte"] = end_date
+                query["trade_date"] = date_filter
+
+            if data_source:
+                query["data_source"] = data_source
+
+            if period:
+                query["period"] = period
+
+            fields = fields or ["open", "high", "low", "close", "volume"]
+            projection = {"_id": 0, "symbol": 1, "trade_date": 1, "data_source": 1}
+            projection.update({f: 1 for f in fields})
+
+            cursor = self.collection.find(query, projection).sort([("symbol", 1), ("trade_date", 1)])
+            results = await cursor.to_list(length=None)
+
+            logger.info(f"📊 批量查询历史数据: {len(symbols)}只股票 返回 {len(results)} 条记录")
+            return results
+
+        except Exception as e:
+            logger.error(f"❌ 批量查询历史数据失败: {e}")
+            return []
+
     async def get_latest_date(self, symbol: str, data_source: str) -> Optional[str]:
         """获取最新数据日期"""
         if self.collection is None:
@@ -10,3 +10,8 @@ from .log_handler import (
     unregister_analysis_tracker,
 )
 
+from .dispatcher import (
+    ProgressDispatcher,
+    get_progress_dispatcher,
+    close_progress_dispatcher,
+)
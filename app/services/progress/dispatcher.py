@@ -0,0 +1,187 @@
+"""
+进度消息分发器（每个 API 进程一个 Redis Pub/Sub 连接）
+
+原先每个 SSE 连接（每个浏览器标签页）都会单独创建一个 pubsub 连接并每秒轮询一次，
+500 个打开的看板就占用 500 个 Redis 连接。这里改为每个进程只持有一个
+task_progress:* 模式订阅，由单个后台协程读取消息，再按频道分发到各订阅者的内存队列：
+
+    Redis  --psubscribe task_progress:*-->  ProgressDispatcher  --> {channel: {asyncio.Queue, ...}}
+
+- Redis 连接数随进程数增长，而不是随观看者数量增长
+- 订阅者只在有消息时被唤醒（队列 get），不再各自轮询
+- 连接断开后自动重连（指数退避），订阅者无需感知
+- 队列满时丢弃最旧的消息（进度消息只关心最新状态）
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from app.core.database import get_redis_client
+
+logger = logging.getLogger("app.services.progress.dispatcher")
+
+PROGRESS_CHANNEL_PREFIX = "task_progress:"
+PROGRESS_CHANNEL_PATTERN = PROGRESS_CHANNEL_PREFIX + "*"
+
+
+class ProgressDispatcher:
+    """按频道把 task_progress:* 消息分发到进程内订阅者队列"""
+
+    def __init__(
+        self,
+        redis_factory: Callable = get_redis_client,
+        pattern: str = PROGRESS_CHANNEL_PATTERN,
+        queue_size: int = 100,
+        read_timeout: float = 1.0,
+        ready_timeout: float = 5.0,
+    ):
+        """
+        Args:
+            redis_factory: 返回 redis.asyncio 客户端的函数
+            pattern: 订阅的频道模式
+            queue_size: 每个订阅者队列的最大长度
+            read_timeout: 单次读取等待时间（需小于 Redis 客户端 socket_timeout）
+            ready_timeout: 首个订阅者等待模式订阅建立的最长时间（秒）
+        """
+        self._redis_factory = redis_factory
+        self.pattern = pattern
+        self.queue_size = queue_size
+        self.read_timeout = read_timeout
+        self.ready_timeout = ready_timeout
+
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.messages_received = 0
+        self.messages_dropped = 0
+
+    # ---- 订阅管理 ----
+    async def subscribe(self, channel: str, queue: Optional[asyncio.Queue] = None) -> asyncio.Queue:
+        """
+        订阅频道，返回接收消息数据（字符串）的队列
+
+        传入 queue 时把该队列同时挂到多个频道上（如批次进度订阅其全部任务）
+        """
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            await self._ensure_listener()
+        except Exception:
+            self.unsubscribe(channel, queue)
+            raise
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        """取消订阅（不涉及 Redis 操作）"""
+        queues = self._subscribers.get(channel)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[channel]
+
+    @asynccontextmanager
+    async def subscription(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        queue = await self.subscribe(channel)
+        try:
+            yield queue
+        finally:
+            self.unsubscribe(channel, queue)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(q) for q in self._subscribers.values()),
+            "messages_received": self.messages_received,
+            "messages_dropped": self.messages_dropped,
+            "listening": int(self._listener is not None and not self._listener.done()),
+        }
+
+    # ---- 后台监听 ----
+    async def _ensure_listener(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._listener.get_loop() is not loop:
+            self._stopping = False
+            self._ready = asyncio.Event()
+            self._listener = loop.create_task(self._listen())
+            logger.info(f"📡 [进度分发] 启动监听: {self.pattern}")
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.ready_timeout)
+            except asyncio.TimeoutError:
+                raise RuntimeError(f"订阅 {self.pattern} 超时，Redis 不可用")
+
+    async def _listen(self) -> None:
+        backoff = 0.5
+        while not self._stopping:
+            pubsub = None
+            try:
+                pubsub = self._redis_factory().pubsub()
+                await pubsub.psubscribe(self.pattern)
+                self._ready.set()
+                backoff = 0.5
+                while not self._stopping:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=self.read_timeout)
+                    if message and message.get("type") == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [进度分发] 订阅连接异常，{backoff:.1f}秒后重连: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    def _dispatch(self, channel, data) -> None:
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        self.messages_received += 1
+        for queue in tuple(self._subscribers.get(channel, ())):
+            if queue.full():
+                # 只保留最新进度：丢弃最旧的一条
+                try:
+                    queue.get_nowait()
+                    self.messages_dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(data)
+
+    async def close(self) -> None:
+        """停止监听并释放 Redis 连接"""
+        self._stopping = True
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.done():
+            listener.cancel()
+            try:
+                await listener
+            except (asyncio.CancelledError, Exception):
+                pass
+        logger.info("🛑 [进度分发] 已停止")
+
+
+_dispatcher: Optional[ProgressDispatcher] = None
+
+
+def get_progress_dispatcher() -> ProgressDispatcher:
+    """获取进程级进度分发器"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = ProgressDispatcher()
+    return _dispatcher
+
+
+async def close_progress_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.close()
+        _dispatcher = None
@@ -5,6 +5,8 @@ Queue 子包
 """
 from .keys import (
     READY_LIST,
+    READY_BATCH_LIST,
+    QUEUE_NOTIFY_LIST,
     TASK_PREFIX,
     BATCH_PREFIX,
     SET_PROCESSING,
@@ -14,9 +16,15 @@ from .keys import (
     USER_PROCESSING_PREFIX,
     GLOBAL_CONCURRENT_KEY,
     VISIBILITY_TIMEOUT_PREFIX,
+    VISIBILITY_DEADLINES_ZSET,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BATCH,
+    READY_LANES,
     DEFAULT_USER_CONCURRENT_LIMIT,
     GLOBAL_CONCURRENT_LIMIT,
     VISIBILITY_TIMEOUT_SECONDS,
+    CLAIM_SCAN_DEPTH,
+    NOTIFY_LIST_MAX,
 )
 
 from .helpers import (
@@ -26,5 +34,6 @@ from .helpers import (
     unmark_task_processing,
     set_visibility_timeout,
     clear_visibility_timeout,
+    CLAIM_TASK_LUA,
 )
 
@@ -12,9 +12,78 @@ from .keys import (
     SET_PROCESSING,
     USER_PROCESSING_PREFIX,
     VISIBILITY_TIMEOUT_PREFIX,
+    VISIBILITY_DEADLINES_ZSET,
 )
 
 
+# 原子领取任务：按通道优先级依次检查队尾（最早入队）的任务，跳过已达并发上限的用户，
+# 在同一脚本内完成出队、处理中标记、可见性截止时间与任务状态更新，Worker 中途退出不会丢任务。
+# KEYS: [处理中集合, 可见性截止时间ZSET, 通道1, 通道2, ...]
+# ARGV: [worker_id, now, visibility_timeout, user_limit, global_limit, scan_depth,
+#        task_prefix, user_processing_prefix, visibility_prefix]
+# 返回: nil 或 [通道键, 任务hash展开的 field, value, ...]
+#
+# 注意：本部署假定使用单节点 Redis（或单主节点的哨兵/主从模式），不支持 Redis Cluster。
+# 脚本在执行过程中由前缀拼出 task:<id>、用户处理中集合与可见性键，这些键在扫描通道之前
+# 无法得知，因此没有在 KEYS 中声明；在 Cluster 上它们可能落在不同 slot，脚本会被拒绝执行。
+# 如需迁移到 Cluster，需要为所有队列键使用同一 hash tag（如 {queue}），并同步调整 keys.py。
+CLAIM_TASK_LUA = """
+local processing_key = KEYS[1]
+local deadlines_key = KEYS[2]
+local worker_id = ARGV[1]
+local now = tonumber(ARGV[2])
+local visibility_timeout = tonumber(ARGV[3])
+local user_limit = tonumber(ARGV[4])
+local global_limit = tonumber(ARGV[5])
+local scan_depth = tonumber(ARGV[6])
+local task_prefix = ARGV[7]
+local user_prefix = ARGV[8]
+local visibility_prefix = ARGV[9]
+
+if redis.call('SCARD', processing_key) >= global_limit then
+    return false
+end
+
+local saturated = {}
+for lane_index = 3, #KEYS do
+    local lane = KEYS[lane_index]
+    local ids = redis.call('LRANGE', lane, -scan_depth, -1)
+    for i = #ids, 1, -1 do
+        local task_id = ids[i]
+        local task_key = task_prefix .. task_id
+        local fields = redis.call('HMGET', task_key, 'user', 'status')
+        local user = fields[1]
+        if (not user) or fields[2] ~= 'queued' then
+            -- 任务数据缺失或已取消：直接从通道移除
+            redis.call('LREM', lane, -1, task_id)
+        elseif not saturated[user] then
+            local user_key = user_prefix .. user
+            if redis.call('SCARD', user_key) < user_limit then
+                redis.call('LREM', lane, -1, task_id)
+                redis.call('SADD', user_key, task_id)
+                redis.call('SADD', processing_key, task_id)
+                local deadline = now + visibility_timeout
+                redis.call('ZADD', deadlines_key, deadline, task_id)
+                local visibility_key = visibility_prefix .. task_id
+                redis.call('HSET', visibility_key, 'task_id', task_id, 'worker_id', worker_id,
+                           'timeout_at', tostring(deadline))
+                redis.call('EXPIRE', visibility_key, visibility_timeout * 2)
+                redis.call('HSET', task_key, 'status', 'processing', 'worker_id', worker_id,
+                           'started_at', tostring(now))
+                local result = {lane}
+                for _, value in ipairs(redis.call('HGETALL', task_key)) do
+                    table.insert(result, value)
+                end
+                return result
+            end
+            saturated[user] = true
+        end
+    end
+end
+return false
+"""
+
+
 async def check_user_concurrent_limit(r: Redis, user_id: str, limit: int) -> bool:
     """检查用户并发限制"""
     user_processing_key = USER_PROCESSING_PREFIX + user_id
@@ -51,11 +120,13 @@ async def set_visibility_timeout(r: Redis, task_id: str, worker_id: str, visibil
         "timeout_at": str(int(time.time()) + visibility_timeout),
     }
     await r.hset(timeout_key, mapping=timeout_data)
-    await r.expire(timeout_key, visibility_timeout)
+    await r.expire(timeout_key, visibility_timeout * 2)
+    await r.zadd(VISIBILITY_DEADLINES_ZSET, {task_id: int(timeout_data["timeout_at"])})
 
 
 async def clear_visibility_timeout(r: Redis, task_id: str) -> None:
     """清除可见性超时"""
     timeout_key = VISIBILITY_TIMEOUT_PREFIX + task_id
     await r.delete(timeout_key)
+    await r.zrem(VISIBILITY_DEADLINES_ZSET, task_id)
 
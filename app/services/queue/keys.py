@@ -3,7 +3,9 @@
 """
 
 # Redis键名常量
-READY_LIST = "qa:ready"
+READY_LIST = "qa:ready"  # 交互式（单股）任务通道
+READY_BATCH_LIST = "qa:ready:batch"  # 批量任务通道
+QUEUE_NOTIFY_LIST = "qa:notify"  # 唤醒阻塞中的Worker
 
 TASK_PREFIX = "qa:task:"
 BATCH_PREFIX = "qa:batch:"
@@ -16,9 +18,20 @@ BATCH_TASKS_PREFIX = "qa:batch_tasks:"
 USER_PROCESSING_PREFIX = "qa:user_processing:"
 GLOBAL_CONCURRENT_KEY = "qa:global_concurrent"
 VISIBILITY_TIMEOUT_PREFIX = "qa:visibility:"
+VISIBILITY_DEADLINES_ZSET = "qa:visibility_deadlines"  # task_id -> 可见性截止时间
+
+# 优先级通道：出队时按顺序依次尝试（交互式单股分析优先于批量任务）
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+READY_LANES = {
+    PRIORITY_INTERACTIVE: READY_LIST,
+    PRIORITY_BATCH: READY_BATCH_LIST,
+}
 
 # 配置常量 - 开源版限制
 DEFAULT_USER_CONCURRENT_LIMIT = 3
 GLOBAL_CONCURRENT_LIMIT = 3  # 开源版全局最大并发限制为3
 VISIBILITY_TIMEOUT_SECONDS = 300  # 5分钟
+CLAIM_SCAN_DEPTH = 50  # 出队时每个通道最多检查的任务数（跳过已达并发上限的用户）
+NOTIFY_LIST_MAX = 100  # 唤醒标记列表最大长度
 
@@ -17,6 +17,8 @@ from app.core.database import get_redis_client
 
 from app.services.queue import (
     READY_LIST,
+    READY_BATCH_LIST,
+    QUEUE_NOTIFY_LIST,
     TASK_PREFIX,
     BATCH_PREFIX,
     SET_PROCESSING,
@@ -26,15 +28,22 @@ from app.services.queue import (
     USER_PROCESSING_PREFIX,
     GLOBAL_CONCURRENT_KEY,
     VISIBILITY_TIMEOUT_PREFIX,
+    VISIBILITY_DEADLINES_ZSET,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BATCH,
+    READY_LANES,
     DEFAULT_USER_CONCURRENT_LIMIT,
     GLOBAL_CONCURRENT_LIMIT,
     VISIBILITY_TIMEOUT_SECONDS,
+    CLAIM_SCAN_DEPTH,
+    NOTIFY_LIST_MAX,
     check_user_concurrent_limit,
     check_global_concurrent_limit,
     mark_task_processing,
     unmark_task_processing,
     set_visibility_timeout,
     clear_visibility_timeout,
+    CLAIM_TASK_LUA,
 )
 
 logger = logging.getLogger(__name__)
@@ -50,15 +59,36 @@ class QueueService:
         self.user_concurrent_limit = DEFAULT_USER_CONCURRENT_LIMIT
         self.global_concurrent_limit = GLOBAL_CONCURRENT_LIMIT
         self.visibility_timeout = VISIBILITY_TIMEOUT_SECONDS
+        self.claim_scan_depth = CLAIM_SCAN_DEPTH
+        self._claim_script = None
+
+    @staticmethod
+    def _lane_key(priority: Optional[str]) -> str:
+        """根据优先级返回就绪通道键（未知优先级按交互式处理）"""
+        return READY_LANES.get(priority or PRIORITY_INTERACTIVE, READY_LIST)
+
+    async def _notify(self, count: int = 1) -> None:
+        """唤醒阻塞在 dequeue_task 上的Worker（新任务入队或并发槽位释放时调用）"""
+        try:
+            await self.r.lpush(QUEUE_NOTIFY_LIST, *(["1"] * count))
+            await self.r.ltrim(QUEUE_NOTIFY_LIST, 0, NOTIFY_LIST_MAX - 1)
+        except Exception as e:
+            logger.debug(f"唤醒Worker失败: {e}")
 
     async def enqueue_task(
         self,
         user_id: str,
         symbol: str,
         params: Dict[str, Any],
-        batch_id: Optional[str] = None
+        batch_id: Optional[str] = None,
+        priority: Optional[str] = None
     ) -> str:
-        """任务入队，支持并发控制（开源版FIFO队列）"""
+        """
+        任务入队，支持并发控制与优先级通道
+
+        priority 为空时：带 batch_id 的任务进入批量通道，其余（单股分析）进入交互式通道；
+        出队时交互式通道优先。
+        """
 
         # 检查用户并发限制
         if not await self._check_user_concurrent_limit(user_id):
@@ -82,64 +112,83 @@ class QueueService:
             "enqueued_at": str(now)
         }
 
+        if priority is None:
+            priority = PRIORITY_BATCH if batch_id else PRIORITY_INTERACTIVE
+        mapping["priority"] = priority
+
         if batch_id:
             mapping["batch_id"] = batch_id
 
-        # 保存任务数据
-        await self.r.hset(key, mapping=mapping)
-
-        # 添加到FIFO队列
-        await self.r.lpush(READY_LIST, task_id)
-
+        # 保存任务数据并加入对应优先级通道（单次往返）
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hset(key, mapping=mapping)
+        pipe.lpush(self._lane_key(priority), task_id)
         if batch_id:
-            await self.r.sadd(BATCH_TASKS_PREFIX + batch_id, task_id)
+            pipe.sadd(BATCH_TASKS_PREFIX + batch_id, task_id)
+        await pipe.execute()
+
+        await self._notify()
 
-        logger.info(f"任务已入队: {task_id}")
+        logger.info(f"任务已入队: {task_id} (优先级: {priority})")
         return task_id
 
-    async def dequeue_task(self, worker_id: str) -> Optional[Dict[str, Any]]:
-        """从FIFO队列中取出任务"""
-        try:
-            # 从FIFO队列获取任务
-            task_id = await self.r.rpop(READY_LIST)
-            if not task_id:
-                return None
+    async def dequeue_task(self, worker_id: str, timeout: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        原子领取任务
 
-            # 获取任务详情
-            task_data = await self.get_task(task_id)
-            if not task_data:
-                logger.warning(f"任务数据不存在: {task_id}")
-                return None
+        通过 Lua 脚本一次性完成：按优先级通道取最早的可执行任务（跳过已达并发上限的用户）、
+        检查全局并发、标记处理中、设置可见性截止时间并更新任务状态。
 
-            user_id = task_data.get("user")
+        Args:
+            worker_id: Worker标识
+            timeout: 无可领取任务时阻塞等待唤醒的秒数；0 表示不等待立即返回
+                （需小于 Redis 客户端的 socket_timeout）
 
-            # 再次检查并发限制（防止竞态条件）
-            if not await self._check_user_concurrent_limit(user_id):
-                # 如果超过限制，将任务放回队列
-                await self.r.lpush(READY_LIST, task_id)
-                logger.warning(f"用户 {user_id} 并发限制，任务重新入队: {task_id}")
+        Raises:
+            Redis 或脚本执行异常原样抛出，由调用方退避重试（不能当作"暂无任务"立即重试）
+        """
+        try:
+            task_data = await self._claim_task(worker_id)
+            if task_data is None and timeout > 0:
+                # 阻塞等待新任务入队或并发槽位释放，醒来后再尝试领取一次
+                await self.r.blpop([QUEUE_NOTIFY_LIST], timeout=timeout)
+                task_data = await self._claim_task(worker_id)
+            if task_data is None:
                 return None
 
-            # 标记任务为处理中
-            await self._mark_task_processing(task_id, user_id, worker_id)
-
-            # 设置可见性超时
-            await self._set_visibility_timeout(task_id, worker_id)
-
-            # 更新任务状态
-            await self.r.hset(TASK_PREFIX + task_id, mapping={
-                "status": "processing",
-                "worker_id": worker_id,
-                "started_at": str(int(time.time()))
-            })
-
-            logger.info(f"任务已出队: {task_id} -> Worker: {worker_id}")
+            logger.info(f"任务已出队: {task_data.get('id')} -> Worker: {worker_id} "
+                        f"(优先级: {task_data.get('priority', PRIORITY_INTERACTIVE)})")
             return task_data
 
         except Exception as e:
             logger.error(f"出队失败: {e}")
+            raise
+
+    async def _claim_task(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """执行领取脚本，返回解析后的任务数据"""
+        if self._claim_script is None:
+            self._claim_script = self.r.register_script(CLAIM_TASK_LUA)
+
+        result = await self._claim_script(
+            keys=[SET_PROCESSING, VISIBILITY_DEADLINES_ZSET, READY_LIST, READY_BATCH_LIST],
+            args=[
+                worker_id,
+                int(time.time()),
+                int(self.visibility_timeout),
+                int(self.user_concurrent_limit),
+                int(self.global_concurrent_limit),
+                int(self.claim_scan_depth),
+                TASK_PREFIX,
+                USER_PROCESSING_PREFIX,
+                VISIBILITY_TIMEOUT_PREFIX,
+            ],
+        )
+        if not result:
             return None
 
+        fields = result[1:]
+        return self._parse_task(dict(zip(fields[0::2], fields[1::2])))
+
     async def ack_task(self, task_id: str, success: bool = True) -> bool:
         """确认任务完成"""
         try:
@@ -169,6 +218,9 @@ class QueueService:
             else:
                 await self.r.sadd(SET_FAILED, task_id)
 
+            # 释放了并发槽位，唤醒等待中的Worker
+            await self._notify()
+
             logger.info(f"任务已确认: {task_id} (成功: {success})")
             return True
 
@@ -196,6 +248,10 @@ class QueueService:
         data = await self.r.hgetall(key)
         if not data:
             return None
+        return self._parse_task(data)
+
+    @staticmethod
+    def _parse_task(data: Dict[str, Any]) -> Dict[str, Any]:
         # parse fields
         if "params" in data:
             try:
@@ -223,12 +279,15 @@ class QueueService:
         return data
 
     async def stats(self) -> Dict[str, int]:
-        queued = await self.r.llen(READY_LIST)
+        queued_interactive = int(await self.r.llen(READY_LIST) or 0)
+        queued_batch = int(await self.r.llen(READY_BATCH_LIST) or 0)
         processing = await self.r.scard(SET_PROCESSING)
         completed = await self.r.scard(SET_COMPLETED)
         failed = await self.r.scard(SET_FAILED)
         return {
-            "queued": int(queued or 0),
+            "queued": queued_interactive + queued_batch,
+            "queued_interactive": queued_interactive,
+            "queued_batch": queued_batch,
             "processing": int(processing or 0),
             "completed": int(completed or 0),
             "failed": int(failed or 0),
@@ -273,20 +332,9 @@ class QueueService:
     async def cleanup_expired_tasks(self):
         """清理过期任务（可见性超时）"""
         try:
-            # 获取所有可见性超时键
-            timeout_keys = await self.r.keys(VISIBILITY_TIMEOUT_PREFIX + "*")
-
+            # 可见性截止时间已过的任务（按截止时间排序的ZSET，无需扫描键空间）
             current_time = int(time.time())
-            expired_tasks = []
-
-            for timeout_key in timeout_keys:
-                timeout_data = await self.r.hgetall(timeout_key)
-                if timeout_data:
-                    timeout_at = int(timeout_data.get("timeout_at", 0))
-                    if current_time > timeout_at:
-                        task_id = timeout_data.get("task_id")
-                        if task_id:
-                            expired_tasks.append(task_id)
+            expired_tasks = await self.r.zrangebyscore(VISIBILITY_DEADLINES_ZSET, "-inf", current_time - 1)
 
             # 处理过期任务
             for task_id in expired_tasks:
@@ -302,7 +350,9 @@ class QueueService:
         """处理过期任务"""
         try:
             task_data = await self.get_task(task_id)
-            if not task_data:
+            if not task_data or task_data.get("status") != "processing":
+                # 已确认/已取消的任务只清理残留的截止时间记录
+                await self._clear_visibility_timeout(task_id)
                 return
 
             user_id = task_data.get("user")
@@ -313,16 +363,18 @@ class QueueService:
             # 清除可见性超时
             await self._clear_visibility_timeout(task_id)
 
-            # 重新加入队列
-            await self.r.lpush(READY_LIST, task_id)
-
-            # 更新任务状态
+            # 更新任务状态（需先于入队：领取脚本只接受 queued 状态的任务）
             await self.r.hset(TASK_PREFIX + task_id, mapping={
                 "status": "queued",
                 "worker_id": "",
                 "requeued_at": str(int(time.time()))
             })
 
+            # 重新加入原优先级通道队尾（最先被领取）
+            await self.r.rpush(self._lane_key(task_data.get("priority")), task_id)
+
+            await self._notify()
+
             logger.warning(f"过期任务重新入队: {task_id}")
 
         except Exception as e:
@@ -342,9 +394,10 @@ class QueueService:
                 # 如果正在处理中，从处理集合移除
                 await self._unmark_task_processing(task_id, user_id)
                 await self._clear_visibility_timeout(task_id)
+                await self._notify()
             elif status == "queued":
-                # 如果在队列中，从队列移除
-                await self.r.lrem(READY_LIST, 0, task_id)
+                # 如果在队列中，从所在通道移除
+                await self.r.lrem(self._lane_key(task_data.get("priority")), 0, task_id)
 
             # 更新任务状态
             await self.r.hset(TASK_PREFIX + task_id, mapping={
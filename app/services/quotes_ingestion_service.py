@@ -1,6 +1,7 @@
 import logging
+import math
 from datetime import datetime, time as dtime, timedelta
-from typing import Dict, Optional, Tuple, List
+from typing import Any, Dict, Optional, Tuple, List
 from zoneinfo import ZoneInfo
 from collections import deque
 
@@ -12,6 +13,16 @@ from app.services.data_sources.manager import DataSourceManager
 
 logger = logging.getLogger(__name__)
 
+# 参与变化检测的行情字段（与 market_quotes 写入字段一致）
+QUOTE_FIELDS = ("close", "pct_chg", "amount", "volume", "open", "high", "low", "pre_close")
+
+
+def _clean_number(value: Any) -> Any:
+    """NaN 统一为 None，避免 NaN != NaN 导致每次都判定为变化"""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
 
 class QuotesIngestionService:
     """
@@ -23,6 +34,8 @@ class QuotesIngestionService:
     - 智能限流：Tushare免费用户每小时最多2次，付费用户自动切换到高频模式（5秒）
     - 休市时间：跳过任务，保持上次收盘数据；必要时执行一次性兜底补数
     - 字段：code(6位)、close、pct_chg、amount、open、high、low、pre_close、trade_date、updated_at
+    - 增量写入：内存中保留上一次快照，只写入发生变化的股票（停牌/无成交的股票不再重复写入）
+    - 分钟K线：把每次采集中变化的行情聚合为分钟K线，追加写入时序集合 market_quotes_minute
     """
 
     def __init__(self, collection_name: str = "market_quotes") -> None:
@@ -44,6 +57,16 @@ class QuotesIngestionService:
         self._rotation_sources = ["tushare", "akshare_eastmoney", "akshare_sina"]
         self._rotation_index = 0  # 当前轮换索引
 
+        # 增量写入：code -> 上次写入的行情指纹（首次写入前从 market_quotes 加载）
+        self._last_snapshot: Dict[str, Tuple] = {}
+        self._snapshot_loaded = False
+
+        # 分钟K线聚合：当前分钟的K线、当前分钟、各股票上一次的累计成交量/额
+        self.minute_collection_name = settings.QUOTES_MINUTE_BARS_COLLECTION
+        self._minute_bars: Dict[str, Dict[str, Any]] = {}
+        self._bar_minute: Optional[datetime] = None
+        self._last_cumulative: Dict[str, Tuple] = {}  # code -> (trade_date, volume, amount)
+
     @staticmethod
     def _normalize_stock_code(code: str) -> str:
         """
@@ -93,6 +116,27 @@ class QuotesIngestionService:
         except Exception as e:
             logger.warning(f"创建行情表索引失败（忽略）: {e}")
 
+        if settings.QUOTES_MINUTE_BARS_ENABLED:
+            await self._ensure_minute_collection(db)
+
+    async def _ensure_minute_collection(self, db) -> None:
+        """创建分钟K线时序集合（MongoDB 5.0+），不支持时退化为普通集合 + 复合索引"""
+        name = self.minute_collection_name
+        try:
+            if name not in await db.list_collection_names():
+                try:
+                    await db.create_collection(
+                        name,
+                        timeseries={"timeField": "ts", "metaField": "code", "granularity": "minutes"},
+                        expireAfterSeconds=settings.QUOTES_MINUTE_BARS_RETENTION_DAYS * 86400,
+                    )
+                    logger.info(f"✅ 已创建分钟K线时序集合: {name}")
+                except Exception as e:
+                    logger.warning(f"创建时序集合失败，使用普通集合: {e}")
+            await db[name].create_index([("code", 1), ("ts", 1)])
+        except Exception as e:
+            logger.warning(f"创建分钟K线集合索引失败（忽略）: {e}")
+
     async def _record_sync_status(
         self,
         success: bool,
@@ -364,10 +408,44 @@ class QuotesIngestionService:
         except Exception:
             return True
 
-    async def _bulk_upsert(self, quotes_map: Dict[str, Dict], trade_date: str, source: Optional[str] = None) -> None:
+    @staticmethod
+    def _fingerprint(q: Dict, trade_date: str) -> Tuple:
+        return tuple(_clean_number(q.get(f)) for f in QUOTE_FIELDS) + (trade_date,)
+
+    async def _load_snapshot(self, coll) -> None:
+        """首次写入前从 market_quotes 加载上一次快照，避免进程重启后全量重写"""
+        self._snapshot_loaded = True
+        try:
+            projection = {f: 1 for f in QUOTE_FIELDS}
+            projection.update({"code": 1, "trade_date": 1, "_id": 0})
+            docs = await coll.find({}, projection).to_list(length=None)
+        except Exception as e:
+            logger.debug(f"加载行情快照失败，首次采集将全量写入: {e}")
+            return
+        for doc in docs:
+            code6 = doc.get("code")
+            if not code6:
+                continue
+            trade_date = str(doc.get("trade_date") or "")
+            self._last_snapshot[code6] = self._fingerprint(doc, trade_date)
+            self._last_cumulative.setdefault(code6, (trade_date, doc.get("volume"), doc.get("amount")))
+        logger.info(f"📥 已加载 {len(self._last_snapshot)} 条行情快照用于增量写入")
+
+    async def _bulk_upsert(self, quotes_map: Dict[str, Dict], trade_date: str, source: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        只写入与上次快照相比发生变化的行情
+
+        Returns:
+            本次发生变化（已写入）的行情 {code6: quote}
+        """
         db = get_mongo_db()
         coll = db[self.collection_name]
+        if not self._snapshot_loaded:
+            await self._load_snapshot(coll)
+
         ops = []
+        changed: Dict[str, Dict] = {}
+        fingerprints: Dict[str, Tuple] = {}
         updated_at = datetime.now(self.tz)
         for code, q in quotes_map.items():
             if not code:
@@ -377,11 +455,18 @@ class QuotesIngestionService:
             if not code6:
                 continue
 
+            # 与上次快照一致（停牌/无成交）则跳过
+            fingerprint = self._fingerprint(q, trade_date)
+            if self._last_snapshot.get(code6) == fingerprint:
+                continue
+
             # 🔥 日志：记录写入的成交量值
             volume = q.get("volume")
             if code6 in ["300750", "000001", "600000"]:  # 只记录几个示例股票
                 logger.info(f"📊 [写入market_quotes] {code6} - volume={volume}, amount={q.get('amount')}, source={source}")
 
+            changed[code6] = q
+            fingerprints[code6] = fingerprint
             ops.append(
                 UpdateOne(
                     {"code": code6},
@@ -403,12 +488,100 @@ class QuotesIngestionService:
                 )
             )
         if not ops:
-            logger.info("无可写入的数据，跳过")
-            return
+            logger.info(f"行情无变化，跳过入库 (source={source}, 共 {len(quotes_map)} 只)")
+            return {}
         result = await coll.bulk_write(ops, ordered=False)
+        self._last_snapshot.update(fingerprints)
         logger.info(
-            f"✅ 行情入库完成 source={source}, matched={result.matched_count}, upserted={len(result.upserted_ids) if result.upserted_ids else 0}, modified={result.modified_count}"
+            f"✅ 行情入库完成 source={source}, changed={len(ops)}/{len(quotes_map)}, matched={result.matched_count}, upserted={len(result.upserted_ids) if result.upserted_ids else 0}, modified={result.modified_count}"
         )
+        return changed
+
+    def _update_minute_bars(self, changed: Dict[str, Dict], trade_date: str, source: Optional[str], now: datetime) -> List[Dict[str, Any]]:
+        """
+        把本次变化的行情聚合进当前分钟K线
+
+        Returns:
+            已结束（分钟已切换）的K线，需写入时序集合
+        """
+        minute = now.replace(second=0, microsecond=0)
+        finished: List[Dict[str, Any]] = []
+        if self._bar_minute is not None and minute != self._bar_minute:
+            finished = self._finish_minute_bars()
+        self._bar_minute = minute
+
+        for code6, q in changed.items():
+            price = _clean_number(q.get("close"))
+            if price is None:
+                continue
+            volume = _clean_number(q.get("volume"))
+            amount = _clean_number(q.get("amount"))
+            bar = self._minute_bars.get(code6)
+            if bar is None:
+                self._minute_bars[code6] = {
+                    "ts": minute,
+                    "code": code6,
+                    "trade_date": trade_date,
+                    "open": price,
+                    "high": price,
+                    "low": price,
+                    "close": price,
+                    "source": source,
+                    "_base": self._last_cumulative.get(code6),
+                    "_cum": (volume, amount),
+                }
+            else:
+                bar["high"] = max(bar["high"], price)
+                bar["low"] = min(bar["low"], price)
+                bar["close"] = price
+                bar["_cum"] = (volume, amount)
+            self._last_cumulative[code6] = (trade_date, volume, amount)
+        return finished
+
+    def _finish_minute_bars(self) -> List[Dict[str, Any]]:
+        """结束当前分钟：把累计成交量/额换算为该分钟的增量"""
+        finished = []
+        for bar in self._minute_bars.values():
+            base = bar.pop("_base")
+            cum_volume, cum_amount = bar.pop("_cum")
+            if base is None:
+                # 首次观测到该股票，无法得知本分钟之前的累计值
+                base_volume = base_amount = None
+            elif base[0] != bar["trade_date"]:
+                # 新交易日：累计值从0开始
+                base_volume = base_amount = 0
+            else:
+                base_volume, base_amount = base[1], base[2]
+            bar["volume"] = cum_volume - base_volume if cum_volume is not None and base_volume is not None else None
+            bar["amount"] = cum_amount - base_amount if cum_amount is not None and base_amount is not None else None
+            finished.append(bar)
+        self._minute_bars = {}
+        return finished
+
+    async def _write_minute_bars(self, bars: List[Dict[str, Any]]) -> None:
+        if not bars:
+            return
+        try:
+            db = get_mongo_db()
+            await db[self.minute_collection_name].insert_many(bars, ordered=False)
+            logger.info(f"🕐 分钟K线写入 {len(bars)} 条 ({bars[0]['ts'].strftime('%H:%M')})")
+        except Exception as e:
+            logger.warning(f"分钟K线写入失败（忽略）: {e}")
+
+    async def flush_minute_bars(self) -> None:
+        """把尚未结束的分钟K线写入（收盘后/停止采集时调用）"""
+        if self._minute_bars:
+            await self._write_minute_bars(self._finish_minute_bars())
+        self._bar_minute = None
+
+    async def get_minute_bars(self, code: str, start: datetime, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """查询单只股票的分钟K线（按时间升序）"""
+        db = get_mongo_db()
+        query: Dict[str, Any] = {"code": self._normalize_stock_code(code), "ts": {"$gte": start}}
+        if end is not None:
+            query["ts"]["$lte"] = end
+        cursor = db[self.minute_collection_name].find(query, {"_id": 0}).sort("ts", 1)
+        return await cursor.to_list(length=None)
 
     async def backfill_from_historical_data(self) -> None:
         """
@@ -605,6 +778,7 @@ class QuotesIngestionService:
         """
         # 非交易时段处理
         if not self._is_trading_time():
+            await self.flush_minute_bars()
             if settings.QUOTES_BACKFILL_ON_OFFHOURS:
                 await self.backfill_last_close_snapshot_if_needed()
             else:
@@ -651,8 +825,13 @@ class QuotesIngestionService:
             except Exception:
                 trade_date = datetime.now(self.tz).strftime("%Y%m%d")
 
-            # 入库
-            await self._bulk_upsert(quotes_map, trade_date, source_name)
+            # 入库（仅变化的行情）
+            changed = await self._bulk_upsert(quotes_map, trade_date, source_name)
+
+            # 分钟K线：聚合本次变化，写入已结束的分钟
+            if settings.QUOTES_MINUTE_BARS_ENABLED:
+                finished = self._update_minute_bars(changed, trade_date, source_name, datetime.now(self.tz))
+                await self._write_minute_bars(finished)
 
             # 记录成功状态
             await self._record_sync_status(
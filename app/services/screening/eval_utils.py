@@ -157,6 +157,103 @@ def evaluate_conditions(
     return False
 
 
+def evaluate_conditions_mask(
+    last: Dict[str, np.ndarray],
+    prev: Dict[str, np.ndarray],
+    node: Dict[str, Any],
+    allowed_fields: Iterable[str],
+    allowed_ops: Iterable[str],
+    size: int,
+) -> np.ndarray:
+    """
+    evaluate_conditions 的向量化版本：一次评估所有股票
+
+    Args:
+        last: 字段 -> 每只股票最近一行的取值（长度为 size 的数组）
+        prev: 字段 -> 每只股票倒数第二行的取值（不足两行为 NaN），用于 cross_up/cross_down
+        size: 股票数量
+
+    Returns:
+        长度为 size 的布尔数组，与逐只调用 evaluate_conditions 的结果一致
+    """
+    if not node:
+        return np.ones(size, dtype=bool)
+    # group 节点
+    if node.get("op") == "group" or "children" in node:
+        logic = (node.get("logic") or "AND").upper()
+        children = node.get("children", [])
+        if logic not in {"AND", "OR"}:
+            logic = "AND"
+        mask = np.ones(size, dtype=bool) if logic == "AND" else np.zeros(size, dtype=bool)
+        for c in children:
+            flags = evaluate_conditions_mask(last, prev, c, allowed_fields, allowed_ops, size)
+            mask = (mask & flags) if logic == "AND" else (mask | flags)
+        return mask
+
+    nothing = np.zeros(size, dtype=bool)
+    missing = np.full(size, np.nan)
+
+    # 叶子：字段比较
+    field = node.get("field")
+    op = node.get("op")
+    if field not in allowed_fields or op not in set(allowed_ops):
+        return nothing
+
+    # 需要最近两行（交叉）
+    if op in {"cross_up", "cross_down"}:
+        right_field = node.get("right_field")
+        if right_field not in allowed_fields:
+            return nothing
+        a0, b0 = last.get(field, missing), last.get(right_field, missing)
+        a1, b1 = prev.get(field, missing), prev.get(right_field, missing)
+        with np.errstate(invalid="ignore"):
+            if op == "cross_up":
+                mask = (a1 <= b1) & (a0 > b0)
+            else:
+                mask = (a1 >= b1) & (a0 < b0)
+        # 任一值为 NaN（含不足两行）时不满足
+        return mask & ~(np.isnan(a0) | np.isnan(a1) | np.isnan(b0) | np.isnan(b1))
+
+    # 普通比较：最近一行
+    left = last.get(field, missing)
+
+    if node.get("right_field"):
+        rf = node.get("right_field")
+        if rf not in allowed_fields:
+            return nothing
+        right = last.get(rf, missing)
+    else:
+        right = node.get("value")
+
+    try:
+        if op == "between":
+            lo_hi = right if isinstance(right, (list, tuple)) else (None, None)
+            lo, hi = lo_hi if isinstance(lo_hi, (list, tuple)) and len(lo_hi) == 2 else (None, None)
+            if lo is None or hi is None:
+                return nothing
+            mask = (float(lo) <= left) & (left <= float(hi))
+        else:
+            right = right if isinstance(right, np.ndarray) else float(right)
+            with np.errstate(invalid="ignore"):
+                if op == ">":
+                    mask = left > right
+                elif op == "<":
+                    mask = left < right
+                elif op == ">=":
+                    mask = left >= right
+                elif op == "<=":
+                    mask = left <= right
+                elif op == "==":
+                    mask = left == right
+                elif op == "!=":
+                    mask = left != right
+                else:
+                    return nothing
+    except Exception:
+        return nothing
+    return mask & ~np.isnan(left)
+
+
 def safe_float(v: Any) -> Optional[float]:
     try:
         if v is None or (isinstance(v, float) and np.isnan(v)):
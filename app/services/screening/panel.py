@@ -0,0 +1,147 @@
+"""
+Whole-market bar panel for the technical screener.
+
+Loads the recent bars of the whole universe at once (columnar bar store first,
+one Mongo ``$in`` query for the rest) and lays them out as wide frames so the
+indicator set and the condition DSL can be evaluated for all symbols together.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tradingagents.tools.analysis.indicators import IndicatorSpec, compute_many_panel
+
+logger = logging.getLogger("agents")
+
+# Screening field names of the raw bar columns
+BAR_FIELDS = {"open": "open", "high": "high", "low": "low", "close": "close", "volume": "vol", "amount": "amount"}
+
+
+@dataclass
+class ScreeningPanel:
+    """
+    Per-symbol bar sequences as wide frames (row = bar position, column = symbol).
+
+    Each column holds that symbol's own bars from row 0 with a NaN tail after
+    ``lengths[j]`` bars, so rolling/ewm indicators computed column-wise equal
+    the ones computed on the symbol's own DataFrame.
+    """
+    symbols: List[str]
+    fields: Dict[str, pd.DataFrame]
+    lengths: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ScreeningPanel":
+        """Build from a long frame with ``symbol``, ``trade_date`` and bar columns"""
+        df = df.copy()
+        df["symbol"] = df["symbol"].astype(str)
+        df["trade_date"] = pd.to_datetime(df["trade_date"])
+        # The same bar may be stored by several data sources; keep one per (symbol, date)
+        df = (df.drop_duplicates(subset=["symbol", "trade_date"], keep="first")
+                .sort_values(["symbol", "trade_date"], kind="stable"))
+        df["_pos"] = df.groupby("symbol", sort=False).cumcount()
+
+        fields = [f for f in BAR_FIELDS.values() if f in df.columns]
+        wide = df.pivot(index="_pos", columns="symbol", values=fields)
+        symbols = [str(s) for s in wide[fields[0]].columns]
+        lengths = df.groupby("symbol", sort=True).size().reindex(symbols).to_numpy()
+
+        frames = {f: wide[f].astype(np.float64).reset_index(drop=True) for f in fields}
+        for f in BAR_FIELDS.values():
+            frames.setdefault(f, pd.DataFrame(np.nan, index=frames["close"].index, columns=symbols))
+        return cls(symbols=symbols, fields=frames, lengths=lengths)
+
+    def with_indicators(self, specs: List[IndicatorSpec]) -> "ScreeningPanel":
+        fields = dict(self.fields)
+        # Same derived field as the per-symbol path: close.pct_change() * 100
+        fields["pct_chg"] = (fields["close"] / fields["close"].shift(1) - 1) * 100.0
+        fields = compute_many_panel(fields, specs)
+        return ScreeningPanel(symbols=self.symbols, fields=fields, lengths=self.lengths)
+
+    def row(self, back: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Values of every field at each symbol's ``back``-th bar from its end
+        (0 = latest). Symbols with too few bars get NaN.
+        """
+        idx = self.lengths - 1 - back
+        ok = idx >= 0
+        cols = np.arange(len(self.symbols))
+        out = {}
+        for name, frame in self.fields.items():
+            values = frame.to_numpy(dtype=np.float64)
+            picked = np.full(len(self.symbols), np.nan)
+            picked[ok] = values[idx[ok], cols[ok]]
+            out[name] = picked
+        return out
+
+
+def _bar_store():
+    try:
+        from tradingagents.dataflows.cache.bar_store import get_bar_store
+        return get_bar_store()
+    except Exception:
+        return None
+
+
+def load_universe_bars(symbols: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Load daily bars for the whole universe as one long frame.
+
+    Symbols covered by the columnar bar store are read memory-mapped, the rest
+    with a single ``stock_daily_quotes`` query.
+    """
+    frames = []
+    missing = list(symbols)
+    columns = list(BAR_FIELDS.keys())
+
+    store = _bar_store()
+    if store is not None:
+        stored = [s for s in symbols if store.covers(s, start_date, end_date)]
+        if stored:
+            frames.append(store.read_many(stored, start_date=start_date, end_date=end_date, columns=columns))
+            stored_set = set(stored)
+            missing = [s for s in symbols if s not in stored_set]
+
+    if missing:
+        try:
+            from app.core.database import get_mongo_db_sync
+
+            projection = {"_id": 0, "symbol": 1, "trade_date": 1}
+            projection.update({c: 1 for c in columns})
+            cursor = get_mongo_db_sync()["stock_daily_quotes"].find(
+                {
+                    "symbol": {"$in": missing},
+                    "trade_date": {"$gte": start_date, "$lte": end_date},
+                    "period": "daily",
+                },
+                projection
+            )
+            records = list(cursor)
+            if records:
+                df = pd.DataFrame(records)
+                for col in columns:
+                    df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else np.nan
+                frames.append(df)
+        except Exception as e:
+            logger.warning(f"⚠️ 批量加载K线失败: {e}")
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    df["symbol"] = df["symbol"].astype(str)
+    logger.info(f"📊 选股面板: {df['symbol'].nunique()}/{len(symbols)} 只股票, {len(df)} 根K线")
+    return df.rename(columns=BAR_FIELDS)
+
+
+def build_screening_panel(symbols: List[str], start_date: str, end_date: str) -> Optional[ScreeningPanel]:
+    df = load_universe_bars(symbols, start_date, end_date)
+    if df.empty:
+        return None
+    return ScreeningPanel.from_frame(df)
@@ -17,9 +17,11 @@ from tradingagents.dataflows.providers.china.fundamentals_snapshot import get_cn
 from app.services.screening.eval_utils import (
     collect_fields_from_conditions as _collect_fields_from_conditions_util,
     evaluate_conditions as _evaluate_conditions_util,
+    evaluate_conditions_mask as _evaluate_conditions_mask_util,
     evaluate_fund_conditions as _evaluate_fund_conditions_util,
     safe_float as _safe_float_util,
 )
+from app.services.screening.panel import build_screening_panel
 
 # --- DSL 约束 ---
 ALLOWED_FIELDS = {
@@ -54,6 +56,27 @@ FUND_FIELDS = {"pe", "pb", "roe", "market_cap"}
 
 ALLOWED_OPS = {">", "<", ">=", "<=", "==", "!=", "between", "cross_up", "cross_down"}
 
+# 选股统一计算的技术指标
+SCREENING_INDICATORS = [
+    IndicatorSpec("ma", {"n": 5}),
+    IndicatorSpec("ma", {"n": 10}),
+    IndicatorSpec("ma", {"n": 20}),
+    IndicatorSpec("ma", {"n": 60}),
+    IndicatorSpec("ema", {"n": 12}),
+    IndicatorSpec("ema", {"n": 26}),
+    IndicatorSpec("macd"),
+    IndicatorSpec("rsi", {"n": 14}),
+    IndicatorSpec("boll", {"n": 20, "k": 2}),
+    IndicatorSpec("atr", {"n": 14}),
+    IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3}),
+]
+
+# 结果项返回的字段（技术指标仅在条件/排序涉及技术指标时返回）
+RESULT_FIELDS = ["close", "pct_chg", "amount", "ma20", "rsi14", "kdj_k", "kdj_d", "kdj_j", "dif", "dea", "macd_hist"]
+
+# 面板不可用、退回逐只获取K线时的样本上限
+LEGACY_SYMBOL_LIMIT = 120
+
 
 @dataclass
 class ScreeningParams:
@@ -76,16 +99,12 @@ class ScreeningService:
     # --- 公共入口 ---
     def run(self, conditions: Dict[str, Any], params: ScreeningParams) -> Dict[str, Any]:
         symbols = self._get_universe()
-        # 为控制时长，先限制样本规模（后续用批量/缓存优化）
-        symbols = symbols[:120]
 
         end_date = datetime.now()
         start_date = end_date - timedelta(days=220)
         end_s = end_date.strftime("%Y-%m-%d")
         start_s = start_date.strftime("%Y-%m-%d")
 
-        results: List[Dict[str, Any]] = []
-
         # 解析条件中涉及的字段，决定是否需要技术指标/行情
         needed_fields = self._collect_fields_from_conditions(conditions)
         order_fields = {o.get("field") for o in (params.order_by or []) if o.get("field")}
@@ -94,6 +113,65 @@ class ScreeningService:
         need_base = any(f in BASE_FIELDS for f in all_needed) or need_tech
         need_fund = any(f in FUND_FIELDS for f in all_needed)
 
+        results: Optional[List[Dict[str, Any]]] = None
+        if need_base:
+            # 全市场一次性加载K线面板，指标与条件按列向量化计算
+            results = self._run_vectorized(symbols, conditions, start_s, end_s, need_tech)
+            if results is None:
+                # 面板不可用（库中无K线）时退回逐只获取，限制样本规模以控制时长
+                logger.warning(f"⚠️ 选股面板为空，退回逐只计算（前{LEGACY_SYMBOL_LIMIT}只）")
+                symbols = symbols[:LEGACY_SYMBOL_LIMIT]
+
+        if results is None:
+            results = self._run_per_symbol(symbols, conditions, start_s, end_s, need_base, need_tech, need_fund)
+
+        total = len(results)
+        # 排序
+        if params.order_by:
+            for order in reversed(params.order_by):  # 后者优先级低
+                f = order.get("field")
+                d = order.get("direction", "desc").lower()
+                if f in ALLOWED_FIELDS:
+                    results.sort(key=lambda x: (x.get(f) is None, x.get(f)), reverse=(d == "desc"))
+
+        # 分页
+        start = params.offset or 0
+        end = start + (params.limit or 50)
+        page_items = results[start:end]
+
+        return {
+            "total": total,
+            "items": page_items,
+        }
+
+    def _run_vectorized(self, symbols: List[str], conditions: Dict[str, Any],
+                        start_s: str, end_s: str, need_tech: bool) -> Optional[List[Dict[str, Any]]]:
+        """全市场向量化选股；面板为空时返回 None"""
+        panel = build_screening_panel(symbols, start_s, end_s)
+        if panel is None:
+            return None
+
+        panel = panel.with_indicators(SCREENING_INDICATORS if need_tech else [])
+        last = panel.row(0)
+        prev = panel.row(1)
+        mask = _evaluate_conditions_mask_util(
+            last, prev, conditions, ALLOWED_FIELDS, ALLOWED_OPS, len(panel.symbols)
+        )
+
+        results: List[Dict[str, Any]] = []
+        for j in np.flatnonzero(mask):
+            item = {"code": panel.symbols[j]}
+            for f in RESULT_FIELDS:
+                if f in BASE_FIELDS or need_tech:
+                    item[f] = self._safe_float(last[f][j]) if f in last else None
+                else:
+                    item[f] = None
+            results.append(item)
+        return results
+
+    def _run_per_symbol(self, symbols: List[str], conditions: Dict[str, Any], start_s: str, end_s: str,
+                        need_base: bool, need_tech: bool, need_fund: bool) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
         for code in symbols:
             try:
                 dfc = None
@@ -116,19 +194,7 @@ class ScreeningService:
 
                     # 仅在需要技术指标时计算
                     if need_tech:
-                        specs = [
-                            IndicatorSpec("ma", {"n": 5}),
-                            IndicatorSpec("ma", {"n": 10}),
-                            IndicatorSpec("ma", {"n": 20}),
-                            IndicatorSpec("ema", {"n": 12}),
-                            IndicatorSpec("ema", {"n": 26}),
-                            IndicatorSpec("macd"),
-                            IndicatorSpec("rsi", {"n": 14}),
-                            IndicatorSpec("boll", {"n": 20, "k": 2}),
-                            IndicatorSpec("atr", {"n": 14}),
-                            IndicatorSpec("kdj", {"n": 9, "m1": 3, "m2": 3}),
-                        ]
-                        dfc = compute_many(dfu, specs)
+                        dfc = compute_many(dfu, SCREENING_INDICATORS)
                     else:
                         dfc = dfu
 
@@ -150,40 +216,14 @@ class ScreeningService:
                     item = {"code": code}
                     if last is not None:
                         item.update({
-                            "close": self._safe_float(last.get("close")),
-                            "pct_chg": self._safe_float(last.get("pct_chg")),
-                            "amount": self._safe_float(last.get("amount")),
-                            "ma20": self._safe_float(last.get("ma20")) if need_tech else None,
-                            "rsi14": self._safe_float(last.get("rsi14")) if need_tech else None,
-                            "kdj_k": self._safe_float(last.get("kdj_k")) if need_tech else None,
-                            "kdj_d": self._safe_float(last.get("kdj_d")) if need_tech else None,
-                            "kdj_j": self._safe_float(last.get("kdj_j")) if need_tech else None,
-                            "dif": self._safe_float(last.get("dif")) if need_tech else None,
-                            "dea": self._safe_float(last.get("dea")) if need_tech else None,
-                            "macd_hist": self._safe_float(last.get("macd_hist")) if need_tech else None,
+                            f: self._safe_float(last.get(f)) if (f in BASE_FIELDS or need_tech) else None
+                            for f in RESULT_FIELDS
                         })
                     results.append(item)
             except Exception:
                 continue
+        return results
 
-        total = len(results)
-        # 排序
-        if params.order_by:
-            for order in reversed(params.order_by):  # 后者优先级低
-                f = order.get("field")
-                d = order.get("direction", "desc").lower()
-                if f in ALLOWED_FIELDS:
-                    results.sort(key=lambda x: (x.get(f) is None, x.get(f)), reverse=(d == "desc"))
-
-        # 分页
-        start = params.offset or 0
-        end = start + (params.limit or 50)
-        page_items = results[start:end]
-
-        return {
-            "total": total,
-            "items": page_items,
-        }
     def _evaluate_fund_conditions(self, snap: Dict[str, Any], node: Dict[str, Any]) -> bool:
         """Delegate fundamental condition evaluation to utils to keep service slim."""
         return _evaluate_fund_conditions_util(snap, node, FUND_FIELDS)
@@ -206,9 +246,9 @@ class ScreeningService:
     def _get_universe(self) -> List[str]:
         """获取A股代码集合：从 MongoDB stock_basic_info 集合获取所有A股股票代码"""
         try:
-            from app.core.database import get_mongo_db
+            from app.core.database import get_mongo_db_sync
 
-            db = get_mongo_db()
+            db = get_mongo_db_sync()
             collection = db.stock_basic_info
 
             # 查询所有A股股票代码（兼容不同的数据结构）
@@ -4,8 +4,12 @@
 """
 
 import asyncio
+import hashlib
+import json
+import threading
 import uuid
 import logging
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from pathlib import Path
@@ -591,8 +595,13 @@ def create_analysis_config(
 class SimpleAnalysisService:
     """简化的股票分析服务类"""
 
+    # 按配置复用的 TradingAgentsGraph 实例上限（LRU 淘汰）
+    TRADING_GRAPH_POOL_SIZE = 8
+
     def __init__(self):
-        self._trading_graph_cache = {}
+        self._trading_graph_cache: "OrderedDict[str, TradingAgentsGraph]" = OrderedDict()
+        self._trading_graph_lock = threading.Lock()
+        self._trading_graph_build_locks: Dict[str, threading.Lock] = {}
         self.memory_manager = get_memory_state_manager()
 
         # 进度跟踪器缓存
@@ -704,26 +713,50 @@ class SimpleAnalysisService:
             logger.warning(f"⚠️ 生成新的用户ID: {new_object_id}")
             return PyObjectId(new_object_id)
 
+    @staticmethod
+    def _trading_graph_key(config: Dict[str, Any]) -> str:
+        """配置哈希：配置完全相同的任务复用同一个 TradingAgentsGraph"""
+        payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
     def _get_trading_graph(self, config: Dict[str, Any]) -> TradingAgentsGraph:
         """获取或创建TradingAgents实例
 
-        ⚠️ 注意：为了避免并发执行时的数据混淆，每次都创建新实例
-        虽然这会增加一些初始化开销，但可以确保线程安全
-
-        TradingAgentsGraph 实例包含可变状态（self.ticker, self.curr_state等），
-        如果多个线程共享同一个实例，会导致数据混淆。
+        LLM 客户端、记忆库和编译后的图只依赖配置，按配置哈希池化复用；
+        单次运行的状态（ticker、curr_state、task_id）随 propagate 调用传递并按线程隔离，
+        因此同一实例可被并发任务安全共享。
         """
-        # 🔧 [并发安全] 每次都创建新实例，避免多线程共享状态
-        # 不再使用缓存，因为 TradingAgentsGraph 有可变的实例变量
-        logger.info(f"🔧 创建新的TradingAgents实例（并发安全模式）...")
-
-        trading_graph = TradingAgentsGraph(
-            selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
-            debug=config.get("debug", False),
-            config=config
-        )
-
-        logger.info(f"✅ TradingAgents实例创建成功（实例ID: {id(trading_graph)}）")
+        key = self._trading_graph_key(config)
+
+        with self._trading_graph_lock:
+            trading_graph = self._trading_graph_cache.get(key)
+            if trading_graph is not None:
+                self._trading_graph_cache.move_to_end(key)
+                logger.info(f"♻️ 复用TradingAgents实例（实例ID: {id(trading_graph)}）")
+                return trading_graph
+            build_lock = self._trading_graph_build_locks.setdefault(key, threading.Lock())
+
+        # 同一配置只构建一次，不同配置可并行构建
+        with build_lock:
+            with self._trading_graph_lock:
+                trading_graph = self._trading_graph_cache.get(key)
+            if trading_graph is not None:
+                return trading_graph
+
+            logger.info(f"🔧 创建新的TradingAgents实例...")
+            trading_graph = TradingAgentsGraph(
+                selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
+                debug=config.get("debug", False),
+                config=config
+            )
+            logger.info(f"✅ TradingAgents实例创建成功（实例ID: {id(trading_graph)}）")
+
+            with self._trading_graph_lock:
+                self._trading_graph_cache[key] = trading_graph
+                self._trading_graph_build_locks.pop(key, None)
+                while len(self._trading_graph_cache) > self.TRADING_GRAPH_POOL_SIZE:
+                    evicted_key, _ = self._trading_graph_cache.popitem(last=False)
+                    logger.info(f"🗑️ 淘汰TradingAgents实例: {evicted_key[:12]}")
 
         return trading_graph
 
@@ -7,9 +7,13 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 
+from app.core.config import settings
 from app.core.database import get_mongo_db
+from app.core.rate_limiter import get_akshare_rate_limiter
 from app.services.historical_data_service import get_historical_data_service
+from app.services.scheduler_service import TaskCancelledException
 from app.services.news_data_service import get_news_data_service
+from app.worker.sync_pipeline import SymbolSyncPipeline, SymbolSyncStats, job_hooks
 from tradingagents.dataflows.providers.china.akshare import get_akshare_provider
 
 logger = logging.getLogger(__name__)
@@ -535,7 +539,8 @@ class AKShareSyncService:
         end_date: str = None,
         symbols: List[str] = None,
         incremental: bool = True,
-        period: str = "daily"
+        period: str = "daily",
+        job_id: str = None
     ) -> Dict[str, Any]:
         """
         同步历史数据
@@ -546,6 +551,7 @@ class AKShareSyncService:
             symbols: 指定股票代码列表
             incremental: 是否增量同步
             period: 数据周期 (daily/weekly/monthly)
+            job_id: 任务ID（用于停止检查与进度跟踪）
 
         Returns:
             同步结果统计
@@ -590,27 +596,15 @@ class AKShareSyncService:
 
             logger.info(f"📊 历史数据同步: 结束日期={end_date}, 股票数量={len(symbols)}, 模式={'增量' if incremental else '全量'}")
 
-            # 4. 批量处理
-            for i in range(0, len(symbols), self.batch_size):
-                batch = symbols[i:i + self.batch_size]
-                batch_stats = await self._process_historical_batch(
-                    batch, start_date, end_date, period, incremental
-                )
-
-                # 更新统计
-                stats["success_count"] += batch_stats["success_count"]
-                stats["error_count"] += batch_stats["error_count"]
-                stats["total_records"] += batch_stats["total_records"]
-                stats["errors"].extend(batch_stats["errors"])
-
-                # 进度日志
-                progress = min(i + self.batch_size, len(symbols))
-                logger.info(f"📈 历史数据同步进度: {progress}/{len(symbols)} "
-                           f"(成功: {stats['success_count']}, 记录: {stats['total_records']})")
-
-                # API限流
-                if i + self.batch_size < len(symbols):
-                    await asyncio.sleep(self.rate_limit_delay)
+            # 4. 流水线处理：并发请求、工作线程标准化、多只股票合并批量写入
+            pipeline_stats = await self._run_historical_pipeline(
+                symbols, start_date, end_date, period, incremental, job_id
+            )
+            stats["success_count"] = pipeline_stats.success_count
+            stats["error_count"] = pipeline_stats.error_count
+            stats["total_records"] = pipeline_stats.total_records
+            stats["errors"].extend(pipeline_stats.errors)
+            stats["cancelled"] = pipeline_stats.cancelled
 
             # 4. 完成统计
             stats["end_time"] = datetime.utcnow()
@@ -624,76 +618,57 @@ class AKShareSyncService:
 
             return stats
 
+        except TaskCancelledException:
+            logger.warning("⚠️ 历史数据同步任务被用户取消")
+            raise
         except Exception as e:
             logger.error(f"❌ 历史数据同步失败: {e}")
             stats["errors"].append({"error": str(e), "context": "sync_historical_data"})
             return stats
 
-    async def _process_historical_batch(
+    async def _run_historical_pipeline(
         self,
-        batch: List[str],
-        start_date: str,
+        symbols: List[str],
+        start_date: Optional[str],
         end_date: str,
         period: str = "daily",
-        incremental: bool = False
-    ) -> Dict[str, Any]:
-        """处理历史数据批次"""
-        batch_stats = {
-            "success_count": 0,
-            "error_count": 0,
-            "total_records": 0,
-            "errors": []
-        }
-
-        for symbol in batch:
-            try:
-                # 确定该股票的起始日期
-                symbol_start_date = start_date
-                if not symbol_start_date:
-                    if incremental:
-                        # 增量同步：获取该股票的最后日期
-                        symbol_start_date = await self._get_last_sync_date(symbol)
-                        logger.debug(f"📅 {symbol}: 从 {symbol_start_date} 开始同步")
-                    else:
-                        # 全量同步：最近1年
-                        symbol_start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
-
-                # 获取历史数据
-                hist_data = await self.provider.get_historical_data(symbol, symbol_start_date, end_date, period)
-
-                if hist_data is not None and not hist_data.empty:
-                    # 保存到统一历史数据集合
-                    if self.historical_service is None:
-                        self.historical_service = await get_historical_data_service()
-
-                    saved_count = await self.historical_service.save_historical_data(
-                        symbol=symbol,
-                        data=hist_data,
-                        data_source="akshare",
-                        market="CN",
-                        period=period
-                    )
+        incremental: bool = False,
+        job_id: str = None
+    ) -> SymbolSyncStats:
+        """通过同步流水线拉取并保存历史数据"""
+        if self.historical_service is None:
+            self.historical_service = await get_historical_data_service()
 
-                    batch_stats["success_count"] += 1
-                    batch_stats["total_records"] += saved_count
-                    logger.debug(f"✅ {symbol}历史数据同步成功: {saved_count}条记录")
+        async def fetch(symbol: str):
+            # 确定该股票的起始日期
+            symbol_start_date = start_date
+            if not symbol_start_date:
+                if incremental:
+                    # 增量同步：获取该股票的最后日期
+                    symbol_start_date = await self._get_last_sync_date(symbol)
+                    logger.debug(f"📅 {symbol}: 从 {symbol_start_date} 开始同步")
                 else:
-                    batch_stats["error_count"] += 1
-                    batch_stats["errors"].append({
-                        "code": symbol,
-                        "error": "历史数据为空",
-                        "context": "_process_historical_batch"
-                    })
+                    # 全量同步：最近1年
+                    symbol_start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+            return await self.provider.get_historical_data(symbol, symbol_start_date, end_date, period)
 
-            except Exception as e:
-                batch_stats["error_count"] += 1
-                batch_stats["errors"].append({
-                    "code": symbol,
-                    "error": str(e),
-                    "context": "_process_historical_batch"
-                })
+        def transform(symbol: str, hist_data):
+            return self.historical_service.prepare_documents(symbol, hist_data, "akshare", "CN", period)
 
-        return batch_stats
+        async def write(batch):
+            return await self.historical_service.save_documents(
+                dict(batch), market="CN", period=period, batch_size=settings.SYNC_PIPELINE_WRITE_BATCH_SIZE
+            )
+
+        pipeline = SymbolSyncPipeline(
+            fetch, write, transform,
+            name=f"AKShare历史数据({period})",
+            concurrency=settings.AKSHARE_SYNC_CONCURRENCY,
+            rate_limiter=get_akshare_rate_limiter(max_calls=settings.AKSHARE_SYNC_MAX_CALLS_PER_MINUTE),
+            write_batch_size=settings.SYNC_PIPELINE_WRITE_BATCH_SIZE,
+            **job_hooks(self.db, job_id)
+        )
+        return await pipeline.run(symbols)
 
     async def _get_last_sync_date(self, symbol: str = None) -> str:
         """
@@ -1189,7 +1164,7 @@ async def run_akshare_historical_sync(incremental: bool = True):
     """APScheduler任务：同步历史数据"""
     try:
         service = await get_akshare_sync_service()
-        result = await service.sync_historical_data(incremental=incremental)
+        result = await service.sync_historical_data(incremental=incremental, job_id="akshare_historical_sync")
         logger.info(f"✅ AKShare历史数据同步完成: {result}")
         return result
     except Exception as e:
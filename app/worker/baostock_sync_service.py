@@ -9,9 +9,13 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from pymongo import UpdateOne
+
 from app.core.config import get_settings
 from app.core.database import get_database
+from app.core.rate_limiter import get_baostock_rate_limiter
 from app.services.historical_data_service import get_historical_data_service
+from app.worker.sync_pipeline import SymbolSyncPipeline, SymbolSyncStats, job_hooks
 from tradingagents.dataflows.providers.china.baostock import BaoStockProvider
 
 logger = logging.getLogger(__name__)
@@ -345,15 +349,17 @@ class BaoStockSyncService:
             logger.error(f"❌ 更新日K线到数据库失败: {e}")
             raise
     
-    async def sync_historical_data(self, days: int = 30, batch_size: int = 20, period: str = "daily", incremental: bool = True) -> BaoStockSyncStats:
+    async def sync_historical_data(self, days: int = 30, batch_size: int = 20, period: str = "daily",
+                                   incremental: bool = True, job_id: str = None) -> BaoStockSyncStats:
         """
         同步历史数据
 
         Args:
             days: 同步天数（如果>=3650则同步全历史，如果<0则使用增量模式）
-            batch_size: 批处理大小
+            batch_size: 批处理大小（保留参数以兼容调用方，写入批量由 SYNC_PIPELINE_WRITE_BATCH_SIZE 控制）
             period: 数据周期 (daily/weekly/monthly)
             incremental: 是否增量同步（每只股票从自己的最后日期开始）
+            job_id: 任务ID（用于停止检查与进度跟踪）
 
         Returns:
             同步统计信息
@@ -387,21 +393,13 @@ class BaoStockSyncService:
 
             logger.info(f"📊 开始同步{len(stock_codes)}只股票的历史数据...")
 
-            # 批量处理
-            for i in range(0, len(stock_codes), batch_size):
-                batch = stock_codes[i:i + batch_size]
-                batch_stats = await self._sync_historical_batch(batch, days, end_date, period, use_incremental)
-                
-                stats.historical_records += batch_stats.historical_records
-                stats.errors.extend(batch_stats.errors)
-                
-                logger.info(f"📊 批次进度: {i + len(batch)}/{len(stock_codes)}, "
-                          f"记录: {batch_stats.historical_records}, "
-                          f"错误: {len(batch_stats.errors)}")
-                
-                # 避免API限制
-                await asyncio.sleep(0.5)
-            
+            # 流水线处理：请求与写库并行，多只股票合并批量写入
+            pipeline_stats = await self._run_historical_pipeline(
+                stock_codes, days, end_date, period, use_incremental, job_id
+            )
+            stats.historical_records += pipeline_stats.total_records
+            stats.errors.extend(f"处理{e['code']}历史数据失败: {e['error']}" for e in pipeline_stats.errors)
+
             logger.info(f"✅ BaoStock历史数据同步完成: {stats.historical_records}条记录")
             return stats
             
@@ -410,44 +408,78 @@ class BaoStockSyncService:
             stats.errors.append(str(e))
             return stats
     
-    async def _sync_historical_batch(
+    async def _run_historical_pipeline(
         self,
-        code_batch: List[str],
+        stock_codes: List[str],
         days: int,
         end_date: str,
         period: str = "daily",
-        incremental: bool = False
-    ) -> BaoStockSyncStats:
-        """同步历史数据批次"""
-        stats = BaoStockSyncStats()
-
-        for code in code_batch:
-            try:
-                # 确定该股票的起始日期
-                if incremental:
-                    # 增量同步：获取该股票的最后日期
-                    start_date = await self._get_last_sync_date(code)
-                    logger.debug(f"📅 {code}: 从 {start_date} 开始同步")
-                elif days >= 3650:
-                    # 全历史同步
-                    start_date = "1990-01-01"
-                else:
-                    # 固定天数同步
-                    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-
-                hist_data = await self.provider.get_historical_data(code, start_date, end_date, period)
-
-                if hist_data is not None and not hist_data.empty:
-                    # 更新数据库
-                    records_count = await self._update_historical_data(code, hist_data, period)
-                    stats.historical_records += records_count
-                else:
-                    stats.errors.append(f"获取{code}历史数据失败")
-
-            except Exception as e:
-                stats.errors.append(f"处理{code}历史数据失败: {e}")
+        incremental: bool = False,
+        job_id: str = None
+    ) -> SymbolSyncStats:
+        """通过同步流水线拉取并保存历史数据"""
+        if self.historical_service is None:
+            self.historical_service = await get_historical_data_service()
+
+        async def fetch(code: str):
+            # 确定该股票的起始日期
+            if incremental:
+                # 增量同步：获取该股票的最后日期
+                start_date = await self._get_last_sync_date(code)
+                logger.debug(f"📅 {code}: 从 {start_date} 开始同步")
+            elif days >= 3650:
+                # 全历史同步
+                start_date = "1990-01-01"
+            else:
+                # 固定天数同步
+                start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+            return await self.provider.get_historical_data(code, start_date, end_date, period)
+
+        def transform(code: str, hist_data):
+            return self.historical_service.prepare_documents(code, hist_data, "baostock", "CN", period)
+
+        async def write(batch):
+            docs_by_symbol = dict(batch)
+            saved_count = await self.historical_service.save_documents(
+                docs_by_symbol, market="CN", period=period,
+                batch_size=self.settings.SYNC_PIPELINE_WRITE_BATCH_SIZE
+            )
+            await self._update_historical_meta(docs_by_symbol)
+            return saved_count
 
-        return stats
+        # BaoStock 每次请求都在全局会话上 login/logout，并发请求会互相干扰，因此只用一个请求协程；
+        # 流水线仍可让网络等待与标准化、写库重叠
+        pipeline = SymbolSyncPipeline(
+            fetch, write, transform,
+            name=f"BaoStock历史数据({period})",
+            concurrency=1,
+            rate_limiter=get_baostock_rate_limiter(),
+            write_batch_size=self.settings.SYNC_PIPELINE_WRITE_BATCH_SIZE,
+            **job_hooks(self.db, job_id)
+        )
+        return await pipeline.run(stock_codes)
+
+    async def _update_historical_meta(self, docs_by_symbol: Dict[str, List[Dict[str, Any]]]):
+        """批量更新market_quotes集合的历史数据元信息（保持兼容性）"""
+        if self.db is None or not docs_by_symbol:
+            return
+        now = datetime.now()
+        operations = [
+            UpdateOne(
+                {"code": code},
+                {"$set": {
+                    "historical_data_updated": now,
+                    "latest_historical_date": docs[-1].get("trade_date") if docs else None,
+                    "historical_records_count": len(docs)
+                }},
+                upsert=True
+            )
+            for code, docs in docs_by_symbol.items()
+        ]
+        try:
+            await self.db.market_quotes.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"⚠️ 更新历史数据元信息失败: {e}")
 
     async def _update_historical_data(self, code: str, hist_data, period: str = "daily") -> int:
         """更新历史数据到数据库"""
@@ -590,7 +622,7 @@ async def run_baostock_historical_sync():
     try:
         service = BaoStockSyncService()
         await service.initialize()  # 🔥 必须先初始化
-        stats = await service.sync_historical_data()
+        stats = await service.sync_historical_data(job_id="baostock_historical_sync")
         logger.info(f"🎯 BaoStock历史数据同步完成: {stats.historical_records}条记录, {len(stats.errors)}个错误")
     except Exception as e:
         logger.error(f"❌ BaoStock历史数据同步任务失败: {e}")
@@ -31,6 +31,7 @@ from tradingagents.dataflows.providers.hk.hk_stock import HKStockProvider
 from tradingagents.dataflows.providers.hk.improved_hk import ImprovedHKStockProvider
 from app.core.database import get_mongo_db
 from app.core.config import settings
+from app.worker.sync_pipeline import job_hooks, run_upsert_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -140,7 +141,8 @@ class HKDataService:
     async def sync_basic_info_from_source(
         self,
         source: str,
-        force_update: bool = False
+        force_update: bool = False,
+        job_id: str = None
     ) -> Dict[str, int]:
         """
         从指定数据源同步港股基础信息
@@ -148,6 +150,7 @@ class HKDataService:
         Args:
             source: 数据源名称 (yfinance/akshare)
             force_update: 是否强制更新（强制刷新股票列表）
+            job_id: 任务ID（用于停止检查与进度跟踪）
 
         Returns:
             Dict: 同步统计信息 {updated: int, inserted: int, failed: int}
@@ -177,59 +180,41 @@ class HKDataService:
         logger.info(f"🇭🇰 开始同步港股基础信息 (数据源: {source})")
         logger.info(f"📊 待同步股票数量: {len(stock_list)}")
 
-        operations = []
-        failed_count = 0
-
-        for stock_code in stock_list:
-            try:
-                # 从数据源获取数据
-                stock_info = provider.get_stock_info(stock_code)
-
-                if not stock_info or not stock_info.get('name'):
-                    logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
-                    failed_count += 1
-                    continue
-
-                # 标准化数据格式
-                normalized_info = self._normalize_stock_info(stock_info, source)
-                normalized_info["code"] = stock_code.lstrip('0').zfill(5)  # 标准化为5位代码
-                normalized_info["source"] = source
-                normalized_info["updated_at"] = datetime.now()
-
-                # 批量更新操作
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
-                        {"$set": normalized_info},
-                        upsert=True
-                    )
-                )
-
-                logger.debug(f"✅ 准备同步: {stock_code} ({stock_info.get('name')}) from {source}")
-
-            except Exception as e:
-                logger.error(f"❌ 同步失败: {stock_code} from {source}: {e}")
-                failed_count += 1
-
-        # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
-
-        if operations:
-            try:
-                bulk_result = await self.db.stock_basic_info_hk.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-
-                logger.info(
-                    f"✅ 港股基础信息同步完成 ({source}): "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
-                )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
-
+        async def fetch(stock_code: str):
+            return await asyncio.to_thread(provider.get_stock_info, stock_code)
+
+        def transform(stock_code: str, stock_info: Dict):
+            if not stock_info.get('name'):
+                logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
+                return None
+
+            # 标准化数据格式
+            normalized_info = self._normalize_stock_info(stock_info, source)
+            normalized_info["code"] = stock_code.lstrip('0').zfill(5)  # 标准化为5位代码
+            normalized_info["source"] = source
+            normalized_info["updated_at"] = datetime.now()
+
+            return UpdateOne(
+                {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
+                {"$set": normalized_info},
+                upsert=True
+            )
+
+        # 并发请求 + 合并批量写入
+        result = await run_upsert_pipeline(
+            stock_list, fetch, transform, self.db.stock_basic_info_hk,
+            name=f"港股基础信息({source})",
+            concurrency=self.settings.SYNC_PIPELINE_CONCURRENCY,
+            write_batch_size=self.settings.SYNC_PIPELINE_WRITE_BATCH_SIZE,
+            **job_hooks(self.db, job_id)
+        )
+
+        logger.info(
+            f"✅ 港股基础信息同步完成 ({source}): "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
         return result
 
     async def _sync_basic_info_from_akshare_batch(self, force_update: bool = False) -> Dict[str, int]:
@@ -375,13 +360,15 @@ class HKDataService:
     
     async def sync_quotes_from_source(
         self,
-        source: str = "yfinance"
+        source: str = "yfinance",
+        job_id: str = None
     ) -> Dict[str, int]:
         """
         从指定数据源同步港股实时行情
         
         Args:
             source: 数据源名称 (默认 yfinance)
+            job_id: 任务ID（用于停止检查与进度跟踪）
         
         Returns:
             Dict: 同步统计信息
@@ -393,69 +380,53 @@ class HKDataService:
         
         logger.info(f"🇭🇰 开始同步港股实时行情 (数据源: {source})")
         
-        operations = []
-        failed_count = 0
-        
-        for stock_code in self.hk_stock_list:
-            try:
-                # 获取实时价格
-                quote = provider.get_real_time_price(stock_code)
-                
-                if not quote or not quote.get('price'):
-                    logger.warning(f"⚠️ 跳过无效行情: {stock_code}")
-                    failed_count += 1
-                    continue
-                
-                # 标准化行情数据
-                normalized_quote = {
-                    "code": stock_code.lstrip('0').zfill(5),
-                    "close": float(quote.get('price', 0)),
-                    "open": float(quote.get('open', 0)),
-                    "high": float(quote.get('high', 0)),
-                    "low": float(quote.get('low', 0)),
-                    "volume": int(quote.get('volume', 0)),
-                    "currency": "HKD",
-                    "updated_at": datetime.now()
-                }
-                
-                # 计算涨跌幅
-                if normalized_quote["open"] > 0:
-                    pct_chg = ((normalized_quote["close"] - normalized_quote["open"]) / normalized_quote["open"]) * 100
-                    normalized_quote["pct_chg"] = round(pct_chg, 2)
-                
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_quote["code"]},
-                        {"$set": normalized_quote},
-                        upsert=True
-                    )
-                )
-                
-                logger.debug(f"✅ 准备同步行情: {stock_code} (价格: {normalized_quote['close']} HKD)")
-                
-            except Exception as e:
-                logger.error(f"❌ 同步行情失败: {stock_code}: {e}")
-                failed_count += 1
-        
-        # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
-        
-        if operations:
-            try:
-                bulk_result = await self.db.market_quotes_hk.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-                
-                logger.info(
-                    f"✅ 港股行情同步完成: "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
-                )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
-        
+        async def fetch(stock_code: str):
+            # 获取实时价格
+            return await asyncio.to_thread(provider.get_real_time_price, stock_code)
+
+        def transform(stock_code: str, quote: Dict):
+            if not quote.get('price'):
+                logger.warning(f"⚠️ 跳过无效行情: {stock_code}")
+                return None
+
+            # 标准化行情数据
+            normalized_quote = {
+                "code": stock_code.lstrip('0').zfill(5),
+                "close": float(quote.get('price', 0)),
+                "open": float(quote.get('open', 0)),
+                "high": float(quote.get('high', 0)),
+                "low": float(quote.get('low', 0)),
+                "volume": int(quote.get('volume', 0)),
+                "currency": "HKD",
+                "updated_at": datetime.now()
+            }
+
+            # 计算涨跌幅
+            if normalized_quote["open"] > 0:
+                pct_chg = ((normalized_quote["close"] - normalized_quote["open"]) / normalized_quote["open"]) * 100
+                normalized_quote["pct_chg"] = round(pct_chg, 2)
+
+            return UpdateOne(
+                {"code": normalized_quote["code"]},
+                {"$set": normalized_quote},
+                upsert=True
+            )
+
+        # 并发请求 + 合并批量写入
+        result = await run_upsert_pipeline(
+            self.hk_stock_list, fetch, transform, self.db.market_quotes_hk,
+            name=f"港股行情({source})",
+            concurrency=self.settings.SYNC_PIPELINE_CONCURRENCY,
+            write_batch_size=self.settings.SYNC_PIPELINE_WRITE_BATCH_SIZE,
+            **job_hooks(self.db, job_id)
+        )
+
+        logger.info(
+            f"✅ 港股行情同步完成: "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
         return result
 
 
@@ -463,11 +434,11 @@ class HKDataService:
 
 _hk_sync_service = None
 
-async def get_hk_sync_service() -> HKSyncService:
+async def get_hk_sync_service() -> HKDataService:
     """获取港股同步服务实例"""
     global _hk_sync_service
     if _hk_sync_service is None:
-        _hk_sync_service = HKSyncService()
+        _hk_sync_service = HKDataService()
         await _hk_sync_service.initialize()
     return _hk_sync_service
 
@@ -478,7 +449,9 @@ async def run_hk_yfinance_basic_info_sync(force_update: bool = False):
     """APScheduler任务：港股基础信息同步（yfinance）"""
     try:
         service = await get_hk_sync_service()
-        result = await service.sync_basic_info_from_source("yfinance", force_update)
+        result = await service.sync_basic_info_from_source(
+            "yfinance", force_update, job_id="hk_yfinance_basic_info_sync"
+        )
         logger.info(f"✅ 港股基础信息同步完成 (yfinance): {result}")
         return result
     except Exception as e:
@@ -490,7 +463,9 @@ async def run_hk_akshare_basic_info_sync(force_update: bool = False):
     """APScheduler任务：港股基础信息同步（akshare）"""
     try:
         service = await get_hk_sync_service()
-        result = await service.sync_basic_info_from_source("akshare", force_update)
+        result = await service.sync_basic_info_from_source(
+            "akshare", force_update, job_id="hk_akshare_basic_info_sync"
+        )
         logger.info(f"✅ 港股基础信息同步完成 (AKShare): {result}")
         return result
     except Exception as e:
@@ -502,7 +477,7 @@ async def run_hk_yfinance_quotes_sync():
     """APScheduler任务：港股实时行情同步（yfinance）"""
     try:
         service = await get_hk_sync_service()
-        result = await service.sync_quotes_from_source("yfinance")
+        result = await service.sync_quotes_from_source("yfinance", job_id="hk_yfinance_quotes_sync")
         logger.info(f"✅ 港股实时行情同步完成: {result}")
         return result
     except Exception as e:
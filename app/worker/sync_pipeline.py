@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+按股票同步的流水线执行器
+
+各数据源同步服务（AKShare/BaoStock/港股/美股）原先逐只股票串行执行
+"请求 -> 处理 -> 写库"，网络等待与数据库写入互相阻塞。这里把同步拆成四个阶段，
+各阶段之间用有界队列连接，网络请求与数据库写入可以重叠进行：
+
+    生产者 --> N 个并发请求协程（受速率限制器约束） --> 转换（CPU，工作线程） --> 批量写入
+
+- 请求阶段：并发数由 concurrency 控制，每次请求前先 acquire 数据源的速率限制器
+- 转换阶段：标准化等 CPU 计算放到工作线程执行，不阻塞事件循环
+- 写入阶段：把多只股票的结果合并后一次写入（大批量 bulk_write），队列空闲时也会及时落库
+- 停止信号：生产者定期调用 should_stop，收到停止信号后不再派发新股票，已在途的结果仍会写入
+- 进度回调：每写入/失败 progress_interval 只股票调用一次 on_progress(已处理数, 总数)；
+  回调抛出的异常（如 TaskCancelledException）会先停止派发、写完在途数据后再抛出
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+FetchFunc = Callable[[str], Awaitable[Any]]
+TransformFunc = Callable[[str, Any], Any]
+WriteFunc = Callable[[List[Tuple[str, Any]]], Awaitable[int]]
+
+
+@dataclass
+class SymbolSyncStats:
+    """流水线同步统计"""
+    total: int = 0
+    processed: int = 0
+    success_count: int = 0
+    error_count: int = 0
+    total_records: int = 0
+    cancelled: bool = False
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return empty
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+def _weight(payload: Any) -> int:
+    """写入批次中一个结果占用的操作数（列表按长度计，其余计 1）"""
+    try:
+        return max(len(payload), 1)
+    except TypeError:
+        return 1
+
+
+class SymbolSyncPipeline:
+    """按股票同步的流水线执行器"""
+
+    def __init__(
+        self,
+        fetch: FetchFunc,
+        write: WriteFunc,
+        transform: Optional[TransformFunc] = None,
+        *,
+        name: str = "sync",
+        concurrency: int = 4,
+        rate_limiter: Any = None,
+        write_batch_size: int = 1000,
+        flush_interval: float = 2.0,
+        should_stop: Optional[Callable[[], Awaitable[bool]]] = None,
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        progress_interval: int = 100,
+        stop_check_interval: int = 50,
+    ):
+        """
+        Args:
+            fetch: 异步请求函数 fetch(symbol) -> 原始数据；返回空数据视为失败
+            write: 异步批量写入函数 write([(symbol, payload), ...]) -> 写入记录数
+            transform: 同步转换函数 transform(symbol, raw) -> payload，在工作线程中执行；
+                返回空值视为失败。为 None 时直接写入原始数据
+            name: 名称（用于日志）
+            concurrency: 并发请求数
+            rate_limiter: 具有 async acquire() 方法的速率限制器
+            write_batch_size: 累计多少条操作后执行一次批量写入
+            flush_interval: 写入队列空闲多少秒后把已累计的结果落库
+            should_stop: 异步停止检查函数，返回 True 时停止派发新股票
+            on_progress: 异步进度回调 on_progress(已处理数, 总数)
+            progress_interval: 每处理多少只股票回调一次进度
+            stop_check_interval: 每派发多少只股票检查一次停止信号
+        """
+        self.fetch = fetch
+        self.write = write
+        self.transform = transform
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.rate_limiter = rate_limiter
+        self.write_batch_size = max(1, int(write_batch_size))
+        self.flush_interval = flush_interval
+        self.should_stop = should_stop
+        self.on_progress = on_progress
+        self.progress_interval = max(1, int(progress_interval))
+        self.stop_check_interval = max(1, int(stop_check_interval))
+
+    async def run(self, symbols: Sequence[str]) -> SymbolSyncStats:
+        """执行同步，返回统计信息"""
+        symbols = list(symbols)
+        stats = SymbolSyncStats(total=len(symbols))
+        if not symbols:
+            return stats
+
+        symbol_queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        transform_queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        stopping = asyncio.Event()
+        state = {"reported": 0, "progress_error": None}
+
+        async def report(done: int = 0, failed: int = 0):
+            stats.processed += done + failed
+            if self.on_progress is None or state["progress_error"] is not None:
+                return
+            finished = stats.processed >= stats.total
+            if not finished and stats.processed - state["reported"] < self.progress_interval:
+                return
+            state["reported"] = stats.processed
+            try:
+                await self.on_progress(stats.processed, stats.total)
+            except Exception as e:
+                logger.warning(f"⚠️ [{self.name}] 进度回调中止同步: {e}")
+                state["progress_error"] = e
+                stopping.set()
+
+        async def fail(symbol: str, error: str, context: str):
+            stats.error_count += 1
+            stats.errors.append({"code": symbol, "error": error, "context": context})
+            await report(failed=1)
+
+        async def produce():
+            for i, symbol in enumerate(symbols):
+                if stopping.is_set():
+                    break
+                if self.should_stop is not None and i % self.stop_check_interval == 0:
+                    if await self.should_stop():
+                        logger.warning(f"⚠️ [{self.name}] 收到停止信号，停止派发 (已派发 {i}/{len(symbols)})")
+                        stats.cancelled = True
+                        stopping.set()
+                        break
+                await symbol_queue.put(symbol)
+            for _ in range(self.concurrency):
+                await symbol_queue.put(_DONE)
+
+        async def fetch_worker():
+            while True:
+                symbol = await symbol_queue.get()
+                if symbol is _DONE:
+                    return
+                if stopping.is_set():
+                    continue
+                try:
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire()
+                    raw = await self.fetch(symbol)
+                except Exception as e:
+                    await fail(symbol, str(e), "fetch")
+                    continue
+                if _is_empty(raw):
+                    await fail(symbol, "数据为空", "fetch")
+                    continue
+                await transform_queue.put((symbol, raw))
+
+        async def transform_worker():
+            while True:
+                item = await transform_queue.get()
+                if item is _DONE:
+                    await write_queue.put(_DONE)
+                    return
+                symbol, raw = item
+                if self.transform is None:
+                    payload = raw
+                else:
+                    try:
+                        payload = await asyncio.to_thread(self.transform, symbol, raw)
+                    except Exception as e:
+                        await fail(symbol, str(e), "transform")
+                        continue
+                if _is_empty(payload):
+                    await fail(symbol, "转换结果为空", "transform")
+                    continue
+                await write_queue.put((symbol, payload))
+
+        async def flush(pending: List[Tuple[str, Any]]):
+            try:
+                written = await self.write(pending)
+            except Exception as e:
+                logger.error(f"❌ [{self.name}] 批量写入失败 ({len(pending)}只): {e}")
+                for symbol, _ in pending:
+                    await fail(symbol, str(e), "write")
+                return
+            stats.success_count += len(pending)
+            stats.total_records += int(written or 0)
+            await report(done=len(pending))
+
+        async def write_worker():
+            pending: List[Tuple[str, Any]] = []
+            weight = 0
+            while True:
+                try:
+                    item = await asyncio.wait_for(write_queue.get(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    if pending:
+                        await flush(pending)
+                        pending, weight = [], 0
+                    continue
+                if item is _DONE:
+                    if pending:
+                        await flush(pending)
+                    return
+                pending.append(item)
+                weight += _weight(item[1])
+                if weight >= self.write_batch_size:
+                    await flush(pending)
+                    pending, weight = [], 0
+
+        logger.info(f"🚀 [{self.name}] 流水线同步开始: {len(symbols)}只股票, "
+                    f"并发={self.concurrency}, 批量写入={self.write_batch_size}")
+
+        fetchers = [asyncio.create_task(fetch_worker()) for _ in range(self.concurrency)]
+        producer = asyncio.create_task(produce())
+        transformer = asyncio.create_task(transform_worker())
+        writer = asyncio.create_task(write_worker())
+        tasks = [producer, transformer, writer, *fetchers]
+        try:
+            await asyncio.gather(producer, *fetchers)
+            await transform_queue.put(_DONE)
+            await asyncio.gather(transformer, writer)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        logger.info(f"✅ [{self.name}] 流水线同步结束: 处理 {stats.processed}/{stats.total}, "
+                    f"成功 {stats.success_count}, 失败 {stats.error_count}, 记录 {stats.total_records}")
+
+        if state["progress_error"] is not None:
+            raise state["progress_error"]
+        return stats
+
+
+def job_hooks(db, job_id: Optional[str]) -> Dict[str, Any]:
+    """
+    构造定时任务的停止检查与进度回调（job_id 为空时返回空字典）
+
+    停止检查读取 scheduler_executions 的 cancel_requested 标记；
+    进度回调使用 scheduler_service.update_job_progress（收到取消请求时抛出 TaskCancelledException）
+    """
+    if not job_id:
+        return {}
+
+    async def should_stop() -> bool:
+        try:
+            execution = await db.scheduler_executions.find_one(
+                {"job_id": job_id, "status": "running"},
+                sort=[("timestamp", -1)]
+            )
+            return bool(execution and execution.get("cancel_requested"))
+        except Exception as e:
+            logger.error(f"❌ 检查任务停止标记失败: {e}")
+            return False
+
+    async def on_progress(processed: int, total: int):
+        from app.services.scheduler_service import update_job_progress
+
+        progress = int(processed * 100 / total) if total else 100
+        await update_job_progress(
+            job_id,
+            progress,
+            message=f"已处理 {processed}/{total} 只股票",
+            total_items=total,
+            processed_items=processed
+        )
+
+    return {"should_stop": should_stop, "on_progress": on_progress}
+
+
+async def run_upsert_pipeline(
+    symbols: Sequence[str],
+    fetch: FetchFunc,
+    transform: TransformFunc,
+    collection,
+    *,
+    name: str,
+    concurrency: int = 4,
+    rate_limiter: Any = None,
+    write_batch_size: int = 1000,
+    **hooks
+) -> Dict[str, int]:
+    """
+    逐只请求、转换为 UpdateOne 后合并批量写入同一集合（港股/美股基础信息与行情同步）
+
+    Args:
+        transform: transform(symbol, raw) -> UpdateOne；返回 None 表示数据无效（计为失败）
+
+    Returns:
+        {"updated": int, "inserted": int, "failed": int}
+    """
+    result = {"updated": 0, "inserted": 0, "failed": 0}
+
+    async def write(batch):
+        bulk_result = await collection.bulk_write([op for _, op in batch], ordered=False)
+        result["updated"] += bulk_result.modified_count
+        result["inserted"] += bulk_result.upserted_count
+        return bulk_result.modified_count + bulk_result.upserted_count
+
+    pipeline = SymbolSyncPipeline(
+        fetch, write, transform,
+        name=name,
+        concurrency=concurrency,
+        rate_limiter=rate_limiter,
+        write_batch_size=write_batch_size,
+        **hooks
+    )
+    stats = await pipeline.run(symbols)
+    result["failed"] = stats.error_count
+    return result
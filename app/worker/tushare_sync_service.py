@@ -7,6 +7,9 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 import logging
 
+import numpy as np
+import pandas as pd
+
 from tradingagents.dataflows.providers.china.tushare import TushareProvider
 from app.services.stock_data_service import get_stock_data_service
 from app.services.historical_data_service import get_historical_data_service
@@ -21,6 +24,9 @@ logger = logging.getLogger(__name__)
 # UTC+8 时区
 UTC_8 = timezone(timedelta(hours=8))
 
+# 整市场增量同步：某交易日记录数低于窗口内最大值的该比例时视为不完整，重新拉取
+BULK_SYNC_COVERAGE_RATIO = 0.9
+
 
 def get_utc8_now():
     """
@@ -578,6 +584,16 @@ class TushareSyncService:
         }
 
         try:
+            # 0. 全市场日线增量：按缺失的交易日整市场拉取（每个交易日两次API调用）
+            if (incremental and symbols is None and period == "daily" and not all_history
+                    and getattr(self.settings, "TUSHARE_HISTORICAL_BULK_SYNC_ENABLED", True)):
+                bulk_stats = await self.sync_historical_data_by_trade_date(
+                    start_date=start_date, end_date=end_date, job_id=job_id
+                )
+                if bulk_stats is not None:
+                    return bulk_stats
+                logger.info("ℹ️ 整市场增量同步不可用，改为逐只股票同步")
+
             # 1. 获取股票列表（排除退市股票）
             if symbols is None:
                 # 查询所有A股股票（兼容不同的数据结构），排除退市股票
@@ -756,6 +772,209 @@ class TushareSyncService:
             })
             return stats
 
+    async def sync_historical_data_by_trade_date(
+        self,
+        start_date: str = None,
+        end_date: str = None,
+        job_id: str = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        按交易日整市场增量同步日线
+
+        由交易日历算出库中缺失（或不完整）的交易日，每个交易日调用一次 daily 和 adj_factor
+        获取全市场数据，换算为前复权价后批量写入。
+
+        新K线以本批次最新的复权因子为基准，库中已有的历史以上次同步时的因子为基准；
+        复权因子在此期间变化（除权除息）的股票两段基准不同，会按前复权整段重新同步
+        （数量超过 TUSHARE_HISTORICAL_QFQ_RESYNC_MAX 时只记录日志，结果中的 rebased_symbols 列出这些股票）。
+
+        Args:
+            start_date: 开始日期，默认从库中最新交易日往前回看 TUSHARE_HISTORICAL_BULK_LOOKBACK_DAYS 天
+            end_date: 结束日期，默认今天
+            job_id: 任务ID（用于进度跟踪）
+
+        Returns:
+            同步结果统计；库中尚无 Tushare 日线（需逐只初始化）或交易日历不可用时返回 None
+        """
+        if self.historical_service is None:
+            self.historical_service = await get_historical_data_service()
+
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        trade_dates = await self._get_missing_trade_dates(start_date, end_date)
+        if trade_dates is None:
+            return None
+
+        stats = {
+            "mode": "trade_date",
+            "trade_dates": trade_dates,
+            "total_processed": len(trade_dates),
+            "success_count": 0,
+            "error_count": 0,
+            "total_records": 0,
+            "start_time": datetime.utcnow(),
+            "errors": []
+        }
+        logger.info(f"📊 整市场日线增量同步: 缺失交易日 {len(trade_dates)} 个 {trade_dates[:5]}{'...' if len(trade_dates) > 5 else ''}")
+
+        # 1. 逐个交易日拉取全市场数据
+        frames = []
+        for i, trade_date in enumerate(trade_dates):
+            if job_id and await self._should_stop(job_id):
+                logger.warning(f"⚠️ 任务 {job_id} 收到停止信号，正在退出...")
+                stats["stopped"] = True
+                break
+
+            try:
+                await self.rate_limiter.acquire()
+                await self.rate_limiter.acquire()  # daily + adj_factor
+                df = await self.provider.get_market_daily(trade_date)
+                if df is None or df.empty:
+                    logger.warning(f"⚠️ {trade_date}: 无全市场日线（可能尚未收盘或非交易日）")
+                else:
+                    frames.append(df)
+                    stats["success_count"] += 1
+            except Exception as e:
+                stats["error_count"] += 1
+                stats["errors"].append({
+                    "trade_date": trade_date,
+                    "error": str(e),
+                    "error_type": type(e).__name__,
+                    "context": "sync_historical_data_by_trade_date"
+                })
+                logger.error(f"❌ {trade_date} 全市场日线获取失败: {e}")
+
+            if job_id:
+                await self._update_progress(
+                    job_id,
+                    int((i + 1) / len(trade_dates) * 90),
+                    f"正在同步交易日 {trade_date} ({i + 1}/{len(trade_dates)})"
+                )
+
+        # 2. 换算前复权并批量写入
+        rebased = []
+        if frames:
+            data = pd.concat(frames, ignore_index=True)
+            rebased = await self._find_rebased_symbols(data, trade_dates[0])
+            data = self._to_forward_adjusted(data)
+            stats["total_records"] = await self.historical_service.save_market_data(
+                data, data_source="tushare", market="CN", period="daily"
+            )
+
+        # 3. 除权股票：库中历史与新K线的前复权基准不同，整段重新同步
+        if rebased:
+            stats["rebased_symbols"] = rebased
+            limit = getattr(self.settings, "TUSHARE_HISTORICAL_QFQ_RESYNC_MAX", 200)
+            if len(rebased) <= limit and not stats.get("stopped"):
+                logger.info(f"🔁 复权因子变化的股票 {len(rebased)} 只，按前复权整段重新同步: {rebased[:10]}")
+                resync = await self._resync_full_history(rebased, end_date)
+                stats["total_records"] += resync.get("total_records", 0)
+                stats["errors"].extend(resync.get("errors", []))
+            else:
+                logger.warning(
+                    f"⚠️ 复权因子变化的股票 {len(rebased)} 只未重新同步（上限 {limit}），"
+                    f"库中历史与新K线前复权基准不一致，需整段重新同步: {rebased}"
+                )
+
+        stats["end_time"] = datetime.utcnow()
+        stats["duration"] = (stats["end_time"] - stats["start_time"]).total_seconds()
+        if job_id:
+            await self._update_progress(job_id, 100, f"整市场日线同步完成: {stats['total_records']} 条记录")
+
+        logger.info(f"✅ 整市场日线增量同步完成: "
+                    f"交易日 {stats['success_count']}/{stats['total_processed']}, "
+                    f"记录 {stats['total_records']} 条, "
+                    f"错误 {stats['error_count']} 个, "
+                    f"耗时 {stats['duration']:.2f} 秒")
+        return stats
+
+    async def _get_missing_trade_dates(self, start_date: Optional[str], end_date: str) -> Optional[List[str]]:
+        """
+        交易日历中库里缺失或不完整的交易日
+
+        某交易日的记录数低于窗口内最大记录数的 BULK_SYNC_COVERAGE_RATIO 时视为不完整。
+        """
+        collection = self.historical_service.collection
+        base_query = {"data_source": "tushare", "period": "daily"}
+
+        if not start_date:
+            latest = await collection.find_one(base_query, {"trade_date": 1, "_id": 0}, sort=[("trade_date", -1)])
+            if not latest or not latest.get("trade_date"):
+                logger.info("ℹ️ 库中尚无 Tushare 日线，跳过整市场增量同步")
+                return None
+            lookback = getattr(self.settings, "TUSHARE_HISTORICAL_BULK_LOOKBACK_DAYS", 10)
+            start_date = (datetime.strptime(latest["trade_date"], '%Y-%m-%d') - timedelta(days=lookback)).strftime('%Y-%m-%d')
+
+        await self.rate_limiter.acquire()
+        trade_dates = await self.provider.get_trade_dates(start_date, end_date)
+        if trade_dates is None:
+            return None
+
+        counts = {}
+        if trade_dates:
+            cursor = collection.aggregate([
+                {"$match": {**base_query, "trade_date": {"$in": trade_dates}}},
+                {"$group": {"_id": "$trade_date", "count": {"$sum": 1}}}
+            ])
+            counts = {doc["_id"]: doc["count"] async for doc in cursor}
+
+        full = max(counts.values(), default=0)
+        if full == 0:
+            return trade_dates
+        return [d for d in trade_dates if counts.get(d, 0) < full * BULK_SYNC_COVERAGE_RATIO]
+
+    async def _find_rebased_symbols(self, data: pd.DataFrame, first_trade_date: str) -> List[str]:
+        """
+        找出复权因子自库中最近一个交易日以来发生变化的股票
+
+        库中历史以当时最新的复权因子为前复权基准；与本批次最新的因子不同，说明两段K线基准不同
+        """
+        collection = self.historical_service.collection
+        previous = await collection.find_one(
+            {"data_source": "tushare", "period": "daily", "trade_date": {"$lt": first_trade_date}},
+            {"trade_date": 1, "_id": 0},
+            sort=[("trade_date", -1)]
+        )
+        if not previous or not previous.get("trade_date"):
+            return []
+
+        await self.rate_limiter.acquire()
+        base = await self.provider.get_market_adj_factor(previous["trade_date"])
+        if base is None or base.empty:
+            logger.warning(f"⚠️ 无法获取 {previous['trade_date']} 的复权因子，跳过除权检查")
+            return []
+
+        latest = (data.sort_values(["symbol", "trade_date"])
+                      .groupby("symbol")["adj_factor"].last()
+                      .pipe(pd.to_numeric, errors="coerce"))
+        stored = pd.to_numeric(base.set_index("symbol")["adj_factor"], errors="coerce")
+        both = pd.concat([latest.rename("latest"), stored.rename("stored")], axis=1, join="inner").dropna()
+        changed = ~np.isclose(both["latest"], both["stored"])
+        return sorted(both.index[changed].tolist())
+
+    async def _resync_full_history(self, symbols: List[str], end_date: str) -> Dict[str, Any]:
+        """逐只按 pro_bar(adj='qfq') 重新同步全部历史，使整段K线回到同一前复权基准"""
+        return await self.sync_historical_data(
+            symbols=symbols, end_date=end_date, incremental=False, all_history=True, period="daily"
+        )
+
+    @staticmethod
+    def _to_forward_adjusted(data: pd.DataFrame) -> pd.DataFrame:
+        """
+        未复权价按复权因子换算为前复权价：price * adj_factor / 该股本批次最新的 adj_factor
+
+        只在本批次内与 pro_bar(adj='qfq') 一致；库中已有历史的基准是上次同步时的因子，
+        两者不同的股票由 _find_rebased_symbols 找出并整段重新同步
+        """
+        data = data.sort_values(["symbol", "trade_date"])
+        factor = pd.to_numeric(data["adj_factor"], errors="coerce")
+        latest = factor.groupby(data["symbol"]).transform("last")
+        # 缺少复权因子时保持原价
+        ratio = (factor / latest).fillna(1.0)
+        for col in ("open", "high", "low", "close", "pre_close"):
+            if col in data.columns:
+                data[col] = data[col] * ratio
+        return data.reset_index(drop=True)
+
     async def _save_historical_data(self, symbol: str, df, period: str = "daily") -> int:
         """保存历史数据到数据库"""
         try:
@@ -29,6 +29,7 @@ sys.path.insert(0, str(project_root))
 from tradingagents.dataflows.providers.us.yfinance import YFinanceUtils
 from app.core.database import get_mongo_db
 from app.core.config import settings
+from app.worker.sync_pipeline import job_hooks, run_upsert_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -173,7 +174,8 @@ class USSyncService:
     async def sync_basic_info_from_source(
         self,
         source: str = "yfinance",
-        force_update: bool = False
+        force_update: bool = False,
+        job_id: str = None
     ) -> Dict[str, int]:
         """
         从指定数据源同步美股基础信息
@@ -181,6 +183,7 @@ class USSyncService:
         Args:
             source: 数据源名称 (默认 yfinance)
             force_update: 是否强制更新（强制刷新股票列表）
+            job_id: 任务ID（用于停止检查与进度跟踪）
 
         Returns:
             Dict: 同步统计信息 {updated: int, inserted: int, failed: int}
@@ -204,61 +207,44 @@ class USSyncService:
         logger.info(f"🇺🇸 开始同步美股基础信息 (数据源: {source})")
         logger.info(f"📊 待同步股票数量: {len(stock_list)}")
 
-        operations = []
-        failed_count = 0
+        async def fetch(stock_code: str):
+            # 从 yfinance 获取数据
+            return await asyncio.to_thread(self.yfinance_provider.get_stock_info, stock_code)
 
-        for stock_code in stock_list:
-            try:
-                # 从 yfinance 获取数据
-                stock_info = self.yfinance_provider.get_stock_info(stock_code)
-                
-                if not stock_info or not stock_info.get('shortName'):
-                    logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
-                    failed_count += 1
-                    continue
-                
-                # 标准化数据格式
-                normalized_info = self._normalize_stock_info(stock_info, source)
-                normalized_info["code"] = stock_code.upper()
-                normalized_info["source"] = source
-                normalized_info["updated_at"] = datetime.now()
-                
-                # 批量更新操作
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
-                        {"$set": normalized_info},
-                        upsert=True
-                    )
-                )
-                
-                logger.debug(f"✅ 准备同步: {stock_code} ({stock_info.get('shortName')}) from {source}")
-                
-            except Exception as e:
-                logger.error(f"❌ 同步失败: {stock_code} from {source}: {e}")
-                failed_count += 1
-        
-        # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
-        
-        if operations:
-            try:
-                bulk_result = await self.db.stock_basic_info_us.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-                
-                logger.info(
-                    f"✅ 美股基础信息同步完成 ({source}): "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
-                )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
-        
+        def transform(stock_code: str, stock_info: Dict):
+            if not stock_info.get('shortName'):
+                logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
+                return None
+
+            # 标准化数据格式
+            normalized_info = self._normalize_stock_info(stock_info, source)
+            normalized_info["code"] = stock_code.upper()
+            normalized_info["source"] = source
+            normalized_info["updated_at"] = datetime.now()
+
+            return UpdateOne(
+                {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
+                {"$set": normalized_info},
+                upsert=True
+            )
+
+        # 并发请求 + 合并批量写入
+        result = await run_upsert_pipeline(
+            stock_list, fetch, transform, self.db.stock_basic_info_us,
+            name=f"美股基础信息({source})",
+            concurrency=self.settings.SYNC_PIPELINE_CONCURRENCY,
+            write_batch_size=self.settings.SYNC_PIPELINE_WRITE_BATCH_SIZE,
+            **job_hooks(self.db, job_id)
+        )
+
+        logger.info(
+            f"✅ 美股基础信息同步完成 ({source}): "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
         return result
-    
+
     def _normalize_stock_info(self, stock_info: Dict, source: str) -> Dict:
         """
         标准化股票信息格式
@@ -295,13 +281,15 @@ class USSyncService:
     
     async def sync_quotes_from_source(
         self,
-        source: str = "yfinance"
+        source: str = "yfinance",
+        job_id: str = None
     ) -> Dict[str, int]:
         """
         从指定数据源同步美股实时行情
         
         Args:
             source: 数据源名称 (默认 yfinance)
+            job_id: 任务ID（用于停止检查与进度跟踪）
         
         Returns:
             Dict: 同步统计信息
@@ -312,73 +300,55 @@ class USSyncService:
         
         logger.info(f"🇺🇸 开始同步美股实时行情 (数据源: {source})")
         
-        operations = []
-        failed_count = 0
-        
-        for stock_code in self.us_stock_list:
-            try:
-                # 获取最近1天的数据作为实时行情
-                import yfinance as yf
-                ticker = yf.Ticker(stock_code)
-                data = ticker.history(period="1d")
-                
-                if data.empty:
-                    logger.warning(f"⚠️ 跳过无效行情: {stock_code}")
-                    failed_count += 1
-                    continue
-                
-                latest = data.iloc[-1]
-                
-                # 标准化行情数据
-                normalized_quote = {
-                    "code": stock_code.upper(),
-                    "close": float(latest['Close']),
-                    "open": float(latest['Open']),
-                    "high": float(latest['High']),
-                    "low": float(latest['Low']),
-                    "volume": int(latest['Volume']),
-                    "currency": "USD",
-                    "updated_at": datetime.now()
-                }
-                
-                # 计算涨跌幅
-                if normalized_quote["open"] > 0:
-                    pct_chg = ((normalized_quote["close"] - normalized_quote["open"]) / normalized_quote["open"]) * 100
-                    normalized_quote["pct_chg"] = round(pct_chg, 2)
-                
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_quote["code"]},
-                        {"$set": normalized_quote},
-                        upsert=True
-                    )
-                )
-                
-                logger.debug(f"✅ 准备同步行情: {stock_code} (价格: {normalized_quote['close']} USD)")
-                
-            except Exception as e:
-                logger.error(f"❌ 同步行情失败: {stock_code}: {e}")
-                failed_count += 1
-        
-        # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
-        
-        if operations:
-            try:
-                bulk_result = await self.db.market_quotes_us.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-                
-                logger.info(
-                    f"✅ 美股行情同步完成: "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
-                )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
-        
+        def fetch_history(stock_code: str):
+            # 获取最近1天的数据作为实时行情
+            import yfinance as yf
+            return yf.Ticker(stock_code).history(period="1d")
+
+        async def fetch(stock_code: str):
+            return await asyncio.to_thread(fetch_history, stock_code)
+
+        def transform(stock_code: str, data):
+            latest = data.iloc[-1]
+
+            # 标准化行情数据
+            normalized_quote = {
+                "code": stock_code.upper(),
+                "close": float(latest['Close']),
+                "open": float(latest['Open']),
+                "high": float(latest['High']),
+                "low": float(latest['Low']),
+                "volume": int(latest['Volume']),
+                "currency": "USD",
+                "updated_at": datetime.now()
+            }
+
+            # 计算涨跌幅
+            if normalized_quote["open"] > 0:
+                pct_chg = ((normalized_quote["close"] - normalized_quote["open"]) / normalized_quote["open"]) * 100
+                normalized_quote["pct_chg"] = round(pct_chg, 2)
+
+            return UpdateOne(
+                {"code": normalized_quote["code"]},
+                {"$set": normalized_quote},
+                upsert=True
+            )
+
+        # 并发请求 + 合并批量写入
+        result = await run_upsert_pipeline(
+            self.us_stock_list, fetch, transform, self.db.market_quotes_us,
+            name=f"美股行情({source})",
+            concurrency=self.settings.SYNC_PIPELINE_CONCURRENCY,
+            write_batch_size=self.settings.SYNC_PIPELINE_WRITE_BATCH_SIZE,
+            **job_hooks(self.db, job_id)
+        )
+
+        logger.info(
+            f"✅ 美股行情同步完成: "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
         return result
 
 
@@ -401,7 +371,9 @@ async def run_us_yfinance_basic_info_sync(force_update: bool = False):
     """APScheduler任务：美股基础信息同步（yfinance）"""
     try:
         service = await get_us_sync_service()
-        result = await service.sync_basic_info_from_source("yfinance", force_update)
+        result = await service.sync_basic_info_from_source(
+            "yfinance", force_update, job_id="us_yfinance_basic_info_sync"
+        )
         logger.info(f"✅ 美股基础信息同步完成 (yfinance): {result}")
         return result
     except Exception as e:
@@ -413,7 +385,7 @@ async def run_us_yfinance_quotes_sync():
     """APScheduler任务：美股实时行情同步（yfinance）"""
     try:
         service = await get_us_sync_service()
-        result = await service.sync_quotes_from_source("yfinance")
+        result = await service.sync_quotes_from_source("yfinance", job_id="us_yfinance_quotes_sync")
         logger.info(f"✅ 美股实时行情同步完成: {result}")
         return result
     except Exception as e:
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+回填列式K线存储
+
+列式K线存储只随同步写入增长，启用之前已在 MongoDB 中的历史K线需要回填一次，
+否则更早区间的查询始终无法命中存储、一直退回 MongoDB。
+
+使用方法：
+    python scripts/backfill_bar_store.py
+    python scripts/backfill_bar_store.py --symbols 000001 600000
+    python scripts/backfill_bar_store.py --market CN --period weekly --batch-symbols 50
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import init_database
+from app.services.historical_data_service import get_historical_data_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s | %(name)-30s | %(levelname)-8s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main(symbols=None, market: str = "CN", period: str = "daily", batch_symbols: int = 100):
+    await init_database()
+    service = await get_historical_data_service()
+    filled = await service.backfill_bar_store(symbols, market=market, period=period, batch_symbols=batch_symbols)
+    logger.info(f"📦 回填完成: {filled}只股票")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="把 MongoDB 中已有的K线回填到列式K线存储")
+    parser.add_argument("--symbols", nargs="*", help="股票代码（默认全部）")
+    parser.add_argument("--market", default="CN", help="市场 (CN/HK/US)")
+    parser.add_argument("--period", default="daily", help="周期 (daily/weekly/monthly)")
+    parser.add_argument("--batch-symbols", type=int, default=100, help="每批读取的股票数量")
+    args = parser.parse_args()
+    asyncio.run(main(args.symbols or None, args.market, args.period, args.batch_symbols))
@@ -6,3 +6,26 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _isolate_cache_dirs(tmp_path_factory):
+    """把默认缓存目录（文件缓存、SQLite 索引、向量缓存、列式K线存储）指向临时目录，避免测试写入包目录"""
+    from tradingagents.default_config import DEFAULT_CONFIG
+    from tradingagents.dataflows.cache.file_cache import StockDataCache
+
+    cache_root = tmp_path_factory.mktemp("data_cache")
+    original_init = StockDataCache.__init__
+
+    def init_in_tmp(self, cache_dir=None):
+        original_init(self, cache_dir if cache_dir is not None else str(cache_root))
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(DEFAULT_CONFIG, "data_cache_dir", str(cache_root))
+        mp.setenv("TA_EMBEDDING_CACHE_PATH", str(cache_root / "embeddings" / "embedding_cache.sqlite3"))
+        mp.setattr(StockDataCache, "__init__", init_in_tmp)
+        mp.setenv("TA_BAR_STORE_DIR", str(cache_root / "bar_store"))
+        yield cache_root
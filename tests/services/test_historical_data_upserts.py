@@ -0,0 +1,246 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.historical_data_service import HistoricalDataService
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeQuotes:
+    """stock_daily_quotes stand-in: applies UpdateOne upserts and answers the change-detection query"""
+
+    def __init__(self):
+        self.docs = {}
+        self.bulk_sizes = []
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        symbols = query["symbol"]["$in"] if isinstance(query["symbol"], dict) else [query["symbol"]]
+        lo, hi = query["trade_date"]["$gte"], query["trade_date"]["$lte"]
+        return FakeCursor([
+            {"symbol": d["symbol"], "trade_date": d["trade_date"], "content_hash": d.get("content_hash")}
+            for d in self.docs.values()
+            if d["symbol"] in symbols and lo <= d["trade_date"] <= hi
+            and d["data_source"] == query["data_source"] and d["period"] == query["period"]
+        ])
+
+    async def bulk_write(self, ops, ordered=True):
+        assert ordered is False
+        self.bulk_sizes.append(len(ops))
+        inserted = modified = 0
+        for op in ops:
+            key = tuple(op._filter[k] for k in ("symbol", "trade_date", "data_source", "period"))
+            if key in self.docs:
+                modified += 1
+                self.docs[key].update(op._doc["$set"])
+            else:
+                inserted += 1
+                self.docs[key] = {**op._doc["$set"], **op._doc["$setOnInsert"]}
+        return SimpleNamespace(upserted_count=inserted, modified_count=modified)
+
+
+def _service():
+    service = object.__new__(HistoricalDataService)
+    service.collection = FakeQuotes()
+    service.bar_store_writes = []
+
+    async def write_bar_store(symbol, docs, market, period):
+        service.bar_store_writes.append((symbol, len(docs)))
+
+    service._write_bar_store = write_bar_store
+    return service
+
+
+def _bars(n=250, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 10 + rng.random(n)
+    return pd.DataFrame({
+        "date": pd.bdate_range("2024-01-01", periods=n),
+        "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+        "pre_close": np.r_[np.nan, close[:-1]],
+        "volume": rng.integers(1_000, 10_000, n), "amount": close * 1_000,
+        "turnover_rate": rng.random(n),
+    })
+
+
+def test_resync_of_unchanged_bars_writes_nothing():
+    service = _service()
+    bars = _bars()
+
+    first = asyncio.run(service.save_historical_data("000001", bars, "akshare"))
+    assert first == 250
+    assert service.collection.bulk_sizes == [250]
+
+    second = asyncio.run(service.save_historical_data("000001", bars.copy(), "akshare"))
+    assert second == 0
+    assert service.collection.bulk_sizes == [250]
+    # Unchanged bars still reach the bar store so it fills in for existing history
+    assert service.bar_store_writes == [("000001", 250), ("000001", 250)]
+
+
+def test_only_new_and_changed_bars_are_written():
+    service = _service()
+    bars = _bars()
+    asyncio.run(service.save_historical_data("000001", bars, "akshare"))
+    created_at = service.collection.docs[("000001", "2024-01-01", "akshare", "daily")]["created_at"]
+
+    updated = pd.concat([bars, _bars(252).tail(2).assign(date=pd.bdate_range("2024-12-16", periods=2))])
+    updated.loc[0, "close"] = 99.0
+
+    saved = asyncio.run(service.save_historical_data("000001", updated, "akshare"))
+
+    assert saved == 3
+    assert service.collection.bulk_sizes[-1] == 3
+    doc = service.collection.docs[("000001", "2024-01-01", "akshare", "daily")]
+    assert doc["close"] == 99.0
+    assert doc["created_at"] == created_at
+
+
+def test_legacy_documents_without_hash_are_rewritten_once():
+    service = _service()
+    bars = _bars(5)
+    asyncio.run(service.save_historical_data("000001", bars, "akshare"))
+    for doc in service.collection.docs.values():
+        doc.pop("content_hash")
+
+    assert asyncio.run(service.save_historical_data("000001", bars, "akshare")) == 5
+    assert asyncio.run(service.save_historical_data("000001", bars, "akshare")) == 0
+
+
+def test_prepared_documents_keep_row_standardization_semantics():
+    service = _service()
+    bars = pd.DataFrame({
+        "date": pd.to_datetime(["2024-06-03", "2024-06-04", "2024-06-05", "2024-06-06"]),
+        "open": [10.0, 10.5, 10.2, 10.4], "high": [11.0, 10.8, 10.6, 10.9],
+        "low": [9.8, 10.1, 10.0, 10.3], "close": [10.5, 10.2, 10.4, 10.8],
+        "pre_close": [10.0, np.nan, 10.2, 0.0],
+        "change": [9.9, -0.3, 9.9, 0.4], "pct_chg": [9.9, -2.8571, 9.9, 3.8462],
+        "vol": [12, 30, 25, 40], "amount": [3.0, 4.5, 2.5, 6.0],
+        "turnover_rate": [0.2, 0.3, 0.0, 0.4], "turn": [0.5, 0.5, 0.5, 0.5],
+    })
+    service._convert_units(bars, "tushare")
+
+    docs = service.prepare_documents("600000", bars, "tushare", "CN", "daily")
+
+    common = {
+        "symbol": "600000", "code": "600000", "full_symbol": "600000.SH", "market": "CN",
+        "period": "daily", "data_source": "tushare", "version": 1,
+    }
+    expected = [
+        # pre_close present: change and pct_chg are recomputed from close
+        {"trade_date": "2024-06-03", "open": 10.0, "high": 11.0, "low": 9.8, "close": 10.5, "pre_close": 10.0,
+         "volume": 120000.0, "amount": 3000000.0, "change": 0.5, "pct_chg": 5.0, "turnover_rate": 0.2},
+        # NaN pre_close: the source change columns are kept
+        {"trade_date": "2024-06-04", "open": 10.5, "high": 10.8, "low": 10.1, "close": 10.2, "pre_close": None,
+         "volume": 300000.0, "amount": 4500000.0, "change": -0.3, "pct_chg": -2.8571, "turnover_rate": 0.3},
+        # Zero turnover_rate falls back to turn
+        {"trade_date": "2024-06-05", "open": 10.2, "high": 10.6, "low": 10.0, "close": 10.4, "pre_close": 10.2,
+         "volume": 250000.0, "amount": 2500000.0, "change": 0.2, "pct_chg": 1.9608, "turnover_rate": 0.5},
+        # Zero pre_close falls back to the (missing) preclose column and the source change columns
+        {"trade_date": "2024-06-06", "open": 10.4, "high": 10.9, "low": 10.3, "close": 10.8, "pre_close": None,
+         "volume": 400000.0, "amount": 6000000.0, "change": 0.4, "pct_chg": 3.8462, "turnover_rate": 0.4},
+    ]
+    assert len(docs) == len(expected)
+    for doc, row in zip(docs, expected):
+        row = {**common, **row}
+        actual = {k: v for k, v in doc.items() if k not in ("created_at", "updated_at", "content_hash")}
+        assert actual.keys() == row.keys()
+        for key, value in row.items():
+            if isinstance(value, float):
+                assert actual[key] == pytest.approx(value), key
+            else:
+                assert actual[key] == value, key
+
+
+def test_market_data_checks_all_symbols_with_one_query():
+    service = _service()
+    day = pd.DataFrame({
+        "symbol": ["000001", "000002", "600000"],
+        "trade_date": pd.to_datetime(["2024-06-03"] * 3),
+        "open": [1.0, 2.0, 3.0], "high": [1.0, 2.0, 3.0], "low": [1.0, 2.0, 3.0], "close": [1.0, 2.0, 3.0],
+        "volume": [10, 20, 30], "amount": [1.0, 2.0, 3.0],
+    })
+    service._write_bar_store_many = lambda *args: asyncio.sleep(0)
+
+    assert asyncio.run(service.save_market_data(day, "tushare")) == 3
+    assert asyncio.run(service.save_market_data(day, "tushare")) == 0
+    assert len(service.collection.queries) == 2
+    assert service.collection.queries[0]["symbol"] == {"$in": ["000001", "000002", "600000"]}
+    assert service.collection.docs[("000001", "2024-06-03", "tushare", "daily")]["volume"] == 1000.0
+
+
+def test_bar_store_writes_are_partitioned_by_source_and_adjustment(tmp_path, monkeypatch):
+    from tradingagents.dataflows.cache import bar_store as bar_store_mod
+
+    store = bar_store_mod.ColumnarBarStore(str(tmp_path))
+    monkeypatch.setattr(bar_store_mod, "get_bar_store", lambda: store)
+
+    class FakeBasics:
+        def find(self, query, projection):
+            return FakeCursor([{"code": "000001", "list_date": "20240603"}])
+
+    service = object.__new__(HistoricalDataService)
+    service.db = SimpleNamespace(stock_basic_info=FakeBasics())
+
+    day = {"symbol": "000001", "trade_date": "2024-06-03", "close": 10.0}
+    docs = [
+        {**day, "data_source": "baostock", "adjustflag": 3.0},
+        {**day, "data_source": "baostock", "adjustflag": 2.0, "close": 9.5},
+        {**day, "data_source": "tushare", "close": 9.4},
+    ]
+    asyncio.run(service._write_bar_store_many({"000001": docs}, "CN", "daily"))
+
+    assert store.read("000001", partition="baostock_none")["close"].item() == 10.0
+    assert store.read("000001", partition="baostock_qfq")["close"].item() == 9.5
+    assert store.read("000001", partition="tushare_qfq")["close"].item() == 9.4
+    assert store.covers("000001", "1990-01-01", "2024-06-03", partition="tushare_qfq")
+
+
+def test_backfill_bar_store_from_existing_documents(tmp_path, monkeypatch):
+    from tradingagents.dataflows.cache import bar_store as bar_store_mod
+
+    store = bar_store_mod.ColumnarBarStore(str(tmp_path))
+    monkeypatch.setattr(bar_store_mod, "get_bar_store", lambda: store)
+
+    service = _service()
+    asyncio.run(service.save_historical_data("000001", _bars(), "tushare"))
+    asyncio.run(service.save_historical_data("600000", _bars(20, seed=1), "tushare"))
+
+    class BackfillQuotes:
+        def __init__(self, docs):
+            self.docs = docs
+
+        async def distinct(self, field, query):
+            return sorted({d[field] for d in self.docs if d["market"] == query["market"]})
+
+        def find(self, query, projection):
+            return FakeCursor([d for d in self.docs if d["symbol"] in query["symbol"]["$in"]])
+
+    class NoBasics:
+        def find(self, query, projection):
+            return FakeCursor([])
+
+    service.collection = BackfillQuotes(list(service.collection.docs.values()))
+    service.db = SimpleNamespace(stock_basic_info=NoBasics())
+    del service._write_bar_store
+
+    assert asyncio.run(service.backfill_bar_store(batch_symbols=1)) == 2
+    assert len(store.read("000001")) == 250
+    assert store.covers("600000", "2024-01-01", "2024-01-26")
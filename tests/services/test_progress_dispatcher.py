@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+
+from app.routers import sse as sse_mod
+from app.services.progress.dispatcher import ProgressDispatcher
+
+
+class FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def psubscribe(self, pattern):
+        if self.broker.fail_next:
+            self.broker.fail_next -= 1
+            raise ConnectionError("redis down")
+        self.broker.subscriptions.append((pattern, self))
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.closed = True
+        self.broker.subscriptions = [s for s in self.broker.subscriptions if s[1] is not self]
+
+
+class FakeBroker:
+    """Redis stand-in that only routes pattern publishes"""
+
+    def __init__(self, fail_next=0):
+        self.subscriptions = []
+        self.connections = 0
+        self.fail_next = fail_next
+
+    def pubsub(self):
+        self.connections += 1
+        return FakePubSub(self)
+
+    def publish(self, channel, data):
+        for pattern, pubsub in self.subscriptions:
+            if channel.startswith(pattern.rstrip("*")):
+                pubsub.inbox.put_nowait({"type": "pmessage", "pattern": pattern, "channel": channel, "data": data})
+
+
+def _dispatcher(broker, **kwargs):
+    return ProgressDispatcher(redis_factory=lambda: broker, read_timeout=0.05, **kwargs)
+
+
+def test_many_viewers_share_one_connection():
+    broker = FakeBroker()
+    dispatcher = _dispatcher(broker)
+
+    async def run():
+        viewers = [await dispatcher.subscribe(f"task_progress:{i % 10}") for i in range(500)]
+        broker.publish("task_progress:3", '{"progress": 30}')
+        broker.publish("task_progress:other", '{"progress": 1}')
+        await asyncio.sleep(0.05)
+        got = [q.get_nowait() for q in viewers if not q.empty()]
+        stats = dispatcher.stats()
+        await dispatcher.close()
+        return got, stats
+
+    got, stats = asyncio.run(run())
+    assert broker.connections == 1
+    assert got == ['{"progress": 30}'] * 50
+    assert stats["channels"] == 10 and stats["subscribers"] == 500
+    assert stats["messages_received"] == 2
+
+
+def test_unsubscribe_and_full_queue_keeps_latest():
+    broker = FakeBroker()
+    dispatcher = _dispatcher(broker, queue_size=2)
+
+    async def run():
+        q = await dispatcher.subscribe("task_progress:a")
+        gone = await dispatcher.subscribe("task_progress:a")
+        dispatcher.unsubscribe("task_progress:a", gone)
+        for i in range(4):
+            broker.publish("task_progress:a", str(i))
+        await asyncio.sleep(0.05)
+        await dispatcher.close()
+        return [q.get_nowait(), q.get_nowait()], gone.empty()
+
+    latest, gone_empty = asyncio.run(run())
+    assert latest == ["2", "3"]
+    assert gone_empty
+    assert dispatcher.messages_dropped == 2
+
+
+def test_listener_reconnects_after_connection_error():
+    broker = FakeBroker(fail_next=1)
+    dispatcher = _dispatcher(broker)
+
+    async def run():
+        q = await dispatcher.subscribe("task_progress:x")
+        broker.publish("task_progress:x", "ok")
+        data = await asyncio.wait_for(q.get(), timeout=1)
+        await dispatcher.close()
+        return data
+
+    assert asyncio.run(run()) == "ok"
+    assert broker.connections == 2
+
+
+def test_subscribe_fails_fast_when_redis_unavailable():
+    broker = FakeBroker(fail_next=100)
+    dispatcher = _dispatcher(broker, ready_timeout=0.1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await dispatcher.subscribe("task_progress:x")
+        stats = dispatcher.stats()
+        await dispatcher.close()
+        return stats
+
+    assert asyncio.run(run())["subscribers"] == 0
+
+
+def test_task_progress_stream_uses_dispatcher(monkeypatch):
+    broker = FakeBroker()
+    dispatcher = _dispatcher(broker)
+    monkeypatch.setattr(sse_mod, "get_progress_dispatcher", lambda: dispatcher)
+
+    async def run():
+        gen = sse_mod.task_progress_generator("T1", "u1")
+        connected = await gen.__anext__()
+        broker.publish("task_progress:T1", json.dumps({"progress": 50}))
+        progress = await asyncio.wait_for(gen.__anext__(), timeout=1)
+        await gen.aclose()
+        stats = dispatcher.stats()
+        await dispatcher.close()
+        return connected, progress, stats
+
+    connected, progress, stats = asyncio.run(run())
+    assert connected.startswith("event: connected")
+    assert progress == 'event: progress\ndata: {"progress": 50}\n\n'
+    assert stats["subscribers"] == 0
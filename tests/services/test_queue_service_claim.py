@@ -0,0 +1,312 @@
+import asyncio
+import time
+
+import lupa
+import pytest
+
+from app.services.queue import (
+    QUEUE_NOTIFY_LIST,
+    READY_BATCH_LIST,
+    READY_LIST,
+    SET_PROCESSING,
+    TASK_PREFIX,
+    VISIBILITY_DEADLINES_ZSET,
+)
+from app.services.queue_service import QueueService
+
+
+class FakeRedis:
+    """In-memory Redis subset; register_script runs the real Lua through lupa"""
+
+    def __init__(self):
+        self.data = {}
+        self.lua = lupa.LuaRuntime(unpack_returned_tuples=True)
+        self.script_calls = 0
+
+    # --- commands (sync core shared by Lua and the async API) ---
+    def _call(self, cmd, *args):
+        cmd = cmd.upper()
+        d = self.data
+        if cmd == "SCARD":
+            return len(d.get(args[0], set()))
+        if cmd == "SADD":
+            d.setdefault(args[0], set()).update(args[1:])
+            return 1
+        if cmd == "SREM":
+            d.get(args[0], set()).difference_update(args[1:])
+            return 1
+        if cmd == "LPUSH":
+            lst = d.setdefault(args[0], [])
+            for v in args[1:]:
+                lst.insert(0, v)
+            return len(lst)
+        if cmd == "RPUSH":
+            d.setdefault(args[0], []).extend(args[1:])
+            return len(d[args[0]])
+        if cmd == "LRANGE":
+            lst = d.get(args[0], [])
+            start, stop = int(args[1]), int(args[2])
+            n = len(lst)
+            start = max(start + n if start < 0 else start, 0)
+            stop = stop + n if stop < 0 else stop
+            return lst[start:stop + 1]
+        if cmd == "LREM":
+            lst = d.get(args[0], [])
+            count, value = int(args[1]), args[2]
+            idxs = [i for i, v in enumerate(lst) if v == value]
+            if count < 0:
+                idxs = idxs[::-1][:-count]
+            elif count > 0:
+                idxs = idxs[:count]
+            for i in sorted(idxs, reverse=True):
+                del lst[i]
+            return len(idxs)
+        if cmd == "HSET":
+            h = d.setdefault(args[0], {})
+            for k, v in zip(args[1::2], args[2::2]):
+                h[k] = str(v)
+            return 1
+        if cmd == "HMGET":
+            h = d.get(args[0], {})
+            return [h.get(f, False) for f in args[1:]]
+        if cmd == "HGETALL":
+            return [x for kv in d.get(args[0], {}).items() for x in kv]
+        if cmd == "ZADD":
+            d.setdefault(args[0], {})[args[2]] = float(args[1])
+            return 1
+        if cmd == "EXPIRE":
+            return 1
+        raise NotImplementedError(cmd)
+
+    def register_script(self, script):
+        fn = self.lua.eval("function(KEYS, ARGV, redis) " + script + " end")
+        fake = self
+
+        def call(cmd, *args):
+            result = fake._call(cmd, *args)
+            return fake.lua.table(*result) if isinstance(result, list) else result
+
+        redis_api = self.lua.table_from({"call": lambda *a: call(*a)})
+
+        async def run(keys, args):
+            fake.script_calls += 1
+            result = fn(self.lua.table(*keys), self.lua.table(*[str(a) for a in args]), redis_api)
+            if not result:
+                return None
+            return [result[i] for i in range(1, len(result) + 1)]
+
+        return run
+
+    # --- async API used by QueueService ---
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class Pipe:
+            def __init__(self):
+                self.ops = []
+
+            def __getattr__(self, name):
+                return lambda *a, **kw: self.ops.append((name, a, kw))
+
+            async def execute(self):
+                for name, a, kw in self.ops:
+                    await getattr(fake, name)(*a, **kw)
+
+        return Pipe()
+
+    async def hset(self, key, mapping):
+        return self._call("HSET", key, *[x for kv in mapping.items() for x in kv])
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    async def lpush(self, key, *values):
+        return self._call("LPUSH", key, *values)
+
+    async def rpush(self, key, *values):
+        return self._call("RPUSH", key, *values)
+
+    async def ltrim(self, key, start, stop):
+        self.data[key] = self.data.get(key, [])[start:stop + 1]
+
+    async def lrem(self, key, count, value):
+        return self._call("LREM", key, count, value)
+
+    async def llen(self, key):
+        return len(self.data.get(key, []))
+
+    async def blpop(self, keys, timeout=0):
+        deadline = time.monotonic() + timeout
+        while True:
+            for key in keys:
+                if self.data.get(key):
+                    return key, self.data[key].pop(0)
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.01)
+
+    async def sadd(self, key, *values):
+        return self._call("SADD", key, *values)
+
+    async def srem(self, key, *values):
+        return self._call("SREM", key, *values)
+
+    async def scard(self, key):
+        return self._call("SCARD", key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def expire(self, key, seconds):
+        return 1
+
+    async def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, member):
+        self.data.get(key, {}).pop(member, None)
+
+    async def zrangebyscore(self, key, lo, hi):
+        return [m for m, s in sorted(self.data.get(key, {}).items(), key=lambda kv: kv[1]) if s <= float(hi)]
+
+
+def _service(user_limit=3, global_limit=10):
+    svc = QueueService(FakeRedis())
+    svc.user_concurrent_limit = user_limit
+    svc.global_concurrent_limit = global_limit
+    return svc
+
+
+def test_interactive_tasks_jump_ahead_of_batch_jobs():
+    svc = _service()
+
+    async def run():
+        batch = [await svc.enqueue_task("u1", f"60000{i}", {}, batch_id="b1") for i in range(3)]
+        single = await svc.enqueue_task("u2", "000001", {"depth": 1})
+        claimed = [await svc.dequeue_task("w1") for _ in range(4)]
+        return batch, single, claimed
+
+    batch, single, claimed = asyncio.run(run())
+
+    assert [t["id"] for t in claimed] == [single, *batch]
+    assert claimed[0]["parameters"] == {"depth": 1}
+    assert claimed[0]["status"] == "processing" and claimed[0]["worker_id"] == "w1"
+    assert svc.r.data[READY_LIST] == [] and svc.r.data[READY_BATCH_LIST] == []
+    # one script round trip per claim
+    assert svc.r.script_calls == 4
+
+
+def test_claim_sets_processing_and_visibility_deadline_atomically():
+    svc = _service()
+    svc.visibility_timeout = 120
+
+    async def run():
+        task_id = await svc.enqueue_task("u1", "000001", {})
+        before = int(time.time())
+        task = await svc.dequeue_task("w1")
+        return task_id, before, task
+
+    task_id, before, task = asyncio.run(run())
+
+    data = svc.r.data
+    assert task["id"] == task_id
+    assert task_id in data[SET_PROCESSING]
+    assert task_id in data["qa:user_processing:u1"]
+    assert before + 120 <= data[VISIBILITY_DEADLINES_ZSET][task_id] <= before + 121
+    assert data["qa:visibility:" + task_id]["worker_id"] == "w1"
+
+
+def test_user_limit_skips_to_other_users_without_requeue_churn():
+    svc = _service(user_limit=1)
+
+    async def run():
+        a1 = await svc.enqueue_task("alice", "000001", {})
+        a2 = await svc.enqueue_task("alice", "000002", {})
+        b1 = await svc.enqueue_task("bob", "000003", {})
+        first = await svc.dequeue_task("w1")
+        second = await svc.dequeue_task("w2")
+        third = await svc.dequeue_task("w3")
+        await svc.ack_task(first["id"])
+        fourth = await svc.dequeue_task("w3")
+        return (a1, a2, b1), (first, second, third, fourth)
+
+    (a1, a2, b1), (first, second, third, fourth) = asyncio.run(run())
+
+    assert first["id"] == a1
+    assert second["id"] == b1
+    assert third is None
+    assert fourth["id"] == a2
+
+
+def test_global_limit_blocks_claims():
+    svc = _service(global_limit=1)
+
+    async def run():
+        await svc.enqueue_task("u1", "000001", {})
+        await svc.enqueue_task("u2", "000002", {})
+        return await svc.dequeue_task("w1"), await svc.dequeue_task("w2")
+
+    first, second = asyncio.run(run())
+    assert first is not None and second is None
+    assert len(svc.r.data[READY_LIST]) == 1
+
+
+def test_cancelled_tasks_are_dropped_from_lane():
+    svc = _service()
+
+    async def run():
+        stale = await svc.enqueue_task("u1", "000001", {})
+        live = await svc.enqueue_task("u1", "000002", {})
+        await svc.r.hset(TASK_PREFIX + stale, mapping={"status": "cancelled"})
+        return live, await svc.dequeue_task("w1")
+
+    live, task = asyncio.run(run())
+    assert task["id"] == live
+    assert svc.r.data[READY_LIST] == []
+
+
+def test_blocking_dequeue_wakes_on_enqueue():
+    svc = _service()
+
+    async def run():
+        svc.r.data.pop(QUEUE_NOTIFY_LIST, None)
+        waiter = asyncio.create_task(svc.dequeue_task("w1", timeout=2))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        started = time.perf_counter()
+        task_id = await svc.enqueue_task("u1", "000001", {})
+        task = await waiter
+        return task_id, task, time.perf_counter() - started
+
+    task_id, task, waited = asyncio.run(run())
+    assert task["id"] == task_id
+    assert waited < 0.5
+
+
+def test_expired_tasks_return_to_their_lane():
+    svc = _service()
+    svc.visibility_timeout = 0
+
+    async def run():
+        task_id = await svc.enqueue_task("u1", "000001", {}, batch_id="b1")
+        await svc.dequeue_task("w1")
+        svc.r.data[VISIBILITY_DEADLINES_ZSET][task_id] -= 5
+        await svc.cleanup_expired_tasks()
+        return task_id, await svc.stats()
+
+    task_id, stats = asyncio.run(run())
+    assert svc.r.data[READY_BATCH_LIST] == [task_id]
+    assert svc.r.data[TASK_PREFIX + task_id]["status"] == "queued"
+    assert task_id not in svc.r.data[SET_PROCESSING]
+    assert stats["queued"] == stats["queued_batch"] == 1
+
+
+def test_claim_errors_propagate_so_the_worker_backs_off():
+    svc = _service()
+
+    async def broken(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    svc._claim_script = broken
+    with pytest.raises(ConnectionError):
+        asyncio.run(svc.dequeue_task("w1", timeout=1))
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import app.services.quotes_ingestion_service as qis_mod
+from app.services.quotes_ingestion_service import QuotesIngestionService
+
+TZ = ZoneInfo("Asia/Shanghai")
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        return list(self._docs)
+
+
+class FakeColl:
+    def __init__(self, docs=None):
+        self.docs = docs or []
+        self.bulk_calls = []
+        self.inserted = []
+
+    def find(self, query, projection=None):
+        return FakeCursor(self.docs)
+
+    async def bulk_write(self, ops, ordered=False):
+        self.bulk_calls.append(ops)
+        return SimpleNamespace(matched_count=len(ops), modified_count=len(ops), upserted_ids={})
+
+    async def insert_many(self, docs, ordered=False):
+        self.inserted.extend(docs)
+
+
+class FakeDB:
+    def __init__(self, quotes_docs=None):
+        self.colls = {"market_quotes": FakeColl(quotes_docs), "market_quotes_minute": FakeColl()}
+
+    def __getitem__(self, name):
+        return self.colls[name]
+
+
+def _service(monkeypatch, quotes_docs=None):
+    db = FakeDB(quotes_docs)
+    monkeypatch.setattr(qis_mod, "get_mongo_db", lambda: db)
+    svc = QuotesIngestionService()
+    svc.minute_collection_name = "market_quotes_minute"
+    return svc, db
+
+
+def _quote(close, volume, amount=None):
+    return {"close": close, "pct_chg": 0.0, "amount": amount if amount is not None else volume * close,
+            "volume": volume, "open": 10.0, "high": 11.0, "low": 9.0, "pre_close": 10.0}
+
+
+def test_only_changed_quotes_are_written(monkeypatch):
+    svc, db = _service(monkeypatch)
+
+    async def run():
+        first = {"000001": _quote(10.0, 100), "600000": _quote(8.0, 50), "sz000002": _quote(5.0, float("nan"))}
+        await svc._bulk_upsert(first, "20250102", "fake")
+        second = {"000001": _quote(10.2, 150), "600000": _quote(8.0, 50), "sz000002": _quote(5.0, float("nan"))}
+        changed = await svc._bulk_upsert(second, "20250102", "fake")
+        unchanged = await svc._bulk_upsert(second, "20250102", "fake")
+        return changed, unchanged
+
+    changed, unchanged = asyncio.run(run())
+
+    calls = db["market_quotes"].bulk_calls
+    assert [len(ops) for ops in calls] == [3, 1]
+    assert calls[1][0]._filter == {"code": "000001"}
+    assert list(changed) == ["000001"]
+    assert unchanged == {}
+
+
+def test_snapshot_is_seeded_from_existing_quotes(monkeypatch):
+    existing = [{"code": "000001", "trade_date": "20250102", **_quote(10.0, 100)}]
+    svc, db = _service(monkeypatch, existing)
+
+    async def run():
+        await svc._bulk_upsert({"000001": _quote(10.0, 100), "600000": _quote(8.0, 50)}, "20250102", "fake")
+
+    asyncio.run(run())
+    assert [op._filter["code"] for op in db["market_quotes"].bulk_calls[0]] == ["600000"]
+
+    # a new trading day rewrites even identical prices
+    asyncio.run(svc._bulk_upsert({"000001": _quote(10.0, 100)}, "20250103", "fake"))
+    assert len(db["market_quotes"].bulk_calls) == 2
+
+
+def test_minute_bars_aggregate_snapshots_and_volume_deltas(monkeypatch):
+    existing = [{"code": "000001", "trade_date": "20250102", **_quote(10.0, 1000, amount=10000.0)}]
+    svc, db = _service(monkeypatch, existing)
+
+    ticks = [
+        (datetime(2025, 1, 2, 10, 0, 5, tzinfo=TZ), 10.1, 1100),
+        (datetime(2025, 1, 2, 10, 0, 35, tzinfo=TZ), 9.9, 1300),
+        (datetime(2025, 1, 2, 10, 0, 50, tzinfo=TZ), 10.0, 1400),
+        (datetime(2025, 1, 2, 10, 1, 5, tzinfo=TZ), 10.3, 1500),
+    ]
+
+    async def run():
+        for now, price, volume in ticks:
+            changed = await svc._bulk_upsert({"000001": _quote(price, volume, amount=volume * 10.0)}, "20250102", "fake")
+            await svc._write_minute_bars(svc._update_minute_bars(changed, "20250102", "fake", now))
+        await svc.flush_minute_bars()
+
+    asyncio.run(run())
+
+    bars = db["market_quotes_minute"].inserted
+    assert [b["ts"].strftime("%H:%M") for b in bars] == ["10:00", "10:01"]
+    first, second = bars
+    assert (first["open"], first["high"], first["low"], first["close"]) == (10.1, 10.1, 9.9, 10.0)
+    assert first["volume"] == 400 and first["amount"] == 4000.0
+    assert second["volume"] == 100 and second["close"] == 10.3
+    assert not any(k.startswith("_") for b in bars for k in b)
+
+
+def test_unchanged_symbols_produce_no_bars(monkeypatch):
+    svc, db = _service(monkeypatch)
+    t0 = datetime(2025, 1, 2, 10, 0, tzinfo=TZ)
+
+    async def run():
+        snapshot = {"000001": _quote(10.0, 100), "600000": _quote(8.0, 50)}
+        changed = await svc._bulk_upsert(snapshot, "20250102", "fake")
+        svc._update_minute_bars(changed, "20250102", "fake", t0)
+        changed = await svc._bulk_upsert({**snapshot, "000001": _quote(10.5, 120)}, "20250102", "fake")
+        await svc._write_minute_bars(svc._update_minute_bars(changed, "20250102", "fake", t0.replace(minute=1)))
+        await svc.flush_minute_bars()
+
+    asyncio.run(run())
+    bars = db["market_quotes_minute"].inserted
+    assert [(b["code"], b["ts"].minute) for b in bars] == [("000001", 0), ("600000", 0), ("000001", 1)]
+    # first observation of a symbol has no baseline volume
+    assert bars[0]["volume"] is None and bars[2]["volume"] == 20
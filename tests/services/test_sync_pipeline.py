@@ -0,0 +1,192 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.services.historical_data_service import HistoricalDataService
+from app.worker.sync_pipeline import SymbolSyncPipeline, run_upsert_pipeline
+
+
+def test_pipeline_overlaps_fetch_and_coalesces_writes():
+    symbols = [f"{i:06d}" for i in range(40)]
+    writes = []
+    in_flight = {"fetch": 0, "overlap": 0}
+
+    async def fetch(symbol):
+        in_flight["fetch"] += 1
+        await asyncio.sleep(0.02)
+        in_flight["fetch"] -= 1
+        return [symbol]
+
+    def transform(symbol, raw):
+        return raw * 5
+
+    async def write(batch):
+        if in_flight["fetch"]:
+            in_flight["overlap"] += 1
+        writes.append([s for s, _ in batch])
+        await asyncio.sleep(0.02)
+        return sum(len(p) for _, p in batch)
+
+    pipeline = SymbolSyncPipeline(fetch, write, transform, concurrency=8, write_batch_size=50)
+    started = time.perf_counter()
+    stats = asyncio.run(pipeline.run(symbols))
+    elapsed = time.perf_counter() - started
+
+    assert stats.success_count == 40 and stats.error_count == 0
+    assert stats.total_records == 200
+    assert sorted(s for batch in writes for s in batch) == symbols
+    # 40 symbols x 5 ops, 50 ops per bulk write
+    assert len(writes) == 4
+    assert in_flight["overlap"] > 0
+    assert elapsed < 40 * 0.02
+
+
+def test_pipeline_counts_failures_per_stage():
+    async def fetch(symbol):
+        if symbol == "boom":
+            raise RuntimeError("network")
+        return None if symbol == "empty" else {"v": symbol}
+
+    def transform(symbol, raw):
+        return None if symbol == "skip" else [raw]
+
+    async def write(batch):
+        if any(s == "bad" for s, _ in batch):
+            raise RuntimeError("db down")
+        return len(batch)
+
+    pipeline = SymbolSyncPipeline(fetch, write, transform, concurrency=2, write_batch_size=1)
+    stats = asyncio.run(pipeline.run(["ok", "boom", "empty", "skip", "bad"]))
+
+    assert stats.success_count == 1
+    assert stats.error_count == 4
+    assert {e["code"]: e["context"] for e in stats.errors} == {
+        "boom": "fetch", "empty": "fetch", "skip": "transform", "bad": "write"
+    }
+    assert stats.processed == 5
+
+
+def test_pipeline_stop_signal_and_progress():
+    symbols = [str(i) for i in range(100)]
+    checks = []
+    progress = []
+
+    async def should_stop():
+        checks.append(1)
+        return len(checks) > 1
+
+    async def on_progress(processed, total):
+        progress.append((processed, total))
+
+    async def fetch(symbol):
+        return [symbol]
+
+    async def write(batch):
+        return len(batch)
+
+    pipeline = SymbolSyncPipeline(fetch, write, concurrency=2, write_batch_size=5,
+                                  should_stop=should_stop, on_progress=on_progress,
+                                  progress_interval=5, stop_check_interval=10)
+    stats = asyncio.run(pipeline.run(symbols))
+
+    assert stats.cancelled
+    assert stats.success_count < 100
+    assert stats.processed == stats.success_count
+    assert progress and all(total == 100 for _, total in progress)
+
+
+def test_pipeline_progress_cancellation_is_raised_after_draining():
+    class Cancelled(Exception):
+        pass
+
+    written = []
+
+    async def on_progress(processed, total):
+        if processed >= 10:
+            raise Cancelled("cancel requested")
+
+    async def fetch(symbol):
+        return [symbol]
+
+    async def write(batch):
+        written.extend(s for s, _ in batch)
+        return len(batch)
+
+    pipeline = SymbolSyncPipeline(fetch, write, concurrency=2, write_batch_size=5,
+                                  on_progress=on_progress, progress_interval=5)
+    with pytest.raises(Cancelled):
+        asyncio.run(pipeline.run([str(i) for i in range(200)]))
+
+    assert 10 <= len(written) < 200
+
+
+def test_akshare_historical_sync_propagates_cancellation(monkeypatch):
+    from app.services.scheduler_service import TaskCancelledException
+    from app.worker.akshare_sync_service import AKShareSyncService
+
+    service = AKShareSyncService()
+
+    async def cancelled_pipeline(*args, **kwargs):
+        raise TaskCancelledException("任务已被用户取消")
+
+    monkeypatch.setattr(service, "_run_historical_pipeline", cancelled_pipeline)
+
+    with pytest.raises(TaskCancelledException):
+        asyncio.run(service.sync_historical_data(
+            start_date="2024-01-01", end_date="2024-01-31", symbols=["000001"], job_id="akshare_historical_sync"
+        ))
+
+
+def test_run_upsert_pipeline_bulk_writes_collection():
+    calls = []
+
+    class FakeCollection:
+        async def bulk_write(self, ops, ordered=True):
+            calls.append(len(ops))
+            return SimpleNamespace(modified_count=len(ops) - 1, upserted_count=1)
+
+    async def fetch(code):
+        return {"price": 1.0} if code != "bad" else {}
+
+    def transform(code, quote):
+        return ("op", code)
+
+    result = asyncio.run(run_upsert_pipeline(
+        ["a", "b", "bad", "c"], fetch, transform, FakeCollection(),
+        name="test", concurrency=2, write_batch_size=10
+    ))
+
+    assert result == {"updated": 2, "inserted": 1, "failed": 1}
+    assert calls == [3]
+
+
+def test_historical_save_documents_coalesces_symbols():
+    calls = []
+
+    class FakeCollection:
+        async def bulk_write(self, ops, ordered=True):
+            calls.append(len(ops))
+            return SimpleNamespace(upserted_count=len(ops), modified_count=0)
+
+    service = object.__new__(HistoricalDataService)
+    service.collection = FakeCollection()
+
+    async def no_store(*args, **kwargs):
+        return None
+
+    service._write_bar_store_many = no_store
+
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=3),
+        "open": [1.0, 2.0, 3.0], "high": [1.0, 2.0, 3.0], "low": [1.0, 2.0, 3.0],
+        "close": [1.0, 2.0, 3.0], "volume": [100, 200, 300],
+    })
+    docs = {code: service.prepare_documents(code, df, "akshare", "CN", "daily") for code in ["000001", "600000"]}
+    saved = asyncio.run(service.save_documents(docs, market="CN", period="daily", batch_size=4))
+
+    assert saved == 6
+    assert calls == [4, 2]
+    assert {d["symbol"] for ds in docs.values() for d in ds} == {"000001", "600000"}
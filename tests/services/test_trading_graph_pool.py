@@ -0,0 +1,82 @@
+import threading
+import time
+
+
+def _service(monkeypatch):
+    import app.services.simple_analysis_service as sas_mod
+
+    built = []
+
+    class FakeGraph:
+        def __init__(self, selected_analysts, debug, config):
+            time.sleep(0.1)
+            self.config = config
+            built.append(config)
+
+    monkeypatch.setattr(sas_mod, "TradingAgentsGraph", FakeGraph)
+    service = sas_mod.SimpleAnalysisService.__new__(sas_mod.SimpleAnalysisService)
+    service._trading_graph_cache = sas_mod.OrderedDict()
+    service._trading_graph_lock = threading.Lock()
+    service._trading_graph_build_locks = {}
+    return service, built
+
+
+def test_graphs_are_pooled_per_config(monkeypatch):
+    service, built = _service(monkeypatch)
+    config = {"llm_provider": "dashscope", "research_depth": 3, "selected_analysts": ["market"]}
+
+    graphs = []
+    threads = [threading.Thread(target=lambda: graphs.append(service._get_trading_graph(dict(config))))
+               for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert len({id(g) for g in graphs}) == 1
+
+    other = service._get_trading_graph(dict(config, research_depth=5))
+    assert other is not graphs[0]
+    assert len(built) == 2
+
+
+def test_pool_evicts_least_recently_used(monkeypatch):
+    service, built = _service(monkeypatch)
+    monkeypatch.setattr(type(service), "TRADING_GRAPH_POOL_SIZE", 2)
+
+    first = service._get_trading_graph({"n": 1})
+    service._get_trading_graph({"n": 2})
+    assert service._get_trading_graph({"n": 1}) is first
+    service._get_trading_graph({"n": 3})  # evicts {"n": 2}
+
+    assert len(service._trading_graph_cache) == 2
+    service._get_trading_graph({"n": 2})
+    assert len(built) == 4
+
+
+def test_run_config_is_isolated_per_concurrent_run():
+    from concurrent.futures import ThreadPoolExecutor
+    from contextvars import copy_context
+
+    from tradingagents.agents.utils.agent_utils import Toolkit, _analysis_config_key
+
+    class_depth = Toolkit._config.get("research_depth")
+    barrier = threading.Barrier(2)
+    seen = {}
+
+    def run(depth):
+        with Toolkit.run_config({"research_depth": depth}):
+            barrier.wait()
+            # tools run on worker threads with a copied context, as in LangGraph's ToolNode
+            with ThreadPoolExecutor(1) as pool:
+                seen[depth] = pool.submit(copy_context().run, _analysis_config_key).result()
+
+    threads = [threading.Thread(target=run, args=(depth,)) for depth in ("快速", "深度")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert seen == {"快速": {"research_depth": "快速"}, "深度": {"research_depth": "深度"}}
+    assert Toolkit._config.get("research_depth") == class_depth
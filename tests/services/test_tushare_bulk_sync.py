@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pandas as pd
+import pytest
+
+from app.worker.tushare_sync_service import TushareSyncService
+
+
+class _FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def __aiter__(self):
+        self._it = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _market_daily(trade_date, factors):
+    return pd.DataFrame({
+        "ts_code": ["000001.SZ", "600000.SH"],
+        "symbol": ["000001", "600000"],
+        "trade_date": pd.Timestamp(trade_date),
+        "open": [10.0, 20.0], "high": [11.0, 21.0], "low": [9.0, 19.0],
+        "close": [10.0, 20.0], "pre_close": [10.0, 20.0],
+        "volume": [100.0, 200.0], "amount": [1000.0, 2000.0],
+        "adj_factor": factors,
+    })
+
+
+def _make_service(counts, trade_dates):
+    service = object.__new__(TushareSyncService)
+    service.settings = SimpleNamespace(TUSHARE_HISTORICAL_BULK_SYNC_ENABLED=True,
+                                       TUSHARE_HISTORICAL_BULK_LOOKBACK_DAYS=10,
+                                       TUSHARE_HISTORICAL_QFQ_RESYNC_MAX=200)
+    service.rate_limiter = SimpleNamespace(acquire=AsyncMock())
+
+    collection = SimpleNamespace(
+        find_one=AsyncMock(return_value={"trade_date": "2024-01-03"}),
+        aggregate=lambda pipeline: _FakeCursor([{"_id": d, "count": c} for d, c in counts.items()]),
+    )
+    service.historical_service = SimpleNamespace(
+        collection=collection, save_market_data=AsyncMock(side_effect=lambda data, **kw: len(data))
+    )
+
+    factors = {"2024-01-04": [1.0, 2.0], "2024-01-05": [2.0, 2.0]}
+    service.provider = SimpleNamespace(
+        get_trade_dates=AsyncMock(return_value=trade_dates),
+        get_market_daily=AsyncMock(side_effect=lambda d: _market_daily(d, factors[d])),
+        # 库中最近交易日 2024-01-03 的复权因子：000001 此后除权
+        get_market_adj_factor=AsyncMock(return_value=pd.DataFrame({
+            "symbol": ["000001", "600000"], "adj_factor": [1.0, 2.0]
+        })),
+    )
+    service._resync_full_history = AsyncMock(return_value={"total_records": 250, "errors": []})
+    return service
+
+
+def test_bulk_sync_fetches_only_missing_trade_dates():
+    service = _make_service(
+        counts={"2024-01-02": 5000, "2024-01-03": 5000, "2024-01-04": 1200},
+        trade_dates=["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"],
+    )
+
+    stats = asyncio.run(service.sync_historical_data(incremental=True))
+
+    assert stats["mode"] == "trade_date"
+    # 01-04 只写入了部分股票，01-05 尚未同步
+    assert stats["trade_dates"] == ["2024-01-04", "2024-01-05"]
+    assert service.provider.get_market_daily.await_count == 2
+    # 4 条整市场记录 + 除权股票整段重新同步的 250 条
+    assert stats["total_records"] == 254
+
+    saved = service.historical_service.save_market_data.await_args.args[0]
+    first = saved[(saved["symbol"] == "000001") & (saved["trade_date"] == pd.Timestamp("2024-01-04"))].iloc[0]
+    # 前复权：以批次内最新复权因子为基准
+    assert first["close"] == pytest.approx(5.0)
+    assert first["pre_close"] == pytest.approx(5.0)
+    other = saved[saved["symbol"] == "600000"]
+    assert other["close"].tolist() == [20.0, 20.0]
+
+
+def test_rebased_symbols_are_resynced_in_full():
+    service = _make_service(counts={"2024-01-03": 5000}, trade_dates=["2024-01-03", "2024-01-04", "2024-01-05"])
+
+    stats = asyncio.run(service.sync_historical_data_by_trade_date(end_date="2024-01-05"))
+
+    query = service.historical_service.collection.find_one.await_args.args[0]
+    assert query["trade_date"] == {"$lt": "2024-01-04"}
+    service.provider.get_market_adj_factor.assert_awaited_once_with("2024-01-03")
+    assert stats["rebased_symbols"] == ["000001"]
+    service._resync_full_history.assert_awaited_once_with(["000001"], "2024-01-05")
+
+
+def test_rebased_symbols_over_limit_are_only_reported():
+    service = _make_service(counts={"2024-01-03": 5000}, trade_dates=["2024-01-03", "2024-01-04", "2024-01-05"])
+    service.settings.TUSHARE_HISTORICAL_QFQ_RESYNC_MAX = 0
+
+    stats = asyncio.run(service.sync_historical_data_by_trade_date(end_date="2024-01-05"))
+
+    assert stats["rebased_symbols"] == ["000001"]
+    service._resync_full_history.assert_not_awaited()
+    assert stats["total_records"] == 4
+
+
+def test_bulk_sync_falls_back_without_baseline():
+    service = _make_service(counts={}, trade_dates=[])
+    service.historical_service.collection.find_one = AsyncMock(return_value=None)
+
+    assert asyncio.run(service.sync_historical_data_by_trade_date()) is None
+    service.provider.get_market_daily.assert_not_awaited()
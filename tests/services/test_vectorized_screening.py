@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.screening.eval_utils import evaluate_conditions, evaluate_conditions_mask
+from app.services.screening.panel import ScreeningPanel
+from app.services.screening_service import ALLOWED_FIELDS, ALLOWED_OPS, SCREENING_INDICATORS
+from tradingagents.tools.analysis.indicators import compute_many
+
+
+def _make_bars(n_symbols, n_days, seed=0, ragged=True):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_days)
+    frames = []
+    for i in range(n_symbols):
+        length = int(rng.integers(1, n_days + 1)) if ragged else n_days
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+        frames.append(pd.DataFrame({
+            "symbol": f"{i:06d}",
+            "trade_date": dates[n_days - length:],
+            "open": close * (1 + rng.normal(0, 0.005, length)),
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "vol": rng.integers(1_000, 100_000, length).astype(float),
+            "amount": close * 1_000,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+CONDITIONS = [
+    {"logic": "AND", "children": [
+        {"field": "close", "op": ">", "right_field": "ma20"},
+        {"field": "rsi14", "op": "between", "value": [30, 70]},
+    ]},
+    {"logic": "OR", "children": [
+        {"field": "dif", "op": "cross_up", "right_field": "dea"},
+        {"field": "kdj_k", "op": "cross_down", "right_field": "kdj_d"},
+    ]},
+    {"field": "ma5", "op": "cross_up", "right_field": "ma10"},
+    {"field": "atr14", "op": "<=", "value": 0.3},
+    {"field": "pct_chg", "op": "!=", "right_field": "ma60"},
+    {"field": "close", "op": ">", "value": "bad"},
+    {},
+]
+
+
+@pytest.mark.parametrize("conditions", CONDITIONS)
+def test_vectorized_screening_matches_per_symbol(conditions):
+    bars = _make_bars(60, 90)
+    panel = ScreeningPanel.from_frame(bars).with_indicators(SCREENING_INDICATORS)
+    last, prev = panel.row(0), panel.row(1)
+    mask = evaluate_conditions_mask(last, prev, conditions, ALLOWED_FIELDS, ALLOWED_OPS, len(panel.symbols))
+
+    for j, code in enumerate(panel.symbols):
+        df = bars[bars["symbol"] == code].drop(columns=["symbol", "trade_date"]).reset_index(drop=True)
+        df["pct_chg"] = df["close"].pct_change() * 100.0
+        dfc = compute_many(df, SCREENING_INDICATORS)
+
+        for f in ["ma20", "ma60", "rsi14", "dif", "dea", "boll_upper", "atr14", "kdj_k", "kdj_j", "pct_chg"]:
+            assert last[f][j] == pytest.approx(dfc[f].iloc[-1], nan_ok=True), (code, f)
+        assert bool(mask[j]) == evaluate_conditions(dfc, conditions, ALLOWED_FIELDS, ALLOWED_OPS), code
+
+
+def test_vectorized_screening_whole_market_speed():
+    bars = _make_bars(5000, 150, seed=1, ragged=False)
+    conditions = CONDITIONS[0]
+
+    started = time.perf_counter()
+    panel = ScreeningPanel.from_frame(bars).with_indicators(SCREENING_INDICATORS)
+    mask = evaluate_conditions_mask(panel.row(0), panel.row(1), conditions, ALLOWED_FIELDS, ALLOWED_OPS,
+                                    len(panel.symbols))
+    elapsed = time.perf_counter() - started
+
+    assert mask.shape == (5000,)
+    assert elapsed < 5.0
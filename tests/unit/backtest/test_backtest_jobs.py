@@ -0,0 +1,156 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+import app.backtest.jobs as jobs_mod
+from app.backtest.jobs import BacktestJobService, make_cache_key
+from app.backtest.strategies.registry import StrategyRegistry
+from app.backtest.strategies.examples.ma_cross import DualMovingAverage
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs: List[Dict[str, Any]] = []
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+    def _match(self, doc, query):
+        for key, cond in query.items():
+            if key == "$or":
+                if not any(self._match(doc, sub) for sub in cond):
+                    return False
+            elif isinstance(cond, dict):
+                value = doc.get(key)
+                if "$in" in cond and value not in cond["$in"]:
+                    return False
+                if "$gte" in cond and not (value is not None and value >= cond["$gte"]):
+                    return False
+                if "$lt" in cond and not (value is not None and value < cond["$lt"]):
+                    return False
+            elif doc.get(key) != cond:
+                return False
+        return True
+
+    async def find_one(self, query, projection=None, sort=None):
+        for doc in reversed(self.docs):
+            if self._match(doc, query):
+                return dict(doc)
+        return None
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(update["$set"])
+                return
+
+    async def update_many(self, query, update):
+        matched = [doc for doc in self.docs if self._match(doc, query)]
+        for doc in matched:
+            doc.update(update["$set"])
+        return type("Result", (), {"modified_count": len(matched)})()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append(channel)
+
+
+def _bars():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2023-01-02", periods=150)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame(
+        {"open": close, "high": close, "low": close, "close": close, "volume": 1e5},
+        index=pd.DatetimeIndex(dates, name="trade_date"),
+    )
+
+
+def test_cache_key_is_order_independent():
+    a = make_cache_key({"symbol": "000001", "params": {"fast_period": 5, "slow_period": 20}})
+    b = make_cache_key({"params": {"slow_period": 20, "fast_period": 5}, "symbol": "000001"})
+    assert a == b
+
+
+def test_job_runs_in_background_and_is_reused(monkeypatch):
+    coll, redis = FakeCollection(), FakeRedis()
+    calls = []
+
+    async def fake_get_data_frame(**kwargs):
+        calls.append(kwargs)
+        return _bars()
+
+    monkeypatch.setattr(jobs_mod, "get_mongo_db", lambda: {jobs_mod.JOBS_COLLECTION: coll})
+    monkeypatch.setattr(jobs_mod, "get_redis_client", lambda: redis)
+    monkeypatch.setattr(jobs_mod, "get_data_frame", fake_get_data_frame)
+    monkeypatch.setitem(StrategyRegistry._strategies, "DualMovingAverage", DualMovingAverage)
+
+    spec = {
+        "strategy_id": "DualMovingAverage", "symbol": "000001",
+        "start_date": "2023-01-01", "end_date": "2023-12-31",
+        "initial_cash": 100000.0, "commission": 0.0003,
+        "params": {"fast_period": 5, "slow_period": 20}, "engine": "backtrader",
+    }
+
+    async def scenario():
+        svc = BacktestJobService()
+        job = await svc.submit(spec)
+        assert job["status"] == "queued" and not job["cached"]
+        await asyncio.gather(*svc._running)
+
+        done = await svc.get_job(job["job_id"])
+        assert done["status"] == "completed", done["error"]
+        assert "sharpe_ratio" in done["metrics"]
+        assert len(done["equity_curve"]) == 150
+
+        again = await svc.submit(spec)
+        assert again["job_id"] == job["job_id"] and again["cached"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        jobs_mod.shutdown_backtest_executor()
+
+    assert len(calls) == 1
+    assert set(redis.published) == {f"task_progress:{coll.docs[0]['job_id']}"}
+
+
+def test_orphaned_jobs_do_not_block_resubmission(monkeypatch):
+    coll = FakeCollection()
+    monkeypatch.setattr(jobs_mod, "get_mongo_db", lambda: {jobs_mod.JOBS_COLLECTION: coll})
+    monkeypatch.setattr(jobs_mod, "get_redis_client", lambda: FakeRedis())
+    monkeypatch.setitem(StrategyRegistry._strategies, "DualMovingAverage", DualMovingAverage)
+
+    spec = {"strategy_id": "DualMovingAverage", "symbol": "000001", "params": {}}
+    long_ago = datetime.utcnow() - timedelta(hours=2)
+    # Left behind by a process that crashed mid-run
+    coll.docs.append({"job_id": "dead", "cache_key": make_cache_key(spec), "status": "running",
+                      "created_at": long_ago, "updated_at": long_ago})
+    # Still heartbeating in another worker process
+    coll.docs.append({"job_id": "alive", "cache_key": "other", "status": "running",
+                      "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()})
+
+    async def scenario():
+        svc = BacktestJobService()
+        monkeypatch.setattr(svc, "_run_job", lambda *args: asyncio.sleep(0))
+
+        job = await svc.submit(spec)
+        assert job["job_id"] != "dead" and not job["cached"]
+        await asyncio.gather(*svc._running)
+
+        assert await svc.fail_stale_jobs() == 1
+
+    asyncio.run(scenario())
+
+    status = {doc["job_id"]: doc["status"] for doc in coll.docs}
+    assert status["dead"] == "failed"
+    assert status["alive"] == "running"
@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest.exceptions import BacktestError, StrategyError
+from app.backtest.optimizer import ParameterOptimizer, expand_param_grid, rank_results
+from app.backtest.strategies.examples.ma_cross import DualMovingAverage
+
+
+def test_expand_param_grid_ranges_and_lists():
+    grid = expand_param_grid(DualMovingAverage, {
+        "fast_period": {"start": 5, "stop": 15, "step": 5},
+        "slow_period": [20, 30],
+    })
+    assert len(grid) == 6
+    assert {"fast_period": 10, "slow_period": 30} in grid
+    assert all(isinstance(p["fast_period"], int) for p in grid)
+
+
+def test_expand_param_grid_rejects_unknown_param():
+    with pytest.raises(StrategyError):
+        expand_param_grid(DualMovingAverage, {"nope": [1, 2]})
+
+
+def test_rank_results_orders_by_metric():
+    results = [
+        {"params": {"a": 1}, "metrics": {"sharpe_ratio": 0.1, "max_drawdown": 5.0}, "error": None},
+        {"params": {"a": 2}, "metrics": None, "error": "boom"},
+        {"params": {"a": 3}, "metrics": {"sharpe_ratio": 0.3, "max_drawdown": 9.0}, "error": None},
+    ]
+    ranked = rank_results(list(results), sort_by="sharpe_ratio")
+    assert [r["params"]["a"] for r in ranked] == [3, 1, 2]
+    assert [r["rank"] for r in ranked] == [1, 2, None]
+
+    ranked = rank_results(list(results), sort_by="max_drawdown")
+    assert [r["params"]["a"] for r in ranked[:2]] == [1, 3]
+
+
+def test_rank_results_puts_missing_metrics_last():
+    results = [
+        {"params": {"a": 1}, "metrics": {"sharpe_ratio": None, "max_drawdown": None}, "error": None},
+        {"params": {"a": 2}, "metrics": {"sharpe_ratio": -0.5, "max_drawdown": 3.0}, "error": None},
+        {"params": {"a": 3}, "metrics": {"sharpe_ratio": float("nan"), "max_drawdown": 1.0}, "error": None},
+    ]
+    ranked = rank_results(list(results), sort_by="sharpe_ratio")
+    assert [r["params"]["a"] for r in ranked] == [2, 1, 3]
+    assert [r["rank"] for r in ranked] == [1, 2, 3]
+
+    ranked = rank_results(list(results), sort_by="max_drawdown")
+    assert [r["params"]["a"] for r in ranked] == [3, 2, 1]
+
+
+def test_rank_results_rejects_unknown_metric():
+    with pytest.raises(BacktestError):
+        rank_results([], sort_by="sharpe")
+
+
+def test_optimize_endpoint_rejects_unknown_sort_by():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routers.backtest import router
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).post("/optimize", json={
+        "strategy_id": "ma_cross",
+        "symbol": "000001",
+        "start_date": "2024-01-01",
+        "end_date": "2024-06-30",
+        "param_ranges": {"fast_period": [5, 10]},
+        "sort_by": "sharpe",
+    })
+    assert response.status_code == 400
+    assert "sharpe" in response.json()["detail"]
+
+
+def test_optimizer_runs_grid_in_process_pool():
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range("2022-01-03", periods=200)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    data = pd.DataFrame(
+        {"open": close, "high": close * 1.01, "low": close * 0.99, "close": close, "volume": 1e6},
+        index=pd.DatetimeIndex(dates, name="trade_date"),
+    )
+
+    optimizer = ParameterOptimizer(data, max_workers=2)
+    ranked = asyncio.run(optimizer.optimize(
+        DualMovingAverage, {"fast_period": [5, 10], "slow_period": [20, 30]}
+    ))
+
+    assert len(ranked) == 4
+    assert all(r["error"] is None for r in ranked)
+    sharpes = [r["metrics"]["sharpe_ratio"] for r in ranked]
+    assert sharpes == sorted(sharpes, reverse=True)
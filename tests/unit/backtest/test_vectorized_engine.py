@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest.engine import BacktestEngine
+from app.backtest.feeds import MongoPandasData
+from app.backtest.vectorized import BarPanel, VectorizedBacktestEngine, rolling_mean, crossover
+from app.backtest.strategies.examples.ma_cross import DualMovingAverage
+
+
+def _make_bars(seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=300)
+    frames = []
+    for k in range(4):
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        open_ = close * (1 + rng.normal(0, 0.005, len(dates)))
+        df = pd.DataFrame({
+            "trade_date": dates,
+            "symbol": f"00000{k}",
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.01,
+            "low": np.minimum(open_, close) * 0.99,
+            "close": close,
+            "volume": 1e6,
+        })
+        if k == 1:
+            df = df.iloc[40:]  # listed later
+        if k == 2:
+            df = df.drop(df.index[120:140])  # suspended
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_vectorized_matches_backtrader_per_symbol():
+    bars = _make_bars()
+    params = {"fast_period": 5, "slow_period": 20}
+
+    results = VectorizedBacktestEngine().run(DualMovingAverage, BarPanel.from_frame(bars), **params)
+
+    for symbol, df in bars.groupby("symbol"):
+        engine = BacktestEngine()
+        engine.add_data(MongoPandasData(dataname=df.set_index("trade_date")))
+        expected = engine.run(DualMovingAverage, **params)["metrics"]
+
+        actual = results[symbol]["metrics"]
+        assert set(expected) == set(actual)
+        for key, value in expected.items():
+            assert actual[key] == pytest.approx(value, rel=1e-6, abs=1e-9), (symbol, key)
+
+
+def test_compact_moves_missing_bars_to_tail():
+    panel = BarPanel.from_frame(_make_bars())
+    compact = panel.compact()
+
+    lengths = (~np.isnan(panel.close)).sum(axis=0)
+    assert list(compact.lengths) == list(lengths)
+    for j in range(len(panel.symbols)):
+        valid = panel.close[:, j][~np.isnan(panel.close[:, j])]
+        np.testing.assert_array_equal(compact.close[:lengths[j], j], valid)
+        assert np.isnan(compact.close[lengths[j]:, j]).all()
+
+
+def test_rolling_mean_and_crossover():
+    values = np.array([[1.0], [2.0], [3.0], [4.0], [np.nan]])
+    np.testing.assert_allclose(rolling_mean(values, 2)[:, 0], [np.nan, 1.5, 2.5, 3.5, np.nan])
+
+    fast = np.array([[1.0], [2.0], [2.0], [3.0], [1.0]])
+    slow = np.array([[2.0], [2.0], [2.0], [2.0], [2.0]])
+    # touching at bars 1-2 then crossing at bar 3 still counts as an up-cross
+    np.testing.assert_array_equal(crossover(fast, slow)[:, 0], [0, 0, 0, 1, -1])
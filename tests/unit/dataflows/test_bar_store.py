@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+from tradingagents.dataflows.cache.bar_store import ColumnarBarStore, bar_adjustment
+
+
+def _bars(start: str, periods: int, close_offset: float = 0.0) -> pd.DataFrame:
+    dates = pd.bdate_range(start, periods=periods)
+    return pd.DataFrame({
+        "trade_date": dates.strftime("%Y-%m-%d"),
+        "open": 1.0,
+        "high": 2.0,
+        "low": 0.5,
+        "close": np.arange(periods, dtype=float) + close_offset,
+        "volume": 100.0,
+    })
+
+
+def test_write_merges_and_reads_sorted(tmp_path):
+    store = ColumnarBarStore(str(tmp_path))
+    store.write("000001", _bars("2024-01-01", 10), data_source="tushare")
+    # Overlapping update: newer values win for the same trade_date
+    store.write("000001", _bars("2024-01-08", 10, close_offset=100.0), data_source="tushare")
+
+    df = store.read("000001")
+    assert df["trade_date"].is_monotonic_increasing
+    assert df["trade_date"].is_unique
+    assert len(df) == 15
+    assert df.loc[df["trade_date"] == "2024-01-08", "close"].item() == 100.0
+    assert np.isnan(df["amount"]).all()  # missing columns are stored as NaN
+
+
+def test_read_slices_date_range(tmp_path):
+    store = ColumnarBarStore(str(tmp_path))
+    store.write("600000", _bars("2024-01-01", 30), data_source="tushare")
+
+    df = store.read("600000", start_date="2024-01-10", end_date="2024-01-19", columns=["close"])
+    assert list(df.columns) == ["trade_date", "close"]
+    assert df["trade_date"].min() == pd.Timestamp("2024-01-10")
+    assert df["trade_date"].max() == pd.Timestamp("2024-01-19")
+    assert store.read("000000") is None
+
+
+def test_read_many_and_covers(tmp_path):
+    store = ColumnarBarStore(str(tmp_path))
+    store.write("000001", _bars("2024-01-01", 20), data_source="tushare")
+    store.write("000002", _bars("2024-01-15", 5), data_source="tushare")
+
+    df = store.read_many(["000001", "000002", "000003"], columns=["close"])
+    assert df.groupby("symbol", observed=True).size().to_dict() == {"000001": 20, "000002": 5}
+
+    assert store.covers("000001", "2024-01-01", "2024-01-26")
+    assert not store.covers("000002", "2024-01-01", "2024-01-19")  # starts too late
+    assert not store.covers("000001", "2024-01-01", "2024-03-01")  # stale
+    assert not store.covers("000003", None, None)
+
+
+def test_sources_and_adjustments_are_kept_apart(tmp_path):
+    store = ColumnarBarStore(str(tmp_path))
+    store.write("000001", _bars("2024-01-01", 20), data_source="akshare")
+    store.write("000001", _bars("2024-01-01", 20, close_offset=50.0), data_source="tushare")
+    # BaoStock unadjusted bars (adjustflag 3) never land in a qfq partition
+    store.write("000001", _bars("2024-01-01", 20, close_offset=900.0), data_source="baostock",
+                adjustment=bar_adjustment("baostock", 3.0))
+
+    assert bar_adjustment("baostock", "2") == "qfq" and bar_adjustment("tushare") == "qfq"
+    assert store.resolve_partition("000001", "2024-01-01", "2024-01-26") == "tushare_qfq"
+    assert store.read("000001")["close"].iloc[0] == 50.0
+    assert store.read("000001", partition="akshare_qfq")["close"].iloc[0] == 0.0
+    assert store.read("000001", partition="baostock_none")["close"].iloc[0] == 900.0
+
+    # A later, fresher akshare partition wins when tushare no longer covers the range
+    store.write("000001", _bars("2024-01-29", 5), data_source="akshare")
+    df = store.read_many(["000001"], start_date="2024-01-01", end_date="2024-02-02", columns=["close"])
+    assert len(df) == 25 and df["close"].iloc[0] == 0.0
+
+
+def test_symbol_listed_after_start_is_covered(tmp_path):
+    store = ColumnarBarStore(str(tmp_path))
+    store.write("301001", _bars("2024-03-04", 20), data_source="tushare")
+    assert not store.covers("301001", "2024-01-01", "2024-03-29")
+
+    store.write("301001", _bars("2024-03-25", 5), data_source="tushare", list_date="2024-03-04")
+    assert store.covers("301001", "2024-01-01", "2024-03-29")
+    # the listing date survives later merges that don't pass it
+    store.write("301001", _bars("2024-03-29", 3), data_source="tushare")
+    assert store.covers("301001", "2024-01-01", "2024-04-02")
+
+    # bars missing after the listing date are still a gap
+    store.write("301002", _bars("2024-03-18", 10), data_source="tushare", list_date="2024-03-04")
+    assert not store.covers("301002", "2024-01-01", "2024-03-29")
+
+
+def test_writes_append_deltas_and_compact(tmp_path, monkeypatch):
+    monkeypatch.setenv("TA_BAR_STORE_COMPACT_DELTAS", "3")
+    store = ColumnarBarStore(str(tmp_path))
+    store.write("000001", _bars("2024-01-01", 10), data_source="tushare")
+    path = store.path_for("000001", partition="tushare_qfq")
+    size = path.stat().st_size
+
+    store.write("000001", _bars("2024-01-15", 1, close_offset=50.0), data_source="tushare")
+    store.write("000001", _bars("2024-01-12", 1, close_offset=70.0), data_source="tushare")
+    # Appends don't rewrite the history file, reads still see them
+    assert path.stat().st_size == size
+    df = store.read("000001")
+    assert len(df) == 11 and df["close"].iloc[-2:].tolist() == [70.0, 50.0]
+
+    store.write("000001", _bars("2024-01-16", 1, close_offset=90.0), data_source="tushare")
+    assert not list(path.with_suffix(".delta").glob("*.arrow"))
+    assert store.read("000001")["close"].tolist()[-3:] == [70.0, 50.0, 90.0]
+
+
+def _write_days(root, offset):
+    store = ColumnarBarStore(root)
+    for i in range(offset, 40, 4):
+        store.write("000001", _bars("2024-01-01", 40).iloc[[i]], data_source="tushare")
+
+
+def test_concurrent_processes_do_not_lose_bars(tmp_path):
+    import multiprocessing
+
+    ColumnarBarStore(str(tmp_path)).write("000001", _bars("2023-12-01", 1), data_source="tushare")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_write_days, args=(str(tmp_path), i)) for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    assert len(ColumnarBarStore(str(tmp_path)).read("000001")) == 41
@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+
+
+def _age_entry(cache: StockDataCache, cache_key: str, hours: float):
+    """Rewrite an entry's cached_at as if it had been cached `hours` ago"""
+    path = cache._get_metadata_path(cache_key)
+    metadata = json.loads(path.read_text(encoding="utf-8"))
+    metadata["cached_at"] = (datetime.now() - timedelta(hours=hours)).isoformat()
+    path.write_text(json.dumps(metadata), encoding="utf-8")
+    cache.metadata_index.upsert(cache_key, metadata)
+
+
+def test_lookup_uses_index(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    old = cache.save_stock_data("000001", "old", "2024-01-01", "2024-01-31", "tushare")
+    new = cache.save_stock_data("000001", "new", "2024-02-01", "2024-02-29", "tushare")
+    cache.save_stock_data("000001", "other", "2024-02-01", "2024-02-29", "akshare")
+    _age_entry(cache, old, 0.5)
+
+    # No exact match: the newest entry for the same symbol and source wins
+    assert cache.find_cached_stock_data("000001", "2023-01-01", "2023-12-31", "tushare") == new
+
+    _age_entry(cache, new, 5)
+    assert cache.find_cached_stock_data("000001", "2023-01-01", "2023-12-31", "tushare") == old
+    _age_entry(cache, old, 5)
+    assert cache.find_cached_stock_data("000001", "2023-01-01", "2023-12-31", "tushare") is None
+
+    key = cache.save_fundamentals_data("AAPL", "fundamentals", "openai")
+    assert cache.find_cached_fundamentals_data("AAPL", "openai") == key
+    assert cache.find_cached_fundamentals_data("AAPL", "finnhub") is None
+
+
+def test_stats_and_clear_old_cache(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    stale = cache.save_stock_data("600000", pd.DataFrame({"close": [1.0, 2.0]}), "2024-01-01", "2024-01-02", "tushare")
+    cache.save_fundamentals_data("600000", "fundamentals", "tushare")
+    _age_entry(cache, stale, 24 * 30)
+
+    stats = cache.get_cache_stats()
+    assert stats["total_files"] == 2
+    assert stats["stock_data_count"] == 1
+    assert stats["fundamentals_count"] == 1
+    assert stats["total_size"] > 0
+
+    data_file = cache._load_metadata(stale)["file_path"]
+    assert cache.clear_old_cache(max_age_days=7) == 1
+    assert not cache._get_metadata_path(stale).exists()
+    assert not pd.io.common.file_exists(data_file)
+    assert cache.get_cache_stats()["total_files"] == 1
+
+
+def test_index_is_rebuilt_from_existing_metadata(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    key = cache.save_stock_data("000002", "text", "2024-01-01", "2024-01-31", "tushare")
+    cache.metadata_index.close()
+    cache.metadata_index.db_path.unlink()
+
+    reopened = StockDataCache(str(tmp_path))
+    assert reopened.metadata_index.count() == 1
+    assert reopened.find_cached_stock_data("000002", data_source="tushare") == key
+
+
+def test_lookup_skips_and_drops_entries_whose_file_is_gone(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    old = cache.save_stock_data("000001", "old", "2024-01-01", "2024-01-31", "tushare")
+    new = cache.save_stock_data("000001", "new", "2024-02-01", "2024-02-29", "tushare")
+    _age_entry(cache, old, 0.5)
+
+    # Delete the newest data file behind the index's back
+    Path(cache._load_metadata(new)["file_path"]).unlink()
+
+    assert cache.find_cached_stock_data("000001", "2024-02-01", "2024-02-29", "tushare") == old
+    assert cache.metadata_index.count() == 1
+    assert not cache._get_metadata_path(new).exists()
+
+    fundamentals = cache.save_fundamentals_data("AAPL", "fundamentals", "openai")
+    Path(cache._load_metadata(fundamentals)["file_path"]).unlink()
+    assert cache.find_cached_fundamentals_data("AAPL", "openai") is None
+    assert cache.metadata_index.count() == 1
+
+
+def test_stats_reflect_files_on_disk(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    kept = cache.save_stock_data("600000", "kept", "2024-01-01", "2024-01-02", "tushare")
+    gone = cache.save_stock_data("600001", "gone", "2024-01-01", "2024-01-02", "tushare")
+    kept_size = Path(cache._load_metadata(kept)["file_path"]).stat().st_size
+
+    Path(cache._load_metadata(gone)["file_path"]).unlink()
+
+    stats = cache.get_cache_stats()
+    assert stats["total_files"] == 2
+    assert stats["skipped_count"] == 1
+    assert stats["total_size"] == kept_size
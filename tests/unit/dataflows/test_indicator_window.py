@@ -0,0 +1,89 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from stockstats import wrap
+
+from tradingagents.dataflows import interface
+from tradingagents.dataflows.technical import stockstats as st
+
+
+def _write_prices(tmp_path, symbol="AAPL", periods=400):
+    price_dir = tmp_path / "market_data" / "price_data"
+    price_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(1)
+    close = 100 + rng.standard_normal(periods).cumsum()
+    df = pd.DataFrame({
+        "Date": pd.bdate_range("2024-01-01", periods=periods).strftime("%Y-%m-%d"),
+        "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+        "Volume": rng.integers(1_000, 5_000, periods),
+    })
+    path = price_dir / f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv"
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def _count_reads(monkeypatch):
+    calls = []
+    real = pd.read_csv
+
+    def read_csv(*args, **kwargs):
+        calls.append(args[0])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(st.pd, "read_csv", read_csv)
+    return calls
+
+
+def test_window_loads_and_computes_once(tmp_path, monkeypatch):
+    st.clear_indicator_cache()
+    path, prices = _write_prices(tmp_path)
+    monkeypatch.setattr(interface, "DATA_DIR", str(tmp_path))
+    reads = _count_reads(monkeypatch)
+
+    report = interface.get_stock_stats_indicators_window("AAPL", "rsi", "2025-03-03", 30, False)
+    interface.get_stock_stats_indicators_window("AAPL", "macd", "2025-03-03", 30, False)
+    again = interface.get_stock_stats_indicators_window("AAPL", "rsi", "2025-03-03", 30, False)
+
+    assert reads == [str(path)]
+    assert again == report
+
+    expected = wrap(prices.copy())
+    expected["rsi"]
+    lines = [l for l in report.splitlines() if l[:4] == "2025" or l[:4] == "2024"]
+    window = pd.bdate_range("2025-02-01", "2025-03-03")[::-1].strftime("%Y-%m-%d")
+    assert [l.split(":")[0] for l in lines] == list(window)
+    for line in lines:
+        date, value = line.split(": ")
+        row = expected[expected["Date"] == date]
+        assert float(value) == row["rsi"].values[0]
+
+
+def test_single_day_lookup_uses_cached_series(tmp_path, monkeypatch):
+    st.clear_indicator_cache()
+    _write_prices(tmp_path)
+    monkeypatch.setattr(interface, "DATA_DIR", str(tmp_path))
+    reads = _count_reads(monkeypatch)
+
+    window = interface.get_stock_stats_indicators_window("AAPL", "close_10_ema", "2025-03-03", 5, False)
+    value = interface.get_stockstats_indicator("AAPL", "close_10_ema", "2025-03-03", False)
+    weekend = interface.get_stockstats_indicator("AAPL", "close_10_ema", "2025-03-02", False)
+
+    assert f"2025-03-03: {value}\n" in window
+    assert weekend == "N/A: Not a trading day (weekend or holiday)"
+    assert len(reads) == 1
+
+
+def test_cache_invalidates_when_data_file_changes(tmp_path, monkeypatch):
+    st.clear_indicator_cache()
+    path, prices = _write_prices(tmp_path)
+    data_dir = str(tmp_path / "market_data" / "price_data")
+
+    before = st.StockstatsUtils.get_indicator_series("AAPL", "close_10_ema", data_dir)
+    prices["Close"] = prices["Close"] * 2
+    prices.to_csv(path, index=False)
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    after = st.StockstatsUtils.get_indicator_series("AAPL", "close_10_ema", data_dir)
+
+    assert after.iloc[-1] == before.iloc[-1] * 2
@@ -0,0 +1,123 @@
+import pandas as pd
+
+from tradingagents.dataflows.cache.file_cache import StockDataCache
+
+
+def _fetcher(calls):
+    def fetch(start, end):
+        calls.append((start, end))
+        dates = pd.bdate_range(start, end)
+        return pd.DataFrame({
+            "trade_date": dates.strftime("%Y%m%d"),
+            "close": [float(d.day) for d in dates],
+        })
+    return fetch
+
+
+def test_sub_range_is_served_from_cache(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    calls = []
+
+    df = cache.get_stock_data_range("000001", "2024-01-01", "2024-01-31", _fetcher(calls), "tushare")
+    assert calls == [("2024-01-01", "2024-01-31")]
+    assert len(df) == 23
+
+    sub = cache.get_stock_data_range("000001", "2024-01-10", "2024-01-19", _fetcher(calls), "tushare")
+    assert len(calls) == 1
+    assert sub["trade_date"].tolist() == pd.bdate_range("2024-01-10", "2024-01-19").strftime("%Y%m%d").tolist()
+
+
+def test_only_missing_gaps_are_fetched(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    calls = []
+    cache.get_stock_data_range("600000", "2024-02-01", "2024-02-10", _fetcher(calls), "tushare")
+    cache.get_stock_data_range("600000", "2024-02-20", "2024-02-29", _fetcher(calls), "tushare")
+
+    assert cache.get_missing_date_ranges("600000", "2024-01-25", "2024-03-05", "tushare") == [
+        ("2024-01-25", "2024-01-31"), ("2024-02-11", "2024-02-19"), ("2024-03-01", "2024-03-05"),
+    ]
+
+    calls.clear()
+    df = cache.get_stock_data_range("600000", "2024-01-25", "2024-03-05", _fetcher(calls), "tushare")
+    assert calls == [("2024-01-25", "2024-01-31"), ("2024-02-11", "2024-02-19"), ("2024-03-01", "2024-03-05")]
+    assert df["trade_date"].is_unique
+    assert df["trade_date"].tolist() == pd.bdate_range("2024-01-25", "2024-03-05").strftime("%Y%m%d").tolist()
+
+    # Ranges are tracked per data source
+    assert cache.load_stock_data_range("600000", "2024-02-01", "2024-02-10", "akshare") is None
+
+
+def test_today_is_refetched_after_ttl(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    today = pd.Timestamp.now().normalize()
+    start = (today - pd.Timedelta(days=10)).strftime("%Y-%m-%d")
+    end = today.strftime("%Y-%m-%d")
+    cache.get_stock_data_range("000002", start, end, _fetcher([]), "tushare")
+
+    assert cache.get_missing_date_ranges("000002", start, end, "tushare") == []
+    # Intraday data for the current day expires, history before it does not
+    assert cache.get_missing_date_ranges("000002", start, end, "tushare", max_age_hours=0) == [(end, end)]
+
+
+def test_gap_without_trading_days_counts_as_covered(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    calls = []
+    cache.get_stock_data_range("000001", "2024-01-01", "2024-02-02", _fetcher(calls), "tushare", adjustment="qfq")
+
+    def no_bars(start, end):
+        calls.append((start, end))
+        return None  # Tushare returns None for a range without bars
+
+    df = cache.get_stock_data_range("000001", "2024-01-01", "2024-02-04", no_bars, "tushare", adjustment="qfq")
+    assert len(df) == 25
+    assert calls[-1] == ("2024-02-02", "2024-02-04")
+
+    calls.clear()
+    cache.get_stock_data_range("000001", "2024-01-01", "2024-02-04", no_bars, "tushare", adjustment="qfq")
+    assert calls == []
+
+
+def test_provider_errors_are_not_cached(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+
+    def failing(start, end):
+        raise RuntimeError("rate limited")
+
+    try:
+        cache.get_stock_data_range("000001", "2024-01-01", "2024-01-31", failing, "tushare")
+    except RuntimeError:
+        pass
+    assert cache.get_missing_date_ranges("000001", "2024-01-01", "2024-01-31", "tushare") == [
+        ("2024-01-01", "2024-01-31")
+    ]
+
+
+def test_qfq_rebase_rebuilds_cache(tmp_path):
+    cache = StockDataCache(str(tmp_path))
+    factor = {"value": 1.0}
+    calls = []
+
+    def qfq_fetch(start, end):
+        calls.append((start, end))
+        dates = pd.bdate_range(start, end)
+        return pd.DataFrame({
+            "trade_date": dates.strftime("%Y%m%d"),
+            "close": [round(d.day * factor["value"], 2) for d in dates],
+        })
+
+    cache.get_stock_data_range("600000", "2024-01-01", "2024-01-31", qfq_fetch, "tushare", adjustment="qfq")
+
+    # Unchanged base: the gap is fetched together with one cached anchor bar
+    df = cache.get_stock_data_range("600000", "2024-01-01", "2024-02-09", qfq_fetch, "tushare", adjustment="qfq")
+    assert calls[-1] == ("2024-01-31", "2024-02-09")
+    assert df["close"].iloc[0] == 1.0
+
+    # Ex-dividend: history is re-adjusted, so the cache is rebuilt on the new base
+    factor["value"] = 0.9
+    df = cache.get_stock_data_range("600000", "2024-01-01", "2024-02-20", qfq_fetch, "tushare", adjustment="qfq")
+    assert calls[-1] == ("2024-01-01", "2024-02-20")
+    assert df["close"].iloc[0] == 0.9
+    assert df["trade_date"].is_unique
+
+    # Unadjusted data is cached separately
+    assert cache.load_stock_data_range("600000", "2024-01-01", "2024-01-31", "tushare") is None
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from tradingagents.dataflows.data_source_manager import ChinaDataSource, DataSourceManager
+from tradingagents.dataflows.source_stats import MIN_SAMPLES, SourceLatencyTracker
+
+
+def _make_manager(monkeypatch, fetchers):
+    manager = object.__new__(DataSourceManager)
+    manager.current_source = ChinaDataSource.TUSHARE
+    manager.available_sources = list(DataSourceManager.EXTERNAL_SOURCES)
+    manager.source_stats = SourceLatencyTracker()
+    monkeypatch.setattr(manager, "_get_data_source_priority_order",
+                        lambda symbol=None: [ChinaDataSource.AKSHARE, ChinaDataSource.TUSHARE, ChinaDataSource.BAOSTOCK])
+    monkeypatch.setattr(manager, "_get_tushare_data", fetchers["tushare"])
+    monkeypatch.setattr(manager, "_get_akshare_data", fetchers["akshare"])
+    monkeypatch.setattr(manager, "_get_baostock_data", fetchers["baostock"])
+    return manager
+
+
+def _slow(result, delay):
+    def fetch(symbol, start_date, end_date, period="daily"):
+        time.sleep(delay)
+        return result
+    return fetch
+
+
+def test_hedged_fetch_takes_first_valid_result(monkeypatch):
+    monkeypatch.setenv("TA_DATA_SOURCE_HEDGE_ENABLED", "true")
+    monkeypatch.setenv("TA_DATA_SOURCE_HEDGE_BUDGET_SECONDS", "0.1")
+    manager = _make_manager(monkeypatch, {
+        "tushare": _slow("tushare data", 1.5),
+        "akshare": _slow("akshare data", 0.05),
+        "baostock": _slow("baostock data", 0.05),
+    })
+
+    started = time.time()
+    result = manager.get_stock_data("000001", "2024-01-01", "2024-02-01")
+
+    assert result == "akshare data"
+    assert time.time() - started < 1.0
+    # 未启动的 BaoStock 请求不会被调用
+    assert "baostock" not in manager.get_source_stats()
+
+
+def test_hedged_fetch_moves_on_immediately_after_error(monkeypatch):
+    monkeypatch.setenv("TA_DATA_SOURCE_HEDGE_ENABLED", "true")
+    monkeypatch.setenv("TA_DATA_SOURCE_HEDGE_BUDGET_SECONDS", "10")
+    manager = _make_manager(monkeypatch, {
+        "tushare": _slow("❌ 未获取到有效数据", 0.01),
+        "akshare": _slow("❌ AKShare获取数据失败", 0.01),
+        "baostock": _slow("baostock data", 0.01),
+    })
+
+    started = time.time()
+    assert manager.get_stock_data("000001", "2024-01-01", "2024-02-01") == "baostock data"
+    assert time.time() - started < 1.0
+
+    stats = manager.get_source_stats()
+    assert stats["tushare"]["error_rate"] == 1.0
+    assert stats["baostock"]["error_rate"] == 0.0
+
+
+def test_hedging_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("TA_DATA_SOURCE_HEDGE_ENABLED", raising=False)
+    monkeypatch.setenv("TA_DATA_SOURCE_HEDGE_BUDGET_SECONDS", "0.01")
+    calls = []
+
+    def tracked(name, delay):
+        def fetch(symbol, start_date, end_date, period="daily"):
+            calls.append(name)
+            time.sleep(delay)
+            return f"{name} data"
+        return fetch
+
+    manager = _make_manager(monkeypatch, {
+        "tushare": tracked("tushare", 0.2),
+        "akshare": tracked("akshare", 0.01),
+        "baostock": tracked("baostock", 0.01),
+    })
+
+    assert manager.get_stock_data("000001", "2024-01-01", "2024-02-01") == "tushare data"
+    # 慢但有效的主数据源不会触发对第二个数据源的请求
+    assert calls == ["tushare"]
+
+
+def test_cancelled_hedge_requests_are_not_started(monkeypatch):
+    calls = []
+    manager = _make_manager(monkeypatch, {
+        "tushare": lambda *args, **kwargs: calls.append("tushare"),
+        "akshare": _slow("akshare data", 0),
+        "baostock": _slow("baostock data", 0),
+    })
+    cancelled = threading.Event()
+    cancelled.set()
+
+    result = manager._call_source(ChinaDataSource.TUSHARE, "000001", "2024-01-01", "2024-02-01", "daily", cancelled)
+
+    assert result.startswith("❌") and calls == []
+    assert "tushare" not in manager.get_source_stats()
+
+
+def test_tracker_ranks_by_latency_and_error_rate():
+    tracker = SourceLatencyTracker()
+    for _ in range(MIN_SAMPLES):
+        tracker.record("slow", 5.0, True)
+        tracker.record("fast", 0.2, True)
+        tracker.record("broken", 0.01, False)
+
+    # 样本不足的 "new" 保持原位置
+    assert tracker.rank(["slow", "new", "broken", "fast"]) == ["fast", "new", "slow", "broken"]
+
+    stats = tracker.stats("fast")
+    assert stats["p50"] == pytest.approx(0.2)
+    assert stats["p95"] == pytest.approx(0.2)
+    assert tracker.hedge_budget("slow", 3.0) == 3.0
+    assert tracker.hedge_budget("fast", 3.0) == pytest.approx(0.5)
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+import tradingagents.graph.setup as graph_setup_module
+from tradingagents.graph.conditional_logic import ConditionalLogic
+from tradingagents.graph.setup import ANALYST_STATE_KEYS, GraphSetup
+
+ANALYSTS = ["market", "social", "news", "fundamentals"]
+
+
+def _fake_analyst(analyst_type, seen, active, peak):
+    report_key, counter_key = ANALYST_STATE_KEYS[analyst_type]
+
+    def node(state):
+        with active["lock"]:
+            active["n"] += 1
+            peak["n"] = max(peak["n"], active["n"])
+        time.sleep(0.2)
+        with active["lock"]:
+            active["n"] -= 1
+
+        tool_messages = [m for m in state["messages"] if isinstance(m, ToolMessage)]
+        seen.setdefault(analyst_type, []).append([m.content for m in tool_messages])
+        if not tool_messages:
+            call = {"name": "fetch", "args": {}, "id": f"{analyst_type}-call"}
+            return {"messages": [AIMessage(content="", tool_calls=[call])]}
+        return {"messages": [AIMessage(content="done")], report_key: f"{analyst_type} report " * 20,
+                counter_key: state.get(counter_key, 0) + 1}
+
+    return node
+
+
+def _fake_tools(analyst_type):
+    def node(state):
+        call_id = state["messages"][-1].tool_calls[0]["id"]
+        return {"messages": [ToolMessage(content=f"{analyst_type} data", tool_call_id=call_id)]}
+    return node
+
+
+def _build(monkeypatch, parallel):
+    seen, active, peak = {}, {"n": 0, "lock": threading.Lock()}, {"n": 0}
+    factories = {
+        "market": "create_market_analyst",
+        "social": "create_social_media_analyst",
+        "news": "create_news_analyst",
+        "fundamentals": "create_fundamentals_analyst",
+    }
+    for analyst_type, factory in factories.items():
+        node = _fake_analyst(analyst_type, seen, active, peak)
+        monkeypatch.setattr(graph_setup_module, factory, lambda llm, toolkit, node=node: node, raising=False)
+
+    noop = lambda *args: (lambda state: {})
+    for factory in ["create_bear_researcher", "create_research_manager", "create_trader",
+                    "create_neutral_debator", "create_safe_debator", "create_risk_manager"]:
+        monkeypatch.setattr(graph_setup_module, factory, noop, raising=False)
+    monkeypatch.setattr(graph_setup_module, "create_bull_researcher", lambda *args: (
+        lambda state: {"investment_debate_state": {"count": 2, "current_response": "Bull"}}), raising=False)
+    monkeypatch.setattr(graph_setup_module, "create_risky_debator", lambda *args: (
+        lambda state: {"risk_debate_state": {"count": 3, "latest_speaker": "Risky"}}), raising=False)
+
+    graph_setup = GraphSetup(
+        None, None, None, {a: _fake_tools(a) for a in ANALYSTS},
+        None, None, None, None, None, ConditionalLogic(),
+        config={"parallel_analysts": parallel},
+    )
+    return graph_setup.setup_graph(ANALYSTS), seen, peak
+
+
+def _initial_state():
+    return {"messages": [("human", "000001")], "company_of_interest": "000001", "trade_date": "2024-01-02"}
+
+
+def test_parallel_analysts_run_concurrently_with_isolated_messages(monkeypatch):
+    graph, seen, peak = _build(monkeypatch, parallel=True)
+    final_state = graph.invoke(_initial_state())
+
+    assert peak["n"] == len(ANALYSTS)
+    for analyst_type in ANALYSTS:
+        report_key, counter_key = ANALYST_STATE_KEYS[analyst_type]
+        assert final_state[report_key].startswith(f"{analyst_type} report")
+        assert final_state[counter_key] == 1
+        # Each analyst only ever sees its own tool results
+        assert seen[analyst_type] == [[], [f"{analyst_type} data"]]
+
+
+def test_sequential_mode_is_default(monkeypatch):
+    graph, seen, peak = _build(monkeypatch, parallel=False)
+    final_state = graph.invoke(_initial_state())
+
+    assert peak["n"] == 1
+    assert all(final_state[ANALYST_STATE_KEYS[a][0]] for a in ANALYSTS)
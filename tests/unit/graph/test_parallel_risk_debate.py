@@ -0,0 +1,97 @@
+import threading
+import time
+
+import tradingagents.graph.setup as graph_setup_module
+from tradingagents.graph.conditional_logic import ConditionalLogic
+from tradingagents.graph.setup import GraphSetup
+
+SPEAKERS = {"risky": "Risky", "safe": "Safe", "neutral": "Neutral"}
+
+
+def _fake_debator(key, seen, active, peak):
+    speaker = SPEAKERS[key]
+
+    def node(state):
+        with active["lock"]:
+            active["n"] += 1
+            peak["n"] = max(peak["n"], active["n"])
+        time.sleep(0.2)
+        with active["lock"]:
+            active["n"] -= 1
+
+        debate = state["risk_debate_state"]
+        seen.setdefault(key, []).append(debate.get("history", ""))
+        round_no = len(seen[key])
+        argument = f"{speaker} Analyst: round {round_no}"
+        return {"risk_debate_state": {
+            **debate,
+            "history": debate.get("history", "") + "\n" + argument,
+            f"{key}_history": debate.get(f"{key}_history", "") + "\n" + argument,
+            f"current_{key}_response": argument,
+            "latest_speaker": speaker,
+            "count": debate["count"] + 1,
+        }}
+
+    return node
+
+
+def _build(monkeypatch, parallel, rounds=2):
+    seen, active, peak = {}, {"n": 0, "lock": threading.Lock()}, {"n": 0}
+    for key, factory in [("risky", "create_risky_debator"), ("safe", "create_safe_debator"),
+                         ("neutral", "create_neutral_debator")]:
+        node = _fake_debator(key, seen, active, peak)
+        monkeypatch.setattr(graph_setup_module, factory, lambda llm, node=node: node, raising=False)
+
+    noop = lambda *args: (lambda state: {})
+    for factory in ["create_bear_researcher", "create_research_manager", "create_trader", "create_risk_manager"]:
+        monkeypatch.setattr(graph_setup_module, factory, noop, raising=False)
+    monkeypatch.setattr(graph_setup_module, "create_bull_researcher", lambda *args: (
+        lambda state: {"investment_debate_state": {"count": 2, "current_response": "Bull"}}), raising=False)
+    monkeypatch.setattr(graph_setup_module, "create_market_analyst", lambda *args: (
+        lambda state: {"market_report": "m"}), raising=False)
+
+    graph_setup = GraphSetup(
+        None, None, None, {"market": lambda state: {}},
+        None, None, None, None, None, ConditionalLogic(max_risk_discuss_rounds=rounds),
+        config={"parallel_risk_debate": parallel},
+    )
+    return graph_setup.setup_graph(["market"]), seen, peak
+
+
+def _initial_state():
+    return {
+        "messages": [("human", "000001")], "company_of_interest": "000001", "trade_date": "2024-01-02",
+        "risk_debate_state": {"history": "", "current_risky_response": "", "current_safe_response": "",
+                              "current_neutral_response": "", "count": 0},
+    }
+
+
+def test_parallel_rounds_run_concurrently_and_merge(monkeypatch):
+    graph, seen, peak = _build(monkeypatch, parallel=True)
+    final = graph.invoke(_initial_state())
+    debate = final["risk_debate_state"]
+
+    assert peak["n"] == 3
+    assert debate["count"] == 6
+    # Within a round everyone sees the same (previous round's) transcript
+    assert seen["risky"] == seen["safe"] == seen["neutral"]
+    assert seen["risky"][0] == ""
+    assert "Neutral Analyst: round 1" in seen["risky"][1]
+    # Merged in Risky -> Safe -> Neutral order, one line per speaker per round
+    assert debate["history"].split("\n")[1:] == [
+        "Risky Analyst: round 1", "Safe Analyst: round 1", "Neutral Analyst: round 1",
+        "Risky Analyst: round 2", "Safe Analyst: round 2", "Neutral Analyst: round 2",
+    ]
+    assert debate["safe_history"] == "\nSafe Analyst: round 1\nSafe Analyst: round 2"
+    assert debate["current_neutral_response"] == "Neutral Analyst: round 2"
+    assert debate["latest_speaker"] == "Neutral"
+    assert final["risk_round_responses"] == {}
+
+
+def test_sequential_ring_is_default(monkeypatch):
+    graph, seen, peak = _build(monkeypatch, parallel=False, rounds=1)
+    final = graph.invoke(_initial_state())
+
+    assert peak["n"] == 1
+    assert final["risk_debate_state"]["count"] == 3
+    assert seen["safe"] == ["\nRisky Analyst: round 1"]
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+import tradingagents.dataflows.data_source_manager as dsm
+from tradingagents.agents.researchers.bull_researcher import create_bull_researcher
+from tradingagents.agents.trader.trader import create_trader
+from tradingagents.agents.utils import security_context as sc
+from tradingagents.graph.propagation import Propagator
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    calls = []
+    names = {"688981": "中芯国际", "300750": "宁德时代"}
+
+    def fake_info(symbol):
+        calls.append(symbol)
+        return {"symbol": symbol, "name": names.get(symbol, "未知")}
+
+    monkeypatch.setattr(dsm, "get_china_stock_info_unified", fake_info)
+    sc.clear_security_context_cache()
+    yield calls
+    sc.clear_security_context_cache()
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt if isinstance(prompt, str) else str(prompt))
+        return SimpleNamespace(content="观点")
+
+
+def test_context_is_resolved_once_and_cached(lookups):
+    first = sc.resolve_security_context("688981")
+    second = sc.resolve_security_context("688981")
+
+    assert lookups == ["688981"]
+    assert first == second
+    assert first["name"] == "中芯国际"
+    assert (first["exchange"], first["board"]) == ("上海证券交易所", "科创板")
+    assert first["is_china"] and first["currency_name"] == "人民币"
+
+    chinext = sc.resolve_security_context("300750")
+    assert (chinext["exchange"], chinext["board"]) == ("深圳证券交易所", "创业板")
+
+
+def test_unresolved_names_are_not_cached(lookups):
+    assert sc.resolve_security_context("600000")["name"] == "股票代码600000"
+    sc.resolve_security_context("600000")
+    assert lookups == ["600000", "600000"]
+
+
+def test_nodes_read_context_from_initial_state(lookups):
+    state = Propagator().create_initial_state("688981", "2025-01-02")
+    assert state["security_context"]["name"] == "中芯国际"
+
+    state.update(market_report="m", sentiment_report="s", news_report="n", fundamentals_report="f",
+                 investment_plan="持有")
+    llm = FakeLLM()
+    create_bull_researcher(llm, None)(state)
+    create_trader(llm, None)(state)
+
+    assert lookups == ["688981"]
+    assert "中芯国际" in llm.prompts[0]
+
+
+def test_stale_context_for_other_ticker_is_ignored(lookups):
+    state = {"company_of_interest": "300750", "security_context": sc.resolve_security_context("688981")}
+    assert sc.get_security_context(state)["name"] == "宁德时代"
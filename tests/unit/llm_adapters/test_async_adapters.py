@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import httpx
+
+import tradingagents.llm_adapters.http_pool as http_pool
+from tradingagents.llm_adapters.openai_compatible_base import ChatCustomOpenAI, ChatDeepSeekOpenAI
+
+API_KEY = "sk-test-0123456789abcdef"
+
+
+def _completion(content="你好"):
+    return {
+        "id": "c1", "object": "chat.completion", "created": 0, "model": "deepseek-chat",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 11, "completion_tokens": 3, "total_tokens": 14},
+    }
+
+
+def _stream_body():
+    chunks = [
+        {"choices": [{"index": 0, "delta": {"role": "assistant", "content": "你"}, "finish_reason": None}]},
+        {"choices": [{"index": 0, "delta": {"content": "好"}, "finish_reason": "stop"}]},
+        {"choices": [], "usage": {"prompt_tokens": 11, "completion_tokens": 2, "total_tokens": 13}},
+    ]
+    lines = [f"data: {json.dumps({'id': 'c1', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'deepseek-chat', **c})}\n\n"
+             for c in chunks]
+    return "".join(lines) + "data: [DONE]\n\n"
+
+
+class FakeAsyncTransport(httpx.AsyncBaseTransport):
+    created = []
+
+    def __init__(self, limits=None, http2=False, proxy=None):
+        self.requests = []
+        FakeAsyncTransport.created.append(self)
+
+    async def handle_async_request(self, request):
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if body.get("stream"):
+            return httpx.Response(200, text=_stream_body(), headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json=_completion())
+
+
+def _adapter(monkeypatch, base_url):
+    FakeAsyncTransport.created = []
+    monkeypatch.setattr(http_pool.httpx, "AsyncHTTPTransport", FakeAsyncTransport)
+    monkeypatch.setattr(http_pool, "_async_clients", {})
+    monkeypatch.delenv("OPENAI_PROXY", raising=False)
+    return ChatCustomOpenAI(model="deepseek-chat", api_key=API_KEY, base_url=base_url)
+
+
+def test_adapters_share_one_pool_per_host(monkeypatch):
+    monkeypatch.delenv("OPENAI_PROXY", raising=False)
+    first = ChatDeepSeekOpenAI(api_key=API_KEY)
+    second = ChatDeepSeekOpenAI(api_key=API_KEY)
+    other = ChatCustomOpenAI(api_key=API_KEY, base_url="https://proxy.example.com/v1")
+
+    assert first.http_client is second.http_client
+    assert first.http_async_client is second.http_async_client
+    assert other.http_client is not first.http_client
+
+
+def _clear_proxy_env(monkeypatch):
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.lower(), raising=False)
+
+
+def test_shared_pool_honours_environment_proxies(monkeypatch):
+    _clear_proxy_env(monkeypatch)
+    monkeypatch.setenv("HTTPS_PROXY", "http://127.0.0.1:7890")
+    monkeypatch.setenv("NO_PROXY", "internal.example.com")
+
+    proxied = http_pool.get_shared_http_client("https://proxied.example.com/v1")
+    direct = http_pool.get_shared_http_client("https://internal.example.com/v1")
+    async_proxied = http_pool.get_shared_async_http_client("https://proxied.example.com/v1")
+
+    assert type(proxied._transport._pool).__name__ == "HTTPProxy"
+    assert type(direct._transport._pool).__name__ == "ConnectionPool"
+    assert async_proxied._transport._proxy == "http://127.0.0.1:7890"
+
+    # Dropping the proxy gives a separate, direct pool for the same host
+    monkeypatch.delenv("HTTPS_PROXY")
+    assert http_pool.get_shared_http_client("https://proxied.example.com/v1") is not proxied
+
+
+def test_proxy_configuration_keeps_langchain_clients(monkeypatch):
+    monkeypatch.setenv("OPENAI_PROXY", "http://127.0.0.1:7890")
+    llm = ChatDeepSeekOpenAI(api_key=API_KEY)
+    assert llm.http_client not in http_pool._sync_clients.values()
+
+
+def test_ainvoke_uses_async_path_and_tracks_usage(monkeypatch):
+    llm = _adapter(monkeypatch, "https://async-a.example.com/v1")
+    tracked = []
+    monkeypatch.setattr(type(llm), "_log_token_usage", lambda self, usage, start: tracked.append(usage))
+
+    async def run():
+        return await asyncio.gather(llm.ainvoke("hi"), llm.ainvoke("again"))
+
+    results = asyncio.run(run())
+
+    assert [r.content for r in results] == ["你好", "你好"]
+    assert len(FakeAsyncTransport.created) == 1
+    assert len(FakeAsyncTransport.created[0].requests) == 2
+    assert tracked[0]["total_tokens"] == 14 and tracked[0]["input_tokens"] == 11
+
+
+def test_astream_aggregates_usage(monkeypatch):
+    llm = _adapter(monkeypatch, "https://async-b.example.com/v1")
+    tracked = []
+    monkeypatch.setattr(type(llm), "_log_token_usage", lambda self, usage, start: tracked.append(usage))
+
+    async def run():
+        return [chunk.content async for chunk in llm.astream("hi", stream_usage=True)]
+
+    pieces = asyncio.run(run())
+    assert "".join(pieces) == "你好"
+    assert tracked == [{"input_tokens": 11, "output_tokens": 2, "total_tokens": 13}]
+
+
+def test_async_pool_is_isolated_per_event_loop(monkeypatch):
+    llm = _adapter(monkeypatch, "https://async-c.example.com/v1")
+
+    asyncio.run(llm.ainvoke("loop one"))
+    asyncio.run(llm.ainvoke("loop two"))
+
+    # one connection pool per event loop, the client itself is shared
+    assert len(FakeAsyncTransport.created) == 2
+    assert llm.http_async_client is http_pool.get_shared_async_http_client("https://async-c.example.com/v1")
@@ -0,0 +1,92 @@
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tradingagents.llm_adapters.response_cache import (
+    LLMReplayMissError,
+    apply_llm_response_cache,
+    cache_key,
+    get_llm_response_cache,
+)
+
+
+class CountingChatModel(BaseChatModel):
+    temperature: float = 0.1
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting"
+
+    @property
+    def _identifying_params(self):
+        return {"temperature": self.temperature}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        message = AIMessage(
+            content=f"answer {self.calls}",
+            tool_calls=[{"name": "get_stock_market_data_unified", "args": {"ticker": "000001"}, "id": f"call_{self.calls}"}],
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _cached_model(tmp_path, mode, temperature=0.1):
+    model = CountingChatModel(temperature=temperature)
+    cache = apply_llm_response_cache([model], {"llm_cache_mode": mode, "llm_cache_path": str(tmp_path / "llm.sqlite3")})
+    return model, cache
+
+
+def test_record_then_replay_without_model_calls(tmp_path):
+    recorder, _ = _cached_model(tmp_path, "record")
+    recorded = [recorder.invoke([HumanMessage(f"分析 {t}")]) for t in ("000001", "600000")]
+    assert recorder.calls == 2
+
+    player, cache = _cached_model(tmp_path, "replay")
+    replayed = [player.invoke([HumanMessage(f"分析 {t}")]) for t in ("000001", "600000")]
+
+    assert player.calls == 0
+    assert [m.content for m in replayed] == [m.content for m in recorded]
+    assert replayed[0].tool_calls[0]["id"] == "call_1"
+    assert cache.stats()["hits"] == 2
+
+
+def test_replay_miss_raises(tmp_path):
+    player, _ = _cached_model(tmp_path, "replay")
+    with pytest.raises(LLMReplayMissError):
+        player.invoke([HumanMessage("never recorded")])
+    assert player.calls == 0
+
+
+def test_auto_mode_replays_hits_and_records_misses(tmp_path):
+    model, cache = _cached_model(tmp_path, "auto")
+    first = model.invoke([HumanMessage("hi")])
+    again = model.invoke([HumanMessage("hi")])
+    assert model.calls == 1 and again.content == first.content
+
+    hotter, _ = _cached_model(tmp_path, "auto", temperature=0.9)
+    hotter.invoke([HumanMessage("hi")])
+    assert hotter.calls == 1
+    assert cache.stats()["writes"] == 2
+
+
+def test_passthrough_leaves_models_untouched(tmp_path):
+    model, cache = _cached_model(tmp_path, "passthrough")
+    model.invoke([HumanMessage("hi")])
+    model.invoke([HumanMessage("hi")])
+    assert cache is None and model.calls == 2
+    with pytest.raises(ValueError):
+        get_llm_response_cache({"llm_cache_mode": "bogus", "llm_cache_path": str(tmp_path / "x.sqlite3")})
+
+
+def test_key_ignores_secrets_and_message_ids_but_not_tools():
+    llm = ('{"id": ["langchain", "chat_models", "openai", "ChatDeepSeekOpenAI"], "kwargs": {"model_name": "deepseek-chat", '
+           '"openai_api_key": {"id": ["KEY_%s"], "lc": 1, "type": "secret"}, "temperature": 0.1}, "lc": 1}---%s')
+    prompt = ('[{"lc": 1, "type": "constructor", "id": ["langchain", "schema", "messages", "AIMessage"], '
+              '"kwargs": {"content": "a", "type": "ai", "id": "%s"}}]')
+    tools = "[('stop', None), ('tools', [{'name': 'f'}])]"
+
+    base = cache_key(prompt % "run-1", llm % ("A", tools))
+    assert cache_key(prompt % "run-2", llm % ("B", tools)) == base
+    assert cache_key(prompt % "run-1", llm % ("A", "[('stop', None)]")) != base
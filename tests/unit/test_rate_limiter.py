@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from app.core import rate_limiter as rl
+from app.core.rate_limiter import RateLimiter
+
+
+class FakeScriptRedis:
+    """Emulates TOKEN_BUCKET_LUA against an in-memory hash shared by all clients"""
+
+    def __init__(self, store=None, fail=False):
+        self.store = {} if store is None else store
+        self.fail = fail
+        self.calls = []
+
+    def register_script(self, script):
+        assert "HMGET" in script and "TIME" in script
+
+        async def run(keys, args):
+            if self.fail:
+                raise ConnectionError("redis down")
+            self.calls.append((keys, args))
+            capacity, rate, requested = (float(a) for a in args)
+            now = time.monotonic()
+            tokens, ts = self.store.get(keys[0], (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate) - requested
+            self.store[keys[0]] = (tokens, now)
+            return [str(-tokens / rate if tokens < 0 else 0), str(tokens)]
+
+        return run
+
+
+def _limiter(monkeypatch, client, **kwargs):
+    monkeypatch.setattr(RateLimiter, "_get_redis", lambda self: client)
+    return RateLimiter(use_redis=client is not None, **kwargs)
+
+
+def test_waiters_do_not_serialize_behind_one_sleeper(monkeypatch):
+    limiter = _limiter(monkeypatch, None, max_calls=5, time_window=0.1, name="t")
+
+    async def run():
+        started = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire() for _ in range(25)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    # 5 burst + 20 reserved at 50/s -> ~0.4s total, not 20 sequential sleeps
+    assert 0.3 <= elapsed < 0.8
+    stats = limiter.get_stats()
+    assert stats["backend"] == "local"
+    assert stats["total_calls"] == 25
+    assert stats["total_waits"] == 20
+    assert 0.35 <= stats["max_wait_time"] <= 0.45
+    assert stats["avg_wait_time"] > 0
+
+
+def test_permits_are_granted_in_reservation_order(monkeypatch):
+    limiter = _limiter(monkeypatch, None, max_calls=1, time_window=0.02, name="fifo")
+    order = []
+
+    async def worker(i):
+        await limiter.acquire()
+        order.append(i)
+
+    async def run():
+        tasks = []
+        for i in range(10):
+            tasks.append(asyncio.create_task(worker(i)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == list(range(10))
+
+
+def test_redis_bucket_is_shared_between_limiters(monkeypatch):
+    shared = {}
+    a = _limiter(monkeypatch, FakeScriptRedis(shared), max_calls=3, time_window=60, name="A", key="tushare")
+    b = RateLimiter(max_calls=3, time_window=60, name="B", key="tushare", use_redis=True)
+    other = RateLimiter(max_calls=3, time_window=60, name="C", key="tushare", use_redis=True)
+
+    async def run():
+        await a.acquire()
+        await a.acquire()
+        await b.acquire()
+        # bucket exhausted across limiters: the next reservation must wait ~20s
+        return await b._reserve_redis(b._bucket_key(), 1)
+
+    wait = asyncio.run(run())
+    assert 19 < wait <= 20
+    assert set(shared) == {"rate_limit:tushare"}
+    assert b.get_stats()["backend"] == "redis"
+    assert other._bucket_key("daily") == "rate_limit:tushare:daily"
+
+
+def test_falls_back_to_local_bucket_when_redis_fails(monkeypatch):
+    limiter = _limiter(monkeypatch, FakeScriptRedis(fail=True), max_calls=10, time_window=1, name="f")
+
+    asyncio.run(limiter.acquire())
+
+    stats = limiter.get_stats()
+    assert stats["backend"] == "local"
+    assert stats["redis_errors"] == 1
+    assert stats["total_calls"] == 1
+
+
+def test_provider_limiters_share_provider_keys(monkeypatch):
+    monkeypatch.setattr(rl, "_tushare_limiter", None)
+    limiter = rl.get_tushare_rate_limiter(tier="free", safety_margin=0.5)
+    assert limiter.max_calls == 50
+    assert limiter.get_stats()["key"] == "rate_limit:tushare"
+
+
+def test_stats_report_calls_in_current_window(monkeypatch):
+    local = _limiter(monkeypatch, None, max_calls=10, time_window=60, name="l")
+    assert local.get_stats()["current_calls"] == 0
+
+    async def burst(limiter, n):
+        for _ in range(n):
+            await limiter.acquire()
+
+    asyncio.run(burst(local, 4))
+    assert local.get_stats()["current_calls"] == 4
+
+    shared = _limiter(monkeypatch, FakeScriptRedis(), max_calls=10, time_window=60, name="r", key="r")
+    asyncio.run(burst(shared, 3))
+    stats = shared.get_stats()
+    assert stats["backend"] == "redis"
+    assert f"{stats['current_calls']}/{stats['max_calls']}" == "3/10"
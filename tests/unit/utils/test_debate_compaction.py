@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+from tradingagents.agents.researchers.bull_researcher import create_bull_researcher
+from tradingagents.agents.risk_mgmt.aggresive_debator import create_risky_debator
+from tradingagents.agents.utils.debate_compaction import (
+    build_report_prefix,
+    compact_debate_history,
+    estimate_tokens,
+    split_turns,
+)
+
+
+def _history(rounds, chars=600):
+    turns = []
+    for i in range(rounds):
+        for speaker in ("Bull", "Bear"):
+            body = f"第{i + 1}轮{speaker}观点。" + "论据" * (chars // 2)
+            turns.append(f"{speaker} Analyst: {body}\n补充说明{i}")
+    return "\n" + "\n".join(turns)
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content="观点")
+
+
+def test_short_history_is_unchanged():
+    history = _history(1, chars=20)
+    assert compact_debate_history(history, token_budget=1000) == history
+
+
+def test_old_turns_are_summarized_and_recent_kept_verbatim():
+    history = _history(5)
+    turns = split_turns(history)
+    assert len(turns) == 10 and turns[1].startswith("Bear Analyst:")
+
+    compacted = compact_debate_history(history, keep_last_turns=2, token_budget=2000, summary_chars=80)
+
+    assert estimate_tokens(compacted) <= 2000
+    assert compacted.endswith(turns[-2] + "\n\n" + turns[-1])
+    assert "Bull Analyst: 第1轮Bull观点。" in compacted
+    assert turns[0] not in compacted
+
+
+def test_summary_block_only_grows_between_rounds():
+    kwargs = dict(keep_last_turns=2, token_budget=1500, summary_chars=60)
+    earlier = compact_debate_history(_history(4), **kwargs)
+    later = compact_debate_history(_history(5), **kwargs)
+
+    assert earlier.startswith("【早期发言摘要】")
+    earlier_summary = earlier.split("【最近发言原文】")[0].strip()
+    assert later.startswith(earlier_summary)
+
+
+def test_budget_drops_oldest_summaries_then_truncates(monkeypatch):
+    monkeypatch.setenv("TA_DEBATE_HISTORY_TOKENS_BEAR", "300")
+    compacted = compact_debate_history(_history(6), node="bear", keep_last_turns=2, summary_chars=80)
+
+    assert estimate_tokens(compacted) <= 300
+    assert "条发言已省略" in compacted
+
+
+def test_debate_nodes_share_a_stable_report_prefix():
+    state = {
+        "company_of_interest": "AAPL",
+        "security_context": {"ticker": "AAPL", "name": "苹果公司", "market_name": "美股",
+                             "currency_name": "美元", "currency_symbol": "$",
+                             "is_china": False, "is_hk": False, "is_us": True},
+        "market_report": "市场报告", "sentiment_report": "情绪报告", "news_report": "新闻报告",
+        "fundamentals_report": "基本面报告", "trader_investment_plan": "买入",
+        "investment_debate_state": {"history": _history(4), "current_response": "Bear Analyst: x", "count": 8},
+        "risk_debate_state": {"history": "", "count": 0},
+    }
+    llm = FakeLLM()
+    create_bull_researcher(llm, None)(state)
+    create_risky_debator(llm)(state)
+
+    prefix = build_report_prefix(state, state["security_context"])
+    assert all(p.startswith(prefix) for p in llm.prompts)
+    assert "基本面报告" not in llm.prompts[0][len(prefix):]
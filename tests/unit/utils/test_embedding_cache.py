@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+from tradingagents.agents.utils.embedding_cache import EmbeddingCache
+from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model, input):
+        texts = [input] if isinstance(input, str) else list(input)
+        self.calls.append(texts)
+        # return out of order to check index-based reassembly
+        data = [SimpleNamespace(index=i, embedding=[float(len(t)), float(i + 1)]) for i, t in enumerate(texts)]
+        return SimpleNamespace(data=data[::-1])
+
+
+def _memory(cache):
+    memory = object.__new__(FinancialSituationMemory)
+    memory.llm_provider = "openai"
+    memory.embedding = "text-embedding-3-small"
+    memory.client = SimpleNamespace(embeddings=FakeEmbeddings())
+    memory.max_embedding_length = 50000
+    memory.enable_embedding_length_check = True
+    memory.embedding_cache = cache
+    memory.embedding_batch_size = 2
+    return memory
+
+
+def test_repeated_situation_is_embedded_once_across_memories(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3")
+    bull, bear, judge = _memory(cache), _memory(cache), _memory(cache)
+
+    situation = "市场情绪偏热，成交量放大"
+    vectors = [m.get_embedding(situation) for m in (bull, bear, judge)]
+
+    assert vectors[0] == vectors[1] == vectors[2]
+    assert len(bull.client.embeddings.calls) == 1
+    assert bear.client.embeddings.calls == [] and judge.client.embeddings.calls == []
+    assert bear.get_last_text_info()["strategy"] == "embedding_cache_hit"
+
+
+def test_batch_embedding_dedupes_and_uses_cache(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3")
+    memory = _memory(cache)
+    memory.get_embedding("a")
+
+    texts = ["a", "bb", "ccc", "bb", "dddd", ""]
+    vectors = memory.get_embeddings(texts)
+
+    # "a" cached, "bb" deduped, "" never sent; 3 misses in batches of 2
+    assert memory.client.embeddings.calls == [["a"], ["bb", "ccc"], ["dddd"]]
+    assert [v[0] for v in vectors[:5]] == [1.0, 2.0, 3.0, 2.0, 4.0]
+    assert vectors[1] == vectors[3]
+    assert vectors[5] == [0.0] * 1024
+
+
+def test_failed_batch_falls_back_to_single_calls(tmp_path):
+    memory = _memory(EmbeddingCache(None))
+    embeddings = memory.client.embeddings
+    real_create = embeddings.create
+
+    def create(model, input):
+        if not isinstance(input, str):
+            raise RuntimeError("batch not supported")
+        return real_create(model, input)
+
+    embeddings.create = create
+    vectors = memory.get_embeddings(["x", "yy"])
+
+    assert [v[0] for v in vectors] == [1.0, 2.0]
+    assert embeddings.calls == [["x"], ["yy"]]
+
+
+def test_persistent_tier_survives_process_restart(tmp_path):
+    path = tmp_path / "emb.sqlite3"
+    first = _memory(EmbeddingCache(path))
+    vector = first.get_embedding("persist me")
+
+    second = _memory(EmbeddingCache(path))
+    assert second.get_embedding("persist me") == vector
+    assert second.client.embeddings.calls == []
+    assert second.embedding_cache.stats()["hits"] == 1
+
+
+def test_zero_vectors_are_not_cached(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3")
+    memory = _memory(cache)
+    memory.client.embeddings.create = lambda model, input: (_ for _ in ()).throw(ConnectionError("down"))
+
+    assert memory.get_embedding("offline") == [0.0] * 1024
+    assert cache.get_many([]) == {}
+    assert cache.stats()["memory_items"] == 0
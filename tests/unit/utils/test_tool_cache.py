@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from tradingagents.utils import tool_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value.encode("utf-8")
+
+    def set(self, key, value, nx=False, ex=None):
+        with self.lock:
+            if nx and key in self.store:
+                return None
+            self.store[key] = value
+            return True
+
+    def exists(self, key):
+        return int(key in self.store)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+    def eval(self, script, numkeys, key, token):
+        assert script == tool_cache.RELEASE_LOCK_LUA
+        with self.lock:
+            if self.store.get(key) == token:
+                del self.store[key]
+                return 1
+            return 0
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(tool_cache, "_get_redis", lambda: fake)
+    return fake
+
+
+def test_results_are_shared_and_concurrent_calls_run_once(redis):
+    calls = []
+
+    @tool_cache.cache_tool_result(tool_name="market", ttl_seconds=60)
+    def market(ticker, curr_date):
+        calls.append((ticker, curr_date))
+        time.sleep(0.2)
+        return f"report for {ticker} on {curr_date}"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(market("000001", "2024-01-02"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [("000001", "2024-01-02")]
+    assert set(results) == {"report for 000001 on 2024-01-02"}
+    assert market("000001", "2024-01-03") == "report for 000001 on 2024-01-03"
+    assert len(calls) == 2
+    # Stored in Redis, so other worker processes get the same result
+    assert len([k for k in redis.store if not k.endswith(":lock")]) == 2
+    assert not [k for k in redis.store if k.endswith(":lock")]
+
+
+def test_failures_are_not_cached(redis):
+    calls = []
+
+    @tool_cache.cache_tool_result(tool_name="news", ttl_seconds=60)
+    def news(ticker):
+        calls.append(ticker)
+        return "## 新闻\n获取失败: timeout"
+
+    news("AAPL")
+    news("AAPL")
+    assert len(calls) == 2
+
+
+def test_key_extra_and_local_fallback(monkeypatch):
+    monkeypatch.setattr(tool_cache, "_get_redis", lambda: None)
+    depth = {"research_depth": "标准"}
+    calls = []
+
+    @tool_cache.cache_tool_result(tool_name="fundamentals_test", ttl_seconds=60, key_extra=lambda: dict(depth))
+    def fundamentals(ticker):
+        calls.append(depth["research_depth"])
+        return f"{ticker} {depth['research_depth']}"
+
+    assert fundamentals("600000") == "600000 标准"
+    assert fundamentals("600000") == "600000 标准"
+    depth["research_depth"] = "深度"
+    assert fundamentals("600000") == "600000 深度"
+    assert calls == ["标准", "深度"]
+
+
+def test_expired_lock_taken_by_another_process_is_not_released(redis):
+    @tool_cache.cache_tool_result(tool_name="slow", ttl_seconds=60)
+    def slow(ticker):
+        # Our lock expires mid-call and another process takes it over
+        lock_key = next(k for k in redis.store if k.endswith(":lock"))
+        redis.store[lock_key] = "other-process"
+        return f"report for {ticker}"
+
+    assert slow("000001") == "report for 000001"
+    assert [v for k, v in redis.store.items() if k.endswith(":lock")] == ["other-process"]
+
+
+def test_key_locks_do_not_accumulate(redis):
+    @tool_cache.cache_tool_result(tool_name="many", ttl_seconds=60)
+    def many(ticker):
+        return f"report for {ticker}"
+
+    for i in range(50):
+        many(str(i))
+
+    assert len(tool_cache._key_locks) == 0
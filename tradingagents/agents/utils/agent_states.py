@@ -5,6 +5,7 @@ from langchain_openai import ChatOpenAI
 from tradingagents.agents import *
 from langgraph.prebuilt import ToolNode
 from langgraph.graph import END, StateGraph, START, MessagesState
+from tradingagents.agents.utils.security_context import SecurityContext
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -51,9 +52,19 @@ class RiskDebateState(TypedDict):
     count: Annotated[int, "Length of the current conversation"]  # Conversation length
 
 
+def merge_risk_round_responses(left: Optional[dict], right: Optional[dict]) -> dict:
+    """Merge concurrent risk debator answers of one round; a falsy update resets the round."""
+    if not right:
+        return {}
+    return {**(left or {}), **right}
+
+
 class AgentState(MessagesState):
     company_of_interest: Annotated[str, "Company that we are interested in trading"]
     trade_date: Annotated[str, "What date we are trading at"]
+    security_context: Annotated[
+        SecurityContext, "Name, market, currency, exchange and board resolved once per run"
+    ]
 
     sender: Annotated[str, "Agent that sent this message"]
 
@@ -83,4 +94,6 @@ class AgentState(MessagesState):
     risk_debate_state: Annotated[
         RiskDebateState, "Current state of the debate on evaluating risk"
     ]
+    # 🔀 并行风险辩论：本轮各风险分析师的发言，轮次汇合后清空
+    risk_round_responses: Annotated[dict, merge_risk_round_responses]
     final_trade_decision: Annotated[str, "Final decision made by the Risk Analysts"]
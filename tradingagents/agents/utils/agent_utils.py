@@ -6,6 +6,8 @@ from langchain_core.messages import RemoveMessage
 from langchain_core.tools import tool
 from datetime import date, timedelta, datetime
 import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
 import pandas as pd
 import os
 from dateutil.relativedelta import relativedelta
@@ -17,6 +19,7 @@ from langchain_core.messages import HumanMessage
 # 导入统一日志系统和工具日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_tool_call, log_analysis_step
+from tradingagents.utils.tool_cache import cache_tool_result
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -39,6 +42,16 @@ def create_msg_delete():
     return delete_messages
 
 
+def _analysis_config_key():
+    """影响工具输出的分析配置，作为工具结果缓存键的一部分"""
+    return {"research_depth": Toolkit.current_config().get("research_depth")}
+
+
+# 当前分析运行的配置：按调用上下文隔离（LangGraph 并行节点与工具线程会复制上下文），
+# 池化复用的图并发运行时互不覆盖；未绑定时使用类级配置
+_run_config: ContextVar = ContextVar("toolkit_run_config", default=None)
+
+
 class Toolkit:
     _config = DEFAULT_CONFIG.copy()
 
@@ -47,10 +60,25 @@ class Toolkit:
         """Update the class-level configuration."""
         cls._config.update(config)
 
+    @classmethod
+    def current_config(cls) -> dict:
+        """当前运行绑定的配置，未绑定时为类级配置"""
+        return _run_config.get() or cls._config
+
+    @classmethod
+    @contextmanager
+    def run_config(cls, config):
+        """在当前调用上下文内绑定运行配置（不修改类级配置）"""
+        token = _run_config.set({**cls._config, **(config or {})})
+        try:
+            yield
+        finally:
+            _run_config.reset(token)
+
     @property
     def config(self):
         """Access the configuration."""
-        return self._config
+        return self.current_config()
 
     def __init__(self, config=None):
         if config:
@@ -692,6 +720,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_fundamentals_unified", log_args=True)
+    @cache_tool_result(tool_name="get_stock_fundamentals_unified", ttl_seconds=6 * 3600, key_extra=_analysis_config_key)
     def get_stock_fundamentals_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD"] = None,
@@ -715,7 +744,7 @@ class Toolkit:
         logger.info(f"📊 [统一基本面工具] 分析股票: {ticker}")
 
         # 🔧 获取分析级别配置，支持基于级别的数据获取策略
-        research_depth = Toolkit._config.get('research_depth', '标准')
+        research_depth = Toolkit.current_config().get('research_depth', '标准')
         logger.info(f"🔧 [分析级别] 当前分析级别: {research_depth}")
         
         # 数字等级到中文等级的映射
@@ -1041,6 +1070,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_market_data_unified", log_args=True)
+    @cache_tool_result(tool_name="get_stock_market_data_unified", ttl_seconds=15 * 60, key_extra=_analysis_config_key)
     def get_stock_market_data_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD。注意：系统会自动扩展到配置的回溯天数（通常为365天），你只需要传递分析日期即可"],
@@ -1153,6 +1183,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_news_unified", log_args=True)
+    @cache_tool_result(tool_name="get_stock_news_unified", ttl_seconds=30 * 60)
     def get_stock_news_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         curr_date: Annotated[str, "当前日期，格式：YYYY-MM-DD"]
@@ -1287,6 +1318,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_sentiment_unified", log_args=True)
+    @cache_tool_result(tool_name="get_stock_sentiment_unified", ttl_seconds=30 * 60)
     def get_stock_sentiment_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         curr_date: Annotated[str, "当前日期，格式：YYYY-MM-DD"]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+辩论记录压缩与提示词布局
+
+多空辩论和风险辩论的 history 每发言一次就变长一段，而每个辩论节点每次都把
+完整 history 连同四份分析报告一起发给模型，提示词长度随 max_debate_rounds 成二次方增长。
+
+这里提供两件事：
+1. compact_debate_history：较早的发言压缩为逐条摘要（抽取式，不额外调用模型），
+   只保留最近 N 条原文，并按节点限制 history 的 token 预算。
+   每条发言独立摘要，摘要部分随轮次只追加不改写，便于前缀缓存。
+2. build_report_prefix：把四份报告整理成各辩论节点完全一致的固定前缀，
+   放在提示词最前面，支持前缀缓存的模型服务（DeepSeek/DashScope/OpenAI 等）可直接复用。
+
+配置（环境变量 / 系统设置）：
+- TA_DEBATE_COMPACTION_ENABLED：是否启用压缩（默认 true）
+- TA_DEBATE_KEEP_TURNS：保留原文的最近发言条数（默认 2）
+- TA_DEBATE_HISTORY_TOKENS：history 的 token 预算（默认 4000），
+  可用 TA_DEBATE_HISTORY_TOKENS_<NODE>（如 _BULL/_RISKY）按节点覆盖
+- TA_DEBATE_SUMMARY_CHARS：每条早期发言摘要的最大字符数（默认 240）
+"""
+
+import re
+from typing import Any, List, Mapping, Optional
+
+from tradingagents.config.runtime_settings import get_bool, get_int
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("agents.utils.debate_compaction")
+
+# 与 research_manager / risk_manager 中的估算保持一致：中文约 1.8 字符 / token
+CHARS_PER_TOKEN = 1.8
+
+_TURN_SPLIT = re.compile(r"\n(?=(?:Bull|Bear|Risky|Safe|Neutral) Analyst:)")
+_SENTENCE_END = re.compile(r"[。！？!?；;]|\.(?=\s)")
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text or "") / CHARS_PER_TOKEN)
+
+
+def split_turns(history: str) -> List[str]:
+    """按发言者前缀（"Bull Analyst:" 等）切分辩论记录"""
+    return [turn.strip() for turn in _TURN_SPLIT.split(history or "") if turn.strip()]
+
+
+def summarize_turn(turn: str, max_chars: int) -> str:
+    """抽取式摘要：保留发言者和开头的完整句子，总长不超过 max_chars"""
+    speaker, sep, body = turn.partition(":")
+    if not sep:
+        speaker, body = "", turn
+    body = " ".join(body.split())
+    if len(body) > max_chars:
+        head = body[:max_chars]
+        ends = [m.end() for m in _SENTENCE_END.finditer(head)]
+        body = head[:ends[-1]] if ends and ends[-1] >= max_chars // 3 else head + "…"
+    return f"{speaker}: {body}" if speaker else body
+
+
+def _truncate(turn: str, max_chars: int) -> str:
+    if len(turn) <= max_chars:
+        return turn
+    return turn[:max(0, max_chars - 1)] + "…"
+
+
+def compact_debate_history(
+    history: str,
+    node: Optional[str] = None,
+    keep_last_turns: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    summary_chars: Optional[int] = None,
+) -> str:
+    """
+    压缩辩论记录：早期发言摘要 + 最近 N 条原文，总长度控制在 token 预算内
+
+    Args:
+        history: 完整辩论记录
+        node: 节点名（bull/bear/risky/safe/neutral），用于读取按节点的 token 预算
+        keep_last_turns / token_budget / summary_chars: 覆盖配置值
+
+    Returns:
+        str: 用于提示词的辩论记录；未超预算时原样返回
+    """
+    if not history or not get_bool("TA_DEBATE_COMPACTION_ENABLED", "ta_debate_compaction_enabled", True):
+        return history
+
+    if token_budget is None:
+        token_budget = get_int("TA_DEBATE_HISTORY_TOKENS", "ta_debate_history_tokens", 4000)
+        if node:
+            token_budget = get_int(f"TA_DEBATE_HISTORY_TOKENS_{node.upper()}", None, token_budget)
+    if estimate_tokens(history) <= token_budget:
+        return history
+
+    if keep_last_turns is None:
+        keep_last_turns = get_int("TA_DEBATE_KEEP_TURNS", "ta_debate_keep_turns", 2)
+    if summary_chars is None:
+        summary_chars = get_int("TA_DEBATE_SUMMARY_CHARS", "ta_debate_summary_chars", 240)
+
+    turns = split_turns(history)
+    keep = max(1, keep_last_turns)
+    older, recent = turns[:-keep], turns[-keep:]
+    summaries = [summarize_turn(turn, summary_chars) for turn in older]
+    budget_chars = int(token_budget * CHARS_PER_TOKEN)
+
+    def render(summary_lines, omitted, recent_turns):
+        parts = []
+        if summary_lines or omitted:
+            header = "【早期发言摘要】"
+            if omitted:
+                header += f"（更早的 {omitted} 条发言已省略）"
+            parts.append("\n".join([header] + summary_lines))
+        parts.append("【最近发言原文】\n" + "\n\n".join(recent_turns))
+        return "\n\n".join(parts)
+
+    # 超出预算时先丢弃最早的摘要，再截断最近发言原文
+    omitted = 0
+    compacted = render(summaries, omitted, recent)
+    while len(compacted) > budget_chars and summaries:
+        summaries.pop(0)
+        omitted += 1
+        compacted = render(summaries, omitted, recent)
+    if len(compacted) > budget_chars:
+        per_turn = max(summary_chars, (budget_chars - len(render([], omitted, [""] * len(recent)))) // len(recent))
+        compacted = render([], omitted, [_truncate(turn, per_turn) for turn in recent])
+
+    logger.info(
+        f"🗜️ [辩论压缩] {node or 'debate'}: {len(turns)} 条发言, "
+        f"{estimate_tokens(history):,} -> {estimate_tokens(compacted):,} tokens "
+        f"(摘要 {len(summaries)} 条, 原文 {len(recent)} 条, 省略 {omitted} 条)"
+    )
+    return compacted
+
+
+def build_report_prefix(state: Mapping[str, Any], context: Optional[Mapping[str, Any]] = None) -> str:
+    """
+    构建各辩论节点共享的固定提示词前缀（研究报告块）
+
+    同一次分析中多空研究员、三位风险分析师的提示词都以此开头且逐字相同，
+    角色说明和随轮次变化的辩论记录放在其后。
+    """
+    lines = ["以下是本次分析的研究资料，供所有辩论参与者共同参考。"]
+    if context:
+        lines.append(
+            f"分析标的：{context.get('name', '')}（股票代码：{context.get('ticker', '')}，"
+            f"{context.get('market_name', '')}，计价货币：{context.get('currency_name', '')}"
+            f"（{context.get('currency_symbol', '')}））"
+        )
+    lines += [
+        "",
+        f"【市场研究报告】\n{state.get('market_report', '')}",
+        "",
+        f"【社交媒体情绪报告】\n{state.get('sentiment_report', '')}",
+        "",
+        f"【最新世界事务新闻】\n{state.get('news_report', '')}",
+        "",
+        f"【公司基本面报告】\n{state.get('fundamentals_report', '')}",
+        "",
+        "==== 研究资料结束 ====",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+向量（embedding）缓存
+
+以 sha256(模型名 + 文本) 为键缓存嵌入向量，分两级：
+- 内存 LRU：同一进程内的多个记忆库（多头/空头/交易员/裁判/风险）共享，
+  同一分析中对相同情况文本的重复查询不再重复调用嵌入接口
+- SQLite 持久层：{data_cache_dir}/embeddings/embedding_cache.sqlite3，跨进程/重启复用
+
+只缓存有效向量（全零向量表示禁用或调用失败，不写入缓存）。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from tradingagents.config.runtime_settings import get_bool, get_int
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("agents.utils.memory")
+
+CACHE_FILENAME = "embedding_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key        TEXT PRIMARY KEY,
+    model      TEXT NOT NULL,
+    dim        INTEGER NOT NULL,
+    vector     BLOB NOT NULL
+);
+"""
+
+
+def embedding_key(model: str, text: str) -> str:
+    """按模型与文本内容计算缓存键"""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """内存 LRU + SQLite 持久层的两级向量缓存"""
+
+    def __init__(self, db_path: Optional[Path] = None, max_memory_items: int = 2048):
+        self.max_memory_items = max(1, int(max_memory_items))
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+        if db_path is not None:
+            try:
+                db_path = Path(db_path)
+                db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(_SCHEMA)
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"⚠️ [向量缓存] 持久化缓存不可用，仅使用内存缓存: {e}")
+                self._conn = None
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """批量查询，返回命中的 {key: vector}"""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+            if missing and self._conn is not None:
+                try:
+                    for start in range(0, len(missing), 500):
+                        chunk = missing[start:start + 500]
+                        rows = self._conn.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                            chunk,
+                        ).fetchall()
+                        for key, blob in rows:
+                            vector = array("d", blob).tolist()
+                            self._remember(key, vector)
+                            found[key] = vector
+                except Exception as e:
+                    logger.warning(f"⚠️ [向量缓存] 读取持久化缓存失败: {e}")
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        """写入缓存（跳过全零向量）"""
+        items = {k: list(v) for k, v in items.items() if v and any(x != 0.0 for x in v)}
+        if not items:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+                        [(k, model, len(v), array("d", v).tobytes()) for k, v in items.items()],
+                    )
+                    self._conn.commit()
+                except Exception as e:
+                    logger.warning(f"⚠️ [向量缓存] 写入持久化缓存失败: {e}")
+
+    def put(self, model: str, key: str, vector: List[float]):
+        self.put_many(model, {key: vector})
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_items": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent": self._conn is not None,
+            }
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(config: Optional[dict] = None) -> Optional[EmbeddingCache]:
+    """
+    获取进程级共享的向量缓存（TA_EMBEDDING_CACHE_ENABLED=false 时返回 None）
+
+    持久层路径：TA_EMBEDDING_CACHE_PATH，未设置时为 {data_cache_dir}/embeddings/embedding_cache.sqlite3；
+    TA_EMBEDDING_CACHE_PERSIST=false 时只使用内存缓存。
+    """
+    if not get_bool("TA_EMBEDDING_CACHE_ENABLED", "ta_embedding_cache_enabled", True):
+        return None
+
+    db_path = None
+    if get_bool("TA_EMBEDDING_CACHE_PERSIST", "ta_embedding_cache_persist", True):
+        db_path = os.getenv("TA_EMBEDDING_CACHE_PATH")
+        if not db_path:
+            cache_dir = (config or {}).get("data_cache_dir")
+            if not cache_dir:
+                from tradingagents.default_config import DEFAULT_CONFIG
+                cache_dir = DEFAULT_CONFIG["data_cache_dir"]
+            db_path = os.path.join(cache_dir, "embeddings", CACHE_FILENAME)
+
+    cache_key = str(db_path or ":memory:")
+    with _caches_lock:
+        cache = _caches.get(cache_key)
+        if cache is None:
+            size = get_int("TA_EMBEDDING_CACHE_SIZE", "ta_embedding_cache_size", 2048)
+            cache = EmbeddingCache(Path(db_path) if db_path else None, max_memory_items=size)
+            _caches[cache_key] = cache
+        return cache
@@ -6,12 +6,18 @@ from dashscope import TextEmbedding
 import os
 import threading
 import hashlib
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("agents.utils.memory")
 
+from tradingagents.config.runtime_settings import get_int
+from .embedding_cache import embedding_key, get_embedding_cache
+
+# 单次批量嵌入请求的最大文本数（DashScope text-embedding-v3 上限为10）
+DASHSCOPE_EMBEDDING_BATCH_SIZE = 10
+
 
 class ChromaDBManager:
     """单例ChromaDB管理器，避免并发创建集合的冲突"""
@@ -306,6 +312,10 @@ class FinancialSituationMemory:
                 self.client = "DISABLED"
                 logger.warning(f"⚠️ 未找到OPENAI_API_KEY，记忆功能已禁用")
 
+        # 向量缓存（进程内共享 + 持久化），多个记忆库查询同一情况文本时只嵌入一次
+        self.embedding_cache = get_embedding_cache(config)
+        self.embedding_batch_size = get_int("TA_EMBEDDING_BATCH_SIZE", "ta_embedding_batch_size", 64)
+
         # 使用单例ChromaDB管理器
         self.chroma_manager = ChromaDBManager()
         self.situation_collection = self.chroma_manager.get_or_create_collection(name)
@@ -348,8 +358,115 @@ class FinancialSituationMemory:
         logger.warning(f"⚠️ 强制截断：保留首尾关键信息，{len(text)}字符截断为{len(truncated)}字符")
         return truncated, True
 
+    def _uses_dashscope(self) -> bool:
+        """是否使用阿里百炼嵌入模型"""
+        return (self.llm_provider == "dashscope" or
+                self.llm_provider == "alibaba" or
+                self.llm_provider == "qianfan" or
+                (self.llm_provider == "google" and self.client is None) or
+                (self.llm_provider == "deepseek" and self.client is None) or
+                (self.llm_provider == "openrouter" and self.client is None))
+
+    def _cache_key(self, text) -> Optional[str]:
+        """可缓存文本的缓存键；禁用、空文本或超长文本返回 None"""
+        if getattr(self, "embedding_cache", None) is None or self.client == "DISABLED":
+            return None
+        if not text or not isinstance(text, str):
+            return None
+        if self.enable_embedding_length_check and len(text) > self.max_embedding_length:
+            return None
+        return embedding_key(getattr(self, "embedding", ""), text)
+
     def get_embedding(self, text):
-        """Get embedding for a text using the configured provider"""
+        """Get embedding for a text using the configured provider (with content-hash cache)"""
+        key = self._cache_key(text)
+        if key is not None:
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                logger.debug(f"💾 向量缓存命中，维度: {len(cached)}")
+                self._last_text_info = {
+                    'original_length': len(text),
+                    'processed_length': len(text),
+                    'was_truncated': False,
+                    'was_skipped': False,
+                    'provider': self.llm_provider,
+                    'strategy': 'embedding_cache_hit'
+                }
+                return cached
+
+        embedding = self._compute_embedding(text)
+        if key is not None:
+            self.embedding_cache.put(self.embedding, key, embedding)
+        return embedding
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        批量获取向量：先查缓存，未命中的去重后按批次一次请求多条文本；
+        批量请求失败时逐条调用 get_embedding（保留原有的降级与错误处理）
+        """
+        texts = list(texts)
+        keys = [self._cache_key(text) for text in texts]
+        cached = self.embedding_cache.get_many([k for k in keys if k]) if any(keys) else {}
+
+        # 未命中的文本（按缓存键去重）
+        pending: Dict[str, str] = {}
+        for text, key in zip(texts, keys):
+            if key is not None and key not in cached:
+                pending.setdefault(key, text)
+
+        computed: Dict[str, List[float]] = {}
+        pending_items = list(pending.items())
+        batch_size = DASHSCOPE_EMBEDDING_BATCH_SIZE if self._uses_dashscope() else max(1, self.embedding_batch_size)
+        for start in range(0, len(pending_items), batch_size):
+            chunk = pending_items[start:start + batch_size]
+            vectors = self._embed_batch([text for _, text in chunk])
+            if vectors is None:
+                vectors = [self._compute_embedding(text) for _, text in chunk]
+            for (key, _), vector in zip(chunk, vectors):
+                computed[key] = vector
+        if computed:
+            self.embedding_cache.put_many(self.embedding, computed)
+            logger.debug(f"📦 批量嵌入完成: 缓存命中 {len(cached)}，新请求 {len(computed)}")
+
+        results = []
+        for text, key in zip(texts, keys):
+            if key is None:
+                results.append(self.get_embedding(text))
+            else:
+                results.append(cached.get(key) or computed[key])
+        return results
+
+    def _embed_batch(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """一次请求嵌入多条文本；失败返回 None"""
+        if len(texts) == 1:
+            return None
+        try:
+            if self._uses_dashscope():
+                from dashscope import TextEmbedding
+
+                response = TextEmbedding.call(model=self.embedding, input=texts)
+                if response.status_code != 200:
+                    logger.warning(f"⚠️ DashScope批量嵌入失败: {response.code} - {response.message}，改为逐条请求")
+                    return None
+                items = sorted(response.output['embeddings'], key=lambda item: item['text_index'])
+                vectors = [item['embedding'] for item in items]
+            else:
+                if self.client is None or self.client == "DISABLED":
+                    return None
+                response = self.client.embeddings.create(model=self.embedding, input=texts)
+                vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            logger.warning(f"⚠️ {self.llm_provider}批量嵌入异常: {e}，改为逐条请求")
+            return None
+
+        if len(vectors) != len(texts):
+            logger.warning(f"⚠️ 批量嵌入返回数量不匹配 ({len(vectors)}/{len(texts)})，改为逐条请求")
+            return None
+        logger.debug(f"✅ {self.llm_provider} 批量嵌入成功: {len(texts)}条")
+        return vectors
+
+    def _compute_embedding(self, text):
+        """调用嵌入接口计算单条文本的向量（不经过缓存）"""
 
         # 检查记忆功能是否被禁用
         if self.client == "DISABLED":
@@ -396,12 +513,7 @@ class FinancialSituationMemory:
             'strategy': 'no_truncation_with_fallback'  # 标记策略
         }
 
-        if (self.llm_provider == "dashscope" or
-            self.llm_provider == "alibaba" or
-            self.llm_provider == "qianfan" or
-            (self.llm_provider == "google" and self.client is None) or
-            (self.llm_provider == "deepseek" and self.client is None) or
-            (self.llm_provider == "openrouter" and self.client is None)):
+        if self._uses_dashscope():
             # 使用阿里百炼的嵌入模型
             try:
                 # 导入DashScope模块
@@ -562,7 +674,6 @@ class FinancialSituationMemory:
         situations = []
         advice = []
         ids = []
-        embeddings = []
 
         offset = self.situation_collection.count()
 
@@ -570,7 +681,9 @@ class FinancialSituationMemory:
             situations.append(situation)
             advice.append(recommendation)
             ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+
+        # 批量嵌入（缓存命中的不再请求）
+        embeddings = self.get_embeddings(situations)
 
         self.situation_collection.add(
             documents=situations,
@@ -647,6 +760,9 @@ class FinancialSituationMemory:
             'embedding_model': self.embedding,
             'provider': self.llm_provider
         }
+
+        if getattr(self, 'embedding_cache', None) is not None:
+            info['embedding_cache'] = self.embedding_cache.stats()
         
         # 添加最后一次文本处理信息
         if hasattr(self, '_last_text_info'):
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+证券上下文（每次分析只解析一次）
+
+原先市场分析师、多空研究员、新闻/社媒/基本面分析师各自实现 _get_company_name，
+每个节点都调用 StockUtils.get_market_info + get_china_stock_info_unified（完整的数据源查询），
+再从返回文本中解析"股票名称:"，一次分析要对同一股票重复解析十余次。
+
+现在由 Propagator.create_initial_state 调用 resolve_security_context 解析一次，
+结果存入 AgentState["security_context"]，各节点通过 get_security_context(state) 读取；
+解析结果同时进入进程级缓存（LRU + TTL），同一进程内的后续分析直接复用。
+
+SecurityContext 兼容 StockUtils.get_market_info 的返回字段（is_china/currency_name 等），
+并额外提供 name（公司名称）、exchange（交易所）和 board（板块）。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from typing_extensions import TypedDict
+
+from tradingagents.config.runtime_settings import get_float, get_int
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("agents.utils.security_context")
+
+
+class SecurityContext(TypedDict):
+    ticker: str
+    name: str
+    market: str
+    market_name: str
+    currency_name: str
+    currency_symbol: str
+    data_source: str
+    exchange: str
+    board: str
+    is_china: bool
+    is_hk: bool
+    is_us: bool
+
+
+# 常见美股中文名称（与原各节点内的映射保持一致）
+US_STOCK_NAMES = {
+    'AAPL': '苹果公司',
+    'TSLA': '特斯拉',
+    'NVDA': '英伟达',
+    'MSFT': '微软',
+    'GOOGL': '谷歌',
+    'AMZN': '亚马逊',
+    'META': 'Meta',
+    'NFLX': '奈飞',
+}
+
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _china_exchange_and_board(code: str) -> tuple:
+    """根据A股代码前缀推断交易所与板块"""
+    if code.startswith(("688", "689")):
+        return "上海证券交易所", "科创板"
+    if code.startswith(("60", "90")):
+        return "上海证券交易所", "主板"
+    if code.startswith(("300", "301")):
+        return "深圳证券交易所", "创业板"
+    if code.startswith(("000", "001", "002", "003", "200")):
+        return "深圳证券交易所", "主板"
+    if code.startswith(("4", "8", "92")):
+        return "北京证券交易所", "北交所"
+    return "未知", "未知"
+
+
+def _resolve_china_name(ticker: str) -> Optional[str]:
+    """直接读取数据源管理器返回的字典，避免再格式化成文本后解析"""
+    try:
+        from tradingagents.dataflows.data_source_manager import get_china_stock_info_unified
+        info = get_china_stock_info_unified(ticker)
+        if info and info.get('name') and info['name'] != '未知':
+            return info['name']
+    except Exception as e:
+        logger.error(f"❌ [证券上下文] 获取A股名称失败: {ticker}: {e}")
+    return None
+
+
+def _resolve_hk_name(ticker: str) -> Optional[str]:
+    try:
+        from tradingagents.dataflows.providers.hk.improved_hk import get_hk_company_name_improved
+        return get_hk_company_name_improved(ticker)
+    except Exception as e:
+        logger.debug(f"📊 [证券上下文] 改进港股工具获取名称失败: {e}")
+        return None
+
+
+def _build_context(ticker: str) -> tuple:
+    """解析证券上下文，返回 (context, 名称是否解析成功)"""
+    from tradingagents.utils.stock_utils import StockUtils
+
+    market_info = StockUtils.get_market_info(ticker)
+    name = None
+    exchange, board = "未知", "未知"
+
+    if market_info['is_china']:
+        exchange, board = _china_exchange_and_board(ticker.strip().split('.')[0])
+        name = _resolve_china_name(ticker)
+        fallback = f"股票代码{ticker}"
+    elif market_info['is_hk']:
+        exchange, board = "香港交易所", "主板"
+        name = _resolve_hk_name(ticker)
+        fallback = f"港股{ticker.replace('.HK', '').replace('.hk', '')}"
+    elif market_info['is_us']:
+        exchange, board = "美国证券交易所", "美股"
+        name = US_STOCK_NAMES.get(ticker.upper(), f"美股{ticker}")
+        fallback = name
+    else:
+        fallback = f"股票{ticker}"
+
+    context = SecurityContext(
+        ticker=ticker,
+        name=name or fallback,
+        market=market_info['market'],
+        market_name=market_info['market_name'],
+        currency_name=market_info['currency_name'],
+        currency_symbol=market_info['currency_symbol'],
+        data_source=market_info['data_source'],
+        exchange=exchange,
+        board=board,
+        is_china=market_info['is_china'],
+        is_hk=market_info['is_hk'],
+        is_us=market_info['is_us'],
+    )
+    return context, name is not None
+
+
+def resolve_security_context(ticker: str) -> SecurityContext:
+    """
+    解析股票的证券上下文（进程级缓存）
+
+    缓存大小与有效期：TA_SECURITY_CONTEXT_CACHE_SIZE（默认 1024）、
+    TA_SECURITY_CONTEXT_TTL_SECONDS（默认 6 小时）。名称解析失败时不缓存，下次重新查询。
+    """
+    key = str(ticker).strip().upper()
+    ttl = get_float("TA_SECURITY_CONTEXT_TTL_SECONDS", "ta_security_context_ttl_seconds", 6 * 3600)
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and now - entry[0] < ttl:
+            _cache.move_to_end(key)
+            return SecurityContext(**entry[1])
+
+    context, resolved = _build_context(ticker)
+    logger.info(f"🏷️ [证券上下文] {ticker} -> {context['name']} ({context['market_name']}/{context['exchange']}/{context['board']})")
+
+    if resolved:
+        max_items = max(1, get_int("TA_SECURITY_CONTEXT_CACHE_SIZE", "ta_security_context_cache_size", 1024))
+        with _cache_lock:
+            _cache[key] = (now, dict(context))
+            _cache.move_to_end(key)
+            while len(_cache) > max_items:
+                _cache.popitem(last=False)
+    return context
+
+
+def get_security_context(state: Mapping[str, Any]) -> SecurityContext:
+    """从 AgentState 读取证券上下文；旧状态（未预先解析）时回退到缓存解析"""
+    context = state.get("security_context")
+    ticker = state.get("company_of_interest", "")
+    if context and context.get("ticker") == ticker:
+        return context
+    return resolve_security_context(ticker)
+
+
+def clear_security_context_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
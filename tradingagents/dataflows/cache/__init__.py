@@ -71,6 +71,14 @@ except ImportError:
     MongoDBCacheAdapter = None
     MONGODB_CACHE_ADAPTER_AVAILABLE = False
 
+# 导入列式K线存储
+try:
+    from .bar_store import ColumnarBarStore, get_bar_store, PYARROW_AVAILABLE as BAR_STORE_AVAILABLE
+except ImportError:
+    ColumnarBarStore = None
+    get_bar_store = None
+    BAR_STORE_AVAILABLE = False
+
 # 全局缓存实例
 _cache_instance = None
 
@@ -137,5 +145,10 @@ __all__ = [
     # MongoDB 缓存适配器
     'MongoDBCacheAdapter',
     'MONGODB_CACHE_ADAPTER_AVAILABLE',
+
+    # 列式K线存储
+    'ColumnarBarStore',
+    'get_bar_store',
+    'BAR_STORE_AVAILABLE',
 ]
 
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+列式K线存储（Arrow IPC 文件 + 内存映射）
+
+按 市场/周期/数据源与复权方式/股票代码 分区，每只股票一个未压缩的 Arrow IPC 文件：
+    {root}/{market}/{period}/{data_source}_{adjustment}/{symbol}.arrow
+
+不同数据源、不同复权基准的K线分别存放，互不覆盖；读取时未指定数据源则按
+TA_BAR_STORE_SOURCES 的优先级选择第一个覆盖请求区间的分区，同一只股票只取自一个分区。
+上市日期写入文件元数据，上市晚于请求开始日期的股票也能判定为已覆盖。
+
+读取时通过 pyarrow.memory_map 打开，列数据直接映射自磁盘，不经过逐条文档解析；
+写入由各 *_sync_service 经 HistoricalDataService.save_historical_data 统一触发。
+
+写入只追加增量文件 {symbol}.delta/{序号}.arrow，不重写整段历史；读取时把增量叠加到主文件上
+（同一 trade_date 以较新的为准）。增量累计到 TA_BAR_STORE_COMPACT_DELTAS 个后合并回主文件。
+同步服务与 API 分属不同进程，写入和合并都持有按股票划分的文件锁（{symbol}.arrow.lock），
+读取不加锁：先打开增量再打开主文件，合并时先替换主文件再删除增量，并在主文件元数据中记录
+已合并到的增量序号，读到的总是某次写入完成后的完整数据。
+
+配置：
+    TA_BAR_STORE_ENABLED=true|false   是否启用（默认启用，需安装 pyarrow）
+    TA_BAR_STORE_DIR=/path/to/store   存储目录（默认 tradingagents/dataflows/data_cache/bar_store）
+    TA_BAR_STORE_SOURCES=tushare_qfq,akshare_qfq,baostock_qfq
+                                      未指定数据源时的读取优先级（默认只读前复权分区）
+    TA_BAR_STORE_COMPACT_DELTAS=16    每只股票累计多少个增量文件后合并回主文件
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, List, Iterable
+
+import numpy as np
+import pandas as pd
+from filelock import FileLock
+
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.config.runtime_settings import get_bool, get_int
+
+logger = get_logger('agents')
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
+# 存储的数值列（缺失的列写入时补 NaN，保证所有文件 schema 一致）
+BAR_COLUMNS = [
+    "open", "high", "low", "close", "pre_close", "volume", "amount",
+    "change", "pct_chg", "turnover_rate",
+]
+
+# 未指定数据源时的读取优先级
+DEFAULT_SOURCE_PRIORITY = ["tushare_qfq", "akshare_qfq", "baostock_qfq"]
+
+# 各数据源同步写入的默认复权方式（Tushare pro_bar / AKShare 均为前复权）
+SOURCE_DEFAULT_ADJUSTMENT = {"tushare": "qfq", "akshare": "qfq"}
+
+# BaoStock adjustflag：1 后复权，2 前复权，3 不复权
+BAOSTOCK_ADJUSTFLAG = {1: "hfq", 2: "qfq", 3: "none"}
+
+LIST_DATE_METADATA_KEY = b"list_date"
+# 主文件已合并到的最后一个增量文件序号；序号不大于它的增量（删除失败残留的）读取时忽略
+COMPACTED_THROUGH_METADATA_KEY = b"compacted_through"
+
+DEFAULT_COMPACT_DELTAS = 16
+# 等待其他进程释放股票文件锁的最长时间（秒）
+LOCK_TIMEOUT_SECONDS = 60
+
+
+def bar_adjustment(data_source: Optional[str], adjustflag=None) -> str:
+    """根据数据源和 adjustflag 字段得到复权方式标签（qfq/hfq/none/unknown）"""
+    if adjustflag is not None:
+        try:
+            return BAOSTOCK_ADJUSTFLAG.get(int(float(adjustflag)), "unknown")
+        except (TypeError, ValueError):
+            pass
+    return SOURCE_DEFAULT_ADJUSTMENT.get(data_source or "", "unknown")
+
+
+def partition_name(data_source: Optional[str], adjustment: Optional[str] = None) -> str:
+    return f"{data_source or 'unknown'}_{adjustment or bar_adjustment(data_source)}"
+
+
+class ColumnarBarStore:
+    """按股票分区的列式K线存储"""
+
+    def __init__(self, root: Optional[str] = None):
+        if root is None:
+            root = os.getenv("TA_BAR_STORE_DIR") or str(Path(__file__).parent.parent / "data_cache" / "bar_store")
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self.compact_deltas = max(1, get_int("TA_BAR_STORE_COMPACT_DELTAS", None, DEFAULT_COMPACT_DELTAS))
+        sources = os.getenv("TA_BAR_STORE_SOURCES")
+        self.source_priority = [p.strip() for p in sources.split(",") if p.strip()] if sources \
+            else list(DEFAULT_SOURCE_PRIORITY)
+
+        if PYARROW_AVAILABLE:
+            self._schema = pa.schema(
+                [("trade_date", pa.timestamp("ns"))] + [(c, pa.float64()) for c in BAR_COLUMNS]
+            )
+
+    def path_for(self, symbol: str, market: str = "CN", period: str = "daily",
+                 partition: Optional[str] = None) -> Path:
+        return self.root / market.upper() / period / (partition or self.source_priority[0]) / f"{symbol}.arrow"
+
+    def has(self, symbol: str, market: str = "CN", period: str = "daily", partition: Optional[str] = None) -> bool:
+        partitions = [partition] if partition else self.source_priority
+        return any(self.path_for(symbol, market, period, p).exists() for p in partitions)
+
+    def resolve_partition(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                          market: str = "CN", period: str = "daily", max_gap_days: int = 4) -> Optional[str]:
+        """按优先级返回第一个覆盖请求区间的分区；都不覆盖时返回 None"""
+        for partition in self.source_priority:
+            if self._covers_partition(symbol, start_date, end_date, market, period, partition, max_gap_days):
+                return partition
+        return None
+
+    # ------------------------------------------------------------------ 读取
+
+    def _open(self, path: Path):
+        # 内存映射打开：列缓冲区直接引用映射页，不做反序列化拷贝
+        with pa.memory_map(str(path), "r") as source:
+            return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    def _delta_dir(path: Path) -> Path:
+        return path.with_suffix(".delta")
+
+    @staticmethod
+    def _file_lock(path: Path) -> FileLock:
+        return FileLock(str(path.with_suffix(".arrow.lock")), timeout=LOCK_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _compacted_through(table) -> str:
+        return (table.schema.metadata or {}).get(COMPACTED_THROUGH_METADATA_KEY, b"").decode()
+
+    def _load(self, path: Path):
+        """读取主文件并叠加尚未合并的增量文件；没有增量时直接返回内存映射的主文件"""
+        deltas = []
+        delta_dir = self._delta_dir(path)
+        if delta_dir.exists():
+            # 必须先打开增量再打开主文件（见模块说明），已被合并删除的增量跳过
+            for delta in sorted(delta_dir.glob("*.arrow")):
+                try:
+                    deltas.append((delta.stem, self._open(delta)))
+                except FileNotFoundError:
+                    continue
+        if not path.exists():
+            return None
+
+        base = self._open(path)
+        through = self._compacted_through(base)
+        pending = [table for name, table in deltas if name > through]
+        if not pending:
+            return base
+        return self._merge([base] + pending)
+
+    def _merge(self, tables):
+        """按顺序叠加多张表：同一 trade_date 以靠后的为准，元数据（上市日期）同样以靠后的为准"""
+        metadata = {}
+        for table in tables:
+            metadata.update(table.schema.metadata or {})
+        metadata.pop(COMPACTED_THROUGH_METADATA_KEY, None)
+        metadata.pop(b"pandas", None)
+
+        merged = pa.concat_tables([t.replace_schema_metadata(None) for t in tables]).to_pandas()
+        merged = (merged.drop_duplicates(subset=["trade_date"], keep="last")
+                        .sort_values("trade_date")
+                        .reset_index(drop=True))
+        schema = self._schema.with_metadata(metadata) if metadata else self._schema
+        return pa.Table.from_pandas(merged, schema=schema, preserve_index=False)
+
+    def _read_table(self, symbol: str, market: str, period: str,
+                    start_date: Optional[str], end_date: Optional[str],
+                    columns: Optional[List[str]] = None, partition: Optional[str] = None):
+        if partition is None:
+            partition = self.resolve_partition(symbol, start_date, end_date, market, period)
+            if partition is None:
+                # 没有分区覆盖请求区间时，退回优先级最高的已有分区
+                partition = next((p for p in self.source_priority
+                                  if self.path_for(symbol, market, period, p).exists()), None)
+                if partition is None:
+                    return None
+        path = self.path_for(symbol, market, period, partition)
+        if not path.exists():
+            return None
+
+        table = self._load(path)
+        if table is None:
+            return None
+
+        if columns:
+            table = table.select(["trade_date"] + [c for c in columns if c != "trade_date"])
+
+        if start_date or end_date:
+            # trade_date 已升序：二分查找后切片（零拷贝）
+            dates = table.column("trade_date").combine_chunks().to_numpy()
+            lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date), "ns"), "left") if start_date else 0
+            hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date), "ns"), "right") if end_date else len(dates)
+            table = table.slice(lo, max(hi - lo, 0))
+        return table
+
+    def read(self, symbol: str, market: str = "CN", period: str = "daily",
+             start_date: Optional[str] = None, end_date: Optional[str] = None,
+             columns: Optional[List[str]] = None, partition: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        读取单只股票的K线
+
+        Args:
+            partition: 数据源分区（如 tushare_qfq），默认按优先级选择覆盖请求区间的分区
+
+        Returns:
+            按 trade_date 升序的 DataFrame（trade_date 为 datetime64 列），不存在时返回 None
+        """
+        if not PYARROW_AVAILABLE:
+            return None
+        try:
+            table = self._read_table(symbol, market, period, start_date, end_date, columns, partition)
+            if table is None:
+                return None
+            return table.to_pandas()
+        except Exception as e:
+            logger.warning(f"⚠️ [BarStore] 读取失败 {market}/{period}/{symbol}: {e}")
+            return None
+
+    def read_many(self, symbols: Iterable[str], market: str = "CN", period: str = "daily",
+                  start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  columns: Optional[List[str]] = None, partition: Optional[str] = None) -> pd.DataFrame:
+        """
+        读取多只股票的K线，返回长表（增加 symbol 列）。
+        不在存储中的股票会被跳过，可通过结果中的 symbol 判断缺失；
+        未指定分区时每只股票各自按优先级选择分区。
+        """
+        if not PYARROW_AVAILABLE:
+            return pd.DataFrame()
+
+        tables, kept = [], []
+        for symbol in symbols:
+            try:
+                table = self._read_table(symbol, market, period, start_date, end_date, columns, partition)
+            except Exception as e:
+                logger.warning(f"⚠️ [BarStore] 读取失败 {market}/{period}/{symbol}: {e}")
+                continue
+            if table is None or table.num_rows == 0:
+                continue
+            tables.append(table)
+            kept.append(symbol)
+
+        if not tables:
+            return pd.DataFrame()
+
+        df = pa.concat_tables(tables).to_pandas()
+        # symbol 列用 Categorical 一次性生成，避免构造千万级字符串
+        lengths = [t.num_rows for t in tables]
+        df["symbol"] = pd.Categorical.from_codes(np.repeat(np.arange(len(kept)), lengths), categories=kept)
+        return df
+
+    def covers(self, symbol: str, start_date: Optional[str], end_date: Optional[str],
+               market: str = "CN", period: str = "daily", max_gap_days: int = 4,
+               partition: Optional[str] = None) -> bool:
+        """
+        判断存储是否覆盖请求区间：首根K线不晚于 start_date（或就是上市后的首个交易日），
+        末根K线距 end_date（或今天）不超过 max_gap_days（容忍周末/节假日）。
+        未指定分区时任一优先级分区覆盖即可（读取时会选中同一个分区）。
+        """
+        if not PYARROW_AVAILABLE:
+            return False
+        if partition is None:
+            return self.resolve_partition(symbol, start_date, end_date, market, period, max_gap_days) is not None
+        return self._covers_partition(symbol, start_date, end_date, market, period, partition, max_gap_days)
+
+    def _covers_partition(self, symbol: str, start_date: Optional[str], end_date: Optional[str],
+                          market: str, period: str, partition: str, max_gap_days: int) -> bool:
+        path = self.path_for(symbol, market, period, partition)
+        if not path.exists():
+            return False
+        try:
+            table = self._load(path)
+        except Exception:
+            return False
+        if table is None or table.num_rows == 0:
+            return False
+
+        dates = table.column("trade_date").combine_chunks().to_numpy()
+        if start_date and dates[0] > np.datetime64(pd.Timestamp(start_date), "ns"):
+            # 请求开始早于首根K线：只有首根K线就是上市后的首个交易日时才算覆盖
+            list_date = self._list_date(table)
+            if list_date is None or dates[0] > np.datetime64(list_date + timedelta(days=max_gap_days), "ns"):
+                return False
+        end = pd.Timestamp(end_date) if end_date else pd.Timestamp(datetime.now().date())
+        return dates[-1] >= np.datetime64(end - timedelta(days=max_gap_days), "ns")
+
+    @staticmethod
+    def _list_date(table) -> Optional[pd.Timestamp]:
+        value = (table.schema.metadata or {}).get(LIST_DATE_METADATA_KEY)
+        if not value:
+            return None
+        try:
+            return pd.Timestamp(value.decode())
+        except ValueError:
+            return None
+
+    # ------------------------------------------------------------------ 写入
+
+    def _to_table(self, df: pd.DataFrame):
+        frame = pd.DataFrame({"trade_date": pd.to_datetime(df["trade_date"]).astype("datetime64[ns]")})
+        for col in BAR_COLUMNS:
+            frame[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else float("nan")
+        return pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+
+    def _write_file(self, path: Path, table):
+        """先写临时文件再原子替换，读者不会看到写了一半的文件"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _next_delta_name(self, delta_dir: Path) -> str:
+        # 固定宽度的递增序号，字符串顺序即写入顺序（调用方持有文件锁）
+        existing = sorted(delta_dir.glob("*.arrow"))
+        seq = time.time_ns()
+        if existing:
+            seq = max(seq, int(existing[-1].stem) + 1)
+        return f"{seq:020d}"
+
+    def write(self, symbol: str, df: pd.DataFrame, market: str = "CN", period: str = "daily",
+              data_source: Optional[str] = None, adjustment: Optional[str] = None,
+              list_date: Optional[str] = None) -> int:
+        """
+        写入K线（同一 trade_date 以新数据为准）：首次写入生成主文件，之后追加增量文件
+
+        Args:
+            df: 至少包含 trade_date 列，其余列按 BAR_COLUMNS 取用
+            data_source / adjustment: 决定写入的分区，同一分区内的K线来自同一数据源、同一复权基准
+            list_date: 上市日期（写入文件元数据，用于判断上市较晚的股票是否覆盖请求区间）
+
+        Returns:
+            本次写入的K线条数
+        """
+        if not PYARROW_AVAILABLE or df is None or df.empty or "trade_date" not in df.columns:
+            return 0
+
+        partition = partition_name(data_source, adjustment)
+        label = f"{market}/{period}/{partition}/{symbol}"
+        path = self.path_for(symbol, market, period, partition)
+        try:
+            incoming = self._to_table(df)
+            if list_date:
+                incoming = incoming.replace_schema_metadata(
+                    {LIST_DATE_METADATA_KEY: pd.Timestamp(list_date).strftime("%Y-%m-%d").encode()}
+                )
+            incoming = self._merge([incoming])
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock, self._file_lock(path):
+                if not path.exists():
+                    self._write_file(path, incoming)
+                else:
+                    delta_dir = self._delta_dir(path)
+                    delta_dir.mkdir(exist_ok=True)
+                    self._write_file(delta_dir / f"{self._next_delta_name(delta_dir)}.arrow", incoming)
+                    if len(list(delta_dir.glob("*.arrow"))) >= self.compact_deltas:
+                        self._compact_locked(path)
+
+            logger.debug(f"💾 [BarStore] {label} 写入完成: {incoming.num_rows}条")
+            return incoming.num_rows
+        except Exception as e:
+            logger.warning(f"⚠️ [BarStore] 写入失败 {label}: {e}")
+            return 0
+
+    def compact(self, symbol: str, market: str = "CN", period: str = "daily",
+                partition: Optional[str] = None) -> int:
+        """
+        把增量文件合并回主文件
+
+        Returns:
+            合并后主文件中的K线条数（文件不存在时为 0）
+        """
+        if not PYARROW_AVAILABLE:
+            return 0
+        path = self.path_for(symbol, market, period, partition)
+        if not path.exists():
+            return 0
+        with self._lock, self._file_lock(path):
+            return self._compact_locked(path)
+
+    def _compact_locked(self, path: Path) -> int:
+        delta_dir = self._delta_dir(path)
+        deltas = sorted(delta_dir.glob("*.arrow")) if delta_dir.exists() else []
+        base = self._open(path)
+        through = self._compacted_through(base)
+        pending = [d for d in deltas if d.stem > through]
+        if not pending:
+            table = base
+        else:
+            table = self._merge([base] + [self._open(d) for d in pending])
+            metadata = dict(table.schema.metadata or {})
+            metadata[COMPACTED_THROUGH_METADATA_KEY] = pending[-1].stem.encode()
+            table = table.replace_schema_metadata(metadata)
+            self._write_file(path, table)
+
+        for delta in deltas:
+            try:
+                os.remove(delta)
+            except OSError:
+                # Windows 上被读者映射的文件无法删除：留到下次合并，compacted_through 保证不会重复叠加
+                pass
+        return table.num_rows
+
+
+_bar_store: Optional[ColumnarBarStore] = None
+
+
+def bar_store_enabled() -> bool:
+    """是否启用列式K线存储。ENV: TA_BAR_STORE_ENABLED（默认启用，需安装 pyarrow）"""
+    return PYARROW_AVAILABLE and get_bool("TA_BAR_STORE_ENABLED", None, True)
+
+
+def get_bar_store() -> Optional[ColumnarBarStore]:
+    """获取全局列式K线存储实例；未启用时返回 None"""
+    global _bar_store
+    if not bar_store_enabled():
+        return None
+    if _bar_store is None:
+        _bar_store = ColumnarBarStore()
+        logger.info(f"📦 列式K线存储已启用: {_bar_store.root}")
+    return _bar_store
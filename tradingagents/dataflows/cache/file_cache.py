@@ -10,13 +10,16 @@ import pickle
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any, Union, List
+import threading
+from typing import Optional, Dict, Any, Union, List, Callable
 import hashlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .metadata_index import CacheMetadataIndex
+
 
 class StockDataCache:
     """股票数据缓存管理器 - 支持美股和A股数据缓存优化"""
@@ -51,6 +54,9 @@ class StockDataCache:
                         self.china_fundamentals_dir, self.metadata_dir]:
             dir_path.mkdir(exist_ok=True)
 
+        # 元数据索引：按股票查找/统计/清理不再遍历 metadata 目录
+        self.metadata_index = CacheMetadataIndex(self.metadata_dir)
+
         # 缓存配置 - 针对不同市场设置不同的TTL
         self.cache_config = {
             'us_stock_data': {
@@ -92,6 +98,9 @@ class StockDataCache:
             'enable_length_check': os.getenv('ENABLE_CACHE_LENGTH_CHECK', 'false').lower() == 'true'  # 文件缓存默认不限制
         }
 
+        # 区间缓存的读-合并-写需要串行
+        self._range_lock = threading.Lock()
+
         logger.info(f"📁 缓存管理器初始化完成，缓存目录: {self.cache_dir}")
         logger.info(f"🗄️ 数据库缓存管理器初始化完成")
         logger.info(f"   美股数据: ✅ 已配置")
@@ -216,6 +225,11 @@ class StockDataCache:
         
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        try:
+            self.metadata_index.upsert(cache_key, metadata)
+        except Exception as e:
+            logger.warning(f"⚠️ 更新缓存元数据索引失败: {e}")
     
     def _load_metadata(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """加载元数据"""
@@ -236,6 +250,11 @@ class StockDataCache:
         if not metadata:
             return False
 
+        # 数据文件已被删除（例如在索引之外被清理）时视为无效
+        file_path = metadata.get('file_path')
+        if file_path and not Path(file_path).exists():
+            return False
+
         # 如果没有指定TTL，根据数据类型和市场自动确定
         if max_age_hours is None:
             if symbol and data_type:
@@ -387,29 +406,395 @@ class StockDataCache:
             logger.info(f"🎯 找到精确匹配的{desc}: {symbol} -> {search_key}")
             return search_key
 
-        # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'stock_data' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
-                        desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
-                        logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存，取最新的一条）
+        try:
+            cache_key = self.metadata_index.find_latest(
+                symbol, 'stock_data', market_type, data_source,
+                min_cached_at=datetime.now() - timedelta(hours=max_age_hours)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ 查询缓存元数据索引失败: {e}")
+            cache_key = None
+
+        if cache_key:
+            desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
+            logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
+            return cache_key
 
         desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol}")
         return None
     
+    # ------------------------------------------------------------------
+    # 区间缓存：每只股票（每个数据源）一个文件，元数据记录已覆盖的日期区间，
+    # 任意子区间直接切片返回，只为缺口区间调用数据源，再合并回同一文件
+    # ------------------------------------------------------------------
+
+    # 识别日期列的候选列名（按优先级）
+    RANGE_DATE_COLUMNS = ['date', 'trade_date', 'Date', '日期', 'datetime', 'time']
+    # 复权校验使用的价格列（按优先级）
+    RANGE_PRICE_COLUMNS = ['close', 'Close', '收盘']
+    # 前复权：每次除权除息后历史价格整体变化，合并前需要校验复权基准
+    REBASING_ADJUSTMENTS = ('qfq',)
+
+    def _get_range_cache_key(self, symbol: str, data_source: str, adjustment: str = None) -> str:
+        """区间缓存键：与日期无关，同一股票、同一数据源、同一复权方式只有一份"""
+        market_type = self._determine_market_type(symbol)
+        return self._generate_cache_key("stock_range", symbol, source=data_source, market=market_type,
+                                        adj=adjustment or "none")
+
+    def _get_range_ttl_hours(self, symbol: str, max_age_hours: int = None) -> float:
+        if max_age_hours is not None:
+            return max_age_hours
+        cache_type = f"{self._determine_market_type(symbol)}_stock_data"
+        return self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
+
+    def _get_range_dates(self, data: pd.DataFrame, date_column: Optional[str]) -> pd.Series:
+        """取出数据的交易日期（归一化到天）"""
+        if date_column is None:
+            values = data.index
+        else:
+            values = data[date_column]
+        dates = pd.to_datetime(pd.Series(values, index=data.index), errors='coerce')
+        if getattr(dates.dt, 'tz', None) is not None:
+            dates = dates.dt.tz_localize(None)
+        return dates.dt.normalize()
+
+    def _detect_date_column(self, data: pd.DataFrame) -> Optional[str]:
+        """
+        识别日期所在的列；日期在索引上时返回 None
+
+        Raises:
+            ValueError: 找不到日期列
+        """
+        if isinstance(data.index, pd.DatetimeIndex):
+            return None
+        for col in self.RANGE_DATE_COLUMNS:
+            if col in data.columns:
+                return col
+        raise ValueError(f"无法识别日期列: {list(data.columns)[:10]}")
+
+    @staticmethod
+    def _merge_intervals(intervals: List[tuple]) -> List[tuple]:
+        """合并重叠或相邻（相差一天）的日期区间"""
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + timedelta(days=1):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _covered_intervals(self, metadata: Optional[Dict[str, Any]], ttl_hours: float) -> List[tuple]:
+        """
+        元数据中仍然有效的覆盖区间
+
+        历史区间（结束日早于获取当天）的K线不会再变化，永久有效；
+        包含获取当天的区间可能是盘中数据，只在 TTL 内有效。
+        """
+        if not metadata:
+            return []
+        now = datetime.now()
+        intervals = []
+        for item in metadata.get('ranges', []):
+            try:
+                if not item.get('final'):
+                    fetched_at = datetime.fromisoformat(item['fetched_at'])
+                    if (now - fetched_at).total_seconds() >= ttl_hours * 3600:
+                        continue
+                intervals.append((datetime.fromisoformat(item['start']).date(),
+                                  datetime.fromisoformat(item['end']).date()))
+            except Exception:
+                continue
+        return self._merge_intervals(intervals)
+
+    @staticmethod
+    def _normalize_range(start_date: str = None, end_date: str = None):
+        """请求区间转换为 date；缺少开始日期时无法做区间缓存，返回 None"""
+        if not start_date:
+            return None
+        start = pd.Timestamp(start_date).date()
+        end = pd.Timestamp(end_date).date() if end_date else datetime.now().date()
+        if end < start:
+            return None
+        return start, end
+
+    def get_missing_date_ranges(self, symbol: str, start_date: str, end_date: str = None,
+                                data_source: str = "unknown",
+                                max_age_hours: int = None, adjustment: str = None) -> List[tuple]:
+        """
+        计算请求区间中尚未被缓存覆盖的缺口
+
+        Returns:
+            [(start_date, end_date), ...]，日期为 YYYY-MM-DD 字符串；完全命中时为空列表
+        """
+        requested = self._normalize_range(start_date, end_date)
+        if requested is None:
+            return [(start_date, end_date)]
+        start, end = requested
+
+        cache_key = self._get_range_cache_key(symbol, data_source, adjustment)
+        covered = self._covered_intervals(self._load_metadata(cache_key),
+                                          self._get_range_ttl_hours(symbol, max_age_hours))
+
+        gaps = []
+        cursor = start
+        for c_start, c_end in covered:
+            if c_end < cursor:
+                continue
+            if c_start > end:
+                break
+            if c_start > cursor:
+                gaps.append((cursor, c_start - timedelta(days=1)))
+            cursor = max(cursor, c_end + timedelta(days=1))
+            if cursor > end:
+                break
+        if cursor <= end:
+            gaps.append((cursor, end))
+
+        return [(s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')) for s, e in gaps]
+
+    def _read_range_frame(self, metadata: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        cache_path = Path(metadata['file_path'])
+        if not cache_path.exists():
+            return None
+        try:
+            return pd.read_pickle(cache_path)
+        except Exception as e:
+            logger.error(f"⚠️ 加载区间缓存失败: {e}")
+            return None
+
+    def load_stock_data_range(self, symbol: str, start_date: str, end_date: str = None,
+                              data_source: str = "unknown",
+                              max_age_hours: int = None, adjustment: str = None) -> Optional[pd.DataFrame]:
+        """
+        从区间缓存读取 [start_date, end_date] 的K线
+
+        Returns:
+            请求区间完全被覆盖时返回切片后的 DataFrame（可能为空，例如整段停牌），否则返回 None
+        """
+        requested = self._normalize_range(start_date, end_date)
+        if requested is None:
+            return None
+        if self.get_missing_date_ranges(symbol, start_date, end_date, data_source, max_age_hours, adjustment):
+            return None
+
+        metadata = self._load_metadata(self._get_range_cache_key(symbol, data_source, adjustment))
+        data = self._read_range_frame(metadata) if metadata else None
+        if data is None:
+            return None
+
+        dates = self._get_range_dates(data, metadata.get('date_column'))
+        start, end = requested
+        mask = (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))
+        logger.debug(f"🎯 区间缓存命中: {symbol} {start}~{end} ({int(mask.sum())}条)")
+        return data.loc[mask.values]
+
+    def save_stock_data_range(self, symbol: str, data: pd.DataFrame, start_date: str,
+                              end_date: str = None, data_source: str = "unknown",
+                              adjustment: str = None, final: bool = True) -> Optional[str]:
+        """
+        将 [start_date, end_date] 区间获取到的K线合并进区间缓存
+
+        同一交易日以新数据为准；即使 data 为空（节假日、停牌）也记录该区间已覆盖，
+        避免重复请求数据源。
+
+        Args:
+            final: False 时整个区间只在 TTL 内有效（例如数据源返回空，无法区分休市和获取失败）
+
+        Returns:
+            cache_key，无法缓存时返回 None
+        """
+        requested = self._normalize_range(start_date, end_date)
+        if requested is None or data is None or not isinstance(data, pd.DataFrame):
+            return None
+        start, end = requested
+
+        cache_key = self._get_range_cache_key(symbol, data_source, adjustment)
+        with self._range_lock:
+            metadata = self._load_metadata(cache_key)
+            existing = self._read_range_frame(metadata) if metadata else None
+
+            try:
+                date_column = metadata.get('date_column') if existing is not None else None
+                if not data.empty:
+                    date_column = self._detect_date_column(data)
+                if existing is not None and not existing.empty and not data.empty:
+                    merged = pd.concat([existing, data])
+                else:
+                    merged = data if existing is None or existing.empty else existing
+
+                if not merged.empty:
+                    dates = self._get_range_dates(merged, date_column)
+                    keep = ~dates.duplicated(keep='last').values & dates.notna().values
+                    order = dates[keep].argsort(kind='stable').values
+                    merged = merged.loc[keep].iloc[order]
+            except Exception as e:
+                logger.warning(f"⚠️ 区间缓存合并失败，放弃缓存 {symbol}: {e}")
+                return None
+
+            cache_path = self._get_cache_path("stock_data", cache_key, "pkl", symbol)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".pkl.{os.getpid()}.tmp")
+            merged.to_pickle(tmp_path)
+            os.replace(tmp_path, cache_path)
+
+            # 记录覆盖区间：获取当天之前的部分不再变化，当天部分受 TTL 约束
+            now = datetime.now()
+            today = now.date()
+            ranges = list(metadata.get('ranges', [])) if metadata else []
+            if not final:
+                ranges.append({'start': start.isoformat(), 'end': end.isoformat(),
+                               'final': False, 'fetched_at': now.isoformat()})
+            elif start < today:
+                ranges.append({'start': start.isoformat(), 'end': min(end, today - timedelta(days=1)).isoformat(),
+                               'final': True, 'fetched_at': now.isoformat()})
+            if final and end >= today:
+                ranges.append({'start': max(start, today).isoformat(), 'end': end.isoformat(),
+                               'final': False, 'fetched_at': now.isoformat()})
+
+            # 永久区间合并压缩，临时区间只保留 TTL 内的
+            ttl_hours = self._get_range_ttl_hours(symbol)
+            finals = self._merge_intervals([
+                (datetime.fromisoformat(r['start']).date(), datetime.fromisoformat(r['end']).date())
+                for r in ranges if r.get('final')
+            ])
+            compacted = [{'start': s.isoformat(), 'end': e.isoformat(), 'final': True} for s, e in finals]
+            compacted += [
+                r for r in ranges
+                if not r.get('final') and (now - datetime.fromisoformat(r['fetched_at'])).total_seconds() < ttl_hours * 3600
+            ]
+
+            self._save_metadata(cache_key, {
+                'symbol': symbol,
+                'data_type': 'stock_range',
+                'market_type': self._determine_market_type(symbol),
+                'data_source': data_source,
+                'adjustment': adjustment,
+                'file_path': str(cache_path),
+                'file_format': 'pkl',
+                'date_column': date_column,
+                'ranges': compacted,
+                'rows': len(merged),
+            })
+
+        logger.debug(f"💾 区间缓存已更新: {symbol} ({data_source}) {start}~{end}, 共{len(merged)}条")
+        return cache_key
+
+    def _invalidate_range_cache(self, cache_key: str):
+        """删除区间缓存文件及其元数据（复权基准变化后整体重建）"""
+        with self._range_lock:
+            metadata = self._load_metadata(cache_key)
+            if metadata and metadata.get('file_path'):
+                Path(metadata['file_path']).unlink(missing_ok=True)
+            self._get_metadata_path(cache_key).unlink(missing_ok=True)
+            try:
+                self.metadata_index.remove([cache_key])
+            except Exception as e:
+                logger.warning(f"⚠️ 更新缓存元数据索引失败: {e}")
+
+    def _find_rebase_anchor(self, metadata: Optional[Dict[str, Any]], gap_start: str,
+                            gap_end: str) -> Optional[tuple]:
+        """
+        找到与缺口相邻的一根已缓存K线，作为复权基准的校验点
+
+        Returns:
+            (anchor_date, price_column, cached_price)；没有可用的相邻K线时返回 None
+        """
+        data = self._read_range_frame(metadata) if metadata else None
+        if data is None or data.empty:
+            return None
+        price_column = next((c for c in self.RANGE_PRICE_COLUMNS if c in data.columns), None)
+        if price_column is None:
+            return None
+
+        dates = self._get_range_dates(data, metadata.get('date_column'))
+        before = dates[dates < pd.Timestamp(gap_start)]
+        after = dates[dates > pd.Timestamp(gap_end)]
+        if not before.empty:
+            anchor = before.max()
+        elif not after.empty:
+            anchor = after.min()
+        else:
+            return None
+        price = data.loc[(dates == anchor).values, price_column].iloc[-1]
+        return anchor.date(), price_column, price
+
+    def _is_rebased(self, data: Optional[pd.DataFrame], anchor: tuple) -> bool:
+        """新获取的数据在校验点上的价格与缓存不一致，说明复权基准已变化"""
+        anchor_date, price_column, cached_price = anchor
+        if data is None or data.empty or price_column not in data.columns:
+            return False
+        try:
+            dates = self._get_range_dates(data, self._detect_date_column(data))
+        except ValueError:
+            return False
+        rows = data.loc[(dates == pd.Timestamp(anchor_date)).values, price_column]
+        if rows.empty:
+            return False
+        fresh = float(rows.iloc[-1])
+        return abs(fresh - float(cached_price)) > 1e-4 * max(1.0, abs(float(cached_price)))
+
+    def get_stock_data_range(self, symbol: str, start_date: str, end_date: str,
+                             fetch_func: Callable[[str, str], Optional[pd.DataFrame]],
+                             data_source: str = "unknown",
+                             max_age_hours: int = None,
+                             adjustment: str = None) -> Optional[pd.DataFrame]:
+        """
+        区间感知的读取：命中部分直接切片，只为缺口调用 fetch_func(gap_start, gap_end)
+
+        缺口返回空数据（周末、节假日、停牌）视为已覆盖，但只在 TTL 内有效；
+        fetch_func 抛出的异常直接向上传递，不写入缓存。
+
+        前复权数据（adjustment='qfq'）每次除权除息后历史价格都会变化：获取缺口时多取一根
+        相邻的已缓存K线作为校验点，价格不一致时丢弃旧缓存，按新基准重新获取整个请求区间。
+
+        Args:
+            fetch_func: 按 YYYY-MM-DD 区间获取K线的函数，返回 DataFrame 或 None
+            adjustment: 复权方式（qfq/hfq/None），不同复权方式分别缓存
+
+        Returns:
+            请求区间的 DataFrame（可能为空）
+        """
+        if self._normalize_range(start_date, end_date) is None:
+            return fetch_func(start_date, end_date)
+
+        cache_key = self._get_range_cache_key(symbol, data_source, adjustment)
+        gaps = self.get_missing_date_ranges(symbol, start_date, end_date, data_source, max_age_hours, adjustment)
+        if gaps:
+            logger.info(f"🧩 区间缓存缺口 {symbol}: {gaps}")
+        for gap_start, gap_end in gaps:
+            anchor = None
+            fetch_start, fetch_end = gap_start, gap_end
+            if adjustment in self.REBASING_ADJUSTMENTS:
+                anchor = self._find_rebase_anchor(self._load_metadata(cache_key), gap_start, gap_end)
+                if anchor is not None:
+                    anchor_day = anchor[0].isoformat()
+                    fetch_start, fetch_end = min(gap_start, anchor_day), max(gap_end, anchor_day)
+
+            data = fetch_func(fetch_start, fetch_end)
+            if data is None or (isinstance(data, pd.DataFrame) and data.empty):
+                # 无交易日的缺口：记录为已获取（TTL 内有效），不影响已缓存的部分
+                self.save_stock_data_range(symbol, pd.DataFrame(), gap_start, gap_end, data_source,
+                                           adjustment, final=False)
+                continue
+
+            if anchor is not None and self._is_rebased(data, anchor):
+                logger.info(f"🔄 {symbol} 复权基准已变化（{anchor[0]}），重建区间缓存")
+                self._invalidate_range_cache(cache_key)
+                data = fetch_func(start_date, end_date)
+                if data is None:
+                    return None
+                if self.save_stock_data_range(symbol, data, start_date, end_date, data_source, adjustment) is None:
+                    return data
+                break
+
+            if self.save_stock_data_range(symbol, data, fetch_start, fetch_end, data_source, adjustment) is None:
+                # 数据无法写入区间缓存（例如没有日期列），退回整段获取
+                return fetch_func(start_date, end_date)
+
+        return self.load_stock_data_range(symbol, start_date, end_date, data_source, max_age_hours, adjustment)
+
     def save_news_data(self, symbol: str, news_data: str, 
                       start_date: str = None, end_date: str = None,
                       data_source: str = "unknown") -> str:
@@ -528,25 +913,21 @@ class StockDataCache:
             cache_type = f"{market_type}_fundamentals"
             max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
         
-        # 查找匹配的缓存
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'fundamentals' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-                    
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
-                        desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
-                        logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
-        
+        # 查找匹配的缓存（取最新的一条）
+        try:
+            cache_key = self.metadata_index.find_latest(
+                symbol, 'fundamentals', market_type, data_source,
+                min_cached_at=datetime.now() - timedelta(hours=max_age_hours)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ 查询缓存元数据索引失败: {e}")
+            cache_key = None
+
+        if cache_key:
+            desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
+            logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
+            return cache_key
+
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol} ({data_source})")
         return None
@@ -554,28 +935,28 @@ class StockDataCache:
     def clear_old_cache(self, max_age_days: int = 7):
         """清理过期缓存"""
         cutoff_time = datetime.now() - timedelta(days=max_age_days)
-        cleared_count = 0
-        
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+        cleared_keys = []
+
+        for cache_key, file_path in self.metadata_index.older_than(cutoff_time):
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                cached_at = datetime.fromisoformat(metadata['cached_at'])
-                if cached_at < cutoff_time:
-                    # 删除数据文件
-                    data_file = Path(metadata['file_path'])
+                # 删除数据文件
+                if file_path:
+                    data_file = Path(file_path)
                     if data_file.exists():
                         data_file.unlink()
-                    
-                    # 删除元数据文件
+
+                # 删除元数据文件
+                metadata_file = self._get_metadata_path(cache_key)
+                if metadata_file.exists():
                     metadata_file.unlink()
-                    cleared_count += 1
-                    
+                cleared_keys.append(cache_key)
+
             except Exception as e:
                 logger.warning(f"⚠️ 清理缓存时出错: {e}")
-        
-        logger.info(f"🧹 已清理 {cleared_count} 个过期缓存文件")
+
+        self.metadata_index.remove(cleared_keys)
+        logger.info(f"🧹 已清理 {len(cleared_keys)} 个过期缓存文件")
+        return len(cleared_keys)
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
@@ -591,35 +972,17 @@ class StockDataCache:
 
         total_size_bytes = 0
 
-        # 统计有元数据的缓存文件
-        metadata_files_count = 0
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                data_type = metadata.get('data_type', 'unknown')
-                if data_type == 'stock_data':
-                    stats['stock_data_count'] += 1
-                elif data_type == 'news':
-                    stats['news_count'] += 1
-                elif data_type == 'fundamentals':
-                    stats['fundamentals_count'] += 1
-
-                # 检查是否为跳过的缓存（没有实际文件）
-                data_file = Path(metadata.get('file_path', ''))
-                if not data_file.exists():
-                    stats['skipped_count'] += 1
-                else:
-                    # 计算文件大小（字节）
-                    file_size = data_file.stat().st_size
-                    total_size_bytes += file_size
-
-                stats['total_files'] += 1
-                metadata_files_count += 1
-
-            except Exception:
-                continue
+        # 统计有元数据的缓存文件（索引聚合查询）
+        index_stats = self.metadata_index.stats()
+        by_type = index_stats['by_type']
+        stats['stock_data_count'] = by_type.get('stock_data', 0) + by_type.get('stock_range', 0)
+        stats['news_count'] = by_type.get('news', 0)
+        stats['fundamentals_count'] = by_type.get('fundamentals', 0)
+        # 没有实际文件的条目视为跳过的缓存
+        stats['skipped_count'] = index_stats['missing_files']
+        stats['total_files'] = index_stats['total']
+        total_size_bytes += index_stats['total_size']
+        metadata_files_count = index_stats['total']
 
         # 如果没有元数据文件，则直接统计缓存目录中的文件（兼容旧缓存）
         if metadata_files_count == 0:
@@ -154,6 +154,37 @@ class IntegratedCacheManager:
                 data_source=data_source
             )
     
+    def load_stock_data_range(self, symbol: str, start_date: str, end_date: str = None,
+                              data_source: str = "default", max_age_hours: int = None,
+                              adjustment: str = None):
+        """从文件区间缓存读取子区间，未完全覆盖时返回None"""
+        return self.legacy_cache.load_stock_data_range(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            data_source=data_source,
+            max_age_hours=max_age_hours,
+            adjustment=adjustment
+        )
+
+    def get_stock_data_range(self, symbol: str, start_date: str, end_date: str,
+                             fetch_func, data_source: str = "default",
+                             max_age_hours: int = None, adjustment: str = None):
+        """
+        区间感知的K线读取（始终使用文件区间缓存）
+
+        命中部分直接切片，只为缺口区间调用 fetch_func(gap_start, gap_end)
+        """
+        return self.legacy_cache.get_stock_data_range(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            fetch_func=fetch_func,
+            data_source=data_source,
+            max_age_hours=max_age_hours,
+            adjustment=adjustment
+        )
+
     def save_news_data(self, symbol: str, data: Any, data_source: str = "default") -> str:
         """保存新闻数据"""
         if self.use_adaptive:
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+文件缓存元数据索引（SQLite）
+
+每个缓存条目的 JSON 元数据仍然写在 metadata 目录下（按缓存键直接读取），
+同时在 {metadata_dir}/cache_index.sqlite3 中维护一张索引表：
+    (symbol, data_type, market_type, data_source, cached_at) -> cache_key, file_path, file_size
+
+按股票查找、统计、清理过期缓存都走索引查询，不再遍历目录逐个解析 JSON。
+首次启用时如果索引为空而目录下已有元数据文件，会一次性导入。
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+INDEX_FILENAME = "cache_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    cache_key   TEXT PRIMARY KEY,
+    symbol      TEXT NOT NULL,
+    data_type   TEXT NOT NULL,
+    market_type TEXT,
+    data_source TEXT,
+    cached_at   TEXT NOT NULL,
+    file_path   TEXT,
+    file_size   INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_cache_lookup
+    ON cache_entries (symbol, data_type, market_type, data_source, cached_at);
+CREATE INDEX IF NOT EXISTS idx_cache_cached_at
+    ON cache_entries (cached_at);
+"""
+
+
+class CacheMetadataIndex:
+    """文件缓存元数据的 SQLite 索引"""
+
+    def __init__(self, metadata_dir: Path):
+        self.metadata_dir = Path(metadata_dir)
+        self.db_path = self.metadata_dir / INDEX_FILENAME
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        if self.count() == 0:
+            self.rebuild()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    @staticmethod
+    def _row(cache_key: str, metadata: Dict[str, Any]) -> Tuple:
+        file_path = metadata.get('file_path')
+        file_size = None
+        if file_path:
+            try:
+                file_size = Path(file_path).stat().st_size
+            except OSError:
+                file_size = None
+        return (
+            cache_key,
+            metadata.get('symbol', ''),
+            metadata.get('data_type', 'unknown'),
+            metadata.get('market_type'),
+            metadata.get('data_source'),
+            metadata['cached_at'],
+            file_path,
+            file_size,
+        )
+
+    def upsert(self, cache_key: str, metadata: Dict[str, Any]):
+        """写入或更新一条缓存记录（metadata 需包含 cached_at）"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row(cache_key, metadata)
+            )
+            self._conn.commit()
+
+    def remove(self, cache_keys: List[str]):
+        if not cache_keys:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", [(k,) for k in cache_keys])
+            self._conn.commit()
+
+    def find_latest(self, symbol: str, data_type: str, market_type: str,
+                    data_source: Optional[str] = None,
+                    min_cached_at: Optional[datetime] = None) -> Optional[str]:
+        """
+        查找某只股票最新的、数据文件仍然存在的缓存键
+
+        数据文件已在索引之外被删除的条目会被顺带清理（索引行和 JSON 元数据），
+        然后继续尝试下一条，避免索引与磁盘长期不一致。
+
+        Args:
+            data_source: None 表示不限数据源
+            min_cached_at: 只返回不早于该时间缓存的条目
+
+        Returns:
+            cache_key，没有匹配时返回 None
+        """
+        sql = "SELECT cache_key, file_path FROM cache_entries WHERE symbol = ? AND data_type = ? AND market_type = ?"
+        params: List[Any] = [symbol, data_type, market_type]
+        if data_source is not None:
+            sql += " AND data_source = ?"
+            params.append(data_source)
+        if min_cached_at is not None:
+            sql += " AND cached_at >= ?"
+            params.append(min_cached_at.isoformat())
+        sql += " ORDER BY cached_at DESC"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        stale = []
+        found = None
+        for cache_key, file_path in rows:
+            if file_path and Path(file_path).exists():
+                found = cache_key
+                break
+            stale.append(cache_key)
+
+        if stale:
+            self.drop_stale(stale)
+        return found
+
+    def drop_stale(self, cache_keys: List[str]):
+        """删除数据文件已丢失的条目：索引行与对应的 JSON 元数据文件"""
+        self.remove(cache_keys)
+        for cache_key in cache_keys:
+            try:
+                (self.metadata_dir / f"{cache_key}_meta.json").unlink()
+            except OSError:
+                pass
+        logger.info(f"🧹 清理数据文件已丢失的缓存条目: {len(cache_keys)} 条")
+
+    def older_than(self, cutoff: datetime) -> List[Tuple[str, Optional[str]]]:
+        """返回缓存时间早于 cutoff 的 (cache_key, file_path)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT cache_key, file_path FROM cache_entries WHERE cached_at < ?",
+                (cutoff.isoformat(),)
+            ).fetchall()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        按数据类型汇总条目数与文件大小
+
+        文件大小和缺失文件数按磁盘实际状态计算，不使用写入时记录的 file_size。
+
+        Returns:
+            {'by_type': {data_type: count}, 'total': n, 'total_size': bytes, 'missing_files': n}
+        """
+        with self._lock:
+            by_type = dict(self._conn.execute(
+                "SELECT data_type, COUNT(*) FROM cache_entries GROUP BY data_type"
+            ).fetchall())
+            file_paths = [row[0] for row in self._conn.execute("SELECT file_path FROM cache_entries")]
+
+        total_size = 0
+        missing = 0
+        for file_path in file_paths:
+            try:
+                total_size += Path(file_path).stat().st_size
+            except (OSError, TypeError):
+                missing += 1
+        return {'by_type': by_type, 'total': len(file_paths), 'total_size': total_size, 'missing_files': missing}
+
+    def rebuild(self) -> int:
+        """从 metadata 目录下的 JSON 文件重建索引，返回导入的条目数"""
+        rows = []
+        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                rows.append(self._row(metadata_file.stem.replace('_meta', ''), metadata))
+            except Exception:
+                continue
+
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.executemany("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+        if rows:
+            logger.info(f"📇 缓存元数据索引已重建: {len(rows)} 条")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
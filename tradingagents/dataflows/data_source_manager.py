@@ -6,6 +6,8 @@
 
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import Dict, List, Optional, Any
 from enum import Enum
 import warnings
@@ -23,6 +25,46 @@ logger = setup_dataflow_logging()
 
 # 导入统一数据源编码
 from tradingagents.constants import DataSourceCode
+from tradingagents.config.runtime_settings import get_bool, get_float
+from .source_stats import get_source_latency_tracker
+
+# 对冲请求共享线程池：已经开始的数据源调用是阻塞的网络请求，无法中途取消，
+# 落败的调用会执行完毕（占用配额与线程），其结果被丢弃但仍计入统计；尚未开始的调用会被跳过
+HEDGE_MAX_WORKERS = 8
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="ds-hedge")
+    return _hedge_executor
+
+
+def hedged_fetch_enabled() -> bool:
+    """
+    是否启用对冲请求：当前数据源超过等待预算仍未返回时，并行请求下一个数据源，取最先返回的有效结果。
+    每次对冲都会多消耗一个数据源的配额（Tushare/AKShare 均有限流），因此默认关闭。
+    ENV: TA_DATA_SOURCE_HEDGE_ENABLED（默认关闭）
+    """
+    return get_bool("TA_DATA_SOURCE_HEDGE_ENABLED", None, False)
+
+
+def get_hedge_budget_seconds(source: str) -> float:
+    """
+    数据源的对冲等待预算（秒）
+    ENV: TA_DATA_SOURCE_HEDGE_BUDGET_<SOURCE>（如 TA_DATA_SOURCE_HEDGE_BUDGET_TUSHARE），
+         未设置时使用 TA_DATA_SOURCE_HEDGE_BUDGET_SECONDS（默认 3 秒）
+    """
+    default = get_float("TA_DATA_SOURCE_HEDGE_BUDGET_SECONDS", None, 3.0)
+    return get_float(f"TA_DATA_SOURCE_HEDGE_BUDGET_{source.upper()}", None, default)
+
+
+def _is_valid_stock_data(result: Any) -> bool:
+    return isinstance(result, str) and bool(result) and "❌" not in result and "错误" not in result
 
 
 class ChinaDataSource(Enum):
@@ -57,6 +99,9 @@ class USDataSource(Enum):
 class DataSourceManager:
     """数据源管理器"""
 
+    # 可对冲/降级的外部数据源（MongoDB 为本地缓存，不参与）
+    EXTERNAL_SOURCES = (ChinaDataSource.TUSHARE, ChinaDataSource.AKSHARE, ChinaDataSource.BAOSTOCK)
+
     def __init__(self):
         """初始化数据源管理器"""
         # 检查是否启用MongoDB缓存
@@ -66,6 +111,9 @@ class DataSourceManager:
         self.available_sources = self._check_available_sources()
         self.current_source = self.default_source
 
+        # 各数据源的延迟/错误率统计（进程内共享），用于自适应优先级与对冲预算
+        self.source_stats = get_source_latency_tracker()
+
         # 初始化统一缓存管理器
         self.cache_manager = None
         self.cache_enabled = False
@@ -605,7 +653,8 @@ class DataSourceManager:
     #     logger.error(f"❌ TDX数据源已不再支持")
     #     return None
 
-    def _get_cached_data(self, symbol: str, start_date: str = None, end_date: str = None, max_age_hours: int = 24) -> Optional[pd.DataFrame]:
+    def _get_cached_data(self, symbol: str, start_date: str = None, end_date: str = None, max_age_hours: int = 24,
+                         data_source: str = None, adjustment: str = None) -> Optional[pd.DataFrame]:
         """
         从缓存获取数据
 
@@ -614,6 +663,8 @@ class DataSourceManager:
             start_date: 开始日期
             end_date: 结束日期
             max_age_hours: 最大缓存时间（小时）
+            data_source: 数据源；指定时优先从区间缓存切片
+            adjustment: 复权方式（与区间缓存写入时一致）
 
         Returns:
             DataFrame: 缓存的数据，如果没有则返回None
@@ -622,6 +673,14 @@ class DataSourceManager:
             return None
 
         try:
+            if data_source and hasattr(self.cache_manager, 'load_stock_data_range'):
+                cached_data = self.cache_manager.load_stock_data_range(
+                    symbol, start_date, end_date, data_source=data_source, adjustment=adjustment
+                )
+                if cached_data is not None and not cached_data.empty:
+                    logger.debug(f"📦 从区间缓存获取{symbol}数据: {len(cached_data)}条")
+                    return cached_data
+
             cache_key = self.cache_manager.find_cached_stock_data(
                 symbol=symbol,
                 start_date=start_date,
@@ -659,6 +718,27 @@ class DataSourceManager:
         except Exception as e:
             logger.warning(f"⚠️ 保存数据到缓存失败: {e}")
 
+    def _fetch_with_range_cache(self, symbol: str, start_date: str, end_date: str, data_source: str,
+                                fetch_func, adjustment: str = None) -> Optional[pd.DataFrame]:
+        """
+        通过区间缓存获取数据：已缓存的日期直接切片，只为缺口区间调用 fetch_func(start, end)
+
+        缓存不可用或不支持区间缓存时直接调用 fetch_func 获取整段数据，并写入按日期区间的旧缓存
+        （区间缓存可用时不再重复写入，避免每个回看窗口各存一份）
+        """
+        if self.cache_enabled and hasattr(self.cache_manager, 'get_stock_data_range') and start_date:
+            try:
+                return self.cache_manager.get_stock_data_range(
+                    symbol, start_date, end_date, fetch_func=fetch_func, data_source=data_source,
+                    adjustment=adjustment
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 区间缓存读取失败，直接请求数据源: {e}")
+        data = fetch_func(start_date, end_date)
+        if data is not None and not data.empty:
+            self._save_to_cache(symbol, data, start_date, end_date)
+        return data
+
     def _get_volume_safely(self, data: pd.DataFrame) -> float:
         """
         安全获取成交量数据
@@ -924,6 +1004,11 @@ class DataSourceManager:
         logger.info(f"📊 [DataFrame接口] 获取股票数据: {symbol} ({start_date} 到 {end_date})")
 
         try:
+            # 优先读取本地列式K线存储（内存映射，无需远程调用）
+            df = self._get_dataframe_from_bar_store(symbol, start_date, end_date, period)
+            if df is not None:
+                return self._standardize_dataframe(df)
+
             # 尝试当前数据源
             df = None
             if self.current_source == ChinaDataSource.MONGODB:
@@ -984,6 +1069,25 @@ class DataSourceManager:
             logger.error(f"❌ [DataFrame接口] 获取失败: {e}", exc_info=True)
             return pd.DataFrame()
 
+    def _get_dataframe_from_bar_store(self, symbol: str, start_date: str = None, end_date: str = None,
+                                      period: str = "daily") -> Optional[pd.DataFrame]:
+        """
+        从列式K线存储读取数据（由同步服务维护）；未启用或未覆盖请求区间时返回 None
+        """
+        try:
+            from tradingagents.dataflows.cache.bar_store import get_bar_store
+            store = get_bar_store()
+            if store is None or not store.covers(symbol, start_date, end_date, market="CN", period=period):
+                return None
+            df = store.read(symbol, market="CN", period=period, start_date=start_date, end_date=end_date)
+            if df is None or df.empty:
+                return None
+            logger.info(f"✅ [DataFrame接口] 从列式K线存储获取成功: {len(df)}条")
+            return df
+        except Exception as e:
+            logger.debug(f"[DataFrame接口] 列式K线存储读取失败: {e}")
+            return None
+
     def _standardize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         标准化 DataFrame 列名和格式
@@ -1064,18 +1168,22 @@ class DataSourceManager:
             # 根据数据源调用相应的获取方法
             actual_source = None  # 实际使用的数据源
 
+            all_sources_tried = False
+
             if self.current_source == ChinaDataSource.MONGODB:
                 result, actual_source = self._get_mongodb_data(symbol, start_date, end_date, period)
-            elif self.current_source == ChinaDataSource.TUSHARE:
-                logger.info(f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}', period='{period}'")
-                result = self._get_tushare_data(symbol, start_date, end_date, period)
-                actual_source = "tushare"
-            elif self.current_source == ChinaDataSource.AKSHARE:
-                result = self._get_akshare_data(symbol, start_date, end_date, period)
-                actual_source = "akshare"
-            elif self.current_source == ChinaDataSource.BAOSTOCK:
-                result = self._get_baostock_data(symbol, start_date, end_date, period)
-                actual_source = "baostock"
+            elif self.current_source in self.EXTERNAL_SOURCES and hedged_fetch_enabled():
+                # 对冲模式：当前数据源超过预算未返回时并行请求下一个数据源
+                candidates = [self.current_source] + [
+                    s for s in self._get_data_source_priority_order(symbol) if s != self.current_source
+                ]
+                candidates = self.source_stats.rank(candidates, key=lambda s: s.value)
+                result, actual_source = self._fetch_hedged(candidates, symbol, start_date, end_date, period)
+                all_sources_tried = True
+            elif self.current_source in self.EXTERNAL_SOURCES:
+                logger.info(f"🔍 [股票代码追踪] 调用 {self.current_source.value} 数据源，传入参数: symbol='{symbol}', period='{period}'")
+                result = self._call_source(self.current_source, symbol, start_date, end_date, period)
+                actual_source = self.current_source.value
             # TDX 已移除
             else:
                 result = f"❌ 不支持的数据源: {self.current_source.value}"
@@ -1084,7 +1192,7 @@ class DataSourceManager:
             # 记录详细的输出结果
             duration = time.time() - start_time
             result_length = len(result) if result else 0
-            is_success = result and "❌" not in result and "错误" not in result
+            is_success = _is_valid_stock_data(result)
 
             # 使用实际数据源名称，如果没有则使用 current_source
             display_source = actual_source or self.current_source.value
@@ -1117,9 +1225,13 @@ class DataSourceManager:
                                   'event_type': 'data_fetch_warning'
                               })
 
+                if all_sources_tried:
+                    logger.error(f"❌ [数据来源: 所有数据源失败] 所有数据源都无法获取有效数据: {symbol}")
+                    return result
+
                 # 数据质量异常时也尝试降级到其他数据源
-                fallback_result = self._try_fallback_sources(symbol, start_date, end_date)
-                if fallback_result and "❌" not in fallback_result and "错误" not in fallback_result:
+                fallback_result, _ = self._try_fallback_sources(symbol, start_date, end_date, period)
+                if _is_valid_stock_data(fallback_result):
                     logger.info(f"✅ [数据来源: 备用数据源] 降级成功获取数据: {symbol}")
                     return fallback_result
                 else:
@@ -1138,7 +1250,7 @@ class DataSourceManager:
                             'error': str(e),
                             'event_type': 'data_fetch_exception'
                         }, exc_info=True)
-            return self._try_fallback_sources(symbol, start_date, end_date)
+            return self._try_fallback_sources(symbol, start_date, end_date, period)[0]
 
     def _get_mongodb_data(self, symbol: str, start_date: str, end_date: str, period: str = "daily") -> tuple[str, str | None]:
         """
@@ -1194,7 +1306,8 @@ class DataSourceManager:
         start_time = time.time()
         try:
             # 1. 先尝试从缓存获取
-            cached_data = self._get_cached_data(symbol, start_date, end_date, max_age_hours=24)
+            cached_data = self._get_cached_data(symbol, start_date, end_date, max_age_hours=24,
+                                                data_source="tushare", adjustment="qfq")
             if cached_data is not None and not cached_data.empty:
                 logger.info(f"✅ [缓存命中] 从缓存获取{symbol}数据")
                 # 获取股票基本信息
@@ -1239,12 +1352,14 @@ class DataSourceManager:
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
 
-            data = loop.run_until_complete(provider.get_historical_data(symbol, start_date, end_date))
+            # 已缓存的日期直接切片，只为缺口区间请求Tushare（pro_bar 前复权）
+            data = self._fetch_with_range_cache(
+                symbol, start_date, end_date, "tushare",
+                lambda s, e: loop.run_until_complete(provider.get_historical_data(symbol, s, e)),
+                adjustment="qfq"
+            )
 
             if data is not None and not data.empty:
-                # 保存到缓存
-                self._save_to_cache(symbol, data, start_date, end_date)
-
                 # 获取股票基本信息（异步）
                 stock_info = loop.run_until_complete(provider.get_stock_basic_info(symbol))
                 stock_name = stock_info.get('name', f'股票{symbol}') if stock_info else f'股票{symbol}'
@@ -1388,40 +1503,130 @@ class DataSourceManager:
         """
         logger.info(f"🔄 [{self.current_source.value}] 失败，尝试备用数据源获取{period}数据: {symbol}")
 
-        # 🔥 从数据库获取数据源优先级顺序（根据股票代码识别市场）
+        # 🔥 从数据库获取数据源优先级顺序（根据股票代码识别市场），再按近期延迟/错误率调整
         # 注意：不包含MongoDB，因为MongoDB是最高优先级，如果失败了就不再尝试
-        fallback_order = self._get_data_source_priority_order(symbol)
+        fallback_order = [
+            s for s in self._get_data_source_priority_order(symbol)
+            if s != self.current_source and s in self.available_sources
+        ]
+        fallback_order = self.source_stats.rank(fallback_order, key=lambda s: s.value)
+
+        if hedged_fetch_enabled():
+            return self._fetch_hedged(fallback_order, symbol, start_date, end_date, period)
 
         for source in fallback_order:
-            if source != self.current_source and source in self.available_sources:
-                try:
-                    logger.info(f"🔄 [备用数据源] 尝试 {source.value} 获取{period}数据: {symbol}")
+            try:
+                logger.info(f"🔄 [备用数据源] 尝试 {source.value} 获取{period}数据: {symbol}")
 
-                    # 直接调用具体的数据源方法，避免递归
-                    if source == ChinaDataSource.TUSHARE:
-                        result = self._get_tushare_data(symbol, start_date, end_date, period)
-                    elif source == ChinaDataSource.AKSHARE:
-                        result = self._get_akshare_data(symbol, start_date, end_date, period)
-                    elif source == ChinaDataSource.BAOSTOCK:
-                        result = self._get_baostock_data(symbol, start_date, end_date, period)
-                    # TDX 已移除
-                    else:
-                        logger.warning(f"⚠️ 未知数据源: {source.value}")
-                        continue
+                # 直接调用具体的数据源方法，避免递归
+                result = self._call_source(source, symbol, start_date, end_date, period)
 
-                    if "❌" not in result:
-                        logger.info(f"✅ [备用数据源-{source.value}] 成功获取{period}数据: {symbol}")
-                        return result, source.value  # 返回结果和实际使用的数据源
-                    else:
-                        logger.warning(f"⚠️ [备用数据源-{source.value}] 返回错误结果: {symbol}")
+                if "❌" not in result:
+                    logger.info(f"✅ [备用数据源-{source.value}] 成功获取{period}数据: {symbol}")
+                    return result, source.value  # 返回结果和实际使用的数据源
+                else:
+                    logger.warning(f"⚠️ [备用数据源-{source.value}] 返回错误结果: {symbol}")
 
-                except Exception as e:
-                    logger.error(f"❌ [备用数据源-{source.value}] 获取失败: {symbol}, 错误: {e}")
-                    continue
+            except Exception as e:
+                logger.error(f"❌ [备用数据源-{source.value}] 获取失败: {symbol}, 错误: {e}")
+                continue
 
         logger.error(f"❌ [所有数据源失败] 无法获取{period}数据: {symbol}")
         return f"❌ 所有数据源都无法获取{symbol}的{period}数据", None
 
+    def _call_source(self, source: ChinaDataSource, symbol: str, start_date: str, end_date: str,
+                     period: str = "daily", cancelled: Optional[threading.Event] = None) -> str:
+        """调用指定外部数据源获取数据，并记录耗时与成败（cancelled 已设置时不再发起请求）"""
+        if cancelled is not None and cancelled.is_set():
+            return f"❌ 对冲请求已取消: {source.value}"
+
+        fetchers = {
+            ChinaDataSource.TUSHARE: self._get_tushare_data,
+            ChinaDataSource.AKSHARE: self._get_akshare_data,
+            ChinaDataSource.BAOSTOCK: self._get_baostock_data,
+        }
+        fetch = fetchers.get(source)
+        if fetch is None:
+            return f"❌ 不支持的数据源: {source.value}"
+
+        start_time = time.time()
+        success = False
+        try:
+            result = fetch(symbol, start_date, end_date, period)
+            success = _is_valid_stock_data(result)
+            return result
+        finally:
+            self.source_stats.record(source.value, time.time() - start_time, success)
+
+    def _fetch_hedged(self, sources: List[ChinaDataSource], symbol: str, start_date: str, end_date: str,
+                      period: str = "daily") -> tuple[str, str | None]:
+        """
+        对冲请求：按顺序启动数据源，当前数据源超过等待预算仍未返回、或已返回无效结果时，
+        立即启动下一个数据源；返回最先得到的有效结果。
+
+        返回后设置取消标记：尚未开始执行的请求直接跳过；已经开始的请求无法中断，
+        会执行完毕后丢弃结果（仍占用该数据源的配额和一个对冲线程）。
+
+        Returns:
+            tuple[str, str | None]: (结果字符串, 实际使用的数据源名称)
+        """
+        if not sources:
+            return f"❌ 所有数据源都无法获取{symbol}的{period}数据", None
+
+        executor = _get_hedge_executor()
+        queue = list(sources)
+        pending = {}
+        last_result = None
+        deadline = 0.0
+        cancelled = threading.Event()
+
+        def launch():
+            source = queue.pop(0)
+            future = executor.submit(self._call_source, source, symbol, start_date, end_date, period, cancelled)
+            pending[future] = source
+            logger.info(f"🚀 [对冲请求] 启动 {source.value} 获取{period}数据: {symbol}")
+            return time.time() + self.source_stats.hedge_budget(source.value, get_hedge_budget_seconds(source.value))
+
+        try:
+            deadline = launch()
+            while pending:
+                timeout = max(deadline - time.time(), 0) if queue else None
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                failed = False
+                for future in done:
+                    source = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ [对冲请求-{source.value}] 获取失败: {symbol}, 错误: {e}")
+                        failed = True
+                        continue
+                    if _is_valid_stock_data(result):
+                        if pending:
+                            logger.info(f"✅ [对冲请求-{source.value}] 最先返回有效数据: {symbol}，"
+                                        f"放弃 {[s.value for s in pending.values()]}")
+                        return result, source.value
+                    logger.warning(f"⚠️ [对冲请求-{source.value}] 返回错误结果: {symbol}")
+                    last_result = result
+                    failed = True
+
+                if queue and (failed or not pending or time.time() >= deadline):
+                    if not failed and pending:
+                        logger.info(f"⏱️ [对冲请求] {[s.value for s in pending.values()]} 超过等待预算，并行请求下一个数据源")
+                    deadline = launch()
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+
+        logger.error(f"❌ [所有数据源失败] 无法获取{period}数据: {symbol}")
+        return last_result or f"❌ 所有数据源都无法获取{symbol}的{period}数据", None
+
+    def get_source_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各数据源近期的调用次数、p50/p95 延迟（秒）与错误率"""
+        return self.source_stats.all_stats()
+
     def get_stock_info(self, symbol: str) -> Dict:
         """
         获取股票基本信息，支持多数据源和自动降级
@@ -648,7 +648,104 @@ class TushareProvider(BaseStockDataProvider):
         except Exception as e:
             self.logger.error(f"❌ 查找最新交易日期失败: {e}")
             return None
+
+    async def get_trade_dates(self, start_date: Union[str, date], end_date: Union[str, date] = None) -> Optional[List[str]]:
+        """
+        获取区间内的交易日（上交所交易日历）
+
+        Returns:
+            升序的交易日列表 (YYYY-MM-DD)，失败时返回 None
+        """
+        if not self.is_available():
+            return None
+
+        try:
+            start_str = self._format_date(start_date)
+            end_str = self._format_date(end_date) if end_date else datetime.now().strftime('%Y%m%d')
+            df = await asyncio.to_thread(
+                self.api.trade_cal,
+                exchange='SSE',
+                start_date=start_str,
+                end_date=end_str,
+                is_open='1',
+                fields='cal_date'
+            )
+            if df is None or df.empty:
+                return []
+
+            return sorted(f"{d[:4]}-{d[4:6]}-{d[6:8]}" for d in df['cal_date'].astype(str))
+
+        except Exception as e:
+            self.logger.error(f"❌ 获取交易日历失败 start={start_date}, end={end_date}: {e}")
+            return None
+
+    async def get_market_daily(self, trade_date: Union[str, date]) -> Optional[pd.DataFrame]:
+        """
+        获取某个交易日全市场的日线（daily 与 adj_factor 各调用一次）
+
+        与 get_historical_data 一样返回标准化后的列（volume 等），另含 ts_code、symbol、trade_date、adj_factor；
+        价格为未复权价，前复权由调用方按 adj_factor 换算。
+
+        Returns:
+            全市场日线 DataFrame，无数据（非交易日/尚未收盘）时返回 None
+        """
+        if not self.is_available():
+            return None
+
+        date_str = self._format_date(trade_date)
+        try:
+            df = await asyncio.to_thread(self.api.daily, trade_date=date_str)
+            if df is None or df.empty:
+                self.logger.warning(f"⚠️ 全市场日线为空: trade_date={date_str}")
+                return None
+
+            factors = await asyncio.to_thread(
+                self.api.adj_factor, trade_date=date_str, fields='ts_code,adj_factor'
+            )
+            if factors is not None and not factors.empty:
+                df = df.merge(factors[['ts_code', 'adj_factor']], on='ts_code', how='left')
+            else:
+                df['adj_factor'] = float('nan')
+
+            df = df.rename(columns={'vol': 'volume'})
+            df['symbol'] = df['ts_code'].str.split('.').str[0]
+            df['trade_date'] = pd.to_datetime(df['trade_date'].astype(str), format='%Y%m%d')
+
+            self.logger.info(f"✅ 获取全市场日线: {date_str} {len(df)}条记录")
+            return df
+
+        except Exception as e:
+            if self._is_rate_limit_error(str(e)):
+                self.logger.error(f"❌ 获取全市场日线失败（限流）trade_date={date_str}: {e}")
+                raise
+            self.logger.error(f"❌ 获取全市场日线失败 trade_date={date_str}: {e}")
+            return None
     
+    async def get_market_adj_factor(self, trade_date: Union[str, date]) -> Optional[pd.DataFrame]:
+        """
+        获取某个交易日全市场的复权因子（adj_factor 调用一次）
+
+        Returns:
+            包含 symbol、adj_factor 列的 DataFrame，无数据时返回 None
+        """
+        if not self.is_available():
+            return None
+
+        date_str = self._format_date(trade_date)
+        try:
+            df = await asyncio.to_thread(self.api.adj_factor, trade_date=date_str, fields='ts_code,adj_factor')
+            if df is None or df.empty:
+                return None
+            df['symbol'] = df['ts_code'].str.split('.').str[0]
+            return df[['symbol', 'adj_factor']]
+
+        except Exception as e:
+            if self._is_rate_limit_error(str(e)):
+                self.logger.error(f"❌ 获取全市场复权因子失败（限流）trade_date={date_str}: {e}")
+                raise
+            self.logger.error(f"❌ 获取全市场复权因子失败 trade_date={date_str}: {e}")
+            return None
+
     async def get_financial_data(self, symbol: str, report_type: str = "quarterly",
                                 period: str = None, limit: int = 4) -> Optional[Dict[str, Any]]:
         """
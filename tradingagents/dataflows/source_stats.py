@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+数据源延迟与错误率统计
+
+DataSourceManager 每次调用具体数据源（Tushare/AKShare/BaoStock）都会记录耗时与成败，
+这里按数据源保留最近 WINDOW_SIZE 次调用，提供：
+    - p50/p95 延迟、错误率
+    - 自适应排序：样本足够的数据源按 "p95 × (1 + 错误率惩罚)" 排序，错误率过高的排在最后，
+      样本不足的数据源保持配置的优先级位置
+    - 对冲请求的等待预算：配置的预算与该数据源 p95 取较小值
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+T = TypeVar('T')
+
+# 每个数据源保留的最近调用次数
+WINDOW_SIZE = 200
+# 参与自适应排序所需的最少样本数
+MIN_SAMPLES = 5
+# 错误率惩罚系数：得分 = p95 × (1 + ERROR_PENALTY × 错误率)
+ERROR_PENALTY = 4.0
+# 错误率不低于该值的数据源视为不健康，排在健康数据源之后（即使它失败得很快）
+UNHEALTHY_ERROR_RATE = 0.5
+# 对冲预算下限（秒），避免 p95 很小时几乎同时请求所有数据源
+MIN_HEDGE_BUDGET_SECONDS = 0.5
+
+
+class SourceLatencyTracker:
+    """按数据源统计最近调用的延迟与成败（线程安全）"""
+
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        self.window_size = window_size
+        self._samples: Dict[str, Deque[Tuple[float, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, duration: float, success: bool):
+        """记录一次调用：耗时（秒）与是否得到有效数据"""
+        with self._lock:
+            samples = self._samples.get(source)
+            if samples is None:
+                samples = self._samples[source] = deque(maxlen=self.window_size)
+            samples.append((float(duration), bool(success)))
+
+    def stats(self, source: str) -> Dict[str, Optional[float]]:
+        """
+        Returns:
+            {'count': n, 'p50': 秒, 'p95': 秒, 'error_rate': 0~1}，无样本时延迟与错误率为 None
+        """
+        with self._lock:
+            samples = list(self._samples.get(source, ()))
+        if not samples:
+            return {'count': 0, 'p50': None, 'p95': None, 'error_rate': None}
+
+        durations = np.array([s[0] for s in samples])
+        errors = sum(1 for s in samples if not s[1])
+        return {
+            'count': len(samples),
+            'p50': float(np.percentile(durations, 50)),
+            'p95': float(np.percentile(durations, 95)),
+            'error_rate': errors / len(samples),
+        }
+
+    def all_stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        with self._lock:
+            sources = list(self._samples.keys())
+        return {source: self.stats(source) for source in sources}
+
+    def score(self, source: str) -> Optional[Tuple[bool, float]]:
+        """排序得分（越小越好）：(是否不健康, 加权延迟)；样本不足时返回 None"""
+        st = self.stats(source)
+        if st['count'] < MIN_SAMPLES:
+            return None
+        return (st['error_rate'] >= UNHEALTHY_ERROR_RATE,
+                st['p95'] * (1.0 + ERROR_PENALTY * st['error_rate']))
+
+    def rank(self, sources: Sequence[T], key=lambda s: s) -> List[T]:
+        """
+        按统计数据调整优先级顺序。
+
+        有足够样本的数据源之间按得分重新排列，只占用它们原来在列表中的位置；
+        样本不足的数据源位置不变，因此新接入的数据源仍按配置的优先级被尝试。
+        """
+        sources = list(sources)
+        scores = {i: self.score(key(s)) for i, s in enumerate(sources)}
+        slots = [i for i, sc in scores.items() if sc is not None]
+        if len(slots) < 2:
+            return sources
+
+        # 稳定排序：得分相同时保持配置顺序
+        ordered = sorted(slots, key=lambda i: (scores[i], i))
+        result = list(sources)
+        for slot, i in zip(slots, ordered):
+            result[slot] = sources[i]
+
+        if result != sources:
+            logger.info(f"📈 [数据源统计] 按延迟/错误率调整优先级: "
+                        f"{[key(s) for s in sources]} -> {[key(s) for s in result]}")
+        return result
+
+    def hedge_budget(self, source: str, configured: float) -> float:
+        """对冲等待预算：样本足够时取 min(配置预算, p95)，由 p95 得出的预算不低于 MIN_HEDGE_BUDGET_SECONDS"""
+        st = self.stats(source)
+        if st['count'] >= MIN_SAMPLES and st['p95'] is not None:
+            return min(configured, max(st['p95'], MIN_HEDGE_BUDGET_SECONDS))
+        return configured
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+_tracker: Optional[SourceLatencyTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_source_latency_tracker() -> SourceLatencyTracker:
+    """获取进程内共享的数据源统计实例"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = SourceLatencyTracker()
+    return _tracker
@@ -1,16 +1,127 @@
 import pandas as pd
 import yfinance as yf
 from stockstats import wrap
-from typing import Annotated
+from typing import Annotated, Tuple
+from collections import OrderedDict
 import os
+import threading
 from tradingagents.config.config_manager import config_manager
 
+# 指标序列缓存：(symbol, indicator, 数据版本) -> 以 YYYY-mm-dd 为索引的指标序列
+# 数据版本取自源CSV的路径/修改时间/大小，文件更新后自动失效
+_SERIES_CACHE_MAX = 256
+_series_cache: "OrderedDict[tuple, pd.Series]" = OrderedDict()
+# 已加载并 wrap 的行情数据：数据版本 -> StockDataFrame（同一股票的多个指标共享一次加载）
+_FRAME_CACHE_MAX = 16
+_frame_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
 def get_config():
     """兼容性包装函数"""
     return config_manager.load_settings()
 
 
+def _cache_get(cache: OrderedDict, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key, value, max_size: int):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def clear_indicator_cache():
+    """清空指标序列与行情数据缓存"""
+    with _cache_lock:
+        _series_cache.clear()
+        _frame_cache.clear()
+
+
 class StockstatsUtils:
+    @staticmethod
+    def _data_file(symbol: str, data_dir: str, online: bool) -> str:
+        """返回行情CSV路径；在线模式下缓存文件不存在时先从 Yahoo Finance 下载"""
+        if not online:
+            data_file = os.path.join(data_dir, f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv")
+            if not os.path.exists(data_file):
+                raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
+            return data_file
+
+        # Get today's date as YYYY-mm-dd to add to cache
+        today_date = pd.Timestamp.today()
+        start_date = (today_date - pd.DateOffset(years=15)).strftime("%Y-%m-%d")
+        end_date = today_date.strftime("%Y-%m-%d")
+
+        # Get config and ensure cache directory exists
+        config = get_config()
+        os.makedirs(config["data_cache_dir"], exist_ok=True)
+
+        data_file = os.path.join(
+            config["data_cache_dir"],
+            f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+        )
+
+        if not os.path.exists(data_file):
+            data = yf.download(
+                symbol,
+                start=start_date,
+                end=end_date,
+                multi_level_index=False,
+                progress=False,
+                auto_adjust=True,
+            )
+            data = data.reset_index()
+            data.to_csv(data_file, index=False)
+        return data_file
+
+    @staticmethod
+    def _load_frame(data_file: str, version: Tuple) -> pd.DataFrame:
+        df = _cache_get(_frame_cache, version)
+        if df is None:
+            df = wrap(pd.read_csv(data_file))
+            _cache_put(_frame_cache, version, df, _FRAME_CACHE_MAX)
+        return df
+
+    @staticmethod
+    def get_indicator_series(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        indicator: Annotated[str, "stockstats indicator name"],
+        data_dir: Annotated[str, "directory where the stock data is stored."],
+        online: Annotated[bool, "whether to fetch data online"] = False,
+    ) -> pd.Series:
+        """
+        计算完整指标序列（每个 股票+指标+数据版本 只加载和计算一次）
+
+        Returns:
+            以交易日 YYYY-mm-dd 字符串为索引的指标序列
+        """
+        data_file = StockstatsUtils._data_file(symbol, data_dir, online)
+        stat = os.stat(data_file)
+        version = (data_file, stat.st_mtime_ns, stat.st_size)
+        key = (symbol, indicator, version)
+
+        series = _cache_get(_series_cache, key)
+        if series is not None:
+            return series
+
+        df = StockstatsUtils._load_frame(data_file, version)
+        with _cache_lock:
+            # stockstats 会把计算结果写回同一 DataFrame，需串行化
+            values = df[indicator].to_numpy(copy=True)
+            dates = df["Date"].astype(str).str[:10].to_numpy()
+        series = pd.Series(values, index=dates, name=indicator)
+        series = series[~series.index.duplicated(keep="first")]
+        _cache_put(_series_cache, key, series, _SERIES_CACHE_MAX)
+        return series
+
     @staticmethod
     def get_stock_stats(
         symbol: Annotated[str, "ticker symbol for the company"],
@@ -29,63 +140,10 @@ class StockstatsUtils:
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
     ):
-        df = None
-        data = None
-
-        if not online:
-            try:
-                data = pd.read_csv(
-                    os.path.join(
-                        data_dir,
-                        f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-                    )
-                )
-                df = wrap(data)
-            except FileNotFoundError:
-                raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
-        else:
-            # Get today's date as YYYY-mm-dd to add to cache
-            today_date = pd.Timestamp.today()
-            curr_date = pd.to_datetime(curr_date)
-
-            end_date = today_date
-            start_date = today_date - pd.DateOffset(years=15)
-            start_date = start_date.strftime("%Y-%m-%d")
-            end_date = end_date.strftime("%Y-%m-%d")
-
-            # Get config and ensure cache directory exists
-            config = get_config()
-            os.makedirs(config["data_cache_dir"], exist_ok=True)
-
-            data_file = os.path.join(
-                config["data_cache_dir"],
-                f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
-            )
+        series = StockstatsUtils.get_indicator_series(symbol, indicator, data_dir, online=online)
+        curr_date = pd.to_datetime(curr_date).strftime("%Y-%m-%d")
 
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                data["Date"] = pd.to_datetime(data["Date"])
-            else:
-                data = yf.download(
-                    symbol,
-                    start=start_date,
-                    end=end_date,
-                    multi_level_index=False,
-                    progress=False,
-                    auto_adjust=True,
-                )
-                data = data.reset_index()
-                data.to_csv(data_file, index=False)
-
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-            curr_date = curr_date.strftime("%Y-%m-%d")
-
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
-
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
-            return indicator_value
+        if curr_date in series.index:
+            return series[curr_date]
         else:
             return "N/A: Not a trading day (weekend or holiday)"
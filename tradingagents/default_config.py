@@ -17,6 +17,12 @@ DEFAULT_CONFIG = {
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # 分析师并行执行：所选分析师同时从 START 出发，在看涨研究员之前汇合
+    "parallel_analysts": os.getenv("PARALLEL_ANALYSTS_ENABLED", "false").lower() == "true",
+    # 风险辩论按轮并行：每轮激进/保守/中性分析师同时基于上一轮记录发言，汇合后进入下一轮
+    "parallel_risk_debate": os.getenv("PARALLEL_RISK_DEBATE_ENABLED", "false").lower() == "true",
+    # LLM 响应录制/回放：passthrough（默认）/ record / replay / auto，用于离线基准测试与重跑失败的分析
+    "llm_cache_mode": os.getenv("TA_LLM_CACHE_MODE", "passthrough"),
     # Tool settings - 从环境变量读取，提供默认值
     "online_tools": os.getenv("ONLINE_TOOLS_ENABLED", "false").lower() == "true",
     "online_news": os.getenv("ONLINE_NEWS_ENABLED", "true").lower() == "true", 
@@ -10,6 +10,7 @@ from tradingagents.agents.utils.agent_states import (
     InvestDebateState,
     RiskDebateState,
 )
+from tradingagents.agents.utils.security_context import resolve_security_context
 
 
 class Propagator:
@@ -29,10 +30,14 @@ class Propagator:
         # 这样可以确保所有LLM（包括DeepSeek）都能理解任务
         analysis_request = f"请对股票 {company_name} 进行全面分析，交易日期为 {trade_date}。"
 
+        # 证券上下文只在这里解析一次，各节点从状态中读取
+        security_context = resolve_security_context(company_name)
+
         return {
             "messages": [HumanMessage(content=analysis_request)],
             "company_of_interest": company_name,
             "trade_date": str(trade_date),
+            "security_context": security_context,
             "investment_debate_state": InvestDebateState(
                 {"history": "", "current_response": "", "count": 0}
             ),
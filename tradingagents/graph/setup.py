@@ -15,6 +15,21 @@ from .conditional_logic import ConditionalLogic
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+# 各分析师写入的状态字段：(报告, 工具调用计数器)
+ANALYST_STATE_KEYS = {
+    "market": ("market_report", "market_tool_call_count"),
+    "social": ("sentiment_report", "sentiment_tool_call_count"),
+    "news": ("news_report", "news_tool_call_count"),
+    "fundamentals": ("fundamentals_report", "fundamentals_tool_call_count"),
+}
+
+# 风险辩论发言者：(节点名, 个人历史字段, 最新发言字段)，按轮内发言顺序排列
+RISK_DEBATORS = {
+    "Risky": ("Risky Analyst", "risky_history", "current_risky_response"),
+    "Safe": ("Safe Analyst", "safe_history", "current_safe_response"),
+    "Neutral": ("Neutral Analyst", "neutral_history", "current_neutral_response"),
+}
+
 
 class GraphSetup:
     """Handles the setup and configuration of the agent graph."""
@@ -48,6 +63,110 @@ class GraphSetup:
         self.config = config or {}
         self.react_llm = react_llm
 
+    def _build_analyst_subgraph(self, analyst_type, analyst_node, delete_node, tool_node):
+        """Compile one analyst's tool loop (analyst -> tools -> analyst ... -> Msg Clear) as its own graph."""
+        name = analyst_type.capitalize()
+        subgraph = StateGraph(AgentState)
+        subgraph.add_node(f"{name} Analyst", analyst_node)
+        subgraph.add_node(f"Msg Clear {name}", delete_node)
+        subgraph.add_node(f"tools_{analyst_type}", tool_node)
+
+        subgraph.add_edge(START, f"{name} Analyst")
+        subgraph.add_conditional_edges(
+            f"{name} Analyst",
+            getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+            [f"tools_{analyst_type}", f"Msg Clear {name}"],
+        )
+        subgraph.add_edge(f"tools_{analyst_type}", f"{name} Analyst")
+        subgraph.add_edge(f"Msg Clear {name}", END)
+        return subgraph.compile()
+
+    def _create_isolated_analyst_node(self, analyst_type, subgraph):
+        """Wrap an analyst subgraph as a single node with a private message channel.
+
+        The subgraph starts from a copy of the shared messages and only the
+        analyst's report and tool call counter are written back, so analysts
+        running in the same superstep never touch each other's messages.
+        """
+        report_key, counter_key = ANALYST_STATE_KEYS[analyst_type]
+        recursion_limit = self.config.get("max_recur_limit", 100)
+
+        def run_analyst(state):
+            branch_state = dict(state)
+            branch_state["messages"] = list(state["messages"])
+            result = subgraph.invoke(branch_state, {"recursion_limit": recursion_limit})
+            return {
+                report_key: result.get(report_key, ""),
+                counter_key: result.get(counter_key, 0),
+            }
+
+        return run_analyst
+
+    def _create_risk_round_node(self, speaker, debator_node):
+        """Wrap a risk debator so that it only reports its answer for the current round.
+
+        The three debators of a round run in the same superstep against the
+        previous round's ``risk_debate_state``; their answers are collected in
+        ``risk_round_responses`` and merged by the "Risk Round Merge" node.
+        """
+        response_key = RISK_DEBATORS[speaker][2]
+
+        def run_debator(state):
+            result = debator_node(state)
+            argument = result["risk_debate_state"].get(response_key, "")
+            return {"risk_round_responses": {speaker: argument}}
+
+        return run_debator
+
+    @staticmethod
+    def _merge_risk_round(state):
+        """Fold one parallel round into ``risk_debate_state`` in Risky -> Safe -> Neutral order."""
+        risk_debate_state = dict(state["risk_debate_state"])
+        responses = state.get("risk_round_responses") or {}
+
+        history = risk_debate_state.get("history", "")
+        for speaker, (_, history_key, response_key) in RISK_DEBATORS.items():
+            argument = responses.get(speaker)
+            if argument is None:
+                continue
+            history += "\n" + argument
+            risk_debate_state[history_key] = risk_debate_state.get(history_key, "") + "\n" + argument
+            risk_debate_state[response_key] = argument
+            risk_debate_state["latest_speaker"] = speaker
+
+        risk_debate_state["history"] = history
+        risk_debate_state["count"] = risk_debate_state.get("count", 0) + len(responses)
+        logger.info(f"🔀 [并行风险辩论] 本轮汇合 {len(responses)} 位分析师发言，累计: {risk_debate_state['count']}")
+
+        return {"risk_debate_state": risk_debate_state, "risk_round_responses": {}}
+
+    def _add_sequential_analyst_edges(self, workflow, selected_analysts):
+        """Chain the analysts one after another, the last one hands over to Bull Researcher."""
+        # Start with the first analyst
+        first_analyst = selected_analysts[0]
+        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
+
+        # Connect analysts in sequence
+        for i, analyst_type in enumerate(selected_analysts):
+            current_analyst = f"{analyst_type.capitalize()} Analyst"
+            current_tools = f"tools_{analyst_type}"
+            current_clear = f"Msg Clear {analyst_type.capitalize()}"
+
+            # Add conditional edges for current analyst
+            workflow.add_conditional_edges(
+                current_analyst,
+                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+                [current_tools, current_clear],
+            )
+            workflow.add_edge(current_tools, current_analyst)
+
+            # Connect to next analyst or to Bull Researcher if this is the last analyst
+            if i < len(selected_analysts) - 1:
+                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
+                workflow.add_edge(current_clear, next_analyst)
+            else:
+                workflow.add_edge(current_clear, "Bull Researcher")
+
     def setup_graph(
         self, selected_analysts=["market", "social", "news", "fundamentals"]
     ):
@@ -59,6 +178,15 @@ class GraphSetup:
                 - "social": Social media analyst
                 - "news": News analyst
                 - "fundamentals": Fundamentals analyst
+
+        With ``parallel_analysts`` enabled in the config, all selected analysts
+        branch from START at once and join before "Bull Researcher"; otherwise
+        they run one after another.
+
+        With ``parallel_risk_debate`` enabled, the Risky/Safe/Neutral analysts
+        answer concurrently in every round and "Risk Round Merge" folds their
+        answers into the debate state before the next round; otherwise they
+        speak in a ring one at a time.
         """
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
@@ -158,50 +286,54 @@ class GraphSetup:
 
         # Create workflow
         workflow = StateGraph(AgentState)
+        parallel_analysts = bool(self.config.get("parallel_analysts", False)) and len(analyst_nodes) > 1
 
         # Add analyst nodes to the graph
-        for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
-            workflow.add_node(
-                f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
-            )
-            workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
+        if parallel_analysts:
+            logger.info(f"🔀 分析师并行执行: {list(analyst_nodes.keys())}")
+            for analyst_type, node in analyst_nodes.items():
+                subgraph = self._build_analyst_subgraph(
+                    analyst_type, node, delete_nodes[analyst_type], tool_nodes[analyst_type]
+                )
+                workflow.add_node(
+                    f"{analyst_type.capitalize()} Analyst",
+                    self._create_isolated_analyst_node(analyst_type, subgraph),
+                )
+        else:
+            for analyst_type, node in analyst_nodes.items():
+                workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
+                workflow.add_node(
+                    f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
+                )
+                workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
         # Add other nodes
         workflow.add_node("Bull Researcher", bull_researcher_node)
         workflow.add_node("Bear Researcher", bear_researcher_node)
         workflow.add_node("Research Manager", research_manager_node)
         workflow.add_node("Trader", trader_node)
-        workflow.add_node("Risky Analyst", risky_analyst)
-        workflow.add_node("Neutral Analyst", neutral_analyst)
-        workflow.add_node("Safe Analyst", safe_analyst)
+        parallel_risk_debate = bool(self.config.get("parallel_risk_debate", False))
+        if parallel_risk_debate:
+            logger.info(f"🔀 风险辩论按轮并行执行")
+            workflow.add_node("Risky Analyst", self._create_risk_round_node("Risky", risky_analyst))
+            workflow.add_node("Neutral Analyst", self._create_risk_round_node("Neutral", neutral_analyst))
+            workflow.add_node("Safe Analyst", self._create_risk_round_node("Safe", safe_analyst))
+            workflow.add_node("Risk Round Merge", self._merge_risk_round)
+        else:
+            workflow.add_node("Risky Analyst", risky_analyst)
+            workflow.add_node("Neutral Analyst", neutral_analyst)
+            workflow.add_node("Safe Analyst", safe_analyst)
         workflow.add_node("Risk Judge", risk_manager_node)
 
         # Define edges
-        # Start with the first analyst
-        first_analyst = selected_analysts[0]
-        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
-
-        # Connect analysts in sequence
-        for i, analyst_type in enumerate(selected_analysts):
-            current_analyst = f"{analyst_type.capitalize()} Analyst"
-            current_tools = f"tools_{analyst_type}"
-            current_clear = f"Msg Clear {analyst_type.capitalize()}"
-
-            # Add conditional edges for current analyst
-            workflow.add_conditional_edges(
-                current_analyst,
-                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
-                [current_tools, current_clear],
-            )
-            workflow.add_edge(current_tools, current_analyst)
-
-            # Connect to next analyst or to Bull Researcher if this is the last analyst
-            if i < len(selected_analysts) - 1:
-                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
-                workflow.add_edge(current_clear, next_analyst)
-            else:
-                workflow.add_edge(current_clear, "Bull Researcher")
+        if parallel_analysts:
+            # Fan out from START, join before Bull Researcher
+            analyst_names = [f"{a.capitalize()} Analyst" for a in analyst_nodes]
+            for analyst_name in analyst_names:
+                workflow.add_edge(START, analyst_name)
+            workflow.add_edge(analyst_names, "Bull Researcher")
+        else:
+            self._add_sequential_analyst_edges(workflow, selected_analysts)
 
         # Add remaining edges
         workflow.add_conditional_edges(
@@ -221,31 +353,43 @@ class GraphSetup:
             },
         )
         workflow.add_edge("Research Manager", "Trader")
-        workflow.add_edge("Trader", "Risky Analyst")
-        workflow.add_conditional_edges(
-            "Risky Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Safe Analyst": "Safe Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
-        workflow.add_conditional_edges(
-            "Safe Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Neutral Analyst": "Neutral Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
-        workflow.add_conditional_edges(
-            "Neutral Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Risky Analyst": "Risky Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
+        if parallel_risk_debate:
+            # Every round fans out from Trader / Risk Round Merge and joins at Risk Round Merge
+            risk_names = [RISK_DEBATORS[speaker][0] for speaker in RISK_DEBATORS]
+            for risk_name in risk_names:
+                workflow.add_edge("Trader", risk_name)
+            workflow.add_edge(risk_names, "Risk Round Merge")
+            workflow.add_conditional_edges(
+                "Risk Round Merge",
+                self.conditional_logic.should_continue_risk_round,
+                risk_names + ["Risk Judge"],
+            )
+        else:
+            workflow.add_edge("Trader", "Risky Analyst")
+            workflow.add_conditional_edges(
+                "Risky Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Safe Analyst": "Safe Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+            workflow.add_conditional_edges(
+                "Safe Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Neutral Analyst": "Neutral Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+            workflow.add_conditional_edges(
+                "Neutral Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Risky Analyst": "Risky Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
 
         workflow.add_edge("Risk Judge", END)
 
@@ -6,11 +6,13 @@ import json
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 import time
+import threading
 
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 from tradingagents.llm_adapters import ChatDashScopeOpenAI, ChatGoogleOpenAI
+from tradingagents.llm_adapters.response_cache import apply_llm_response_cache
 
 from langgraph.prebuilt import ToolNode
 
@@ -751,7 +753,13 @@ class TradingAgentsGraph:
             )
 
             logger.info(f"✅ [自定义厂家 {provider_name}] 已配置自定义端点并应用用户配置的模型参数")
-        
+
+        # LLM 响应录制/回放缓存（TA_LLM_CACHE_MODE=record/replay/auto，默认 passthrough 不启用）
+        self.llm_response_cache = apply_llm_response_cache(
+            [self.quick_thinking_llm, self.deep_thinking_llm, getattr(self, 'react_llm', None)],
+            self.config,
+        )
+
         self.toolkit = Toolkit(config=self.config)
 
         # Initialize memories (如果启用)
@@ -804,13 +812,32 @@ class TradingAgentsGraph:
         self.signal_processor = SignalProcessor(self.quick_thinking_llm)
 
         # State tracking
-        self.curr_state = None
-        self.ticker = None
-        self.log_states_dict = {}  # date to full state dict
+        # 单次运行的状态（ticker、curr_state）按线程隔离，同一实例可被并发任务复用
+        self._run_local = threading.local()
+        self._log_lock = threading.Lock()
+        self.log_states_dict = {}  # ticker -> {date -> full state dict}
 
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
+    @property
+    def ticker(self):
+        """当前线程最近一次运行的股票代码"""
+        return getattr(self._run_local, "ticker", None)
+
+    @ticker.setter
+    def ticker(self, value):
+        self._run_local.ticker = value
+
+    @property
+    def curr_state(self):
+        """当前线程最近一次运行的最终状态（供 reflect_and_remember 使用）"""
+        return getattr(self._run_local, "curr_state", None)
+
+    @curr_state.setter
+    def curr_state(self, value):
+        self._run_local.curr_state = value
+
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources.
 
@@ -878,6 +905,11 @@ class TradingAgentsGraph:
             progress_callback: Optional callback function for progress updates
             task_id: Optional task ID for tracking performance data
         """
+        # 实例可能被池化复用并发运行：本实例的配置只绑定到这次运行的上下文，不改写全局配置
+        with Toolkit.run_config(self.config):
+            return self._propagate(company_name, trade_date, progress_callback, task_id)
+
+    def _propagate(self, company_name, trade_date, progress_callback=None, task_id=None):
 
         # 添加详细的接收日志
         logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
@@ -886,7 +918,7 @@ class TradingAgentsGraph:
         logger.debug(f"🔍 [GRAPH DEBUG] 接收到的task_id: '{task_id}'")
 
         self.ticker = company_name
-        logger.debug(f"🔍 [GRAPH DEBUG] 设置self.ticker: '{self.ticker}'")
+        logger.debug(f"🔍 [GRAPH DEBUG] 设置self.ticker: '{company_name}'")
 
         # Initialize state
         logger.debug(f"🔍 [GRAPH DEBUG] 创建初始状态，传递参数: company_name='{company_name}', trade_date='{trade_date}'")
@@ -902,9 +934,6 @@ class TradingAgentsGraph:
         current_node_start = None  # 当前节点开始时间
         current_node_name = None  # 当前节点名称
 
-        # 保存task_id用于后续保存性能数据
-        self._current_task_id = task_id
-
         # 根据是否有进度回调选择不同的stream_mode
         args = self.propagator.get_graph_args(use_progress_callback=bool(progress_callback))
 
@@ -1037,7 +1066,7 @@ class TradingAgentsGraph:
         self.curr_state = final_state
 
         # Log state
-        self._log_state(trade_date, final_state)
+        self._log_state(trade_date, final_state, ticker=company_name)
 
         # 获取模型信息
         model_info = ""
@@ -1067,6 +1096,7 @@ class TradingAgentsGraph:
         - "Bull Researcher", "Bear Researcher", "Research Manager"
         - "Trader"
         - "Risky Analyst", "Safe Analyst", "Neutral Analyst", "Risk Judge"
+        - "Risk Round Merge"（并行风险辩论的轮次汇合节点）
         """
         try:
             # 从chunk中提取当前执行的节点信息
@@ -1119,6 +1149,8 @@ class TradingAgentsGraph:
                 'Safe Analyst': "🛡️ 保守风险评估",
                 'Neutral Analyst': "⚖️ 中性风险评估",
                 'Risk Judge': "🎯 风险经理",
+                # 并行风险辩论的轮次汇合节点（不发送进度更新）
+                'Risk Round Merge': None,
             }
 
             # 查找映射的消息
@@ -1162,7 +1194,7 @@ class TradingAgentsGraph:
 
         for node_name, elapsed in node_timings.items():
             # 优先匹配风险管理团队（因为它们也包含'Analyst'）
-            if 'Risky' in node_name or 'Safe' in node_name or 'Neutral' in node_name or 'Risk Judge' in node_name:
+            if 'Risky' in node_name or 'Safe' in node_name or 'Neutral' in node_name or node_name.startswith('Risk '):
                 risk_nodes[node_name] = elapsed
             # 然后匹配分析师团队
             elif 'Analyst' in node_name:
@@ -1332,9 +1364,10 @@ class TradingAgentsGraph:
         logger.info(f"  • 快速思考模型: {self.config.get('quick_think_llm', 'unknown')}")
         logger.info("=" * 80)
 
-    def _log_state(self, trade_date, final_state):
+    def _log_state(self, trade_date, final_state, ticker=None):
         """Log the final state to a JSON file."""
-        self.log_states_dict[str(trade_date)] = {
+        ticker = ticker or final_state["company_of_interest"]
+        state_log = {
             "company_of_interest": final_state["company_of_interest"],
             "trade_date": final_state["trade_date"],
             "market_report": final_state["market_report"],
@@ -1365,31 +1398,40 @@ class TradingAgentsGraph:
         }
 
         # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
+        directory = Path(f"eval_results/{ticker}/TradingAgentsStrategy_logs/")
         directory.mkdir(parents=True, exist_ok=True)
 
-        with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
-            "w",
-        ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+        with self._log_lock:
+            ticker_states = self.log_states_dict.setdefault(ticker, {})
+            ticker_states[str(trade_date)] = state_log
+            with open(
+                f"eval_results/{ticker}/TradingAgentsStrategy_logs/full_states_log.json",
+                "w",
+            ) as f:
+                json.dump(ticker_states, f, indent=4)
 
-    def reflect_and_remember(self, returns_losses):
-        """Reflect on decisions and update memory based on returns."""
+    def reflect_and_remember(self, returns_losses, state=None):
+        """Reflect on decisions and update memory based on returns.
+
+        Args:
+            returns_losses: Position returns
+            state: Final state of the run to reflect on, defaults to the last run of this thread
+        """
+        state = state or self.curr_state
         self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
+            state, returns_losses, self.bull_memory
         )
         self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
+            state, returns_losses, self.bear_memory
         )
         self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
+            state, returns_losses, self.trader_memory
         )
         self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
+            state, returns_losses, self.invest_judge_memory
         )
         self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
+            state, returns_losses, self.risk_manager_memory
         )
 
     def process_signal(self, full_signal, stock_symbol=None):
@@ -0,0 +1,137 @@
+"""
+LLM HTTP 连接池（进程级共享）
+
+每次分析都会新建一个 TradingAgentsGraph 和一组 OpenAI 兼容适配器，
+原先每个适配器各自持有 HTTP 客户端，每次分析都要重新建立 TLS 连接。
+这里按提供商 base_url（scheme + host）在进程内共享连接池：
+
+- 同步客户端：httpx.Client 线程安全，同一 host 的所有适配器/线程共用
+- 异步客户端：httpx 的连接绑定创建它的事件循环，因此异步传输层按事件循环分别建池
+  （LoopLocalAsyncTransport），同一个 AsyncClient 可以安全地在多个事件循环中使用
+- 开启 keep-alive；安装了 h2 时启用 HTTP/2（TA_LLM_HTTP2_ENABLED=false 可关闭）
+- 显式传入 transport 时 httpx 不再读取 HTTP_PROXY/HTTPS_PROXY/NO_PROXY，
+  因此按 host 解析环境变量中的代理并传给传输层，代理配置也作为连接池键的一部分
+
+配置：TA_LLM_HTTP_MAX_CONNECTIONS（默认 100）、TA_LLM_HTTP_MAX_KEEPALIVE（默认 20）、
+TA_LLM_HTTP_KEEPALIVE_EXPIRY（秒，默认 60）
+"""
+
+import asyncio
+import threading
+import urllib.request
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from tradingagents.config.runtime_settings import get_bool, get_float, get_int
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger("agents")
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_sync_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def _pool_key(base_url: str) -> str:
+    parts = urlsplit(base_url or "https://api.openai.com/v1")
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _env_proxy(base_url: str) -> Optional[str]:
+    """按 HTTP_PROXY/HTTPS_PROXY/ALL_PROXY/NO_PROXY 解析访问 base_url 时应使用的代理"""
+    parts = urlsplit(base_url or "https://api.openai.com/v1")
+    proxies = urllib.request.getproxies()
+    proxy = proxies.get(parts.scheme) or proxies.get("all")
+    if not proxy or urllib.request.proxy_bypass(parts.hostname or ""):
+        return None
+    return proxy
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=get_int("TA_LLM_HTTP_MAX_CONNECTIONS", "ta_llm_http_max_connections", 100),
+        max_keepalive_connections=get_int("TA_LLM_HTTP_MAX_KEEPALIVE", "ta_llm_http_max_keepalive", 20),
+        keepalive_expiry=get_float("TA_LLM_HTTP_KEEPALIVE_EXPIRY", "ta_llm_http_keepalive_expiry", 60.0),
+    )
+
+
+def _http2_enabled() -> bool:
+    return HTTP2_AVAILABLE and get_bool("TA_LLM_HTTP2_ENABLED", "ta_llm_http2_enabled", True)
+
+
+class LoopLocalAsyncTransport(httpx.AsyncBaseTransport):
+    """按当前事件循环分别维护连接池的异步传输层"""
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False, proxy: Optional[str] = None):
+        self._limits = limits
+        self._http2 = http2
+        self._proxy = proxy
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(limits=self._limits, http2=self._http2, proxy=self._proxy)
+                self._transports[loop] = transport
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.pop(loop, None)
+        if transport is not None:
+            await transport.aclose()
+
+    def pool_count(self) -> int:
+        return len(self._transports)
+
+
+def get_shared_http_client(base_url: str) -> httpx.Client:
+    """获取 base_url 所在 host 的进程级同步 HTTP 客户端"""
+    proxy = _env_proxy(base_url)
+    key = f"{_pool_key(base_url)}|{proxy or ''}"
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None or client.is_closed:
+            http2 = _http2_enabled()
+            client = httpx.Client(
+                transport=httpx.HTTPTransport(limits=_limits(), http2=http2, proxy=proxy),
+                follow_redirects=True,
+            )
+            _sync_clients[key] = client
+            logger.info(f"🔌 [LLM连接池] 创建同步连接池: {_pool_key(base_url)} (HTTP/2: {http2}, 代理: {proxy or '无'})")
+        return client
+
+
+def get_shared_async_http_client(base_url: str) -> httpx.AsyncClient:
+    """获取 base_url 所在 host 的进程级异步 HTTP 客户端（连接按事件循环隔离）"""
+    proxy = _env_proxy(base_url)
+    key = f"{_pool_key(base_url)}|{proxy or ''}"
+    with _lock:
+        client = _async_clients.get(key)
+        if client is None or client.is_closed:
+            http2 = _http2_enabled()
+            client = httpx.AsyncClient(
+                transport=LoopLocalAsyncTransport(_limits(), http2=http2, proxy=proxy),
+                follow_redirects=True,
+            )
+            _async_clients[key] = client
+            logger.info(f"🔌 [LLM连接池] 创建异步连接池: {_pool_key(base_url)} (HTTP/2: {http2}, 代理: {proxy or '无'})")
+        return client
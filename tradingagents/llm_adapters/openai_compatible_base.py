@@ -5,11 +5,11 @@ OpenAI兼容适配器基类
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from langchain_core.messages import BaseMessage
-from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
@@ -19,6 +19,8 @@ from tradingagents.utils.logging_manager import get_logger, get_logger_manager
 logger = get_logger('agents')
 logger = setup_llm_logging()
 
+from tradingagents.llm_adapters.http_pool import get_shared_async_http_client, get_shared_http_client
+
 # 导入token跟踪器
 try:
     from tradingagents.config.config_manager import token_tracker
@@ -134,6 +136,13 @@ class OpenAICompatibleBase(ChatOpenAI):
                 "openai_api_base": base_url
             })
         
+        # 复用进程级 HTTP 连接池（按提供商 host 共享 keep-alive 连接，避免每次分析重新握手）
+        # 配置了 openai_proxy / OPENAI_PROXY 时由 ChatOpenAI 自行创建带代理的客户端
+        uses_proxy = openai_kwargs.get("openai_proxy") or os.getenv("OPENAI_PROXY")
+        if not uses_proxy and not openai_kwargs.get("http_client") and not openai_kwargs.get("http_async_client"):
+            openai_kwargs["http_client"] = get_shared_http_client(base_url)
+            openai_kwargs["http_async_client"] = get_shared_async_http_client(base_url)
+
         # 初始化父类
         super().__init__(**openai_kwargs)
 
@@ -174,13 +183,66 @@ class OpenAICompatibleBase(ChatOpenAI):
         
         return result
 
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        异步生成聊天响应（在事件循环中直接等待 HTTP 响应，不占用线程），并记录token使用量
+        """
+        start_time = time.time()
+        result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        self._track_token_usage(result, kwargs, start_time)
+        return result
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        异步流式生成，流结束后汇总记录token使用量
+        """
+        start_time = time.time()
+        usage: Dict[str, int] = {}
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            chunk_usage = getattr(chunk.message, "usage_metadata", None)
+            if chunk_usage:
+                for key in ("input_tokens", "output_tokens", "total_tokens"):
+                    usage[key] = usage.get(key, 0) + (chunk_usage.get(key) or 0)
+            yield chunk
+        self._log_token_usage(usage or None, start_time)
+
+    @staticmethod
+    def _extract_usage(result: ChatResult) -> Optional[Dict[str, Any]]:
+        """从 ChatResult 中提取 usage（优先消息上的 usage_metadata，其次 llm_output.token_usage）"""
+        for generation in result.generations or []:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage
+        token_usage = (result.llm_output or {}).get("token_usage") or {}
+        if token_usage:
+            return {
+                "input_tokens": token_usage.get("prompt_tokens"),
+                "output_tokens": token_usage.get("completion_tokens"),
+                "total_tokens": token_usage.get("total_tokens"),
+            }
+        return None
+
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
         """记录token使用量并输出日志"""
+        self._log_token_usage(self._extract_usage(result), start_time)
+
+    def _log_token_usage(self, usage: Optional[Dict[str, Any]], start_time: float):
         if not TOKEN_TRACKING_ENABLED:
             return
         try:
             # 统计token信息
-            usage = getattr(result, "usage_metadata", None)
             total_tokens = usage.get("total_tokens") if usage else None
             prompt_tokens = usage.get("input_tokens") if usage else None
             completion_tokens = usage.get("output_tokens") if usage else None
@@ -355,6 +417,17 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
         # 调用父类的_generate方法
         return super()._generate(truncated_messages, stop, run_manager, **kwargs)
 
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """异步生成聊天响应，包含千帆模型的token截断逻辑"""
+        truncated_messages = self._truncate_messages(messages)
+        return await super()._agenerate(truncated_messages, stop, run_manager, **kwargs)
+
 
 class ChatZhipuOpenAI(OpenAICompatibleBase):
     """智谱AI GLM OpenAI兼容适配器"""
@@ -0,0 +1,216 @@
+"""
+LLM 响应录制/回放缓存
+
+挂在 LangChain 的缓存钩子（BaseChatModel.cache）上，对所有适配器生效
+（OpenAI 兼容适配器、DashScope、Google、Anthropic 等），不改动各适配器的调用逻辑。
+
+缓存键：sha256(模型类与参数 + 绑定的工具/stop 等调用参数 + 规范化后的消息列表)，
+其中 API Key、消息 id、响应元数据等与内容无关的字段不参与计算。
+
+模式（TA_LLM_CACHE_MODE）：
+- passthrough：不使用缓存（默认）
+- record：总是调用模型，并把响应写入缓存（覆盖旧记录）
+- replay：只从缓存读取，未命中时抛出 LLMReplayMissError，不会产生任何模型调用
+- auto：命中则回放，未命中则调用并录制（用于重跑中途失败的分析）
+
+存储：SQLite 文件，默认 {data_cache_dir}/llm_cache/llm_responses.sqlite3，可用 TA_LLM_CACHE_PATH 指定。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger("agents")
+
+CACHE_MODES = ("passthrough", "record", "replay", "auto")
+CACHE_FILENAME = "llm_responses.sqlite3"
+
+# 不影响模型输出的字段：不参与缓存键
+_IGNORED_LLM_KWARGS = {"openai_api_key", "api_key", "anthropic_api_key", "google_api_key", "dashscope_api_key",
+                       "http_client", "http_async_client", "request_timeout", "timeout", "max_retries"}
+_IGNORED_MESSAGE_KWARGS = {"id", "response_metadata", "usage_metadata"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key         TEXT PRIMARY KEY,
+    model       TEXT,
+    response    TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+"""
+
+
+def _load_generations(text: str) -> Any:
+    """反序列化缓存记录（新版 langchain-core 需显式限定可还原的类型）"""
+    try:
+        return loads(text, allowed_objects="core")
+    except TypeError:
+        return loads(text)
+
+
+class LLMReplayMissError(RuntimeError):
+    """回放模式下缓存未命中"""
+
+
+def _normalize_llm_string(llm_string: str) -> Dict[str, Any]:
+    """提取模型类名与生成参数（去掉密钥、客户端、超时等）"""
+    serialized, sep, params = llm_string.partition("---")
+    try:
+        data = json.loads(serialized)
+    except ValueError:
+        # 不可序列化的模型：llm_string 本身就是排好序的调用参数
+        return {"params": llm_string}
+    kwargs = {k: v for k, v in (data.get("kwargs") or {}).items() if k not in _IGNORED_LLM_KWARGS}
+    model_class = (data.get("id") or [data.get("name")])[-1]
+    return {"class": model_class, "kwargs": kwargs, "params": params}
+
+
+def _normalize_messages(prompt: str) -> Any:
+    """去掉消息 id、响应元数据等每次运行都会变化的字段"""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+
+    def clean(node):
+        if isinstance(node, dict):
+            result = {}
+            for key, value in node.items():
+                if key == "kwargs" and isinstance(value, dict):
+                    value = {k: v for k, v in value.items() if k not in _IGNORED_MESSAGE_KWARGS}
+                result[key] = clean(value)
+            return result
+        if isinstance(node, list):
+            return [clean(item) for item in node]
+        return node
+
+    return clean(messages)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """计算规范化的缓存键"""
+    payload = {"llm": _normalize_llm_string(llm_string), "messages": _normalize_messages(prompt)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    """基于 SQLite 的 LLM 响应录制/回放缓存"""
+
+    def __init__(self, db_path: Path, mode: str = "auto"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"未知的LLM缓存模式: {mode}，可选: {', '.join(CACHE_MODES)}")
+        self.mode = mode
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.mode == "passthrough":
+            return None
+        key = cache_key(prompt, llm_string)
+        if self.mode == "record":
+            # 录制模式总是调用模型，由 update 写入/覆盖
+            self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            try:
+                generations = _load_generations(row[0])
+                self.hits += 1
+                logger.info(f"⏪ [LLM缓存] 回放命中: {key[:12]}")
+                return generations
+            except Exception as e:
+                logger.warning(f"⚠️ [LLM缓存] 缓存记录无法解析，忽略: {key[:12]}: {e}")
+
+        self.misses += 1
+        if self.mode == "replay":
+            raise LLMReplayMissError(f"LLM回放缓存未命中: {key[:12]}（模型或提示词与录制时不一致）")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode in ("passthrough", "replay"):
+            return
+        key = cache_key(prompt, llm_string)
+        llm = _normalize_llm_string(llm_string)
+        model = (llm.get("kwargs") or {}).get("model_name") or (llm.get("kwargs") or {}).get("model")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, dumps(list(return_val)), time.time()),
+            )
+            self._conn.commit()
+            self.writes += 1
+        logger.debug(f"⏺️ [LLM缓存] 已录制: {key[:12]} ({model})")
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        return {"mode": self.mode, "entries": entries, "hits": self.hits, "misses": self.misses, "writes": self.writes}
+
+
+_caches: Dict[str, LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_response_cache(config: Optional[dict] = None) -> Optional[LLMResponseCache]:
+    """
+    按配置获取进程级 LLM 响应缓存；passthrough 模式返回 None
+
+    优先级：config["llm_cache_mode"] / config["llm_cache_path"] > TA_LLM_CACHE_MODE / TA_LLM_CACHE_PATH
+    """
+    config = config or {}
+    mode = (config.get("llm_cache_mode") or os.getenv("TA_LLM_CACHE_MODE") or "passthrough").strip().lower()
+    if mode == "passthrough":
+        return None
+
+    db_path = config.get("llm_cache_path") or os.getenv("TA_LLM_CACHE_PATH")
+    if not db_path:
+        cache_dir = config.get("data_cache_dir")
+        if not cache_dir:
+            from tradingagents.default_config import DEFAULT_CONFIG
+            cache_dir = DEFAULT_CONFIG["data_cache_dir"]
+        db_path = os.path.join(cache_dir, "llm_cache", CACHE_FILENAME)
+
+    cache_id = f"{mode}:{db_path}"
+    with _caches_lock:
+        cache = _caches.get(cache_id)
+        if cache is None:
+            cache = LLMResponseCache(Path(db_path), mode=mode)
+            _caches[cache_id] = cache
+            logger.info(f"🎞️ [LLM缓存] 模式: {mode}, 存储: {db_path}")
+        return cache
+
+
+def apply_llm_response_cache(llms: Sequence[Any], config: Optional[dict] = None) -> Optional[LLMResponseCache]:
+    """为一组 LLM 实例挂上录制/回放缓存（passthrough 模式下不做任何修改）"""
+    cache = get_llm_response_cache(config)
+    if cache is None:
+        return None
+    for llm in llms:
+        if llm is not None and hasattr(llm, "cache"):
+            llm.cache = cache
+    return cache
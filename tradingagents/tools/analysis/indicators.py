@@ -246,29 +246,135 @@ def compute_indicator(df: pd.DataFrame, spec: IndicatorSpec) -> pd.DataFrame:
     raise ValueError(f"不支持的指标: {name}")
 
 
-def compute_many(df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
-    if not specs:
-        return df.copy()
-    # 粗略去重（按 name+sorted(params)）
-    def key(s: IndicatorSpec):
-        p = s.params or {}
-        items = tuple(sorted(p.items()))
-        return (s.name.lower(), items)
-
-    unique_specs: List[IndicatorSpec] = []
+def _unique_specs(specs: List[IndicatorSpec]) -> List[IndicatorSpec]:
     seen = set()
+    unique_specs: List[IndicatorSpec] = []
     for s in specs:
-        k = key(s)
+        k = (s.name.lower(), tuple(sorted((s.params or {}).items())))
         if k not in seen:
             seen.add(k)
             unique_specs.append(s)
+    return unique_specs
 
+
+def compute_many(df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
+    if not specs:
+        return df.copy()
     out = df.copy()
-    for s in unique_specs:
+    # 粗略去重（按 name+sorted(params)）
+    for s in _unique_specs(specs):
         out = compute_indicator(out, s)
     return out
 
 
+def _rolling_mean_panel(frame: pd.DataFrame, n: int, min_periods: int = 1) -> pd.DataFrame:
+    """
+    面板滚动均值：用累加和一次算完所有列（DataFrame.rolling 按列逐个计算，全市场时较慢）。
+    与 rolling(window=n, min_periods=min_periods).mean() 一致，窗口内的 NaN 被跳过。
+    """
+    values = frame.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    csum = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    total = csum.copy()
+    count = ccount.copy()
+    if n < len(values):
+        total[n:] -= csum[:-n]
+        count[n:] -= ccount[:-n]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = total / count
+    out[count < max(int(min_periods), 1)] = np.nan
+    return pd.DataFrame(out, index=frame.index, columns=frame.columns)
+
+
+def _kdj_panel(high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame,
+               n: int = 9, m1: int = 3, m2: int = 3) -> Dict[str, pd.DataFrame]:
+    """kdj 的面板版本：按时间递推，每一步对所有股票做向量运算（语义与 kdj 一致）"""
+    lowest_low = low.rolling(window=int(n), min_periods=int(n)).min()
+    highest_high = high.rolling(window=int(n), min_periods=int(n)).max()
+    rsv = ((close - lowest_low) / (highest_high - lowest_low) * 100).to_numpy(dtype=np.float64)
+    rsv[np.isinf(rsv)] = np.nan
+
+    k = np.full_like(rsv, np.nan)
+    d = np.full_like(rsv, np.nan)
+    alpha_k = 1 / float(m1)
+    alpha_d = 1 / float(m2)
+    last_k = np.full(rsv.shape[1], 50.0)
+    last_d = np.full(rsv.shape[1], 50.0)
+    for i in range(rsv.shape[0]):
+        rv = rsv[i]
+        valid = ~np.isnan(rv)
+        curr_k = (1 - alpha_k) * last_k + alpha_k * rv
+        curr_d = (1 - alpha_d) * last_d + alpha_d * curr_k
+        k[i] = np.where(valid, curr_k, np.nan)
+        d[i] = np.where(valid, curr_d, np.nan)
+        # RSV 缺失时不更新递推状态
+        last_k = np.where(valid, curr_k, last_k)
+        last_d = np.where(valid, curr_d, last_d)
+
+    k = pd.DataFrame(k, index=close.index, columns=close.columns)
+    d = pd.DataFrame(d, index=close.index, columns=close.columns)
+    return {"kdj_k": k, "kdj_d": d, "kdj_j": 3 * k - 2 * d}
+
+
+def compute_many_panel(panel: Dict[str, pd.DataFrame], specs: List[IndicatorSpec]) -> Dict[str, pd.DataFrame]:
+    """
+    compute_many 的面板版本：一次计算所有股票的指标
+
+    Args:
+        panel: 字段 -> 宽表（行为K线序号，列为股票代码），至少包含 close，
+               atr/kdj 还需要 high、low。每列应为该股票自己的K线序列（从第0行开始），
+               这样滚动/指数平均的结果与逐只调用 compute_many 完全一致
+        specs: 指标列表，参数与 compute_indicator 相同
+
+    Returns:
+        在 panel 基础上增加指标宽表（ma20、rsi14、dif、kdj_k ...）的新字典
+    """
+    out = dict(panel)
+    for s in _unique_specs(specs):
+        name = s.name.lower()
+        params = s.params or {}
+        close = panel["close"]
+
+        if name == "ma":
+            n = int(params.get("n", params.get("period", 20)))
+            out[f"ma{n}"] = _rolling_mean_panel(close, n)
+        elif name == "ema":
+            n = int(params.get("n", params.get("period", 20)))
+            out[f"ema{n}"] = ema(close, n)
+        elif name == "macd":
+            fast = int(params.get("fast", 12))
+            slow = int(params.get("slow", 26))
+            signal = int(params.get("signal", 9))
+            dif = ema(close, fast) - ema(close, slow)
+            dea = dif.ewm(span=signal, adjust=False).mean()
+            out.update({"dif": dif, "dea": dea, "macd_hist": dif - dea})
+        elif name == "rsi":
+            n = int(params.get("n", params.get("period", 14)))
+            out[f"rsi{n}"] = rsi(close, n)
+        elif name == "boll":
+            n = int(params.get("n", 20))
+            k = float(params.get("k", 2.0))
+            mid = _rolling_mean_panel(close, n)
+            std = close.rolling(window=n, min_periods=1).std()
+            out.update({"boll_mid": mid, "boll_upper": mid + k * std, "boll_lower": mid - k * std})
+        elif name == "atr":
+            n = int(params.get("n", 14))
+            high, low = panel["high"], panel["low"]
+            prev_close = close.shift(1)
+            # fmax 与 DataFrame.max(axis=1) 一样跳过 NaN
+            tr = np.fmax(np.fmax((high - low).abs(), (high - prev_close).abs()), (low - prev_close).abs())
+            out[f"atr{n}"] = _rolling_mean_panel(tr, n, min_periods=n)
+        elif name == "kdj":
+            out.update(_kdj_panel(
+                panel["high"], panel["low"], close,
+                n=int(params.get("n", 9)), m1=int(params.get("m1", 3)), m2=int(params.get("m2", 3))
+            ))
+        else:
+            raise ValueError(f"不支持的指标: {name}")
+    return out
+
+
 def last_values(df: pd.DataFrame, columns: List[str]) -> Dict[str, Any]:
     if df.empty:
         return {c: None for c in columns}
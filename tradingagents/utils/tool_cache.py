@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+工具结果缓存装饰器
+
+同一工具、同一组参数（股票代码、交易日期等）的结果在各 worker 进程间通过 Redis 共享，
+Redis 不可用时退化为进程内缓存。并发的相同调用只执行一次（single-flight）：
+    - 进程内：按缓存键加锁，后到的线程等待先到者的结果
+    - 进程间：Redis SET NX 抢占计算锁，未抢到的进程轮询结果
+
+配置：
+    TA_TOOL_CACHE_ENABLED=true|false   是否启用（默认启用）
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+import weakref
+import functools
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tradingagents.config.runtime_settings import get_bool
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+KEY_PREFIX = "ta:tool_cache"
+
+# 计算锁的过期时间与等待其他进程结果的最长时间（秒）
+LOCK_TTL_SECONDS = 120
+WAIT_TIMEOUT_SECONDS = 120
+WAIT_POLL_SECONDS = 0.2
+
+# 结果中出现这些标记说明数据获取失败，不缓存
+FAILURE_MARKERS = ("获取失败", "执行失败")
+
+# 进程内缓存：key -> (过期时间戳, 结果)，Redis 不可用时使用
+LOCAL_CACHE_MAX_ENTRIES = 1000
+_local_cache: Dict[str, Tuple[float, str]] = {}
+_local_lock = threading.Lock()
+# 按缓存键的 single-flight 锁；弱引用保存，没有线程持有时自动回收，避免随键数量无限增长
+_key_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+
+# 仅当锁仍属于自己时才删除，避免锁过期后误删其他进程新抢到的锁
+RELEASE_LOCK_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+
+def tool_cache_enabled() -> bool:
+    """是否启用工具结果缓存。ENV: TA_TOOL_CACHE_ENABLED（默认启用）"""
+    return get_bool("TA_TOOL_CACHE_ENABLED", None, True)
+
+
+def _get_redis():
+    try:
+        from tradingagents.config.database_manager import get_redis_client
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+def make_tool_cache_key(tool_name: str, args: tuple, kwargs: dict, extra: Optional[Dict[str, Any]] = None) -> str:
+    """由工具名、调用参数和附加键（如分析级别）生成稳定的缓存键"""
+    payload = json.dumps(
+        {"args": list(args), "kwargs": kwargs, "extra": extra or {}},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{tool_name}:{digest}"
+
+
+def is_cacheable_result(result: Any) -> bool:
+    """只缓存非空、非错误的字符串结果"""
+    if not isinstance(result, str) or not result.strip():
+        return False
+    if result.lstrip().startswith("❌"):
+        return False
+    return not any(marker in result for marker in FAILURE_MARKERS)
+
+
+def _local_get(key: str) -> Optional[str]:
+    with _local_lock:
+        item = _local_cache.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.time():
+            _local_cache.pop(key, None)
+            return None
+        return value
+
+
+def _local_set(key: str, value: str, ttl_seconds: int):
+    now = time.time()
+    with _local_lock:
+        if len(_local_cache) >= LOCAL_CACHE_MAX_ENTRIES:
+            for k in [k for k, (expires_at, _) in _local_cache.items() if expires_at < now]:
+                _local_cache.pop(k, None)
+        _local_cache[key] = (now + ttl_seconds, value)
+
+
+def _key_lock(key: str) -> threading.Lock:
+    with _local_lock:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+def _release_redis_lock(redis_client, lock_key: str, token: str):
+    try:
+        redis_client.eval(RELEASE_LOCK_LUA, 1, lock_key, token)
+    except Exception as e:
+        # 释放失败时锁会在 LOCK_TTL_SECONDS 后自动过期
+        logger.debug(f"[工具缓存] 释放计算锁失败: {e}")
+
+
+def _cache_get(redis_client, key: str) -> Optional[str]:
+    if redis_client is not None:
+        try:
+            value = redis_client.get(key)
+            if value is not None:
+                return value.decode("utf-8") if isinstance(value, bytes) else value
+        except Exception as e:
+            logger.debug(f"[工具缓存] Redis读取失败: {e}")
+    return _local_get(key)
+
+
+def _cache_set(redis_client, key: str, value: str, ttl_seconds: int):
+    if redis_client is not None:
+        try:
+            redis_client.setex(key, ttl_seconds, value)
+            return
+        except Exception as e:
+            logger.debug(f"[工具缓存] Redis写入失败: {e}")
+    _local_set(key, value, ttl_seconds)
+
+
+def _wait_for_other_process(redis_client, key: str, lock_key: str) -> Optional[str]:
+    """等待持有计算锁的其他进程写入结果；锁释放或超时后返回（可能为 None）"""
+    deadline = time.time() + WAIT_TIMEOUT_SECONDS
+    while time.time() < deadline:
+        value = _cache_get(redis_client, key)
+        if value is not None:
+            return value
+        try:
+            if not redis_client.exists(lock_key):
+                return _cache_get(redis_client, key)
+        except Exception:
+            return None
+        time.sleep(WAIT_POLL_SECONDS)
+    return None
+
+
+def cache_tool_result(tool_name: Optional[str] = None, ttl_seconds: int = 900,
+                      key_extra: Optional[Callable[[], Dict[str, Any]]] = None):
+    """
+    工具结果缓存装饰器
+
+    Args:
+        tool_name: 工具名称，如果不提供则使用函数名
+        ttl_seconds: 缓存有效期（秒）
+        key_extra: 返回附加缓存键的函数，用于结果还依赖配置的工具（如分析级别）
+    """
+    def decorator(func: Callable) -> Callable:
+        name = tool_name or getattr(func, '__name__', 'unknown_tool')
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tool_cache_enabled():
+                return func(*args, **kwargs)
+
+            key = make_tool_cache_key(name, args, kwargs, key_extra() if key_extra else None)
+            redis_client = _get_redis()
+
+            cached = _cache_get(redis_client, key)
+            if cached is not None:
+                logger.info(f"⚡ [工具缓存] 命中: {name}")
+                return cached
+
+            # 进程内 single-flight：同一键只有一个线程执行
+            with _key_lock(key):
+                cached = _cache_get(redis_client, key)
+                if cached is not None:
+                    logger.info(f"⚡ [工具缓存] 命中（等待并发调用）: {name}")
+                    return cached
+
+                # 进程间 single-flight：抢占 Redis 计算锁
+                lock_key = f"{key}:lock"
+                lock_token = uuid.uuid4().hex
+                owns_lock = True
+                if redis_client is not None:
+                    try:
+                        owns_lock = bool(redis_client.set(lock_key, lock_token, nx=True, ex=LOCK_TTL_SECONDS))
+                    except Exception:
+                        owns_lock = True
+
+                if not owns_lock:
+                    cached = _wait_for_other_process(redis_client, key, lock_key)
+                    if cached is not None:
+                        logger.info(f"⚡ [工具缓存] 命中（等待其他进程）: {name}")
+                        return cached
+
+                try:
+                    result = func(*args, **kwargs)
+                    if is_cacheable_result(result):
+                        _cache_set(redis_client, key, result, ttl_seconds)
+                    return result
+                finally:
+                    if owns_lock and redis_client is not None:
+                        _release_redis_lock(redis_client, lock_key, lock_token)
+
+        return wrapper
+    return decorator